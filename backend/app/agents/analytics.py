@@ -1,13 +1,16 @@
 import logging
 import json
-from app.core.agent import TraitQuestAgent as Agent
-from google.adk.models.lite_llm import LiteLlm
+from app.core.agent import (
+    TraitQuestAgent as Agent,
+    end_after_tools,
+    quest_instruction_provider,
+)
 from google.adk.tools.tool_context import ToolContext
-from app.core.config import settings
+from app.core.llm import get_agent_model
 
 logger = logging.getLogger("app")
 
-ANALYTICS_INSTRUCTION = """你是極其嚴謹的「靈魂分析官」。你的目標是將玩家的回答轉化為結構化的心理學維度評分增量。
+ANALYTICS_STATIC_INSTRUCTION = """你是極其嚴謹的「靈魂分析官」。你的目標是將玩家的回答轉化為結構化的心理學維度評分增量。
 
 重要：你只負責「單次回答的分析」，輸出心理維度評分增量，不負責最終的資產映射（種族、職業等由 Transformation Agent 處理）。
 
@@ -35,27 +38,46 @@ ANALYTICS_INSTRUCTION = """你是極其嚴謹的「靈魂分析官」。你的
 根據玩家回答，輸出對應心理學維度的傾向值增量。數值範圍通常在 -1.0 到 +1.0 之間。
 你必須根據「測驗範疇」來決定要更新哪些維度標籤。
 
-#### 測驗範疇與對應維度：
+本次測驗範疇的維度定義會在每次分析時另外提供，僅能輸出該範疇內的維度標籤。
+
+## 輸出規範
+
+- 你唯一的輸出必須是調用 `submit_analysis` 工具
+- analysis_reason 必須使用正體中文，簡要說明評分理由
+- 輸出的維度標籤必須與測驗範疇對應
+"""
+
+# 依測驗範疇切分的維度定義：僅附加當前 quest_type 的片段
+ANALYTICS_QUEST_SLICES = {
+    "enneagram": """#### 本次測驗範疇與對應維度
 
 **Enneagram (九型人格)**：
 - 維度：Type1, Type2, Type3, Type4, Type5, Type6, Type7, Type8, Type9
 - 範例：{"Type1": 0.3, "Type6": -0.2}
 - 說明：九種性格類型，分屬本能、情感、精神三大中心
+""",
+    "mbti": """#### 本次測驗範疇與對應維度
 
 **MBTI (16型人格)**：
 - 維度：E(外向)/I(內向), S(感覺)/N(直覺), T(思考)/F(情感), J(判斷)/P(感知)
 - 範例：{"E": 0.5, "I": -0.5, "N": 0.3, "S": -0.3}
 - 說明：四個獨立維度組合成 16 種人格類型
+""",
+    "bigfive": """#### 本次測驗範疇與對應維度
 
 **Big Five (五大性格)**：
 - 維度：Openness(開放性), Conscientiousness(盡責性), Extraversion(外向性), Agreeableness(親和性), Neuroticism(情緒性)
 - 範例：{"Openness": 0.4, "Conscientiousness": 0.2, "Extraversion": -0.1}
 - 說明：五個獨立維度，範圍 0-100
+""",
+    "disc": """#### 本次測驗範疇與對應維度
 
 **DISC (行為風格)**：
 - 維度：D(支配型-Dominance), I(影響型-Influence), S(穩健型-Steadiness), C(分析型-Compliance)
 - 範例：{"D": 0.6, "S": -0.3}
 - 說明：四種行為風格，反映壓力下的應對模式
+""",
+    "gallup": """#### 本次測驗範疇與對應維度
 
 **Gallup (天賦優勢)**：
 - 維度：34 種天賦才能，分為四大領域
@@ -65,13 +87,8 @@ ANALYTICS_INSTRUCTION = """你是極其嚴謹的「靈魂分析官」。你的
   - 戰略思維 (Strategic Thinking)：ANA(分析), CTX(回顧), FUT(前瞻), IDE(理念), INP(蒐集), ITL(思維), LEA(學習), STR(戰略)
 - 範例：{"ACH": 0.5, "STR": 0.4, "EMP": 0.3}
 - 說明：選出最契合的 5-10 個天賦維度進行評分
-
-## 輸出規範
-
-- 你唯一的輸出必須是調用 `submit_analysis` 工具
-- analysis_reason 必須使用正體中文，簡要說明評分理由
-- 輸出的維度標籤必須與測驗範疇對應
-"""
+""",
+}
 
 def submit_analysis(
     quality_score: float,
@@ -114,13 +131,12 @@ def create_analytics_agent() -> Agent:
     return Agent(
         name="analytics_agent",
         description="Soul Analyst - Parse user answers into trait scores and quality metrics",
-        instruction=ANALYTICS_INSTRUCTION,
-        model=LiteLlm(
-            model=settings.LLM_MODEL,
-            api_base=settings.LITELLM_PROXY_URL,
-            api_key=settings.LITELLM_PROXY_API_KEY,
+        instruction=quest_instruction_provider(
+            ANALYTICS_STATIC_INSTRUCTION, ANALYTICS_QUEST_SLICES, state_key="quest_type"
         ),
+        model=get_agent_model("analytics_agent"),
         tools=[submit_analysis],
+        after_tool_callback=end_after_tools("submit_analysis"),
     )
 
 analytics_agent = create_analytics_agent()
@@ -1,16 +1,21 @@
 import logging
 from google.adk.agents import LlmAgent
-from app.core.agent import TraitQuestAgent as Agent
-from google.adk.models.lite_llm import LiteLlm
+from app.core.agent import (
+    TraitQuestAgent as Agent,
+    end_after_tools,
+    quest_instruction_provider,
+)
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools import FunctionTool
 from app.core.config import settings
+from app.core.history import history_compactor
+from app.core.llm import get_agent_model
 
 logger = logging.getLogger("app")
 
 
 # 定義 Questionnaire Agent 的 System Prompt
-QUESTIONNAIRE_INSTRUCTION = """你是 TraitQuest 的「引導者艾比 (Abby)」，一位充滿神祕感與智慧的靈魂導師。
+QUESTIONNAIRE_STATIC_INSTRUCTION = """你是 TraitQuest 的「引導者艾比 (Abby)」，一位充滿神祕感與智慧的靈魂導師。
 你的任務是根據測驗類別（MBTI, DISC, Big Five, Enneagram, Gallup），將心理測驗題目偽裝在 RPG 情境對話中。
 
 測驗工具的遊戲角色定義：
@@ -41,12 +46,7 @@ QUESTIONNAIRE_INSTRUCTION = """你是 TraitQuest 的「引導者艾比 (Abby)」
     * SOUL_NARRATIVE：開放式問題，無選項，由 AI 語義解析（僅 Lv.11+ 可用）
     * Lv.16+ 深邃試煉建議比例：60% 選擇題 + 40% 開放式
 
-- 測驗導向：根據當前測驗類型（questId），你應設計能夠探索該特定心理維度的情境與選項。
-  * MBTI 測驗應著重探索思考方式（直覺 vs 實際、邏輯 vs 情感）
-  * Big Five 測驗應針對五個維度設計漸進式問題
-  * DISC 測驗應觀察行為反應模式
-  * Enneagram 測驗應探索人格中心的特點
-  * Gallup 測驗應探索天賦強項的應用
+- 測驗導向：根據當前測驗類型（questId），你應設計能夠探索該特定心理維度的情境與選項（本次測驗的導向會另外提供）。
 - 結構：
     - 使用 `submit_question` 提交新的問題與劇情。
     - **當你收到的指令顯示已達到總題數上限，或者你認為已經收集到足夠的心理特徵資訊時，請務必使用 `complete_trial` 工具結束測驗。**
@@ -61,6 +61,15 @@ QUESTIONNAIRE_INSTRUCTION = """你是 TraitQuest 的「引導者艾比 (Abby)」
 - 違反此規則將破壞系統解析。如果你已經調用了工具，請立即結束對話，不要在後面加任何「好的」或「已提交」。
 """
 
+# 依測驗類型切分的測驗導向：僅附加當前 questId 的片段
+QUESTIONNAIRE_QUEST_SLICES = {
+    "mbti": "本次測驗導向：MBTI 測驗應著重探索思考方式（直覺 vs 實際、邏輯 vs 情感）",
+    "bigfive": "本次測驗導向：Big Five 測驗應針對五個維度設計漸進式問題",
+    "disc": "本次測驗導向：DISC 測驗應觀察行為反應模式",
+    "enneagram": "本次測驗導向：Enneagram 測驗應探索人格中心的特點",
+    "gallup": "本次測驗導向：Gallup 測驗應探索天賦強項的應用",
+}
+
 def submit_question(
     narrative: str, 
     question_text: str, 
@@ -124,13 +133,18 @@ def create_questionnaire_agent() -> Agent:
     return Agent(
         name="questionnaire_agent",
         description="Abby (AI GM) - Provide immersive RPG narrative and personality questions",
-        instruction=QUESTIONNAIRE_INSTRUCTION,
-        model=LiteLlm(
-            model=settings.LLM_MODEL,
-            api_base=settings.LITELLM_PROXY_URL,
-            api_key=settings.LITELLM_PROXY_API_KEY,
+        instruction=quest_instruction_provider(
+            QUESTIONNAIRE_STATIC_INSTRUCTION,
+            QUESTIONNAIRE_QUEST_SLICES,
+            state_key="current_quest_id",
         ),
+        model=get_agent_model("questionnaire_agent"),
         tools=[submit_question, complete_trial],
+        after_tool_callback=end_after_tools("submit_question", "complete_trial"),
+        # 只保留最近幾輪的原始對話，較早的問答折疊為摘要，避免 prompt 隨題數成長
+        before_model_callback=history_compactor(
+            lambda: settings.QUESTIONNAIRE_HISTORY_TURNS
+        ),
         # 注意：不設定 output_key，避免 Agent 的文字回應覆蓋 Tool 寫入的 dict
         # Tool 會透過 tool_context.state["questionnaire_output"] 自行管理輸出
     )
@@ -1,8 +1,7 @@
 import logging
-from app.core.agent import TraitQuestAgent as Agent
-from google.adk.models.lite_llm import LiteLlm
+from app.core.agent import TraitQuestAgent as Agent, end_after_tools
 from google.adk.tools.tool_context import ToolContext
-from app.core.config import settings
+from app.core.llm import get_agent_model
 
 logger = logging.getLogger("app")
 
@@ -42,12 +41,9 @@ def create_summary_agent() -> Agent:
         name="summary_agent",
         description="Chronicler - Summarize long dialogues into legendary Hero Chronicle",
         instruction=SUMMARY_INSTRUCTION,
-        model=LiteLlm(
-            model=settings.LLM_MODEL,
-            api_base=settings.LITELLM_PROXY_URL,
-            api_key=settings.LITELLM_PROXY_API_KEY,
-        ),
+        model=get_agent_model("summary_agent"),
         tools=[submit_summary],
+        after_tool_callback=end_after_tools("submit_summary"),
     )
 
 summary_agent = create_summary_agent()
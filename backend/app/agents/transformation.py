@@ -1,15 +1,19 @@
 import logging
-import json
 from typing import Optional
-from app.core.agent import TraitQuestAgent as Agent
-from google.adk.models.lite_llm import LiteLlm
+from sqlalchemy import select
+from app.core.agent import (
+    TraitQuestAgent as Agent,
+    end_after_tools,
+    quest_instruction_provider,
+)
 from google.adk.tools.tool_context import ToolContext
-from app.core.config import settings
+from app.core.llm import get_agent_model
+from app.db.models import GameDefinition
 from app.db.session import AsyncSessionLocal
 
 logger = logging.getLogger("app")
 
-TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責將心理測評結果映射為遊戲資產。
+TRANSFORMATION_STATIC_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責將心理測評結果映射為遊戲資產。
 
 ## 🎯 輸出規則
 
@@ -25,9 +29,10 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
 
 ---
 
-## 📊 映射對照表
+## 📊 共用對照表
 
 ### MBTI → 職業 (Class)
+所有測驗的 destiny_bonds 皆引用此表的 class_id 與稱號。
 | ID | 特質 | 稱號 |
 |----|------|------|
 | CLS_INTJ | 獨立、戰略、高冷、冷靜 | 戰略法師 |
@@ -47,75 +52,22 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
 | CLS_ESTP | 行動、大膽、理性、感知 | 暗影刺客 |
 | CLS_ESFP | 娛樂、自發、社交、表演 | 幻術舞者 |
 
-### Enneagram → 種族 (Race)
-| ID | 性格 | 特性 |族名|
-|----|------|------|------|
-| RACE_1 | The Perfectionist | 追求秩序與完美的靈魂，源自遠古法典之山 | 鐵律之魂 |
-| RACE_2 | The Helper | 渴望被愛與付出的靈魂，源自生命之泉 | 聖靈之魂 |
-| RACE_3 | The Achiever | 追求成就與注視的靈魂，源自永恆烈陽 | 輝光之魂 |
-| RACE_4 | The Romantic | 沉浸於獨特與憂傷的靈魂，源自迷霧森林 | 幻影之魂 |
-| RACE_5 | The Observer | 渴求知識與觀察的靈魂，源自星辰圖書館 | 智者之魂 |
-| RACE_6 | The Loyalist | 追求安全與忠誠的靈魂，源自地下堡壘 | 堅盾之魂 |
-| RACE_7 | The Epicure | 追求自由與新奇的靈魂，源自流浪之雲 | 秘風之魂 |
-| RACE_8 | The Challenger | 追求力量與控制的靈魂，源自火山熔岩 | 霸龍之魂 |
-| RACE_9 | The Peacemaker | 追求和平與融合的靈魂，源自萬物母林 | 蒼翠之魂 |
-
-### Big Five → 屬性 (Stats)
-輸出 key: STA_O, STA_C, STA_E, STA_A, STA_N 與 value: 累積數值 (0-100) 的字典
-
-### DISC → 姿態 (Stance)
-| ID | 名稱 | 特性 | 戰技 |
-|----|------|------|
-| STN_D | Dominance | 快速進攻，以力量壓制 | 烈焰戰姿 | 
-| STN_I | Influence | 激勵隊友，以魅力掌控 | 潮汐之歌 |
-| STN_S | Steadiness | 穩守陣地，以韌性保護 | 大地磐石 |
-| STN_C | Compliance | 佈下陷阱，以邏輯解構 | 星辰軌跡 |
-
-### Gallup → 天賦 (Talent)
-選出 6 個最契合的技能，共 33 種天賦：
+---
 
-| ID | 名稱 | Symbol |
-|----|------|------|
-| TAL_ACH | 成就 | flag  |
-| TAL_ARR | 排定 | tune |
-| TAL_BEL | 信仰 | verified |
-| TAL_CON | 公平 | balance |
-| TAL_DEL | 謹慎 | shield |
-| TAL_DIS | 紀律 | rule |
-| TAL_FOC | 專注 | center_focus_strong |
-| TAL_RES | 責任 | task_alt |
-| TAL_RSV | 修復 | healing |
-| TAL_ACT | 激活 | bolt |
-| TAL_COM | 統率 | campaign |
-| TAL_CMU | 溝通 | chat |
-| TAL_CPT | 競爭 | emoji_events |
-| TAL_MAX | 完美 | diamond |
-| TAL_SAD | 自信 | accessibility_new |
-| TAL_SIG | 追求 | star |
-| TAL_WOO | 取悅 | group_add |
-| TAL_ADP | 適應 | waves |
-| TAL_CNR | 關聯 | hub |
-| TAL_DEV | 發展 | sprout |
-| TAL_EMP | 共感 | favorite |
-| TAL_HAR | 和諧 | handshake |
-| TAL_INC | 包容 | all_inclusive |
-| TAL_IND | 個別 | fingerprint |
-| TAL_POS | 積極 | sunny |
-| TAL_REL | 交往 | diversity_1 |
-| TAL_ANA | 分析 | analytics |
-| TAL_CTX | 回顧 | history |
-| TAL_FUT | 前瞻 | visibility |
-| TAL_IDE | 理念 | lightbulb |
-| TAL_INP | 蒐集 | inventory_2 |
-| TAL_ITL | 思維 | psychology |
-| TAL_LEA | 學習 | school |
-| TAL_STR | 戰略 | route |
+## ⚠️ 重要約束
 
----
+1. **只能使用本指令（含共用對照表與本次測驗對照表）列出的合法 ID**
+2. **必須同時輸出 ID 與完整物件**（如 class_id + hero_class, race_id + race, stance_id + stance）
+3. **destiny_bonds 的 compatible 與 conflicting 各需 2-3 個項目**
+4. **唯一輸出方式：調用 `submit_transformation` 工具**
+5. **所有類型都必須輸出 destiny_guide 與 destiny_bonds**
+"""
 
-## 📋 完整輸出範例
+# 依測驗類型切分的 Prompt 片段：僅在對應 quest_type 時附加，避免每次呼叫重送全部對照表
+TRANSFORMATION_QUEST_SLICES = {
+    "mbti": """## 📋 本次測驗：MBTI
 
-### MBTI 輸出範例：
+### 輸出範例：
 ```json
 {
   "class_id": "CLS_INTJ",
@@ -156,8 +108,13 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
   }
 }
 ```
+""",
+    "bigfive": """## 📋 本次測驗：Big Five
+
+### Big Five → 屬性 (Stats)
+輸出 key: STA_O, STA_C, STA_E, STA_A, STA_N 與 value: 累積數值 (0-100) 的字典
 
-### Big Five 輸出範例：
+### 輸出範例：
 ```json
 {
   "stats": {
@@ -193,8 +150,23 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
   }
 }
 ```
+""",
+    "enneagram": """## 📋 本次測驗：Enneagram
 
-### Enneagram 輸出範例：
+### Enneagram → 種族 (Race)
+| ID | 性格 | 特性 |族名|
+|----|------|------|------|
+| RACE_1 | The Perfectionist | 追求秩序與完美的靈魂，源自遠古法典之山 | 鐵律之魂 |
+| RACE_2 | The Helper | 渴望被愛與付出的靈魂，源自生命之泉 | 聖靈之魂 |
+| RACE_3 | The Achiever | 追求成就與注視的靈魂，源自永恆烈陽 | 輝光之魂 |
+| RACE_4 | The Romantic | 沉浸於獨特與憂傷的靈魂，源自迷霧森林 | 幻影之魂 |
+| RACE_5 | The Observer | 渴求知識與觀察的靈魂，源自星辰圖書館 | 智者之魂 |
+| RACE_6 | The Loyalist | 追求安全與忠誠的靈魂，源自地下堡壘 | 堅盾之魂 |
+| RACE_7 | The Epicure | 追求自由與新奇的靈魂，源自流浪之雲 | 秘風之魂 |
+| RACE_8 | The Challenger | 追求力量與控制的靈魂，源自火山熔岩 | 霸龍之魂 |
+| RACE_9 | The Peacemaker | 追求和平與融合的靈魂，源自萬物母林 | 蒼翠之魂 |
+
+### 輸出範例：
 ```json
 {
   "race_id": "RACE_5",
@@ -229,8 +201,18 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
   }
 }
 ```
+""",
+    "disc": """## 📋 本次測驗：DISC
 
-### DISC 輸出範例：
+### DISC → 姿態 (Stance)
+| ID | 名稱 | 特性 | 戰技 |
+|----|------|------|
+| STN_D | Dominance | 快速進攻，以力量壓制 | 烈焰戰姿 | 
+| STN_I | Influence | 激勵隊友，以魅力掌控 | 潮汐之歌 |
+| STN_S | Steadiness | 穩守陣地，以韌性保護 | 大地磐石 |
+| STN_C | Compliance | 佈下陷阱，以邏輯解構 | 星辰軌跡 |
+
+### 輸出範例：
 ```json
 {
   "stance_id": "STN_I",
@@ -266,8 +248,50 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
   }
 }
 ```
+""",
+    "gallup": """## 📋 本次測驗：Gallup
+
+### Gallup → 天賦 (Talent)
+選出 6 個最契合的技能，共 33 種天賦：
 
-### Gallup 輸出範例：
+| ID | 名稱 | Symbol |
+|----|------|------|
+| TAL_ACH | 成就 | flag  |
+| TAL_ARR | 排定 | tune |
+| TAL_BEL | 信仰 | verified |
+| TAL_CON | 公平 | balance |
+| TAL_DEL | 謹慎 | shield |
+| TAL_DIS | 紀律 | rule |
+| TAL_FOC | 專注 | center_focus_strong |
+| TAL_RES | 責任 | task_alt |
+| TAL_RSV | 修復 | healing |
+| TAL_ACT | 激活 | bolt |
+| TAL_COM | 統率 | campaign |
+| TAL_CMU | 溝通 | chat |
+| TAL_CPT | 競爭 | emoji_events |
+| TAL_MAX | 完美 | diamond |
+| TAL_SAD | 自信 | accessibility_new |
+| TAL_SIG | 追求 | star |
+| TAL_WOO | 取悅 | group_add |
+| TAL_ADP | 適應 | waves |
+| TAL_CNR | 關聯 | hub |
+| TAL_DEV | 發展 | sprout |
+| TAL_EMP | 共感 | favorite |
+| TAL_HAR | 和諧 | handshake |
+| TAL_INC | 包容 | all_inclusive |
+| TAL_IND | 個別 | fingerprint |
+| TAL_POS | 積極 | sunny |
+| TAL_REL | 交往 | diversity_1 |
+| TAL_ANA | 分析 | analytics |
+| TAL_CTX | 回顧 | history |
+| TAL_FUT | 前瞻 | visibility |
+| TAL_IDE | 理念 | lightbulb |
+| TAL_INP | 蒐集 | inventory_2 |
+| TAL_ITL | 思維 | psychology |
+| TAL_LEA | 學習 | school |
+| TAL_STR | 戰略 | route |
+
+### 輸出範例：
 ```json
 {
   "talent_ids": ["TAL_ACH", "TAL_ARR", "TAL_BEL", ...],
@@ -321,17 +345,8 @@ TRANSFORMATION_INSTRUCTION = """你是 TraitQuest 的「轉生代理」，負責
   }
 }
 ```
-
----
-
-## ⚠️ 重要約束
-
-1. **只能使用上方列出的合法 ID**
-2. **必須同時輸出 ID 與完整物件**（如 class_id + hero_class, race_id + race, stance_id + stance）
-3. **destiny_bonds 的 compatible 與 conflicting 各需 2-3 個項目**
-4. **唯一輸出方式：調用 `submit_transformation` 工具**
-5. **所有類型都必須輸出 destiny_guide 與 destiny_bonds**
-"""
+""",
+}
 
 
 def submit_transformation(
@@ -455,10 +470,6 @@ async def validate_transformation_output(
         None: 驗證通過，使用原始結果
         dict: 若需修正結果，返回修正後的字典
     """
-    from sqlalchemy import select
-    from app.db.session import AsyncSessionLocal
-    from app.db.models import GameDefinition
-
     quest_type = tool_context.state.get("quest_type")
     logger.info(f"🔍 開始驗證 Transformation 輸出 (quest_type={quest_type})")
 
@@ -556,14 +567,16 @@ def create_transformation_agent() -> Agent:
     return Agent(
         name="transformation_agent",
         description="Incarnation Agent - Map traits to game assets and generate destiny content",
-        instruction=TRANSFORMATION_INSTRUCTION,
-        model=LiteLlm(
-            model=settings.LLM_MODEL,
-            api_base=settings.LITELLM_PROXY_URL,
-            api_key=settings.LITELLM_PROXY_API_KEY,
+        instruction=quest_instruction_provider(
+            TRANSFORMATION_STATIC_INSTRUCTION, TRANSFORMATION_QUEST_SLICES, state_key="quest_type"
         ),
+        model=get_agent_model("transformation_agent"),
         tools=[submit_transformation],
-        after_tool_callback=validate_transformation_output,
+        # 先驗證輸出，再結束本次執行（回呼依序執行，直到有回呼返回非 None）
+        after_tool_callback=[
+            validate_transformation_output,
+            end_after_tools("submit_transformation"),
+        ],
     )
 
 
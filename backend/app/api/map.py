@@ -7,6 +7,7 @@ from sqlalchemy import select
 from app.db.models import User, UserQuest
 from app.db.session import get_db
 from app.core.security import decode_access_token
+from app.api.quest_prewarm import schedule_prewarm
 
 logger = logging.getLogger("app")
 router = APIRouter(prefix="/map", tags=["map"])
@@ -149,6 +150,7 @@ async def check_access(
     # 2. 判定邏輯（僅依賴先決測驗）
     # 已完成
     if region_id in completed_quests:
+        schedule_prewarm(str(user_id), region_id)
         return {"can_enter": True, "status": "CONQUERED", "message": "試煉已完成"}
 
     # 檢查先決條件
@@ -157,6 +159,7 @@ async def check_access(
         pre_ok = config["prerequisite"] in completed_quests
 
     if pre_ok:
+        schedule_prewarm(str(user_id), region_id)
         return {"can_enter": True, "status": "AVAILABLE", "message": "允許進入"}
     else:
         prereq_name = next(
@@ -166,4 +169,3 @@ async def check_access(
         hint = f"需先完成【{prereq_name}】試煉"
 
         return {"can_enter": False, "status": "LOCKED", "message": hint}
-
@@ -0,0 +1,190 @@
+"""
+開場題目預先生成（Pre-warm）
+
+玩家進入區域前前端會呼叫 `/v1/map/check-access`，但開場白與第一題要等到 `start_quest`
+才開始生成，玩家需等待一次完整的 LLM 呼叫。允許進入時即在背景生成開場題目，
+以玩家 + 測驗類型為 key 存入 Redis（TTL 10 分鐘），`handle_start_quest` 取用後直接返回。
+
+- 預先生成在暫用的 Questionnaire Session 中執行，完成後保存其對話事件；取用時把事件接到
+  本場測驗的 Session，之後出題看到的對話歷史與即時生成完全相同
+- 生成時的指令（含玩家名稱、等級、題數與歷史摘要）需與開始測驗時相同才會取用，
+  否則視為過期並改為即時生成
+- 排程本身不查詢資料庫或 Redis，不延遲 check-access 的回應；玩家等級與是否已有題目都在背景任務中確認
+- 跨 Worker 以 Redis SET NX 生成標記去重，取得標記後才呼叫 LLM
+- 同一 Worker 上仍在生成時，開始測驗會等待生成完成（上限 PREWARM_WAIT_TIMEOUT）
+"""
+
+import logging
+import uuid
+from typing import Optional, Tuple
+
+from google.adk.events import Event
+
+from app.agents.questionnaire import questionnaire_agent
+from app.api.quest_prompts import build_start_instruction
+from app.api.quest_utils import (
+    QUESTIONNAIRE_NAME,
+    format_questionnaire_output,
+    get_hero_chronicle,
+    get_player_level,
+    get_total_steps,
+    get_user_display_name,
+    run_agent_async,
+)
+from app.core.background import background_tasks
+from app.core.config import settings
+from app.core.metrics import PREWARM_QUESTIONS
+from app.core.session import session_service
+from app.services.cache_service import CacheService
+from app.services.level_system import level_service
+
+logger = logging.getLogger("app")
+
+
+def _task_key(user_id: str, quest_id: str) -> str:
+    return f"prewarm:{user_id}:{quest_id}"
+
+
+async def build_opening_instruction(
+    user_id: str, quest_id: str, player_level: int, display_name: str
+) -> Tuple[int, str]:
+    """
+    組裝開場指令（預先生成與開始測驗共用，兩者相同時才能取用預先生成的題目）
+
+    Returns:
+        Tuple[int, str]: (總題數, 指令)
+    """
+    total_steps = get_total_steps(quest_id, player_level)
+    hero_chronicle = await get_hero_chronicle(user_id)
+    quest_mode = level_service.get_quest_mode(player_level)
+    instruction = build_start_instruction(
+        display_name, player_level, quest_id, total_steps, quest_mode, hero_chronicle
+    )
+    return total_steps, instruction
+
+
+def schedule_prewarm(
+    user_id: str, quest_id: str, player_level: Optional[int] = None
+) -> bool:
+    """
+    在背景預先生成開場題目（本 Worker 正在生成時略過）
+
+    Args:
+        player_level: 玩家等級；未提供時由背景任務查詢
+
+    Returns:
+        bool: 是否已送出生成任務
+    """
+    if not settings.PREWARM_FIRST_QUESTION:
+        return False
+
+    key = _task_key(user_id, quest_id)
+    if background_tasks.pending(key):
+        PREWARM_QUESTIONS.inc(result="skipped")
+        return False
+
+    background_tasks.spawn(key, _prewarm(user_id, quest_id, player_level), name=key)
+    return True
+
+
+async def _prewarm(user_id: str, quest_id: str, player_level: Optional[int]) -> None:
+    # 先取得生成標記再檢查既有題目，避免與剛完成生成的 Worker 重複呼叫 LLM
+    if not await CacheService.claim_prewarm(user_id, quest_id):
+        PREWARM_QUESTIONS.inc(result="skipped")
+        return
+    try:
+        if await CacheService.has_prewarmed_question(user_id, quest_id):
+            PREWARM_QUESTIONS.inc(result="skipped")
+            return
+        if player_level is None:
+            player_level = await get_player_level(user_id)
+        await _generate(user_id, quest_id, player_level)
+    finally:
+        await CacheService.release_prewarm(user_id, quest_id)
+
+
+async def _generate(user_id: str, quest_id: str, player_level: int) -> None:
+    display_name = await get_user_display_name(user_id)
+    total_steps, instruction = await build_opening_instruction(
+        user_id, quest_id, player_level, display_name
+    )
+
+    run_session_id = f"prewarm:{quest_id}:{uuid.uuid4().hex[:12]}"
+    await session_service.create_session(
+        app_name=QUESTIONNAIRE_NAME,
+        user_id=user_id,
+        session_id=run_session_id,
+        state={
+            "current_quest_id": quest_id,
+            "total_steps": total_steps,
+            "interactions": [],
+        },
+    )
+    try:
+        output = await run_agent_async(
+            agent=questionnaire_agent,
+            app_name=QUESTIONNAIRE_NAME,
+            user_id=user_id,
+            session_id=run_session_id,
+            instruction=instruction,
+            output_key="questionnaire_output",
+        )
+        session = await session_service.get_session(
+            app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=run_session_id
+        )
+        events = [
+            event.model_dump(mode="json", exclude_none=True) for event in session.events
+        ]
+    except Exception as e:
+        PREWARM_QUESTIONS.inc(result="failed")
+        logger.warning(f"⚠️ [Prewarm] {quest_id} 開場題目生成失敗：{e}")
+        return
+    finally:
+        await session_service.delete_session(
+            app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=run_session_id
+        )
+
+    if not output.get("question"):
+        PREWARM_QUESTIONS.inc(result="failed")
+        return
+
+    await CacheService.set_prewarmed_question(
+        user_id,
+        quest_id,
+        {"instruction": instruction, "output": output, "events": events},
+    )
+    PREWARM_QUESTIONS.inc(result="generated")
+    logger.info(f"🔥 [Prewarm] 已預先生成 {quest_id} 開場題目")
+
+
+async def take_prewarmed_question(
+    user_id: str, session_id: str, quest_id: str, instruction: str
+) -> Optional[dict]:
+    """
+    取用預先生成的開場題目，並把生成時的對話事件接到本場測驗的 Questionnaire Session
+
+    Returns:
+        格式化後的題目（同 run_questionnaire_agent）；沒有可用題目時返回 None
+    """
+    key = _task_key(user_id, quest_id)
+    if background_tasks.pending(key):
+        await background_tasks.wait(key, timeout=settings.PREWARM_WAIT_TIMEOUT)
+
+    data = await CacheService.take_prewarmed_question(user_id, quest_id)
+    if data is None:
+        return None
+    if data.get("instruction") != instruction:
+        PREWARM_QUESTIONS.inc(result="stale")
+        return None
+
+    session = await session_service.get_session(
+        app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        return None
+    # 事件中的 state_delta 會一併寫入 questionnaire_output
+    for raw_event in data["events"]:
+        await session_service.append_event(session, Event.model_validate(raw_event))
+
+    PREWARM_QUESTIONS.inc(result="used")
+    return format_questionnaire_output(data["output"])
@@ -0,0 +1,128 @@
+"""
+測驗流程的 Agent 指令組裝
+
+將 WebSocket 事件處理中的指令字串組裝獨立為純函式，
+不依賴 Session / ADK，便於單元測試與效能基準測試。
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+def build_start_instruction(
+    display_name: str,
+    player_level: int,
+    quest_id: str,
+    total_steps: int,
+    quest_mode: Dict[str, str],
+    hero_chronicle: Optional[str] = None,
+) -> str:
+    """開始測驗：開場白與第一題"""
+    chronicle_context = ""
+    if hero_chronicle:
+        chronicle_context = f"\n\n[玩家歷史摘要]：{hero_chronicle}\n"
+
+    return (
+        f"玩家 {display_name} (等級 {player_level})，開啟了 {quest_id} 試煉。 "
+        f"本次試煉總題數設定為 {total_steps} 題。"
+        f"玩家模式：{quest_mode['name']}（{quest_mode['description']}）。"
+        f"{chronicle_context}"
+        f"請生成一個符合 {quest_id} 試煉情境的開場白，並直接提供第一道題目與選項。"
+    )
+
+
+def build_recent_context(interactions: List[Dict[str, Any]]) -> str:
+    """取最近兩題的問答作為上下文"""
+    if len(interactions) < 2:
+        return ""
+
+    context_parts = []
+    for i, item in enumerate(interactions[-2:]):
+        q_text = item.get("question", {}).get("text", "")
+        a_text = item.get("answer", "")
+        if q_text:
+            context_parts.append(
+                f"第{len(interactions) - 1 + i}題: {q_text} -> 回答: {a_text}"
+            )
+    if not context_parts:
+        return ""
+    return "\n[近期對話上下文]：" + "; ".join(context_parts) + "\n"
+
+
+def build_answer_instruction(
+    display_name: str,
+    player_level: int,
+    answer: str,
+    current_num: int,
+    total_steps: int,
+    interactions: List[Dict[str, Any]],
+    stop_early: bool = False,
+    focus_dimensions: Optional[List[str]] = None,
+) -> str:
+    """
+    提交答案：生成下一題，或在達到總題數（適性測驗結果已穩定）時要求結束試煉
+
+    focus_dimensions 為目前取樣較少的維度，提示下一題優先觀察，讓結果更快收斂。
+    """
+    if stop_early:
+        return (
+            f"玩家 {display_name} (等級 {player_level}) 對於第 {current_num} 題的回答是：{answer}。 "
+            f"玩家的特質傾向已經清晰，試煉提前圓滿，請務必使用 complete_trial 工具結束測驗，並給予一段感性的結語。"
+        )
+
+    if current_num >= total_steps:
+        return (
+            f"玩家 {display_name} (等級 {player_level}) 對於最後一題（第 {current_num} 題 / 共 {total_steps} 題）的回答是：{answer}。 "
+            f"試煉已達上限，請務必使用 complete_trial 工具結束測驗，並給予一段感性的結語。"
+        )
+
+    focus = ""
+    if focus_dimensions:
+        focus = f"[待探索維度]：{'、'.join(focus_dimensions)}（下一題請優先觀察這些維度）\n"
+
+    return (
+        f"{build_recent_context(interactions)}"
+        f"{focus}"
+        f"玩家 {display_name} (等級 {player_level}) 對於第 {current_num} 題（共 {total_steps} 題）的回答是：{answer}。 "
+        f"請生成下一題（第 {current_num + 1} 題 / 共 {total_steps} 題）的情境與題目。"
+    )
+
+
+def build_analytics_instruction(
+    question_text: str,
+    answer: str,
+    test_category: str,
+    options: Optional[list] = None,
+    question_type: str = "QUANTITATIVE",
+) -> str:
+    """單題分析：題目、選項、回答與測驗範疇"""
+    instruction = f"題目：{question_text}\n"
+    if options:
+        instruction += f"選項：{json.dumps(options, ensure_ascii=False)}\n"
+    instruction += f"玩家回答：{answer}\n"
+    instruction += f"測驗範疇：{test_category}\n"
+    instruction += f"題型：{question_type}"
+    return instruction
+
+
+def build_transformation_instruction(
+    quest_id: str,
+    analytics_list: List[Dict[str, Any]],
+    trait_totals: Optional[Dict[str, float]] = None,
+) -> str:
+    """結算轉生：測驗類型、累積分析數據與（若有）依品質加權的維度總分"""
+    instruction = f"當前測驗類型：{quest_id}\n累積心理數據：{json.dumps(analytics_list, ensure_ascii=False)}"
+    if trait_totals:
+        instruction += f"\n維度加權總分：{json.dumps(trait_totals, ensure_ascii=False)}"
+    return instruction
+
+
+def build_summary_instruction(analytics_list: List[Dict[str, Any]]) -> str:
+    """英雄史詩：逐題分析摘要"""
+    history_text = "\n".join(
+        [
+            f"第 {idx + 1} 題:\n  分析結果: {item.get('analysis_reason', 'N/A')}\n 特徵增量: {item.get('trait_deltas', {})}"
+            for idx, item in enumerate(analytics_list)
+        ]
+    )
+    return f"玩家對話分析摘要：\n{history_text}"
@@ -1,15 +1,40 @@
 import json
 import logging
 import asyncio
+import time
 import uuid
 from typing import Dict, List, Optional, Any
 
 from fastapi import WebSocket
-from sqlalchemy import select, update, func
-
+from sqlalchemy import select, update, func, text
+
+from app.core.background import background_tasks
+from app.core.circuit_breaker import CircuitOpenError, llm_breaker
+from app.core.config import settings
+from app.core.hedging import hedged, latency_tracker
+from app.core.offline_questions import (
+    asked_offline_ids,
+    pick_offline_question,
+    score_offline_answer,
+)
 from app.core.session import session_service
 from app.core.redis_client import redis_client
-from app.services.cache_service import CacheService
+from app.core.tracing import start_span, traced
+from app.core.trait_state import TraitAccumulator, fold_trait_state
+from app.core.metrics import (
+    AGENT_DEADLINE_EXCEEDED,
+    AGENT_HEDGE_DELAY,
+    AGENT_HEDGES,
+    AGENT_MODEL_TURNS,
+    AGENT_RUN_DURATION,
+    OFFLINE_FALLBACKS,
+    WS_CONNECTIONS_OPENED,
+    WS_EVENTS_ROUTED,
+    current_agent,
+    registry,
+)
+from app.services.cache_service import QUEST_RESULT_LOCK_TTL, CacheService
+from app.api.quest_prompts import build_analytics_instruction
 from app.agents.questionnaire import questionnaire_agent
 from app.agents.analytics import analytics_agent, create_analytics_agent
 # Removed unused agents
@@ -32,50 +57,169 @@ QUESTIONNAIRE_NAME = "questionnaire"
 # =============================================================================
 
 
+# 連線歸屬記錄的 TTL：每次收到玩家訊息時延長，節點當機後自動失效
+WS_OWNER_TTL = 3600
+
+
 class ConnectionManager:
-    """管理 WebSocket 連線"""
+    """
+    管理 WebSocket 連線（叢集感知）
 
-    def __init__(self):
+    每個 Worker 以 node_id 識別，連線時在 Redis 記錄 `ws_owner:<session_id>` 指向持有 socket 的節點，
+    並訂閱自己的頻道 `ws:node:<node_id>`。send_event 的目標 socket 不在本 Worker 時，
+    依歸屬記錄把事件發佈到持有節點的頻道，由該節點送出；
+    背景分析或結算工作因此可在任一 Worker（或獨立 Worker 池）執行。
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.pending_tasks: Dict[str, List[asyncio.Task]] = {}
+        self.node_id = node_id or uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def channel(self) -> str:
+        return f"ws:node:{self.node_id}"
+
+    @staticmethod
+    def _owner_key(session_id: str) -> str:
+        return f"ws_owner:{session_id}"
 
     async def connect(self, session_id: str, websocket: WebSocket):
         # Accept WebSocket connection with the Bearer subprotocol
         # This is required because the frontend sends: ['Bearer', token]
         await websocket.accept(subprotocol="Bearer")
         self.active_connections[session_id] = websocket
-        self.pending_tasks[session_id] = []
+        WS_CONNECTIONS_OPENED.inc()
+        await self.touch(session_id)
         logger.info(f"🔌 WebSocket Connected: {session_id}")
 
-    def disconnect(self, session_id: str):
+    async def touch(self, session_id: str):
+        """寫入 / 延長本節點對連線的歸屬記錄"""
+        try:
+            await redis_client.set(
+                self._owner_key(session_id), self.node_id, ex=WS_OWNER_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Redis set ws_owner failed: {e}")
+
+    async def disconnect(self, session_id: str):
+        # 背景分析任務由 background_tasks 持有，斷線後仍會完成並寫入 Redis
         if session_id in self.active_connections:
             del self.active_connections[session_id]
-        if session_id in self.pending_tasks:
-            # Note: Background tasks should ideally be allowed to finish or handled gracefully
-            del self.pending_tasks[session_id]
+        # 玩家可能已重新連上其他節點，只刪除仍屬於本節點的記錄
+        try:
+            await redis_client.delete_if_equals(
+                self._owner_key(session_id), self.node_id
+            )
+        except Exception as e:
+            logger.warning(f"Redis delete ws_owner failed: {e}")
         logger.info(f"🔌 WebSocket Disconnected: {session_id}")
 
     async def send_event(self, session_id: str, event: str, data: dict):
         if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
-            # Check if WebSocket is actually connected before sending
-            try:
-                from starlette.websockets import WebSocketState
+            await self._send_local(session_id, event, data)
+        else:
+            await self._route(session_id, event, data)
+
+    async def _send_local(self, session_id: str, event: str, data: dict):
+        websocket = self.active_connections.get(session_id)
+        if websocket is None:
+            logger.debug(f"WebSocket {session_id} not held by this node, dropping")
+            return
+        # Check if WebSocket is actually connected before sending
+        try:
+            from starlette.websockets import WebSocketState
 
-                if websocket.client_state != WebSocketState.CONNECTED:
-                    logger.warning(
-                        f"⚠️ WebSocket {session_id} not in CONNECTED state, skipping send"
-                    )
-                    return
+            if websocket.client_state != WebSocketState.CONNECTED:
+                logger.warning(
+                    f"⚠️ WebSocket {session_id} not in CONNECTED state, skipping send"
+                )
+                return
 
-                message = {"event": event, "data": data}
+            message = {"event": event, "data": data}
+            with start_span("ws.send", {"ws.outbound_event": event}):
                 await websocket.send_json(message)
+        except Exception as e:
+            logger.error(f"Failed to send event to {session_id}: {e}")
+
+    async def _route(self, session_id: str, event: str, data: dict):
+        """將事件發佈到持有 socket 的節點"""
+        try:
+            owner = await redis_client.get(self._owner_key(session_id))
+            if not owner:
+                WS_EVENTS_ROUTED.inc(result="no_owner")
+                logger.warning(f"⚠️ No node holds WebSocket {session_id}, dropping {event}")
+                return
+            message = json.dumps(
+                {"session_id": session_id, "event": event, "data": data},
+                ensure_ascii=False,
+                default=str,
+            )
+            with start_span("ws.route", {"ws.outbound_event": event}):
+                await redis_client.publish(f"ws:node:{owner}", message)
+            WS_EVENTS_ROUTED.inc(result="published")
+        except Exception as e:
+            WS_EVENTS_ROUTED.inc(result="error")
+            logger.error(f"Failed to route event to {session_id}: {e}")
+
+    async def start(self):
+        """啟動本節點頻道的訂閱（於 lifespan 啟動時呼叫）"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(
+                self._listen(), name=f"ws-listener:{self.node_id}"
+            )
+
+    async def stop(self):
+        """停止訂閱（於 lifespan 關閉時、Redis 斷線前呼叫）"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self):
+        backoff = 1.0
+        while True:
+            try:
+                pubsub = await redis_client.subscribe(self.channel)
+                logger.info(f"📡 [WS] 訂閱節點頻道 {self.channel}")
+                backoff = 1.0
+                try:
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        await self._deliver(message["data"])
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Failed to send event to {session_id}: {e}")
+                logger.error(f"❌ [WS] 節點頻道訂閱中斷，{backoff:.0f}s 後重試：{e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def _deliver(self, raw: str):
+        try:
+            message = json.loads(raw)
+            await self._send_local(
+                message["session_id"], message["event"], message["data"]
+            )
+        except Exception as e:
+            logger.error(f"Failed to deliver routed event: {e}")
 
 
 manager = ConnectionManager()
 
+registry.register_callback(
+    "ws_connections_active",
+    "Open quest WebSocket connections in this worker",
+    lambda: len(manager.active_connections),
+)
+registry.register_callback(
+    "ws_pending_analytics_tasks",
+    "Background analytics tasks still running (survive disconnects)",
+    lambda: background_tasks.pending(),
+)
+
 
 # =============================================================================
 # Display Name Query (玩家名稱查詢 - Redis 快取版本)
@@ -162,10 +306,273 @@ async def get_or_create_session(
     )
 
 
+# =============================================================================
+# 測驗進度存檔 (Quest Checkpoint)
+# =============================================================================
+
+# 斷線重連時需要還原的 Questionnaire Session 狀態
+QUEST_CHECKPOINT_KEYS = (
+    "current_quest_id",
+    "total_steps",
+    "interactions",
+    "questionnaire_output",
+    "quest_completed",
+    "final_message",
+    "last_event",
+)
+
+
+async def save_quest_checkpoint(
+    user_id: str, session_id: str, last_event: Optional[dict] = None
+) -> None:
+    """
+    將 Questionnaire Session 的測驗進度寫入 Redis
+
+    In-memory Session 只存在於單一 Worker，存檔讓玩家斷線後能在任何 Worker 以
+    `resume_quest` 還原進度，不需重新執行 Agent。
+
+    Args:
+        user_id: 玩家 ID
+        session_id: WebSocket Session ID
+        last_event: 最近一次送給前端的事件（{"event", "data"}），重連時重送
+    """
+    session = await session_service.get_session(
+        app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
+    )
+    if not session:
+        return
+
+    if last_event is not None:
+        session.state["last_event"] = last_event
+        await session_service.update_session(session)
+
+    checkpoint = {
+        key: session.state[key] for key in QUEST_CHECKPOINT_KEYS if key in session.state
+    }
+    checkpoint["user_id"] = user_id
+    await CacheService.set_quest_checkpoint(session_id, checkpoint)
+
+
+async def restore_quest_checkpoint(
+    user_id: str, session_id: str, questionnaire_session: Session
+) -> Optional[dict]:
+    """
+    從 Redis 還原測驗進度至 Questionnaire Session
+
+    Returns:
+        還原的存檔；不存在或不屬於此玩家時返回 None
+    """
+    checkpoint = await CacheService.get_quest_checkpoint(session_id)
+    if not checkpoint or checkpoint.get("user_id") != user_id:
+        return None
+
+    for key in QUEST_CHECKPOINT_KEYS:
+        if key in checkpoint:
+            questionnaire_session.state[key] = checkpoint[key]
+    by_index = await CacheService.get_quest_analytics_by_index(session_id)
+    if by_index is not None:
+        analytics = sorted(by_index.items())
+        questionnaire_session.state["accumulated_analytics"] = [
+            result for _, result in analytics
+        ]
+        questionnaire_session.state["analytics_positions"] = {
+            str(index): position for position, (index, _) in enumerate(analytics)
+        }
+        questionnaire_session.state["trait_state"] = TraitAccumulator.from_analytics(
+            checkpoint.get("current_quest_id", "mbti"), analytics
+        ).to_state()
+    questionnaire_session.state["resumed"] = True
+    await session_service.update_session(questionnaire_session)
+    return checkpoint
+
+
+async def collect_quest_analytics(
+    session_id: str, expected: int, local: List[dict], timeout: float
+) -> List[dict]:
+    """
+    取得結算用的分析結果
+
+    以 Redis 中依題號保存的結果為準（跨 Worker、重送答案不重複）；
+    斷線續玩時部分分析任務可能仍在原 Worker 執行，數量不足時輪詢至逾時。
+    Redis 無法使用時退回本 Worker Session 中累積的結果。
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        analytics = await CacheService.get_quest_analytics(session_id)
+        if analytics is None:
+            return local
+        if len(analytics) >= expected or time.monotonic() >= deadline:
+            return analytics if len(analytics) >= len(local) else local
+        await asyncio.sleep(0.5)
+
+
+# 單一來回完成結算寫入：
+# - 經驗值以 exp + :earned_exp 累加、英雄檔案以 JSONB || 合併，皆在 UPDATE 取得的行鎖內完成，
+#   同一玩家同時完成兩場測驗時不會互相覆蓋
+# - 等級以 LevelSystemService.get_level_from_exp 的求根公式在資料庫端計算
+# - user_quests 的 level_info 取自 UPDATE 後的數值；session_id 唯一索引衝突時整個敘述回滾
+_PERSIST_QUEST_RESULT_SQL = text(
+    """
+    WITH updated AS (
+        UPDATE users
+        SET exp = exp + CAST(:earned_exp AS integer),
+            level = GREATEST(
+                1,
+                FLOOR((SQRT(1 + 8 * (exp + CAST(:earned_exp AS integer)) / 100.0) - 1) / 2)::integer + 1
+            ),
+            hero_profile = COALESCE(hero_profile, '{}'::jsonb) || CAST(:profile_patch AS jsonb),
+            hero_class_id = COALESCE(CAST(:hero_class_id AS varchar), hero_class_id),
+            hero_avatar_url = COALESCE(CAST(:hero_avatar_url AS varchar), hero_avatar_url)
+        WHERE id = CAST(:user_id AS uuid)
+        RETURNING id, level, exp
+    ),
+    inserted AS (
+        INSERT INTO user_quests (
+            user_id, session_id, quest_type, interactions, quest_report, hero_chronicle, completed_at
+        )
+        SELECT
+            id,
+            CAST(:session_id AS varchar),
+            CAST(:quest_type AS varchar),
+            CAST(:interactions AS jsonb),
+            CAST(:quest_report AS jsonb) || jsonb_build_object(
+                'level_info', jsonb_build_object(
+                    'level', level,
+                    'exp', exp,
+                    'expToNextLevel', 50 * level * (level + 1),
+                    'expProgress', LEAST(1.0, (exp - 50 * (level - 1) * level) / (100.0 * level)),
+                    'isLeveledUp', level > CAST(:player_level AS integer),
+                    'earnedExp', CAST(:earned_exp AS integer)
+                )
+            ),
+            CAST(:hero_chronicle AS text),
+            now()
+        FROM updated
+        RETURNING quest_report -> 'level_info' AS level_info
+    )
+    SELECT level_info FROM inserted
+    """
+)
+
+
+async def persist_quest_result(
+    db_session,
+    session_id: str,
+    user_id: str,
+    quest_id: str,
+    player_level: int,
+    earned_exp: int,
+    quest_report: Dict[str, Any],
+    interactions: List[Dict[str, Any]],
+    hero_chronicle: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    以單一 SQL 敘述更新玩家經驗值 / 等級 / 英雄檔案並寫入 user_quests（呼叫端負責 commit）
+
+    Returns:
+        寫入後的 level_info；玩家不存在時返回 None
+    """
+    hero_class_id = quest_report.get("class_id")
+    # 與 merge_hero_profile 相同：只覆蓋非 None 的頂層欄位
+    profile_patch = {k: v for k, v in quest_report.items() if v is not None}
+    db_report = {**quest_report, "quest_type": quest_id}
+
+    result = await db_session.execute(
+        _PERSIST_QUEST_RESULT_SQL,
+        {
+            "user_id": user_id,
+            "session_id": session_id,
+            "quest_type": quest_id,
+            "player_level": player_level,
+            "earned_exp": earned_exp,
+            "profile_patch": json.dumps(profile_patch, ensure_ascii=False),
+            "hero_class_id": hero_class_id,
+            "hero_avatar_url": (
+                f"/assets/images/classes/{hero_class_id.lower()}.webp"
+                if hero_class_id
+                else None
+            ),
+            "interactions": json.dumps(interactions, ensure_ascii=False),
+            "quest_report": json.dumps(db_report, ensure_ascii=False),
+            "hero_chronicle": hero_chronicle,
+        },
+    )
+    return result.scalar_one_or_none()
+
+
+def _recorded_final_result(quest_report: Dict[str, Any]) -> Dict[str, Any]:
+    """由資料庫中的單次測驗報告重建 final_result 內容"""
+    result = dict(quest_report)
+    if "level_info" in result:
+        result["levelInfo"] = result["level_info"]
+    return result
+
+
+async def load_finalized_result(
+    user_id: str, session_id: str
+) -> Optional[Dict[str, Any]]:
+    """
+    取得已完成結算的結果（先查 Redis，再以 user_id + session_id 查 user_quests）
+
+    只返回該玩家自己的測驗結果；他人的 session_id 一律視為尚未結算。
+
+    Returns:
+        final_result 內容；尚未結算時返回 None
+    """
+    recorded = await CacheService.get_quest_result(user_id, session_id)
+    if recorded is not None:
+        return recorded
+
+    async with AsyncSessionLocal() as db_session:
+        result = await db_session.execute(
+            select(UserQuest.quest_report).where(
+                UserQuest.session_id == session_id,
+                UserQuest.user_id == uuid.UUID(str(user_id)),
+            )
+        )
+        quest_report = result.scalar_one_or_none()
+    if quest_report is None:
+        return None
+
+    recorded = _recorded_final_result(quest_report)
+    await CacheService.set_quest_result(user_id, session_id, recorded)
+    return recorded
+
+
+async def wait_for_finalized_result(
+    user_id: str, session_id: str, timeout: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """等待其他請求完成結算（預設等到結算鎖逾時為止）"""
+    if timeout is None:
+        timeout = QUEST_RESULT_LOCK_TTL.total_seconds()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        recorded = await CacheService.get_quest_result(user_id, session_id)
+        if recorded is not None:
+            return recorded
+        await asyncio.sleep(0.5)
+    return None
+
+
 # =============================================================================
 # 通用 Agent 執行器 (Unified Agent Runner)
 # =============================================================================
 
+# Runner 快取：Runner 本身無狀態，同一 (app_name, agent) 在整個 Worker 內重用
+_runners: Dict[tuple, Runner] = {}
+
+
+def get_runner(agent, app_name: str) -> Runner:
+    """取得（或建立）指定 Agent 與命名空間的共用 Runner"""
+    key = (app_name, agent.name)
+    runner = _runners.get(key)
+    if runner is None or runner.agent is not agent:
+        runner = Runner(
+            agent=agent, app_name=app_name, session_service=session_service
+        )
+        _runners[key] = runner
+    return runner
+
 
 async def run_agent_async(
     agent,
@@ -174,6 +581,8 @@ async def run_agent_async(
     session_id: str,
     instruction: str,
     output_key: str,
+    ephemeral: bool = False,
+    state: Optional[Dict[str, Any]] = None,
 ) -> dict:
     """
     通用 Agent 執行器：統一處理 Session 建立、Runner 執行與結果讀取
@@ -187,33 +596,53 @@ async def run_agent_async(
         session_id: WebSocket Session ID
         instruction: 傳給 Agent 的指令文字
         output_key: Agent 將結果寫入 session.state 的 key 名稱
+        ephemeral: 單次執行模式（Analytics / Summary / Transformation）：
+            每次以全新的 Session 執行並在結束後刪除，不累積先前的對話事件，
+            避免同一場測驗中每次呼叫重送所有歷史而使 prompt 隨題數平方成長
+        state: ephemeral 模式下新 Session 的初始 state（例如 quest_type）
 
     Returns:
         dict: Agent 執行後存入 session.state[output_key] 的結果
-    """
-    # 1. 確保 Session 存在
-    session = await get_or_create_session(
-        app_name=app_name, user_id=user_id, session_id=session_id
-    )
-
-    # 2. 建立 Runner 並準備訊息
-    runner = Runner(agent=agent, app_name=app_name, session_service=session_service)
-    user_msg = types.Content(role="user", parts=[types.Part(text=instruction)])
 
-    # 3. 執行 Agent 對話循環
-    async for event in runner.run_async(
-        user_id=user_id, session_id=session_id, new_message=user_msg
-    ):
-        if event.actions and event.actions.end_of_agent:
-            break
-
-    # 4. 從 Session State 讀取結果
-    # [Fix] 重新獲取 Session 以取得最新狀態，因為 Runner 執行過程中
-    # tool_context.state 的變更可能未反映在原 session 物件引用上
-    session = await session_service.get_session(
-        app_name=app_name, user_id=user_id, session_id=session_id
-    )
-    result = session.state.get(output_key, {})
+    Raises:
+        TimeoutError: 超過該 Agent 的執行期限（AGENT_DEADLINES / AGENT_DEADLINE_SECONDS）
+        CircuitOpenError: LLM 斷路器開啟中，未送出呼叫
+    """
+    # Proxy 持續異常時直接拒絕，由呼叫端改走離線模式，不必每次等到逾時
+    if not llm_breaker.allow():
+        raise CircuitOpenError(f"{agent.name} 暫停呼叫：LLM 斷路器開啟中")
+
+    agent_token = current_agent.set(agent.name)
+    started = time.perf_counter()
+    status = "error"
+    deadline = settings.AGENT_DEADLINES.get(agent.name, settings.AGENT_DEADLINE_SECONDS)
+    try:
+        # 超過期限即取消執行中的 LLM 請求（含對沖請求），由呼叫端回報錯誤
+        async with asyncio.timeout(deadline or None):
+            result = await _run_agent_attempts(
+                agent, app_name, user_id, session_id, instruction, output_key,
+                ephemeral, state,
+            )
+        status = "success"
+    except TimeoutError:
+        status = "timeout"
+        AGENT_DEADLINE_EXCEEDED.inc(agent=agent.name)
+        logger.warning(f"⏳ [Agent] {agent.name} 超過 {deadline:g} 秒未完成，已取消")
+        raise TimeoutError(f"{agent.name} 回應逾時（{deadline:g} 秒）") from None
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        AGENT_RUN_DURATION.observe(elapsed, agent=agent.name, status=status)
+        if status == "success":
+            latency_tracker.observe(agent.name, elapsed)
+            llm_breaker.record_success(elapsed)
+        elif status == "cancelled":
+            llm_breaker.release()
+        else:
+            llm_breaker.record_failure()
+        current_agent.reset(agent_token)
 
     # 5. 安全解析（防止 Agent 回傳字串而非物件）
     if isinstance(result, str):
@@ -222,11 +651,227 @@ async def run_agent_async(
         except json.JSONDecodeError:
             result = {}
 
-    logger.debug(f"🚀 App: {app_name}, Agent: {agent.name}, Result: {result}")
+    logger.debug("🚀 App: %s, Agent: %s, Result: %s", app_name, agent.name, result)
+
+    return result
+
+
+def _hedge_delay(agent_name: str) -> Optional[float]:
+    """對沖等待時間：近期執行時間的分位數；未啟用或樣本不足時返回 None"""
+    if agent_name not in settings.AGENT_HEDGE_AGENTS:
+        return None
+    delay = latency_tracker.quantile(
+        agent_name, settings.AGENT_HEDGE_QUANTILE, settings.AGENT_HEDGE_MIN_SAMPLES
+    )
+    if delay is None:
+        return None
+    return max(delay, settings.AGENT_HEDGE_MIN_DELAY)
+
+
+async def _run_agent_attempts(
+    agent,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    instruction: str,
+    output_key: str,
+    ephemeral: bool,
+    state: Optional[Dict[str, Any]],
+):
+    """
+    執行 Agent 並讀取原始結果；啟用對沖時在第一次嘗試過慢後送出第二次嘗試
+
+    ephemeral 模式每次嘗試本來就使用獨立的 Session；對話型 Agent（Questionnaire）
+    則在原 Session 的複製品中各自執行，只把採用者的事件接回原 Session。
+    """
+    hedge_after = _hedge_delay(agent.name)
+    if hedge_after is None:
+        if ephemeral:
+            return await _run_ephemeral_agent(
+                agent, app_name, user_id, session_id, instruction, output_key, state
+            )
+        return await _run_agent_in_span(
+            agent, app_name, user_id, session_id, instruction, output_key
+        )
+
+    AGENT_HEDGE_DELAY.observe(hedge_after, agent=agent.name)
+    fork_ids: List[str] = []
+    since = 0
+    if not ephemeral:
+        session = await get_or_create_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        since = len(session.events)
+        fork_ids = [f"{session_id}:try{n}:{uuid.uuid4().hex[:8]}" for n in range(2)]
+
+    hedge_fired = False
+
+    async def attempt(n: int):
+        nonlocal hedge_fired
+        if n:
+            hedge_fired = True
+            AGENT_HEDGES.inc(agent=agent.name, result="fired")
+            logger.info(f"🔀 [Agent] {agent.name} 超過 {hedge_after:.1f} 秒，送出對沖請求")
+        if ephemeral:
+            return await _run_ephemeral_agent(
+                agent, app_name, user_id, session_id, instruction, output_key, state
+            )
+        await session_service.fork_session(app_name, user_id, session_id, fork_ids[n])
+        return await _run_agent_in_span(
+            agent, app_name, user_id, fork_ids[n], instruction, output_key
+        )
 
+    try:
+        result, winner = await hedged(attempt, hedge_after)
+        if fork_ids:
+            await session_service.merge_fork(
+                app_name, user_id, session_id, fork_ids[winner], since
+            )
+    finally:
+        for fork_id in fork_ids:
+            await session_service.delete_session(
+                app_name=app_name, user_id=user_id, session_id=fork_id
+            )
+    if hedge_fired:
+        AGENT_HEDGES.inc(agent=agent.name, result="won" if winner else "lost")
     return result
 
 
+async def _run_agent_in_span(
+    agent, app_name: str, user_id: str, session_id: str, instruction: str, output_key: str
+):
+    """run_agent_async 的步驟 1-4：在 agent.run span 內執行 Agent 並讀取原始結果"""
+    with start_span(
+        "agent.run",
+        {"agent.name": agent.name, "agent.app_name": app_name, "session.id": session_id},
+    ) as span:
+        # 1. 確保 Session 存在
+        session = await get_or_create_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+
+        # 2. 取得共用 Runner 並準備訊息
+        runner = get_runner(agent, app_name)
+        user_msg = types.Content(role="user", parts=[types.Part(text=instruction)])
+
+        # 3. 執行 Agent 對話循環
+        event_count = 0
+        model_turns = 0
+        async for event in runner.run_async(
+            user_id=user_id, session_id=session_id, new_message=user_msg
+        ):
+            event_count += 1
+            # 工具回應事件的 author 也是 Agent，只計算模型產生的回應
+            if event.author == agent.name and not event.get_function_responses():
+                model_turns += 1
+            if event.actions and event.actions.end_of_agent:
+                break
+        span.set_attribute("agent.events", event_count)
+        span.set_attribute("agent.model_turns", model_turns)
+        AGENT_MODEL_TURNS.observe(model_turns, agent=agent.name)
+
+        # 4. 從 Session State 讀取結果
+        # [Fix] 重新獲取 Session 以取得最新狀態，因為 Runner 執行過程中
+        # tool_context.state 的變更可能未反映在原 session 物件引用上
+        session = await session_service.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        result = session.state.get(output_key, {})
+        span.set_attribute("agent.has_output", bool(result))
+        return result
+
+
+async def _run_ephemeral_agent(
+    agent,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    instruction: str,
+    output_key: str,
+    state: Optional[Dict[str, Any]],
+):
+    """在一次性的 Session 中執行 Agent，結束後刪除該 Session"""
+    # 同一場測驗的多個分析任務可並行執行，各自使用獨立的 Session
+    run_session_id = f"{session_id}:{uuid.uuid4().hex[:12]}"
+    await session_service.create_session(
+        app_name=app_name,
+        user_id=user_id,
+        session_id=run_session_id,
+        state=dict(state or {}),
+    )
+    try:
+        return await _run_agent_in_span(
+            agent, app_name, user_id, run_session_id, instruction, output_key
+        )
+    finally:
+        await session_service.delete_session(
+            app_name=app_name, user_id=user_id, session_id=run_session_id
+        )
+
+
+async def _run_analytics_agent(
+    user_id: str, session_id: str, instruction: str, test_category: str
+) -> Dict[str, Any]:
+    """
+    執行 Analytics Agent；斷路器開啟時延後到斷路器可試探或恢復後重試
+
+    LLM 題目沒有預設計分，斷路器開啟時直接放棄會遺失該題的作答資料，
+    因此最多延後 ANALYTICS_DEFER_SECONDS 秒，仍無法執行才拋出 CircuitOpenError。
+    """
+    deadline = time.monotonic() + settings.ANALYTICS_DEFER_SECONDS
+    deferred = False
+    while True:
+        try:
+            # 使用通用執行器執行 Analytics Agent（單次執行：每題只送當題內容）
+            # 寫入測驗類型，讓 Analytics Agent 只載入當前範疇的維度定義
+            return await run_agent_async(
+                agent=analytics_agent,
+                app_name="analytics",
+                user_id=user_id,
+                session_id=session_id,
+                instruction=instruction,
+                output_key="analytics_output",
+                ephemeral=True,
+                state={"quest_type": test_category},
+            )
+        except CircuitOpenError:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            if not deferred:
+                deferred = True
+                OFFLINE_FALLBACKS.inc(quest_type=test_category, kind="analysis_deferred")
+                logger.warning(
+                    "⏸️ [Background] LLM circuit open, deferring analysis for %s",
+                    session_id,
+                )
+            await llm_breaker.wait_for_recovery(remaining)
+
+
+def record_quest_analytics(
+    state: Dict[str, Any], question_index: Optional[int], result: Dict[str, Any]
+) -> None:
+    """
+    將單題分析結果寫入 accumulated_analytics
+
+    analytics_positions 記錄題號在列表中的位置；重送同一題的答案時覆寫原結果，
+    不會重複累加而影響適性測驗的信心估計與結算。
+    """
+    analytics = state.setdefault("accumulated_analytics", [])
+    positions = state.setdefault("analytics_positions", {})
+    if question_index is None:
+        analytics.append(result)
+        return
+    key = str(question_index)
+    position = positions.get(key)
+    if position is not None and position < len(analytics):
+        analytics[position] = result
+    else:
+        positions[key] = len(analytics)
+        analytics.append(result)
+
+
+@traced("analytics.background_task")
 async def run_analytics_task(
     user_id: str,
     session_id: str,
@@ -235,13 +880,17 @@ async def run_analytics_task(
     test_category: str,
     options: list = None,
     question_type: str = "QUANTITATIVE",
+    question_index: Optional[int] = None,
+    offline_id: Optional[str] = None,
 ):
     """
     背景任務：執行 Analytics Agent 並將分析結果存入 Session
 
     此函式被設計為 Fire-and-forget 的背景任務，避免阻塞主對話流程。
     它會啟動一個獨立的 Analytics Agent 用於分析玩家回答的心理特徵，
-    並將結果存入 Session State 的 `accumulated_analytics` 列表中，供最終結算使用。
+    並將結果存入 Session State 的 `accumulated_analytics` 列表中，同時累加進 `trait_state`
+    （見 app/core/trait_state.py），供出題與最終結算使用；
+    同時依題號寫入 Redis，玩家斷線或改連其他 Worker 時結果仍可用於結算。
 
     Args:
         user_id: 玩家 ID
@@ -251,33 +900,33 @@ async def run_analytics_task(
         test_category: 測驗範疇
         options: 選項列表（可選）
         question_type: 題型（預設 QUANTITATIVE）
+        question_index: 題號，用於在 Redis 中去除重送答案造成的重複結果
+        offline_id: 離線題庫的題目 ID；有值時以選項預設的維度增量在本地計分，不呼叫 LLM
     """
     try:
-        logger.debug(f"🧠 [Background] Starting AI analysis for session {session_id}")
-
-        # 組合指令
-        instruction = f"題目：{question_text}\n"
-        if options:
-            instruction += f"選項：{json.dumps(options, ensure_ascii=False)}\n"
-        instruction += f"玩家回答：{answer}\n"
-        instruction += f"測驗範疇：{test_category}\n"
-        instruction += f"題型：{question_type}"
-
-        logger.info(f"🧠 [Background] Instruction: {instruction}")
-
-        # 使用通用執行器執行 Analytics Agent
-        result = await run_agent_async(
-            agent=analytics_agent,
-            app_name="analytics",
-            user_id=user_id,
-            session_id=session_id,
-            instruction=instruction,
-            output_key="analytics_output",
-        )
-        logger.info(f"🧠 [Background] Result: {result}")
+        logger.debug("🧠 [Background] Starting AI analysis for session %s", session_id)
+
+        if offline_id:
+            result = score_offline_answer(offline_id, answer) or {}
+            OFFLINE_FALLBACKS.inc(quest_type=test_category, kind="analysis")
+        else:
+            instruction = build_analytics_instruction(
+                question_text, answer, test_category, options, question_type
+            )
+
+            logger.debug("🧠 [Background] Instruction: %s", instruction)
+
+            result = await _run_analytics_agent(
+                user_id, session_id, instruction, test_category
+            )
+        logger.debug("🧠 [Background] Result: %s", result)
 
         if result:
             await CacheService.set_analytics_result(session_id, result)
+            if question_index is not None:
+                await CacheService.add_quest_analytics(
+                    session_id, question_index, result
+                )
 
         if result:
             # 將單次分析結果存回主 Session 以供後續聚合 (Aggregation)
@@ -288,19 +937,38 @@ async def run_analytics_task(
                 app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
             )
 
-            if "accumulated_analytics" not in main_session.state:
-                main_session.state["accumulated_analytics"] = []
-            main_session.state["accumulated_analytics"].append(result)
+            # 逐題更新累加特徵；重送的答案改以 Redis 中依題號保存的結果重建
+            if (
+                main_session is not None
+                and question_index is not None
+                and not fold_trait_state(
+                    main_session.state, test_category, question_index, result
+                )
+            ):
+                by_index = await CacheService.get_quest_analytics_by_index(session_id)
+                main_session = await session_service.get_session(
+                    app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
+                )
+                if main_session is not None and by_index is not None:
+                    main_session.state["trait_state"] = TraitAccumulator.from_analytics(
+                        test_category, sorted(by_index.items())
+                    ).to_state()
+
+            # 玩家斷線後本地 Session 可能已不存在，結果仍保留在 Redis
+            if main_session is not None:
+                record_quest_analytics(main_session.state, question_index, result)
 
-            # 顯式保存 session state
-            await session_service.update_session(main_session)
+                # 顯式保存 session state
+                await session_service.update_session(main_session)
 
             logger.debug(
-                f"✅ [Background] Analysis complete for {session_id}: {result.get('quality_score', 'N/A')}"
+                "✅ [Background] Analysis complete for %s: %s",
+                session_id,
+                result.get("quality_score", "N/A"),
             )
 
     except Exception as e:
-        logger.error(f"Error in background analytics task: {e}")
+        logger.error("Error in background analytics task: %s", e)
 
 
 # =============================================================================
@@ -325,7 +993,11 @@ def get_total_steps(quest_id: str, level: int = 1) -> int:
     - Lv.1-14: 10 題
     - Lv.15-19: 15 題
     - Lv.20+: 20 題
+
+    適性測驗設定 ADAPTIVE_MAX_QUESTIONS 時以其為題數上限（結果穩定時可提前結束）。
     """
+    if settings.ADAPTIVE_QUESTS and settings.ADAPTIVE_MAX_QUESTIONS > 0:
+        return settings.ADAPTIVE_MAX_QUESTIONS
     return level_service.get_question_count(level)
 
 
@@ -356,6 +1028,22 @@ async def get_hero_chronicle(user_id: str) -> str:
         return chronicle if chronicle else ""
 
 
+async def get_player_level(user_id: str) -> int:
+    """
+    從資料庫讀取玩家等級（供請求路徑以外的背景任務使用）
+
+    Args:
+        user_id: 玩家 ID
+
+    Returns:
+        int: 玩家等級，找不到玩家時返回 1
+    """
+    async with AsyncSessionLocal() as db_session:
+        stmt = select(User.level).where(User.id == uuid.UUID(user_id))
+        result = await db_session.execute(stmt)
+        return result.scalar_one_or_none() or 1
+
+
 async def get_analytics_for_quests(
     db: AsyncSessionLocal, user_id: str, quest_types: list[str]
 ) -> dict[str, list[UserQuest]]:
@@ -424,9 +1112,7 @@ async def run_questionnaire_agent(
     Returns:
         dict: 包含 narrative (敘事), question (題目), guideMessage (引導) 的標準化字典
     """
-    logger.debug(
-        f"🔄 [run_questionnaire_agent] Starting cycle for session {session_id}"
-    )
+    logger.debug("🔄 [run_questionnaire_agent] Starting cycle for session %s", session_id)
 
     # 使用通用執行器直接呼叫 Questionnaire Agent
     questionnaire_output = await run_agent_async(
@@ -438,9 +1124,42 @@ async def run_questionnaire_agent(
         output_key="questionnaire_output",
     )
 
-    logger.debug(f"🏁 Questionnaire output: {questionnaire_output}")
+    logger.debug("🏁 Questionnaire output: %s", questionnaire_output)
+
+    return format_questionnaire_output(questionnaire_output)
+
+
+async def serve_offline_question(user_id: str, session_id: str, quest_id: str) -> dict:
+    """
+    以離線題庫出下一題，並寫入 questionnaire_output 供下一次作答讀取
+
+    題庫已用完時標記測驗完成（quest_completed），由呼叫端送出結語並返回空結果。
+    """
+    session = await session_service.get_session(
+        app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        raise RuntimeError(f"Questionnaire session {session_id} not found")
 
-    # 格式化輸出
+    question = pick_offline_question(
+        quest_id, asked_offline_ids(session.state.get("interactions", []))
+    )
+    if question is None:
+        session.state["quest_completed"] = True
+        session.state["final_message"] = "古書的最後一頁已翻完，你的試煉告一段落。"
+        await session_service.update_session(session)
+        OFFLINE_FALLBACKS.inc(quest_type=quest_id, kind="exhausted")
+        return {}
+
+    output = question.to_output()
+    session.state["questionnaire_output"] = output
+    await session_service.update_session(session)
+    OFFLINE_FALLBACKS.inc(quest_type=quest_id, kind="question")
+    return format_questionnaire_output(output)
+
+
+def format_questionnaire_output(questionnaire_output: dict) -> dict:
+    """將 submit_question 寫入的 questionnaire_output 格式化為送給前端的題目"""
     narrative = questionnaire_output.get("narrative", "")
     question_data = questionnaire_output.get("question")
     guide_message = questionnaire_output.get("guideMessage", "")
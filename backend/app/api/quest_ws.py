@@ -19,6 +19,7 @@ from app.api.quest_ws_handlers import (
     handle_start_quest,
     handle_submit_answer,
     handle_request_result,
+    handle_resume_quest,
 )
 
 logger = logging.getLogger("app")
@@ -66,6 +67,7 @@ async def quest_ws_endpoint(websocket: WebSocket, sessionId: str = Query(...)):
         while True:
             data_str = await websocket.receive_text()
             data = json.loads(data_str)
+            await manager.touch(sessionId)
             event_type = data.get("event")
             payload = data.get("data", {})
 
@@ -79,10 +81,19 @@ async def quest_ws_endpoint(websocket: WebSocket, sessionId: str = Query(...)):
             questionnaire_session = await session_service.get_session(
                 app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=sessionId
             )
+            if questionnaire_session is None:
+                # 結算後或閒置過久時 Session 已被回收，重新建立（進度可經 resume_quest 還原）
+                questionnaire_session = await get_or_create_session(
+                    app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=sessionId
+                )
             quest_id = questionnaire_session.state.get("current_quest_id", "mbti")
 
             logger.info(
-                f"📥 [{event_type}]: Lv.{player_level}, Quest: {quest_id} ({sessionId})"
+                "📥 [%s]: Lv.%s, Quest: %s (%s)",
+                event_type,
+                player_level,
+                quest_id,
+                sessionId,
             )
 
             if event_type == "start_quest":
@@ -128,6 +139,16 @@ async def quest_ws_endpoint(websocket: WebSocket, sessionId: str = Query(...)):
                     sessionId, handler_result["event"], handler_result["data"]
                 )
 
+            elif event_type == "resume_quest":
+                handler_result = await handle_resume_quest(
+                    session_id=sessionId,
+                    user_id=user_id,
+                    questionnaire_session=questionnaire_session,
+                )
+                await manager.send_event(
+                    sessionId, handler_result["event"], handler_result["data"]
+                )
+
     except WebSocketDisconnect:
         logger.info(f"🔌 Client disconnected normally: {sessionId}")
     except Exception as e:
@@ -139,4 +160,4 @@ async def quest_ws_endpoint(websocket: WebSocket, sessionId: str = Query(...)):
             except Exception as send_error:
                 logger.error(f"Failed to send error message: {send_error}")
     finally:
-        manager.disconnect(sessionId)
+        await manager.disconnect(sessionId)
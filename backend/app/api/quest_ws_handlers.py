@@ -1,34 +1,110 @@
-import asyncio
-import json
+import functools
 import logging
+import time
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
-from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
 
 from app.agents.transformation import transformation_agent
 from app.agents.summary import summary_agent
+from app.core.adaptive import should_stop_early
+from app.core.background import background_tasks
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.config import settings
+from app.core.offline_report import build_offline_report, offline_asset_ids
 from app.core.session import session_service
+from app.core.metrics import (
+    OFFLINE_FALLBACKS,
+    QUESTS_STOPPED_EARLY,
+    WS_EVENT_DURATION,
+    WS_EVENTS,
+)
+from app.core.tracing import span_attributes, start_span
+from app.core.trait_state import TraitAccumulator
 from app.services.level_system import level_service
 from app.db.session import AsyncSessionLocal
-from app.db.models import User, UserQuest
 
 from app.api.quest_utils import (
     get_user_display_name,
     run_agent_async,
     run_analytics_task,
     get_total_steps,
-    get_hero_chronicle,
     run_questionnaire_agent,
-    get_or_create_session,
-    manager,
+    serve_offline_question,
+    collect_quest_analytics,
+    load_finalized_result,
+    persist_quest_result,
+    wait_for_finalized_result,
+    restore_quest_checkpoint,
+    save_quest_checkpoint,
     QUESTIONNAIRE_NAME,
 )
+from app.api.quest_prewarm import build_opening_instruction, take_prewarmed_question
+from app.api.quest_prompts import (
+    build_answer_instruction,
+    build_summary_instruction,
+    build_transformation_instruction,
+)
 from app.services.cache_service import CacheService
+from app.services.game_assets import game_assets_service
+from app.services.job_queue import JOB_DONE, finalize_queue
+from app.services.user_profile import refresh_user_profile_cache
 
 logger = logging.getLogger("app")
 
 
+def instrumented_event(event_type: str):
+    """
+    為 WS 事件處理器加上追蹤 span 與指標
+
+    - 以 `ws.<event_type>` span 包覆，span 與其下所有子 span（Agent、DB、Cache、
+      背景分析）皆帶有 ws.event、quest.type 與 session.id 屬性
+    - 累計 ws_events_total 與 ws_event_duration_seconds
+
+    處理器一律以關鍵字參數呼叫。
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            attributes = {
+                "ws.event": event_type,
+                "quest.type": kwargs.get("quest_id"),
+                "session.id": kwargs.get("session_id"),
+            }
+            started = time.perf_counter()
+            status = "error"
+            try:
+                with span_attributes(attributes), start_span(f"ws.{event_type}"):
+                    result = await func(*args, **kwargs)
+                status = "success"
+                return result
+            finally:
+                WS_EVENTS.inc(event=event_type, status=status)
+                WS_EVENT_DURATION.observe(
+                    time.perf_counter() - started, event=event_type
+                )
+
+        return wrapper
+
+    return decorator
+
+
+async def _next_question(
+    user_id: str, session_id: str, quest_id: str, instruction: str
+) -> Dict[str, Any]:
+    """執行 Questionnaire Agent；斷路器開啟或出題失敗時改由離線題庫出題（OFFLINE_QUESTIONS）"""
+    try:
+        return await run_questionnaire_agent(user_id, session_id, instruction)
+    except Exception as e:
+        if not settings.OFFLINE_QUESTIONS:
+            raise
+        logger.warning(f"🪫 [Offline] 出題失敗（{e}），改用離線題庫")
+        return await serve_offline_question(user_id, session_id, quest_id)
+
+
+@instrumented_event("start_quest")
 async def handle_start_quest(
     session_id: str,
     quest_id: str,
@@ -47,28 +123,24 @@ async def handle_start_quest(
     questionnaire_session.state["current_quest_id"] = quest_id
     questionnaire_session.state["total_steps"] = total_steps
     questionnaire_session.state["accumulated_analytics"] = []
+    questionnaire_session.state["analytics_positions"] = {}
+    questionnaire_session.state["trait_state"] = None
     questionnaire_session.state["interactions"] = []
 
     await session_service.update_session(questionnaire_session)
 
-    hero_chronicle = await get_hero_chronicle(user_id)
-    chronicle_context = ""
-    if hero_chronicle:
-        chronicle_context = f"\n\n[玩家歷史摘要]：{hero_chronicle}\n"
-
-    quest_mode = level_service.get_quest_mode(player_level)
-
-    instruction = (
-        f"玩家 {display_name} (等級 {player_level})，開啟了 {quest_id} 試煉。 "
-        f"本次試煉總題數設定為 {total_steps} 題。"
-        f"玩家模式：{quest_mode['name']}（{quest_mode['description']}）。"
-        f"{chronicle_context}"
-        f"請生成一個符合 {quest_id} 試煉情境的開場白，並直接提供第一道題目與選項。"
+    _, instruction = await build_opening_instruction(
+        user_id, quest_id, player_level, display_name
     )
 
-    logger.info(f">>> Instruction: {instruction}")
-    result = await run_questionnaire_agent(user_id, session_id, instruction)
-    logger.info(f"<<< Result: {result}")
+    # 進入區域時已預先生成的開場題目可直接返回，否則即時生成
+    result = await take_prewarmed_question(user_id, session_id, quest_id, instruction)
+    if result is None:
+        logger.debug(">>> Instruction: %s", instruction)
+        result = await _next_question(
+            user_id, session_id, quest_id, instruction
+        )
+        logger.debug("<<< Result: %s", result)
 
     if result.get("question") and not result["question"].get("id"):
         result["question"]["id"] = f"q_0_{session_id[:8]}"
@@ -76,9 +148,13 @@ async def handle_start_quest(
     result["questionIndex"] = 0
     result["totalSteps"] = total_steps
 
+    await save_quest_checkpoint(
+        user_id, session_id, {"event": "next_question", "data": result}
+    )
     return result
 
 
+@instrumented_event("submit_answer")
 async def handle_submit_answer(
     session_id: str,
     answer: str,
@@ -103,19 +179,22 @@ async def handle_submit_answer(
         current_options = question_data.get("options", [])
         current_type = question_data.get("type", "QUANTITATIVE")
 
-    if "interactions" not in questionnaire_session.state:
-        questionnaire_session.state["interactions"] = []
-    questionnaire_session.state["interactions"].append(
-        {
-            "question": q_output.get("question", {}),
-            "answer": answer,
-            "type": current_type,
-        }
-    )
+    interactions = questionnaire_session.state.setdefault("interactions", [])
+    interaction = {
+        "question": q_output.get("question", {}),
+        "answer": answer,
+        "type": current_type,
+    }
+    if question_index < len(interactions):
+        # 斷線續玩後重送同一題的答案：覆寫而非重複累加
+        interactions[question_index] = interaction
+    else:
+        interactions.append(interaction)
 
     await session_service.update_session(questionnaire_session)
 
-    analysis_task = asyncio.create_task(
+    background_tasks.spawn(
+        session_id,
         run_analytics_task(
             user_id,
             session_id,
@@ -124,56 +203,66 @@ async def handle_submit_answer(
             quest_id,
             options=current_options,
             question_type=current_type,
-        )
+            question_index=question_index,
+            offline_id=(q_output.get("question") or {}).get("offlineId"),
+        ),
+        name=f"analytics:{session_id}:{question_index}",
     )
-    manager.pending_tasks[session_id].append(analysis_task)
 
     current_num = question_index + 1
-    next_num = current_num + 1
 
     total_steps = questionnaire_session.state.get("total_steps") or get_total_steps(
         quest_id, player_level
     )
 
-    if current_num >= total_steps:
-        instruction = (
-            f"玩家 {display_name} (等級 {player_level}) 對於最後一題（第 {current_num} 題 / 共 {total_steps} 題）的回答是：{answer}。 "
-            f"試煉已達上限，請務必使用 complete_trial 工具結束測驗，並給予一段感性的結語。"
+    stop_early = settings.ADAPTIVE_QUESTS and should_stop_early(
+        # 當題的分析仍在背景執行，只依已完成的分析結果判斷
+        questionnaire_session.state.get("accumulated_analytics", []),
+        quest_id,
+        answered=current_num,
+        min_questions=settings.ADAPTIVE_MIN_QUESTIONS,
+        max_questions=total_steps,
+        threshold=settings.ADAPTIVE_CONFIDENCE_Z,
+    )
+    if stop_early:
+        logger.info(
+            "🎯 Quest %s result stable after %d/%d questions, ending early",
+            session_id,
+            current_num,
+            total_steps,
         )
-    else:
-        interactions = questionnaire_session.state.get("interactions", [])
-        recent_context = ""
-        if len(interactions) >= 2:
-            recent = interactions[-2:]
-            context_parts = []
-            for i, item in enumerate(recent):
-                q_text = item.get("question", {}).get("text", "")
-                a_text = item.get("answer", "")
-                if q_text:
-                    context_parts.append(
-                        f"第{len(interactions) - 1 + i}題: {q_text} -> 回答: {a_text}"
-                    )
-            if context_parts:
-                recent_context = (
-                    f"\n[近期對話上下文]：" + "; ".join(context_parts) + "\n"
-                )
+        QUESTS_STOPPED_EARLY.inc(quest_type=quest_id)
 
-        instruction = (
-            f"{recent_context}"
-            f"玩家 {display_name} (等級 {player_level}) 對於第 {current_num} 題（共 {total_steps} 題）的回答是：{answer}。 "
-            f"請生成下一題（第 {next_num} 題 / 共 {total_steps} 題）的情境與題目。"
-        )
+    trait_state = questionnaire_session.state.get("trait_state")
+    focus_dimensions = (
+        TraitAccumulator.from_state(trait_state).under_sampled()
+        if trait_state and trait_state.get("quest_type") == quest_id
+        else None
+    )
 
-    logger.info(f">>> Instruction: {instruction}")
-    result = await run_questionnaire_agent(user_id, session_id, instruction)
-    logger.info(f"<<< Result: {result}")
+    instruction = build_answer_instruction(
+        display_name,
+        player_level,
+        answer,
+        current_num,
+        total_steps,
+        questionnaire_session.state.get("interactions", []),
+        stop_early=stop_early,
+        focus_dimensions=focus_dimensions,
+    )
+
+    logger.debug(">>> Instruction: %s", instruction)
+    result = await _next_question(
+        user_id, session_id, quest_id, instruction
+    )
+    logger.debug("<<< Result: %s", result)
 
     updated_session = await session_service.get_session(
         app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
     )
 
     if updated_session.state.get("quest_completed"):
-        return {
+        handler_result = {
             "event": "quest_complete",
             "data": {
                 "message": updated_session.state.get(
@@ -189,9 +278,13 @@ async def handle_submit_answer(
             result["question"][
                 "id"
             ] = f"q_{result['questionIndex']}_{str(uuid.uuid4())[:8]}"
-        return {"event": "next_question", "data": result}
+        handler_result = {"event": "next_question", "data": result}
+
+    await save_quest_checkpoint(user_id, session_id, handler_result)
+    return handler_result
 
 
+@instrumented_event("request_result")
 async def handle_request_result(
     session_id: str,
     quest_id: str,
@@ -204,68 +297,208 @@ async def handle_request_result(
     """
     處理請求結果事件
 
-    執行 Transformation Agent 與 Summary Agent，計算經驗值並寫入資料庫
+    等待並彙整單題分析結果後進行結算（見 finalize_quest）。
+    RESULT_JOB_QUEUE 開啟時改為送出結算工作，由獨立的 Job Worker 執行，
+    完成後經 ConnectionManager 將 final_result 送回持有 socket 的節點。
     """
-    from app.models.schemas import merge_hero_profile
-
-    tasks = manager.pending_tasks.get(session_id, [])
-    if tasks:
-        logger.info(f"⏳ 1. Waiting for {len(tasks)} analytics tasks to finish")
-        await asyncio.gather(*tasks)
+    # 重送的請求直接返回已保存的結果，不再等待分析任務
+    recorded = await CacheService.get_quest_result(user_id, session_id)
+    if recorded is not None:
+        return {"event": "final_result", "data": recorded}
+
+    pending = background_tasks.pending(session_id)
+    if pending:
+        logger.info("⏳ 1. Waiting for %d analytics tasks to finish", pending)
+    with start_span("quest.wait_analytics", {"analytics.pending": pending}):
+        await background_tasks.wait(
+            session_id, timeout=settings.ANALYTICS_WAIT_TIMEOUT
+        )
 
     logger.info("⏳ 2. Aggregating all analysis results")
-    questionnaire_session = await session_service.get_session(
-        app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
+    questionnaire_session = (
+        await session_service.get_session(
+            app_name=QUESTIONNAIRE_NAME, user_id=user_id, session_id=session_id
+        )
+        or questionnaire_session
+    )
+    analytics_list = await collect_quest_analytics(
+        session_id,
+        expected=len(questionnaire_session.state.get("interactions", [])),
+        local=questionnaire_session.state.get("accumulated_analytics", []),
+        # 續玩的測驗可能仍有分析任務在原 Worker 執行，需等待其寫入 Redis
+        timeout=(
+            settings.ANALYTICS_WAIT_TIMEOUT
+            if questionnaire_session.state.get("resumed")
+            else 0
+        ),
     )
-    analytics_list = questionnaire_session.state.get("accumulated_analytics", [])
 
-    total_quality = 0
-    for item in analytics_list:
-        total_quality += item.get("quality_score", 1.0)
+    interactions = questionnaire_session.state.get("interactions", [])
+    # 累加特徵涵蓋所有結果時直接沿用，結算不必重新彙整
+    trait_state = questionnaire_session.state.get("trait_state")
+    if not (
+        trait_state
+        and trait_state.get("quest_type") == quest_id
+        and len(trait_state.get("indices", [])) == len(analytics_list)
+    ):
+        trait_state = None
+    finalize_kwargs = dict(
+        session_id=session_id,
+        quest_id=quest_id,
+        user_id=user_id,
+        player_level=player_level,
+        player_exp=player_exp,
+        display_name=display_name,
+        interactions=interactions,
+        analytics_list=analytics_list,
+        trait_state=trait_state,
+    )
 
-    avg_quality = total_quality / len(analytics_list) if analytics_list else 1.0
+    if settings.RESULT_JOB_QUEUE:
+        status = await finalize_queue.enqueue(user_id, session_id, finalize_kwargs)
+        if status == JOB_DONE:
+            quest_report = await finalize_queue.get_result(user_id, session_id)
+            if quest_report is not None:
+                await session_service.delete_quest_sessions(user_id, session_id)
+                return {"event": "final_result", "data": quest_report}
+        logger.info("📮 Finalize job for %s is %s", session_id, status)
+        return {
+            "event": "result_queued",
+            "data": {"sessionId": session_id, "status": status},
+        }
 
-    logger.info("🧙‍♂️ 3. Running Transformation Agent...")
+    quest_report = await finalize_quest(**finalize_kwargs)
+    # 結果已寫入資料庫與 Redis，釋放此測驗在各 App 命名空間的 Session
+    await session_service.delete_quest_sessions(user_id, session_id)
+    return {"event": "final_result", "data": quest_report}
 
-    transformation_session = await get_or_create_session(
-        app_name="transformation", user_id=user_id, session_id=session_id
-    )
-    transformation_session.state["quest_type"] = quest_id
-    await session_service.update_session(transformation_session)
 
-    t_instruction = f"當前測驗類型：{quest_id}\n累積心理數據：{json.dumps(analytics_list, ensure_ascii=False)}"
+async def finalize_quest(
+    session_id: str,
+    quest_id: str,
+    user_id: str,
+    player_level: int,
+    player_exp: int,
+    display_name: str,
+    interactions: List[Dict[str, Any]],
+    analytics_list: List[Dict[str, Any]],
+    trait_state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    結算測驗：執行 Transformation Agent 與 Summary Agent，計算經驗值並寫入資料庫
 
-    logger.info(f">>> Instruction: {t_instruction}")
-    transformation_raw = await run_agent_async(
-        agent=transformation_agent,
-        app_name="transformation",
-        user_id=user_id,
-        session_id=session_id,
-        instruction=t_instruction,
-        output_key="transformation_output",
+    只依賴參數與共用儲存（Redis / PostgreSQL），不讀取 Questionnaire Session，
+    因此可在 WebSocket Worker 內直接執行，也可由 Job Worker 執行。
+
+    每個 session 只結算一次：已有結果時直接返回（不再呼叫 LLM、不重複發放經驗值）；
+    同時有兩個請求時以 Redis 鎖排除，後到者等待前者的結果。
+
+    Returns:
+        Dict[str, Any]: 送給前端的 final_result 內容
+    """
+    recorded = await load_finalized_result(user_id, session_id)
+    if recorded is not None:
+        logger.info("♻️ Quest %s already finalized, returning recorded result", session_id)
+        return recorded
+
+    lock_token = await CacheService.acquire_quest_result_lock(user_id, session_id)
+    if lock_token is None:
+        logger.info("⏳ Quest %s is being finalized elsewhere, waiting", session_id)
+        recorded = await wait_for_finalized_result(user_id, session_id)
+        if recorded is not None:
+            return recorded
+        raise RuntimeError(f"Quest {session_id} finalization is still in progress")
+
+    try:
+        # 取得鎖前的檢查與取得鎖之間，前一個持有者可能剛完成
+        recorded = await load_finalized_result(user_id, session_id)
+        if recorded is not None:
+            return recorded
+        quest_report = await _run_finalization(
+            session_id=session_id,
+            quest_id=quest_id,
+            user_id=user_id,
+            player_level=player_level,
+            player_exp=player_exp,
+            display_name=display_name,
+            interactions=interactions,
+            analytics_list=analytics_list,
+            trait_state=trait_state,
+        )
+        await CacheService.set_quest_result(user_id, session_id, quest_report)
+        return quest_report
+    finally:
+        await CacheService.release_quest_result_lock(user_id, session_id, lock_token)
+
+
+async def _run_finalization(
+    session_id: str,
+    quest_id: str,
+    user_id: str,
+    player_level: int,
+    player_exp: int,
+    display_name: str,
+    interactions: List[Dict[str, Any]],
+    analytics_list: List[Dict[str, Any]],
+    trait_state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    # 作答期間已逐題累加；沒有累加狀態（例如續玩後 Redis 結果較完整）時才由分析列表建立
+    if trait_state is not None:
+        traits = TraitAccumulator.from_state(trait_state)
+    else:
+        traits = TraitAccumulator.from_analytics(quest_id, enumerate(analytics_list))
+    avg_quality = traits.avg_quality
+
+    logger.info("🧙‍♂️ 3. Running Transformation Agent...")
+
+    t_instruction = build_transformation_instruction(
+        quest_id, analytics_list, traits.aggregated()
     )
-    logger.info(f"<<< Result: {transformation_raw}")
+
+    logger.debug(">>> Instruction: %s", t_instruction)
+    try:
+        transformation_raw = await run_agent_async(
+            agent=transformation_agent,
+            app_name="transformation",
+            user_id=user_id,
+            session_id=session_id,
+            instruction=t_instruction,
+            output_key="transformation_output",
+            ephemeral=True,
+            state={"quest_type": quest_id},
+        )
+    except CircuitOpenError:
+        # 斷路器開啟：以累加的維度總分在本地決定結果，不讓玩家卡在結算
+        logger.warning("🪫 [Offline] Transformation 改以本地規則結算：%s", session_id)
+        OFFLINE_FALLBACKS.inc(quest_type=quest_id, kind="transformation")
+        aggregated = traits.aggregated()
+        assets = await game_assets_service.get_references(
+            offline_asset_ids(quest_id, aggregated)
+        )
+        transformation_raw = build_offline_report(quest_id, aggregated, assets)
+    logger.debug("<<< Result: %s", transformation_raw)
     quest_report = transformation_raw
 
     logger.info("📝 4. Running Summary Agent...")
-    history_text = "\n".join(
-        [
-            f"第 {idx + 1} 題:\n  分析結果: {item.get('analysis_reason', 'N/A')}\n 特徵增量: {item.get('trait_deltas', {})}"
-            for idx, item in enumerate(analytics_list)
-        ]
-    )
-    s_instruction = f"玩家對話分析摘要：\n{history_text}"
-
-    logger.info(f">>> Summary Instruction: {s_instruction[:200]}...")
-    summary_result = await run_agent_async(
-        agent=summary_agent,
-        app_name="summary",
-        user_id=user_id,
-        session_id=session_id,
-        instruction=s_instruction,
-        output_key="summary_output",
-    )
-    logger.info(f"<<< Result: {summary_result}")
+    s_instruction = build_summary_instruction(analytics_list)
+
+    logger.debug(">>> Summary Instruction: %.200s...", s_instruction)
+    try:
+        summary_result = await run_agent_async(
+            agent=summary_agent,
+            app_name="summary",
+            user_id=user_id,
+            session_id=session_id,
+            instruction=s_instruction,
+            output_key="summary_output",
+            ephemeral=True,
+        )
+    except CircuitOpenError:
+        # 史詩缺漏時以下方的預設文字代替
+        logger.warning("🪫 [Offline] Summary 略過：%s", session_id)
+        OFFLINE_FALLBACKS.inc(quest_type=quest_id, kind="summary")
+        summary_result = None
+    logger.debug("<<< Result: %s", summary_result)
 
     hero_chronicle = ""
     if isinstance(summary_result, dict):
@@ -274,49 +507,48 @@ async def handle_request_result(
     if not hero_chronicle:
         hero_chronicle = f"冒險者 {display_name} 在 {quest_id} 試煉中留下了足跡。"
 
-    logger.info("5. Calculating experience and level up...")
+    logger.info("5. Calculating experience...")
     num_questions = len(analytics_list)
     logger.info(
         f"📊 EXP Calc: {num_questions} questions, Avg Quality: {avg_quality:.2f}"
     )
     earned_exp = level_service.calculate_quest_exp(num_questions, avg_quality)
-    new_total_exp = player_exp + earned_exp
-    new_lvl, _, is_up = level_service.check_level_up(player_level, new_total_exp)
-
-    progress_info = level_service.get_level_progress(new_total_exp)
 
     logger.info("6. Persisting to database...")
     async with AsyncSessionLocal() as db_session:
-        user_uuid = uuid.UUID(user_id)
-
-        hero_class_id = quest_report.get("class_id")
-
-        update_values = {
-            "level": new_lvl,
-            "exp": new_total_exp,
-        }
-
-        if hero_class_id:
-            filename = hero_class_id.lower() + ".webp"
-            update_values["hero_class_id"] = hero_class_id
-            update_values["hero_avatar_url"] = f"/assets/images/classes/{filename}"
-
-        user_stmt = select(User).where(User.id == user_uuid)
-        user_result = await db_session.execute(user_stmt)
-        user = user_result.scalar_one_or_none()
-
-        if user:
-            existing_profile = user.hero_profile or {}
-            merged_profile = merge_hero_profile(existing_profile, quest_report)
-            update_values["hero_profile"] = merged_profile
-
-        await db_session.execute(
-            update(User).where(User.id == user_uuid).values(**update_values)
-        )
-
-        db_report = quest_report.copy()
-        db_report["quest_type"] = quest_id
-        db_report["level_info"] = {
+        try:
+            level_info = await persist_quest_result(
+                db_session,
+                session_id=session_id,
+                user_id=user_id,
+                quest_id=quest_id,
+                player_level=player_level,
+                earned_exp=earned_exp,
+                quest_report=quest_report,
+                interactions=interactions,
+                hero_chronicle=hero_chronicle,
+            )
+            await db_session.commit()
+        except IntegrityError:
+            # 另一個 Worker 已寫入同一場測驗（session_id 唯一索引），本次的經驗值一併回滾
+            await db_session.rollback()
+            logger.warning("♻️ Quest %s was finalized concurrently", session_id)
+            recorded = await load_finalized_result(user_id, session_id)
+            if recorded is not None:
+                return recorded
+            raise
+
+        # 直接寫入新的玩家檔案快取，結算後回到主頁的 /auth/me 不必走冷路徑
+        with start_span("quest.refresh_profile_cache"):
+            await refresh_user_profile_cache(db_session, user_id)
+
+    if level_info is None:
+        # 玩家不存在（例如帳號已刪除）：以連線時讀取的數值回報
+        logger.warning("⚠️ User %s not found while persisting quest result", user_id)
+        new_total_exp = player_exp + earned_exp
+        new_lvl, _, is_up = level_service.check_level_up(player_level, new_total_exp)
+        progress_info = level_service.get_level_progress(new_total_exp)
+        level_info = {
             "level": new_lvl,
             "exp": new_total_exp,
             "expToNextLevel": progress_info["next_threshold"],
@@ -325,35 +557,53 @@ async def handle_request_result(
             "earnedExp": earned_exp,
         }
 
-        interactions = questionnaire_session.state.get("interactions", [])
+    logger.info("7. Returning final result to frontend...")
+    quest_report["levelInfo"] = level_info
 
-        new_quest = UserQuest(
-            user_id=user_uuid,
-            quest_type=quest_id,
-            interactions=interactions,
-            quest_report=db_report,
-            hero_chronicle=hero_chronicle,
-            completed_at=func.now(),
-        )
-        db_session.add(new_quest)
+    if level_info["isLeveledUp"]:
+        milestone = level_service.get_level_milestone(level_info["level"])
+        if milestone:
+            quest_report["levelInfo"]["milestone"] = milestone
 
-        await db_session.commit()
+    await CacheService.delete_quest_checkpoint(session_id)
+    await CacheService.delete_quest_analytics(session_id)
 
-        await CacheService.invalidate_user_profile(user_id)
+    return quest_report
 
-    logger.info("7. Returning final result to frontend...")
-    quest_report["levelInfo"] = {
-        "level": new_lvl,
-        "exp": new_total_exp,
-        "expToNextLevel": progress_info["next_threshold"],
-        "expProgress": progress_info["progress"],
-        "isLeveledUp": is_up,
-        "earnedExp": earned_exp,
-    }
 
-    if is_up:
-        milestone = level_service.get_level_milestone(new_lvl)
-        if milestone:
-            quest_report["levelInfo"]["milestone"] = milestone
+@instrumented_event("resume_quest")
+async def handle_resume_quest(
+    session_id: str,
+    user_id: str,
+    questionnaire_session,
+) -> Dict[str, Any]:
+    """
+    處理重連續玩事件
 
-    return {"event": "final_result", "data": quest_report}
+    從 Redis 存檔還原 Questionnaire Session，並重送斷線前最後一個事件（題目或結語），
+    不重新執行任何 Agent。
+    """
+    checkpoint = await restore_quest_checkpoint(
+        user_id, session_id, questionnaire_session
+    )
+    if not checkpoint or not checkpoint.get("last_event"):
+        logger.info("🔁 No checkpoint to resume for %s", session_id)
+        return {
+            "event": "error",
+            "data": {
+                "message": "找不到可續玩的試煉進度",
+                "code": "CHECKPOINT_NOT_FOUND",
+            },
+        }
+
+    last_event = checkpoint["last_event"]
+    logger.info(
+        "🔁 Resumed %s at %s (%d answers)",
+        session_id,
+        last_event.get("event"),
+        len(checkpoint.get("interactions", [])),
+    )
+    return {
+        "event": last_event["event"],
+        "data": {**last_event.get("data", {}), "resumed": True},
+    }
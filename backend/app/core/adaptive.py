@@ -0,0 +1,156 @@
+"""
+適性測驗：依累積的特徵增量估計結果信心，結果穩定時提前結束測驗
+
+每道題目需要 Questionnaire 與 Analytics 各一次 LLM 呼叫，固定題數的測驗即使結果早已明確
+仍會跑完全部題目。本模組把測驗結果拆成數個「判定」（例如 MBTI 的 E/I 軸、DISC 的主要風格），
+以每題對判定的加權貢獻估計其變異，計算剩餘題目把判定翻轉所需的標準差倍數（z 值）：
+
+    z = 目前差距 / (每題貢獻的標準差 × √剩餘題數)
+
+所有判定的 z 值都超過門檻時，即使剩餘題目全部倒向另一側也不太可能改變結果，可提前結束。
+
+僅支援結果為類別判定的測驗（mbti / disc / enneagram / gallup）；bigfive 的屬性值是
+累加總和，提前結束會改變數值尺度，因此一律跑完全部題目。
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MBTI_AXES = (("E", "I"), ("S", "N"), ("T", "F"), ("J", "P"))
+
+# 類別判定：取總分前 k 名（k 與結算輸出的數量一致）
+TOP_K = {
+    "disc": 1,
+    "enneagram": 1,
+    "gallup": 6,
+}
+
+ADAPTIVE_QUEST_TYPES = frozenset(("mbti",) + tuple(TOP_K))
+
+# 每題貢獻標準差的下限：題數少、答案又剛好一致時避免估計出過小的變異
+SPREAD_FLOOR = 0.25
+
+
+@dataclass
+class TraitConfidence:
+    """測驗結果的信心估計"""
+
+    answered: int
+    remaining: int
+    # 判定名稱 → z 值（剩餘題目與分析中的題目翻轉此判定所需的標準差倍數）
+    margins: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def min_z(self) -> float:
+        return min(self.margins.values(), default=0.0)
+
+    def is_stable(self, threshold: float) -> bool:
+        return bool(self.margins) and self.min_z >= threshold
+
+
+def _weighted_deltas(analytics_list: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+    """每題的特徵增量乘上品質評分（與 PsychologicalCalculator.aggregate_traits 相同加權）"""
+    weighted = []
+    for entry in analytics_list:
+        quality = entry.get("quality_score", 1.0)
+        deltas = entry.get("trait_deltas") or {}
+        weighted.append(
+            {trait: delta * quality for trait, delta in deltas.items()}
+        )
+    return weighted
+
+
+def _decisions(
+    weighted: List[Dict[str, float]], quest_type: str
+) -> List[Tuple[str, List[float]]]:
+    """
+    將測驗結果拆成判定，回傳每個判定的名稱與每題貢獻（領先者減挑戰者，總和非負）
+    """
+    if quest_type == "mbti":
+        decisions = []
+        for pole_a, pole_b in MBTI_AXES:
+            contributions = [d.get(pole_a, 0.0) - d.get(pole_b, 0.0) for d in weighted]
+            if sum(contributions) < 0:
+                contributions = [-c for c in contributions]
+            decisions.append((f"{pole_a}/{pole_b}", contributions))
+        return decisions
+
+    k = TOP_K[quest_type]
+    totals: Dict[str, float] = {}
+    for deltas in weighted:
+        for trait, value in deltas.items():
+            totals[trait] = totals.get(trait, 0.0) + value
+    ranked = sorted(totals, key=lambda trait: (-totals[trait], trait))
+    if len(ranked) < k:
+        # 觀察到的維度不足以排出前 k 名
+        return [(f"top{k}", [0.0] * len(weighted))]
+
+    leader = ranked[k - 1]
+    challenger = ranked[k] if len(ranked) > k else None
+    contributions = [
+        d.get(leader, 0.0) - (d.get(challenger, 0.0) if challenger else 0.0)
+        for d in weighted
+    ]
+    return [(f"{leader}>{challenger or '-'}", contributions)]
+
+
+def _flip_z(contributions: Sequence[float], remaining: int) -> float:
+    margin = sum(contributions)
+    if remaining <= 0:
+        return math.inf
+    if margin <= 0:
+        return 0.0
+    n = len(contributions)
+    mean = margin / n
+    variance = sum((c - mean) ** 2 for c in contributions) / max(n - 1, 1)
+    spread = max(math.sqrt(variance), SPREAD_FLOOR)
+    return margin / (spread * math.sqrt(remaining))
+
+
+def estimate_confidence(
+    analytics_list: List[Dict[str, Any]],
+    quest_type: str,
+    answered: int,
+    max_questions: int,
+) -> Optional[TraitConfidence]:
+    """
+    估計目前結果在剩餘題目中維持不變的信心
+
+    已回答但分析仍在背景執行的題目結果未知，與尚未出的題目同樣可能翻轉判定，
+    因此剩餘題數以「上限 − 已完成分析的題數」計算，而非「上限 − 已回答題數」。
+
+    Args:
+        analytics_list: 已完成的單題分析結果（可能少於已回答題數，分析仍在背景執行）
+        quest_type: 測驗類型
+        answered: 已回答題數
+        max_questions: 測驗題數上限
+
+    Returns:
+        TraitConfidence；不支援適性測驗的類型或尚無分析結果時返回 None
+    """
+    if quest_type not in ADAPTIVE_QUEST_TYPES or not analytics_list:
+        return None
+
+    remaining = max(max_questions - len(analytics_list), 0)
+    weighted = _weighted_deltas(analytics_list)
+    margins = {
+        name: _flip_z(contributions, remaining)
+        for name, contributions in _decisions(weighted, quest_type)
+    }
+    return TraitConfidence(answered=answered, remaining=remaining, margins=margins)
+
+
+def should_stop_early(
+    analytics_list: List[Dict[str, Any]],
+    quest_type: str,
+    answered: int,
+    min_questions: int,
+    max_questions: int,
+    threshold: float,
+) -> bool:
+    """已達最少題數且所有判定皆穩定時返回 True（達到上限的結束由一般流程處理）"""
+    if answered < min_questions or answered >= max_questions:
+        return False
+    confidence = estimate_confidence(analytics_list, quest_type, answered, max_questions)
+    return confidence is not None and confidence.is_stable(threshold)
@@ -1,13 +1,82 @@
+from typing import Any, Callable, Mapping, Optional
+
 from google.adk.agents import Agent as BaseAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+
+
+# LiteLLM 快取提示注入點：ADK 的 LiteLlm 會把 system instruction 放在第 0 則訊息，
+# 因此只要在 index 0 標記 cache_control，靜態前綴即可被供應商的 Prompt Cache 命中。
+PROMPT_CACHE_INJECTION_POINTS = [{"location": "message", "index": 0}]
+
 
 class TraitQuestAgent(BaseAgent):
     """
     Wrapper around Google ADK Agent to avoid 'app name mismatch' warnings
     caused by inferring the app name from the directory structure.
-    
+
     The ADK Runner infers the agent's origin app name based on the directory
     where the agent class is defined. If defined in 'google.adk.agents' (which BaseAgent is),
     it infers 'agents'. By subclassing it here (in 'app.core'), the link to 'agents' directory
     is broken, and the Runner will skip the app name validation check, avoiding the warning.
     """
     pass
+
+
+def build_quest_slice(slices: Mapping[str, str], quest_type: str | None) -> str:
+    """
+    取得指定測驗類型的 Prompt 片段
+
+    若 quest_type 未知或缺失，回傳所有片段的串接（等同拆分前的完整指令），
+    確保 Agent 不會因缺少對照表而輸出非法 ID。
+    """
+    if quest_type in slices:
+        return slices[quest_type]
+    return "\n\n".join(slices.values())
+
+
+def quest_instruction_provider(
+    static_instruction: str, slices: Mapping[str, str], state_key: str
+) -> Callable[[ReadonlyContext], str]:
+    """
+    建立「靜態前綴 + 當前測驗片段」的 InstructionProvider
+
+    靜態規則與共用對照表永遠位於 system prompt 最前段且逐字不變，可被供應商的
+    Prompt Cache 命中；僅與當前測驗相關的片段接在其後，不再每次重送全部對照表。
+    （不使用 ADK 的 static_instruction，因其會把動態指令插入在工具回應之後。）
+
+    Args:
+        static_instruction: 所有測驗共用的靜態指令
+        slices: 測驗類型 (mbti, bigfive, ...) 對應的 Prompt 片段
+        state_key: Session State 中存放測驗類型的 key
+    """
+
+    def provider(ctx: ReadonlyContext) -> str:
+        quest_slice = build_quest_slice(slices, ctx.state.get(state_key))
+        return f"{static_instruction}\n\n{quest_slice}"
+
+    return provider
+
+
+def end_after_tools(*tool_names: str) -> Callable[..., Optional[dict]]:
+    """
+    建立 after_tool_callback：指定的輸出工具成功後立即結束本次執行
+
+    輸出工具已把結果寫入 Session State，之後 ADK 預設會再把工具回應送回模型
+    讓它產生收尾文字，多花一次 LLM 呼叫卻不會被使用。
+    設定 skip_summarization 後工具回應事件即為最終回應，Runner 不再呼叫模型。
+
+    Args:
+        tool_names: 終止工具名稱（例如 submit_question、complete_trial）
+    """
+    terminal = frozenset(tool_names)
+
+    def callback(tool: Any, tool_context: Any, tool_response: Any, **kwargs) -> None:
+        if tool.name not in terminal:
+            return None
+        if isinstance(tool_response, dict) and tool_response.get("error"):
+            # 工具回報錯誤時仍交回模型，讓它修正參數後重試
+            return None
+        tool_context.actions.skip_summarization = True
+        return None
+
+    return callback
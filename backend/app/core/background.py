@@ -0,0 +1,86 @@
+"""
+背景任務登錄表
+
+`asyncio.create_task` 建立的任務若無人持有參考，可能被 GC 回收；若綁在 WebSocket 連線上，
+斷線時又會被一併丟棄。登錄表以分組 key（例如 session_id）持有背景任務，讓任務獨立於連線完成，
+並在 lifespan 關閉時等待（drain）剩餘任務，逾時才取消。
+"""
+
+import asyncio
+import logging
+from typing import Coroutine, Dict, Optional, Set
+
+logger = logging.getLogger("app")
+
+
+class BackgroundTaskRegistry:
+    """依分組 key 持有背景任務，任務完成後自動移除"""
+
+    def __init__(self):
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+
+    def spawn(
+        self, key: str, coro: Coroutine, name: Optional[str] = None
+    ) -> asyncio.Task:
+        """建立背景任務並登錄在 key 之下"""
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.setdefault(key, set()).add(task)
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return task
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        tasks = self._tasks.get(key)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "❌ [Background] %s failed: %s", task.get_name(), task.exception()
+            )
+
+    def pending(self, key: Optional[str] = None) -> int:
+        """尚未完成的任務數（未指定 key 時為全部）"""
+        if key is not None:
+            return len(self._tasks.get(key, ()))
+        return sum(len(tasks) for tasks in self._tasks.values())
+
+    async def wait(self, key: str, timeout: Optional[float] = None) -> bool:
+        """
+        等待 key 之下的所有任務完成（任務本身的例外不會拋出）
+
+        Returns:
+            bool: 是否在逾時前全部完成
+        """
+        tasks = list(self._tasks.get(key, ()))
+        if not tasks:
+            return True
+        _, still_pending = await asyncio.wait(tasks, timeout=timeout)
+        return not still_pending
+
+    async def drain(self, timeout: float) -> int:
+        """
+        等待所有任務完成，逾時後取消剩餘任務（於 lifespan 關閉時呼叫）
+
+        Returns:
+            int: 被取消的任務數
+        """
+        tasks = [task for group in self._tasks.values() for task in group]
+        if not tasks:
+            return 0
+
+        logger.info("⏳ [Background] 等待 %d 個背景任務完成...", len(tasks))
+        _, still_pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in still_pending:
+            task.cancel()
+        if still_pending:
+            await asyncio.gather(*still_pending, return_exceptions=True)
+            logger.warning(
+                "⚠️ [Background] %d 個背景任務逾時 %.0fs，已取消",
+                len(still_pending),
+                timeout,
+            )
+        return len(still_pending)
+
+
+background_tasks = BackgroundTaskRegistry()
@@ -0,0 +1,175 @@
+"""
+LLM 斷路器（Circuit Breaker）
+
+LiteLLM Proxy 變慢或中斷時，每次 Agent 呼叫都要等到逾時才失敗，玩家每題都卡住再收到錯誤。
+斷路器依最近的 Agent 執行結果判斷：
+
+- closed：正常放行；最近 window 次中失敗（例外、逾時或超過 slow_seconds）比例達門檻即開啟
+- open：直接拒絕（CircuitOpenError），由呼叫端改走離線模式；open_seconds 後轉為 half-open
+- half_open：只放行一次試探呼叫，成功即恢復 closed，失敗則重新開啟
+
+背景分析等可延後的呼叫以 wait_for_recovery 等到可試探或恢復 closed 後再重試。
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Set
+
+from app.core.config import settings
+from app.core.metrics import CIRCUIT_TRANSITIONS, registry
+
+logger = logging.getLogger("app")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """斷路器開啟中，呼叫未送出"""
+
+
+class CircuitBreaker:
+    """單一 Worker 內的斷路器狀態（closed / open / half_open）"""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._waiters: Set[asyncio.Future] = set()
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行一次呼叫（half-open 時同一時間只放行一個試探呼叫）"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self, seconds: float) -> None:
+        """記錄成功的呼叫；超過 slow_seconds 視同失敗"""
+        if seconds > self.slow_seconds:
+            self.record_failure()
+            return
+        if self._state == HALF_OPEN:
+            self._outcomes.clear()
+            self._transition(CLOSED)
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if (
+            self._state == CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """呼叫被取消（未得出結果）時釋放試探名額"""
+        self._probing = False
+
+    def reset(self) -> None:
+        """回到 closed 並清除統計"""
+        self._outcomes.clear()
+        self._state = CLOSED
+        self._probing = False
+        self._wake_waiters()
+
+    def retry_after(self) -> float:
+        """距離下一次可能放行的秒數（closed 為 0；half-open 試探進行中時稍後再查）"""
+        state = self.state
+        if state == OPEN:
+            return max(self.open_seconds - (self._clock() - self._opened_at), 0.0)
+        if state == HALF_OPEN and self._probing:
+            return 1.0
+        return 0.0
+
+    async def wait_for_recovery(self, timeout: float) -> None:
+        """等到斷路器恢復 closed 或到了可試探的時間，最多等待 timeout 秒"""
+        delay = min(self.retry_after(), timeout)
+        if delay <= 0:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, delay)
+        except TimeoutError:
+            pass
+        finally:
+            self._waiters.discard(waiter)
+
+    def _wake_waiters(self) -> None:
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._probing = False
+        if state == CLOSED:
+            self._wake_waiters()
+        CIRCUIT_TRANSITIONS.inc(circuit=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log(f"⚡ [Circuit] {self.name} → {state}")
+
+    def snapshot(self) -> Dict[str, int]:
+        current = self.state
+        return {state: int(state == current) for state in (CLOSED, OPEN, HALF_OPEN)}
+
+
+llm_breaker = CircuitBreaker(
+    "llm",
+    window=settings.CIRCUIT_WINDOW,
+    min_calls=settings.CIRCUIT_MIN_CALLS,
+    failure_rate=settings.CIRCUIT_FAILURE_RATE,
+    slow_seconds=settings.CIRCUIT_SLOW_SECONDS,
+    open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+)
+
+registry.register_callback(
+    "circuit_state",
+    "Current circuit breaker state (1 for the active state)",
+    lambda: {
+        (llm_breaker.name, state): value
+        for state, value in llm_breaker.snapshot().items()
+    },
+    labelnames=("circuit", "state"),
+)
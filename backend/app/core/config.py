@@ -1,11 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional, List
 
-# 在任何 agent 載入前啟用 LiteLLM debug 模式
-import litellm
-
-litellm._turn_on_debug()
-
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
@@ -23,6 +18,59 @@ class Settings(BaseSettings):
     LITELLM_PROXY_URL: str = "https://litellm.brianhan.cc"
     LITELLM_PROXY_API_KEY: str = ""
     LLM_MODEL: str = "openai/gpt-4o"
+    # 模型分層：AGENT_MODELS 依 Agent 名稱指定模型；未指定時 Analytics / Summary 等結構化評分
+    # 使用輕量的 LLM_FAST_MODEL（空白表示同 LLM_MODEL），出題與轉生敘事使用 LLM_MODEL
+    LLM_FAST_MODEL: str = ""
+    AGENT_MODELS: dict = {}
+    # 備援模型：主要模型出錯或超過 LLM_PRIMARY_TIMEOUT 秒未回應時改用（空白表示不備援）
+    LLM_FALLBACK_MODEL: str = ""
+    LLM_PRIMARY_TIMEOUT: float = 20.0
+    # 連往 LiteLLM Proxy 的共用連線池設定
+    LLM_HTTP_MAX_CONNECTIONS: int = 50
+    LLM_HTTP_MAX_KEEPALIVE: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_HTTP_TIMEOUT: float = 120.0
+    # LLM 追蹤：成功呼叫的取樣率與內容截斷長度（失敗呼叫一律記錄）
+    LLM_TRACE_SAMPLE_RATE: float = 0.05
+    LLM_TRACE_MAX_CHARS: int = 2000
+    # 僅供本機除錯：開啟 LiteLLM 原生 debug（會記錄完整 payload）
+    LLM_DEBUG: bool = False
+    # Questionnaire Agent 每次呼叫保留的最近輪數（開場一輪另外保留），中間的輪次折疊為摘要（0 表示不壓縮）
+    QUESTIONNAIRE_HISTORY_TURNS: int = 3
+    # In-memory ADK Session 回收：閒置超過 TTL（秒）即移除，總數超過上限時淘汰最久未更新者
+    # （測驗進度另存於 Redis 存檔，被回收的玩家可經 resume_quest 續玩）
+    SESSION_TTL_SECONDS: float = 3600.0
+    SESSION_MAX_COUNT: int = 20000
+    SESSION_SWEEP_INTERVAL: float = 60.0
+    # 適性測驗：結果穩定（所有判定的 z 值超過門檻）時提前結束，見 app/core/adaptive.py
+    # ADAPTIVE_MAX_QUESTIONS 為 0 時沿用等級決定的題數
+    ADAPTIVE_QUESTS: bool = False
+    ADAPTIVE_MIN_QUESTIONS: int = 6
+    ADAPTIVE_MAX_QUESTIONS: int = 0
+    ADAPTIVE_CONFIDENCE_Z: float = 1.5
+    # 進入區域（check-access）時預先生成開場題目；開始測驗時等待生成中題目的上限（秒）
+    PREWARM_FIRST_QUESTION: bool = True
+    PREWARM_WAIT_TIMEOUT: float = 15.0
+    # Agent 執行期限（秒，整次 run 含多輪模型呼叫）：AGENT_DEADLINES 依 Agent 名稱覆寫預設值
+    AGENT_DEADLINE_SECONDS: float = 120.0
+    AGENT_DEADLINES: dict = {"questionnaire_agent": 45.0, "analytics_agent": 60.0}
+    # 對沖請求：列出的 Agent 在執行時間超過近期 AGENT_HEDGE_QUANTILE 分位數時送出第二次嘗試
+    # （樣本少於 AGENT_HEDGE_MIN_SAMPLES 時不對沖；等待時間不低於 AGENT_HEDGE_MIN_DELAY 秒）
+    AGENT_HEDGE_AGENTS: List[str] = []
+    AGENT_HEDGE_QUANTILE: float = 0.95
+    AGENT_HEDGE_MIN_DELAY: float = 1.0
+    AGENT_HEDGE_MIN_SAMPLES: int = 20
+    # LLM 斷路器：最近 CIRCUIT_WINDOW 次 Agent 執行中失敗（含超過 CIRCUIT_SLOW_SECONDS）比例達門檻即開啟，
+    # 開啟 CIRCUIT_OPEN_SECONDS 秒後放行一次試探呼叫，成功即恢復
+    CIRCUIT_WINDOW: int = 20
+    CIRCUIT_MIN_CALLS: int = 5
+    CIRCUIT_FAILURE_RATE: float = 0.5
+    CIRCUIT_SLOW_SECONDS: float = 30.0
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    # 斷路器開啟或出題失敗時改用離線題庫（本地計分），玩家可繼續作答
+    OFFLINE_QUESTIONS: bool = True
+    # 斷路器開啟時 LLM 題目的分析延後至斷路器恢復再執行，最多延後 ANALYTICS_DEFER_SECONDS 秒
+    ANALYTICS_DEFER_SECONDS: float = 300.0
     # 以下保留供備用或直連模式使用
     GITHUB_COPILOT_TOKEN: str = "your_token"
     GITHUB_COPILOT_HEADERS: dict = {
@@ -36,6 +84,27 @@ class Settings(BaseSettings):
     APP_ENV: str = "development"
     SECRET_KEY: str = ""
     LOG_FILE_PATH: Optional[str] = "logs/app.log"
+    # 以 JSON 行格式輸出日誌（便於集中式日誌系統解析）
+    LOG_JSON: bool = False
+    # 背景日誌佇列容量，滿載時丟棄新日誌而非阻塞事件迴圈
+    LOG_QUEUE_MAXSIZE: int = 10000
+
+    # 分段延遲追蹤（OpenTelemetry）；未設定 endpoint 時輸出至控制台
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "traitquest-backend"
+    OTEL_EXPORTER_OTLP_ENDPOINT: Optional[str] = None
+    # Prometheus 指標端點 /metrics
+    METRICS_ENABLED: bool = True
+    # 結算時等待分析任務的上限（秒），以及關閉時等待背景任務的上限（秒）
+    ANALYTICS_WAIT_TIMEOUT: float = 60.0
+    BACKGROUND_DRAIN_TIMEOUT: float = 30.0
+    # 結算工作佇列：開啟後 request_result 只送出工作，由 `python -m app.worker` 執行結算
+    RESULT_JOB_QUEUE: bool = False
+    JOB_MAX_ATTEMPTS: int = 3
+    # 每個 Job Worker 同時執行的結算工作上限
+    JOB_CONCURRENCY: int = 4
+    # Job Worker 識別名稱（預設為主機名稱）；重新啟動時據此回收未完成的工作
+    JOB_WORKER_ID: Optional[str] = None
 
     # CORS - 開發環境預設，正式環境請透過環境變數設定
     CORS_ORIGINS: List[str] = [
@@ -0,0 +1,80 @@
+"""
+Agent 執行的延遲追蹤與對沖請求（Hedged Requests）
+
+LLM 回應時間長尾明顯：大多數呼叫數秒內完成，少數卡在 Proxy 或供應商端數十秒。
+對沖請求在第一次嘗試超過近期延遲的高分位數（預設 p95）仍未完成時送出第二次嘗試，
+採用先完成者並取消另一個，以約 5% 的額外呼叫換取尾端延遲下降。
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """依 key（Agent 名稱）保存最近的執行時間，用於估計對沖延遲"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, key: str, seconds: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, key: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """最近樣本的 q 分位數；樣本不足時返回 None"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+
+latency_tracker = LatencyTracker()
+
+
+async def hedged(
+    attempt: Callable[[int], Awaitable[T]], hedge_after: Optional[float]
+) -> Tuple[T, int]:
+    """
+    執行 attempt(0)，超過 hedge_after 秒仍未完成時再執行 attempt(1)，採用先成功者
+
+    其中一次嘗試失敗時等待另一次；兩者皆失敗時拋出最後的例外。
+    返回前（包含被外層取消或逾時）會取消並等待所有未完成的嘗試。
+
+    Args:
+        attempt: 以嘗試編號（0 為原始請求、1 為對沖請求）建立一次執行
+        hedge_after: 送出對沖請求前的等待秒數；None 表示不對沖
+
+    Returns:
+        Tuple[T, int]: (結果, 勝出的嘗試編號)
+    """
+    tasks: List[asyncio.Task] = [asyncio.create_task(attempt(0))]
+    try:
+        if hedge_after is not None:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                tasks.append(asyncio.create_task(attempt(1)))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=tasks.index):
+                if task.exception() is None:
+                    return task.result(), tasks.index(task)
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,109 @@
+"""
+多輪 Agent 的對話歷史壓縮
+
+Questionnaire Agent 在整場測驗中沿用同一個 ADK Session，每次呼叫 LLM 都會重送
+所有先前的指令、工具呼叫與工具回應，越後面的題目越慢、越貴。
+compact_contents 保留第一輪（開場指令，含英雄史詩與試煉設定）與最近 K 輪的原始內容，
+中間的輪次以精簡摘要取代，讓每題的 prompt 大小與題數無關。
+
+「一輪」從一則含文字的 user 訊息開始（工具回應雖然也是 user 角色，但只含 function_response），
+直到下一則含文字的 user 訊息之前；因此同一輪內的工具呼叫與回應永遠不會被拆開。
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+logger = logging.getLogger("app")
+
+# 摘要中每段文字的長度上限
+DIGEST_TEXT_MAX_CHARS = 40
+
+
+def _is_turn_start(content: types.Content) -> bool:
+    if content.role != "user" or not content.parts:
+        return False
+    return any(part.text for part in content.parts) and not any(
+        part.function_response for part in content.parts
+    )
+
+
+def compact_contents(
+    contents: List[types.Content], keep_turns: int, digest: Optional[str]
+) -> List[types.Content]:
+    """
+    保留第一輪與最近 keep_turns 輪，中間的輪次以 digest 取代
+
+    第一輪是開場指令（英雄史詩、試煉設定與輸出規則），之後每一輪都依賴它，因此一律保留。
+    digest 會併入最近區段第一則 user 訊息的開頭，避免出現連續兩則 user 訊息。
+    """
+    starts = [i for i, content in enumerate(contents) if _is_turn_start(content)]
+    if keep_turns <= 0 or len(starts) <= keep_turns + 1:
+        return contents
+
+    opening = contents[: starts[1]]
+    recent = list(contents[starts[-keep_turns] :])
+    if digest:
+        first = recent[0]
+        recent[0] = types.Content(
+            role=first.role, parts=[types.Part(text=digest), *first.parts]
+        )
+    return [*opening, *recent]
+
+
+def truncate(text: str, max_chars: int = DIGEST_TEXT_MAX_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= max_chars else text[: max_chars - 1] + "…"
+
+
+def build_interaction_digest(
+    interactions: List[Dict[str, Any]], keep_turns: int
+) -> Optional[str]:
+    """
+    將不在保留區段內的問答折疊為一行一題的摘要
+
+    保留的 K 輪中包含最近 K 題的作答，因此只摘要更早的題目；
+    第一輪只有開場指令與第 1 題的題目，第 1 題的作答仍需列入摘要。
+    """
+    folded = interactions[: max(0, len(interactions) - keep_turns)]
+    if not folded:
+        return None
+    lines = [
+        f"第{index + 1}題: {truncate(item.get('question', {}).get('text', ''))} -> "
+        f"{truncate(item.get('answer', ''))}"
+        for index, item in enumerate(folded)
+    ]
+    return "[先前試煉摘要]\n" + "\n".join(lines) + "\n"
+
+
+def history_compactor(
+    keep_turns: Callable[[], int], interactions_key: str = "interactions"
+) -> Callable[[CallbackContext, LlmRequest], None]:
+    """
+    建立壓縮對話歷史的 before_model_callback
+
+    Args:
+        keep_turns: 返回保留輪數的函式（於每次呼叫時讀取，便於由設定調整）
+        interactions_key: Session State 中存放已作答問答的 key
+    """
+
+    def callback(callback_context: CallbackContext, llm_request: LlmRequest):
+        turns = keep_turns()
+        before = len(llm_request.contents)
+        digest = build_interaction_digest(
+            callback_context.state.get(interactions_key) or [], turns
+        )
+        llm_request.contents = compact_contents(llm_request.contents, turns, digest)
+        if len(llm_request.contents) < before:
+            logger.debug(
+                "🗜️ [History] %s: %d -> %d contents",
+                callback_context.agent_name,
+                before,
+                len(llm_request.contents),
+            )
+        return None
+
+    return callback
@@ -0,0 +1,224 @@
+"""
+共用 LLM 模型與傳輸層
+
+同一模型名稱在 Worker 內只建立一個 LiteLlm 實例，並透過 `litellm.aclient_session`
+讓 LiteLLM 對 Proxy 的請求共用一個 keep-alive 的 httpx 連線池，
+避免每次呼叫重新建立 TCP / TLS 連線。
+
+各 Agent 依 `resolve_agent_model` 取得所屬層級的模型（結構化評分用輕量模型、
+出題與敘事用主要模型）；設定 LLM_FALLBACK_MODEL 時，主要模型出錯或逾時改用備援模型。
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from typing import AsyncGenerator, Dict, Optional
+
+import httpx
+import litellm
+from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from app.core.agent import PROMPT_CACHE_INJECTION_POINTS
+from app.core.config import settings
+from app.core.metrics import LLM_FALLBACKS, current_agent, registry
+
+logger = logging.getLogger("app")
+
+
+@dataclass
+class LLMTransportStats:
+    """連線層統計（單一 Worker 內累計）"""
+
+    requests: int = 0
+    responses: int = 0
+    errors: int = 0
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+
+
+class LLMTransport:
+    """
+    連往 LiteLLM Proxy 的共用 HTTP 連線池
+
+    透過 httpcore 的 trace extension 計算實際新建的 TCP 連線與 TLS 握手次數，
+    可與請求數比較得出連線重用率。
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = LLMTransportStats()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT, connect=10.0),
+            transport=self._transport,
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
+        )
+
+    def install(self) -> None:
+        """讓 LiteLLM 的 OpenAI 相容呼叫改用共用連線池"""
+        litellm.aclient_session = self.client
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        if litellm.aclient_session is not None and litellm.aclient_session.is_closed:
+            litellm.aclient_session = None
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.stats.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.stats.responses += 1
+        if response.status_code >= 400:
+            self.stats.errors += 1
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.stats.tls_handshakes += 1
+
+    def pool_status(self) -> Dict[str, int]:
+        """目前連線池內的連線數（httpx 未公開連線池，取不到時回傳 0）"""
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {"open_connections": len(connections), "idle_connections": idle}
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**asdict(self.stats), **self.pool_status()}
+
+
+llm_transport = LLMTransport()
+
+registry.register_callback(
+    "llm_http_events_total",
+    "Shared LiteLLM HTTP client events (requests, responses, errors, new TCP/TLS)",
+    lambda: {(event,): value for event, value in asdict(llm_transport.stats).items()},
+    kind="counter",
+    labelnames=("event",),
+)
+registry.register_callback(
+    "llm_http_pool_connections",
+    "Connections currently held by the shared LiteLLM HTTP pool",
+    lambda: {(state,): value for state, value in llm_transport.pool_status().items()},
+    labelnames=("state",),
+)
+
+# 使用輕量模型層級（LLM_FAST_MODEL）的 Agent：輸出為結構化評分或短摘要
+FAST_TIER_AGENTS = frozenset({"analytics_agent", "summary_agent"})
+
+
+class FallbackLiteLlm(LiteLlm):
+    """
+    主要模型出錯或超過 primary_timeout 秒未回應時，以備援模型重送同一請求
+
+    只處理非串流呼叫：先收齊主要模型的回應再交給 ADK，確保切換時不會送出半個回應。
+    被外層取消（Agent 執行期限、對沖請求）時直接結束，不改用備援模型。
+    """
+
+    fallback: Optional[LiteLlm] = None
+    primary_timeout: Optional[float] = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.fallback is None or stream:
+            async for response in super().generate_content_async(llm_request, stream):
+                yield response
+            return
+
+        responses = []
+        try:
+            async with asyncio.timeout(self.primary_timeout or None):
+                async for response in super().generate_content_async(llm_request):
+                    responses.append(response)
+        except Exception as e:
+            reason = "timeout" if isinstance(e, TimeoutError) else "error"
+            LLM_FALLBACKS.inc(agent=current_agent.get(), model=self.model, reason=reason)
+            logger.warning(
+                f"🪂 [LLM] {self.model} 呼叫失敗（{reason}），改用備援模型 {self.fallback.model}"
+            )
+            fallback_request = llm_request.model_copy(update={"model": self.fallback.model})
+            async for response in self.fallback.generate_content_async(fallback_request):
+                yield response
+            return
+
+        for response in responses:
+            yield response
+
+
+def _create_model(model_name: str, fallback: Optional[LiteLlm] = None) -> LiteLlm:
+    return FallbackLiteLlm(
+        model=model_name,
+        api_base=settings.LITELLM_PROXY_URL,
+        api_key=settings.LITELLM_PROXY_API_KEY,
+        cache_control_injection_points=PROMPT_CACHE_INJECTION_POINTS,
+        fallback=fallback,
+        primary_timeout=settings.LLM_PRIMARY_TIMEOUT,
+    )
+
+
+# 依模型名稱快取的共用 LiteLlm 實例
+_models: Dict[str, LiteLlm] = {}
+
+
+def get_llm_model(model: Optional[str] = None) -> LiteLlm:
+    """
+    取得共用的 LiteLlm 模型實例
+
+    同一模型名稱在整個 Worker 內只建立一次，所有使用該模型的 Agent 共用同一個實例。
+    共用連線池由 lifespan 啟動時呼叫 `llm_transport.install()` 掛載。
+
+    Args:
+        model: 模型名稱，預設為 settings.LLM_MODEL
+    """
+    model_name = model or settings.LLM_MODEL
+    if model_name not in _models:
+        fallback_name = settings.LLM_FALLBACK_MODEL
+        fallback = None
+        if fallback_name and fallback_name != model_name:
+            fallback = _create_model(fallback_name)
+        _models[model_name] = _create_model(model_name, fallback)
+        logger.debug(
+            f"🔗 [LLM] Shared model created: {model_name}"
+            + (f" (fallback: {fallback_name})" if fallback else "")
+        )
+    return _models[model_name]
+
+
+def resolve_agent_model(agent_name: str) -> str:
+    """
+    Agent 使用的模型名稱：AGENT_MODELS 指定 > 輕量層級 LLM_FAST_MODEL > LLM_MODEL
+    """
+    if agent_name in settings.AGENT_MODELS:
+        return settings.AGENT_MODELS[agent_name]
+    if agent_name in FAST_TIER_AGENTS and settings.LLM_FAST_MODEL:
+        return settings.LLM_FAST_MODEL
+    return settings.LLM_MODEL
+
+
+def get_agent_model(agent_name: str) -> LiteLlm:
+    """取得指定 Agent 所屬層級的共用模型實例"""
+    return get_llm_model(resolve_agent_model(agent_name))
@@ -0,0 +1,216 @@
+"""
+取樣式 LLM 追蹤
+
+取代全域 `litellm._turn_on_debug()`：依取樣率記錄單次 LLM 呼叫的結構化摘要
+（模型、延遲、Token、截斷後的訊息與回應），並在寫入日誌前遮蔽敏感資訊。
+失敗的呼叫一律記錄，成功的呼叫依 `LLM_TRACE_SAMPLE_RATE` 取樣。
+"""
+
+import json
+import logging
+import random
+import re
+from typing import Any, Optional
+
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+
+from app.core.config import settings
+from app.core.metrics import (
+    LLM_REQUEST_DURATION,
+    LLM_REQUESTS,
+    LLM_TOKENS,
+    current_agent,
+)
+
+logger = logging.getLogger("app.llm")
+
+REDACTED = "[REDACTED]"
+
+# 需整個遮蔽的欄位名稱（不分大小寫、完整比對）
+# 不可用 "token" 做部分比對，否則 prompt_tokens / max_tokens 等用量欄位也會被遮蔽
+SENSITIVE_KEYS = frozenset(
+    {
+        "api_key",
+        "apikey",
+        "x-api-key",
+        "authorization",
+        "proxy-authorization",
+        "access_token",
+        "id_token",
+        "refresh_token",
+        "client_secret",
+        "secret",
+        "password",
+    }
+)
+
+# 需在文字內容中遮蔽的樣式
+SENSITIVE_PATTERNS = [
+    re.compile(r"(?i)bearer\s+[A-Za-z0-9\-._~+/]+=*"),
+    re.compile(r"sk-[A-Za-z0-9\-_]{8,}"),
+    re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"),
+]
+
+
+def redact(value: Any) -> Any:
+    """遞迴遮蔽 dict / list / 字串中的敏感資訊"""
+    if isinstance(value, dict):
+        return {
+            key: (
+                REDACTED
+                if str(key).lower() in SENSITIVE_KEYS
+                else redact(item)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str):
+        for pattern in SENSITIVE_PATTERNS:
+            value = pattern.sub(REDACTED, value)
+        return value
+    return value
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """截斷過長的內容，保留原始長度資訊"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}...(+{len(text) - max_chars} chars)"
+
+
+def _serialize(value: Any, max_chars: int) -> Optional[str]:
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = json.dumps(redact(value), ensure_ascii=False, default=str)
+    else:
+        value = redact(value)
+    return truncate(value, max_chars)
+
+
+class SampledLLMTracer(CustomLogger):
+    """
+    LiteLLM callback：以取樣方式輸出結構化 LLM 追蹤紀錄
+
+    Args:
+        sample_rate: 成功呼叫的取樣率 (0.0 ~ 1.0)
+        max_chars: 訊息與回應內容的截斷長度
+    """
+
+    def __init__(self, sample_rate: float, max_chars: int):
+        super().__init__()
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.max_chars = max_chars
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def build_record(
+        self, kwargs: dict, response_obj: Any, start_time, end_time, status: str
+    ) -> dict:
+        payload = kwargs.get("standard_logging_object") or {}
+        latency_ms = None
+        if start_time and end_time:
+            latency_ms = round((end_time - start_time).total_seconds() * 1000, 2)
+
+        response = payload.get("response")
+        if response is None and response_obj is not None:
+            response = str(response_obj)
+
+        return {
+            "status": status,
+            "model": payload.get("model") or kwargs.get("model"),
+            "latency_ms": latency_ms,
+            "prompt_tokens": payload.get("prompt_tokens"),
+            "completion_tokens": payload.get("completion_tokens"),
+            "cache_hit": payload.get("cache_hit"),
+            "messages": _serialize(
+                payload.get("messages") or kwargs.get("messages"), self.max_chars
+            ),
+            "response": _serialize(response, self.max_chars),
+            "error": _serialize(payload.get("error_str"), self.max_chars),
+        }
+
+    def _emit(self, record: dict, level: int) -> None:
+        logger.log(
+            level,
+            "🔭 [LLM Trace] %s",
+            json.dumps(record, ensure_ascii=False, default=str),
+            extra={"llm_trace": record},
+        )
+
+    async def async_log_success_event(self, kwargs, response_obj, start_time, end_time):
+        if not self.should_sample():
+            return
+        record = self.build_record(
+            kwargs, response_obj, start_time, end_time, "success"
+        )
+        self._emit(record, logging.INFO)
+
+    async def async_log_failure_event(self, kwargs, response_obj, start_time, end_time):
+        record = self.build_record(
+            kwargs, response_obj, start_time, end_time, "failure"
+        )
+        self._emit(record, logging.WARNING)
+
+
+class LLMMetricsLogger(CustomLogger):
+    """
+    LiteLLM callback：依 Agent 累計 LLM 呼叫次數、延遲與 Token 數
+
+    Agent 名稱取自 `run_agent_async` 設定的 ContextVar（LiteLLM 的 logging worker
+    會複製呼叫端的 context，因此 callback 內仍可讀到）。
+    """
+
+    def _record(self, kwargs: dict, start_time, end_time, status: str) -> None:
+        payload = kwargs.get("standard_logging_object") or {}
+        agent = current_agent.get()
+        model = payload.get("model") or kwargs.get("model") or "unknown"
+
+        LLM_REQUESTS.inc(agent=agent, model=model, status=status)
+        if start_time and end_time:
+            LLM_REQUEST_DURATION.observe(
+                (end_time - start_time).total_seconds(), agent=agent, model=model
+            )
+        for token_type in ("prompt", "completion"):
+            tokens = payload.get(f"{token_type}_tokens")
+            if tokens:
+                LLM_TOKENS.inc(tokens, agent=agent, model=model, type=token_type)
+
+    async def async_log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self._record(kwargs, start_time, end_time, "success")
+
+    async def async_log_failure_event(self, kwargs, response_obj, start_time, end_time):
+        self._record(kwargs, start_time, end_time, "error")
+
+
+_tracer: Optional[SampledLLMTracer] = None
+_metrics_logger: Optional[LLMMetricsLogger] = None
+
+
+def configure_llm_tracing() -> SampledLLMTracer:
+    """
+    註冊取樣式 LLM 追蹤與 LLM 指標 callback（可重複呼叫，只會註冊一次）
+
+    只有在明確設定 `LLM_DEBUG=true` 時才開啟 LiteLLM 原生的完整 debug 輸出。
+    """
+    global _tracer, _metrics_logger
+
+    if _tracer is None:
+        _tracer = SampledLLMTracer(
+            sample_rate=settings.LLM_TRACE_SAMPLE_RATE,
+            max_chars=settings.LLM_TRACE_MAX_CHARS,
+        )
+        litellm.callbacks.append(_tracer)
+
+    if _metrics_logger is None:
+        _metrics_logger = LLMMetricsLogger()
+        litellm.callbacks.append(_metrics_logger)
+
+    if settings.LLM_DEBUG:
+        litellm._turn_on_debug()
+        logger.warning("🔧 [LiteLLM] Debug 模式已啟用（LLM_DEBUG=true）")
+
+    return _tracer
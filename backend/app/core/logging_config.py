@@ -3,13 +3,23 @@
 Provides a single place to configure logging handlers/formatters.
 - Console: colorized, compact, includes source line number.
 - File: detailed, rotated, configured via environment variables.
+- JSON: optional structured output (one JSON object per line).
+
+All handlers are driven by QueueListener threads: loggers only hold
+QueueHandlers, so the event loop never blocks on console / disk writes.
 """
 
 from __future__ import annotations
 
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+from datetime import datetime, timezone
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -62,6 +72,67 @@ class ColorFormatter(logging.Formatter):
         return line
 
 
+# LogRecord 的標準屬性，其餘皆視為 `extra` 傳入的結構化欄位
+_RESERVED_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """結構化 JSON 格式化器：每筆日誌輸出為一行 JSON，`extra` 欄位一併保留"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    不阻塞呼叫端的 QueueHandler
+
+    - 在呼叫端只合併訊息字串（args 可能是可變物件，需在當下定格），
+      格式化與 I/O 交由 QueueListener 執行緒處理
+    - 保留 exc_info，讓背景執行緒的格式化器自行輸出 Traceback
+    - 佇列已滿時直接丟棄並計數，絕不讓事件迴圈等待
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.listener: QueueListener | None = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 class NoiseFilter(logging.Filter):
     """Filter out noisy logs from specific modules or endpoints."""
 
@@ -87,12 +158,87 @@ def _parse_level(level: str, default: int) -> int:
     return logging._nameToLevel.get(level.upper(), default)
 
 
+# 運作中的 QueueHandler（依實際 handler 名稱）；listener 掛在 queue_handler.listener
+_queue_handlers: dict[str, NonBlockingQueueHandler] = {}
+
+
+def _all_loggers() -> list[logging.Logger]:
+    manager = logging.Logger.manager
+    return [logging.getLogger()] + [
+        logger
+        for logger in manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)
+    ]
+
+
+def shutdown_logging() -> None:
+    """
+    停止所有 QueueListener 並寫出佇列中剩餘的日誌（可重複呼叫）
+
+    停止後 loggers 改回直接掛載實際 handler，關閉過程中的日誌不會遺失。
+    """
+    if not _queue_handlers:
+        return
+
+    real_handlers = {}
+    for queue_handler in _queue_handlers.values():
+        queue_handler.listener.stop()
+        real_handler = queue_handler.listener.handlers[0]
+        try:
+            real_handler.flush()
+        except (OSError, ValueError):
+            # 程序結束時 stdout 可能已被關閉（例如測試框架替換的串流）
+            pass
+        real_handlers[queue_handler] = real_handler
+
+    for logger in _all_loggers():
+        logger.handlers = [real_handlers.get(h, h) for h in logger.handlers]
+
+    _queue_handlers.clear()
+
+
+def get_dropped_log_count() -> int:
+    """佇列滿載而被丟棄的日誌筆數"""
+    return sum(handler.dropped for handler in _queue_handlers.values())
+
+
+def _install_queue_handlers(queue_maxsize: int) -> None:
+    """
+    把 dictConfig 建立的實際 handler 移到 QueueListener 背景執行緒
+
+    每個實際 handler 各自一個佇列與 listener，loggers 改掛對應的 QueueHandler；
+    logger 層級的 filter 與 handler 層級設定維持不變。
+    """
+    for logger in _all_loggers():
+        for index, handler in enumerate(list(logger.handlers)):
+            if isinstance(handler, QueueHandler) or not handler.name:
+                continue
+
+            queue_handler = _queue_handlers.get(handler.name)
+            if queue_handler is None:
+                log_queue: queue.Queue = queue.Queue(maxsize=queue_maxsize)
+                queue_handler = NonBlockingQueueHandler(log_queue)
+                queue_handler.name = f"{handler.name}_queue"
+                queue_handler.setLevel(handler.level)
+                listener = QueueListener(
+                    log_queue, handler, respect_handler_level=True
+                )
+                listener.start()
+                queue_handler.listener = listener
+                _queue_handlers[handler.name] = queue_handler
+
+            logger.handlers[index] = queue_handler
+
+
 def configure_logging(
     console_level: str = "INFO",
     file_level: str = "DEBUG",
     log_file: str | None = None,
     log_file_max_bytes: int = 10 * 1024 * 1024,  # 10MB
     log_file_backup_count: int = 5,
+    json_logs: bool = False,
+    queue_maxsize: int = 10000,
+    use_queue: bool = True,
 ) -> None:
     """配置日誌系統
 
@@ -102,8 +248,14 @@ def configure_logging(
         log_file: 日誌檔案路徑，None 則不寫入檔案
         log_file_max_bytes: 單個日誌檔案最大大小
         log_file_backup_count: 保留的舊日誌檔案數量
+        json_logs: 以 JSON 行格式輸出（控制台與檔案）
+        queue_maxsize: 每個背景佇列的容量，滿載時丟棄新日誌而非阻塞
+        use_queue: 是否經由 QueueListener 背景寫出（False 為同步寫出，供基準比較）
     """
 
+    # 重新配置前先停止既有 listener，確保佇列中的日誌寫出後才關閉 handler
+    shutdown_logging()
+
     console_log_level = _parse_level(console_level, logging.INFO)
     file_log_level = _parse_level(file_level, logging.DEBUG)
 
@@ -111,7 +263,7 @@ def configure_logging(
         "console": {
             "class": "logging.StreamHandler",
             "level": console_log_level,
-            "formatter": "console",
+            "formatter": "json" if json_logs else "console",
             "stream": "ext://sys.stdout",
         }
     }
@@ -128,7 +280,7 @@ def configure_logging(
         handlers["file"] = {
             "class": "logging.handlers.RotatingFileHandler",
             "level": file_log_level,
-            "formatter": "file",
+            "formatter": "json" if json_logs else "file",
             "filename": str(log_path),
             "maxBytes": log_file_max_bytes,
             "backupCount": log_file_backup_count,
@@ -154,6 +306,9 @@ def configure_logging(
                 "format": LOG_FORMAT,
                 "datefmt": LOG_DATE_FORMAT,
             },
+            "json": {
+                "()": "app.core.logging_config.JsonFormatter",
+            },
         },
         "handlers": handlers,
         "root": {
@@ -212,3 +367,9 @@ def configure_logging(
     }
 
     dictConfig(config)
+
+    if use_queue:
+        _install_queue_handlers(queue_maxsize)
+
+
+atexit.register(shutdown_logging)
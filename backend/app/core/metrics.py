@@ -0,0 +1,345 @@
+"""
+Prometheus 指標
+
+輕量的指標登錄表，輸出 Prometheus text exposition format (0.0.4)，由 `/metrics` 端點提供。
+不引入 prometheus_client：指標只在事件迴圈內更新，計數器與直方圖以 dict 累加即可。
+
+- Counter / Gauge / Histogram：支援 labels，於事件發生時更新
+- register_callback：抓取時才計算的指標（連線數、DB 連線池、LLM 連線池統計等）
+
+快取命中率等比例請以 PromQL 由計數器計算，例如：
+    sum by (family) (rate(traitquest_cache_requests_total{result="hit"}[5m]))
+      / sum by (family) (rate(traitquest_cache_requests_total[5m]))
+"""
+
+import logging
+import math
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger("app")
+
+NAMESPACE = "traitquest"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+LabelValues = Tuple[str, ...]
+CallbackResult = Union[float, int, Dict[LabelValues, Union[float, int]]]
+
+# 目前正在執行的 Agent 名稱，讓 LiteLLM callback 能把 LLM 呼叫歸屬到 Agent
+current_agent: ContextVar[str] = ContextVar("metrics_current_agent", default="unknown")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不減的累計值"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """可增可減的瞬時值"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """分桶累計的觀測值（延遲、Token 數等）"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def samples(self):
+        bucket_labels = self.labelnames + ("le",)
+        for key in sorted(self._counts):
+            cumulative = 0
+            for bound, count in zip(self.buckets, self._counts[key]):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_format_labels(bucket_labels, key + (_format_value(bound),))} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class _CallbackMetric(_Metric):
+    """抓取時才呼叫 callback 計算的指標"""
+
+    def __init__(self, name, documentation, kind, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self):
+        result = self.callback()
+        if not isinstance(result, dict):
+            result = {(): result}
+        for key, value in sorted(result.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """指標登錄表：同名指標只建立一次，重複取得回傳同一個實例"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        full_name = f"{NAMESPACE}_{name}"
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = cls(name, *args, **kwargs)
+            self._metrics[full_name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def register_callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], CallbackResult],
+        kind: str = "gauge",
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        """註冊（或取代）抓取時計算的指標"""
+        full_name = f"{NAMESPACE}_{name}"
+        self._metrics[full_name] = _CallbackMetric(
+            name, documentation, kind, callback, labelnames
+        )
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                logger.warning("⚠️ [Metrics] 無法收集 %s：%s", metric.name, e)
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# =============================================================================
+# 共用指標定義
+# =============================================================================
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+
+WS_EVENTS = registry.counter(
+    "ws_events_total", "WebSocket events handled", ("event", "status")
+)
+WS_EVENT_DURATION = registry.histogram(
+    "ws_event_duration_seconds",
+    "WebSocket event handling latency",
+    ("event",),
+    buckets=LLM_BUCKETS,
+)
+WS_CONNECTIONS_OPENED = registry.counter(
+    "ws_connections_opened_total", "WebSocket connections accepted"
+)
+WS_EVENTS_ROUTED = registry.counter(
+    "ws_events_routed_total",
+    "Events for sockets held by another worker (result: published, no_owner, error)",
+    ("result",),
+)
+
+QUESTS_STOPPED_EARLY = registry.counter(
+    "quests_stopped_early_total",
+    "Adaptive quests ended before the question limit because the result was stable",
+    ("quest_type",),
+)
+
+PREWARM_QUESTIONS = registry.counter(
+    "prewarm_questions_total",
+    "Pre-warmed opening questions (result: generated, failed, skipped, used, stale)",
+    ("result",),
+)
+
+CIRCUIT_TRANSITIONS = registry.counter(
+    "circuit_transitions_total",
+    "Circuit breaker state changes (state: closed, open, half_open)",
+    ("circuit", "state"),
+)
+OFFLINE_FALLBACKS = registry.counter(
+    "offline_fallbacks_total",
+    "Degraded-mode work done without the LLM "
+    "(kind: question, analysis, analysis_deferred, exhausted, transformation, summary)",
+    ("quest_type", "kind"),
+)
+
+AGENT_RUN_DURATION = registry.histogram(
+    "agent_run_duration_seconds",
+    "End-to-end agent run latency (may include several LLM calls)",
+    ("agent", "status"),
+    buckets=LLM_BUCKETS,
+)
+AGENT_MODEL_TURNS = registry.histogram(
+    "agent_model_turns",
+    "Model responses per agent run (1 when the output tool ends the run)",
+    ("agent",),
+    buckets=(1, 2, 3, 4, 6, 8),
+)
+AGENT_DEADLINE_EXCEEDED = registry.counter(
+    "agent_deadline_exceeded_total",
+    "Agent runs cancelled after exceeding their deadline",
+    ("agent",),
+)
+AGENT_HEDGES = registry.counter(
+    "agent_hedges_total",
+    "Hedged agent attempts (result: fired, won = hedge finished first, lost)",
+    ("agent", "result"),
+)
+AGENT_HEDGE_DELAY = registry.histogram(
+    "agent_hedge_delay_seconds",
+    "Wait before the hedge attempt (recent run-time quantile)",
+    ("agent",),
+    buckets=LLM_BUCKETS,
+)
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "LLM calls by agent", ("agent", "model", "status")
+)
+LLM_REQUEST_DURATION = registry.histogram(
+    "llm_request_duration_seconds",
+    "Single LLM call latency",
+    ("agent", "model"),
+    buckets=LLM_BUCKETS,
+)
+LLM_FALLBACKS = registry.counter(
+    "llm_fallbacks_total",
+    "LLM calls retried on the fallback model (reason: error, timeout)",
+    ("agent", "model", "reason"),
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM tokens by agent", ("agent", "model", "type")
+)
+
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total",
+    "CacheService lookups by key family (result: hit, miss, error)",
+    ("family", "result"),
+)
+
+
+def record_cache_lookup(family: str, hit: Optional[bool]) -> None:
+    """記錄一次快取查詢；hit=None 表示 Redis 錯誤"""
+    result = "error" if hit is None else ("hit" if hit else "miss")
+    CACHE_REQUESTS.inc(family=family, result=result)
@@ -0,0 +1,418 @@
+"""
+離線題庫（降級模式）
+
+LLM 斷路器開啟或出題失敗時，改由預先撰寫的題目接續測驗。每個選項帶有固定的維度增量，
+作答後在本地計分（格式同 Analytics Agent 的 submit_analysis），
+之後仍由 TraitAccumulator / PsychologicalCalculator 以相同方式累加與結算。
+
+每種測驗各有 MAX_OFFLINE_STEPS 題，足以涵蓋最高等級的題數；ADAPTIVE_MAX_QUESTIONS 設得更高時，
+題庫用完即視為測驗完成（見 serve_offline_question）。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Option = Tuple[str, Dict[str, float]]
+
+OFFLINE_NARRATIVE = "遠方的星光暫時黯淡，Abby 翻開一本古老的試煉之書，書頁上的文字緩緩浮現。"
+OFFLINE_GUIDE = "星光恢復前，先以古書續行試煉"
+
+
+@dataclass(frozen=True)
+class OfflineQuestion:
+    id: str
+    text: str
+    options: Tuple[Option, ...]
+
+    def to_output(self) -> Dict[str, Any]:
+        """組成與 submit_question 相同格式的 questionnaire_output"""
+        return {
+            "narrative": OFFLINE_NARRATIVE,
+            "question": {
+                "text": self.text,
+                "options": [
+                    {"id": str(i + 1), "text": text}
+                    for i, (text, _) in enumerate(self.options)
+                ],
+                "type": "QUANTITATIVE",
+                "offlineId": self.id,
+            },
+            "guideMessage": OFFLINE_GUIDE,
+        }
+
+
+def _likert(dimension: str, weight: float = 0.5) -> Tuple[Option, ...]:
+    """由輕到重的程度選項：越符合，該維度增量越高"""
+    labels = ("完全不像我", "不太像我", "一半一半", "很像我", "就是我")
+    steps = (-1.0, -0.5, 0.0, 0.5, 1.0)
+    return tuple(
+        (label, {dimension: round(step * weight, 2)} if step else {})
+        for label, step in zip(labels, steps)
+    )
+
+
+def _choices(weight: float, *pairs: Tuple[str, str]) -> Tuple[Option, ...]:
+    """每個選項只對應單一維度的選擇題：pairs 為 (維度, 選項文字)"""
+    return tuple((text, {dimension: weight}) for dimension, text in pairs)
+
+
+# 每種測驗至少 MAX_OFFLINE_STEPS 題，涵蓋最高等級的題數（level_service.get_question_count）
+MAX_OFFLINE_STEPS = 15
+
+OFFLINE_QUESTIONS: Dict[str, Tuple[OfflineQuestion, ...]] = {
+    "mbti": (
+        OfflineQuestion("mbti-1", "篝火晚會上，你通常？", (
+            ("加入人群一起歡唱", {"E": 0.5}),
+            ("和一兩位夥伴靜靜聊天", {"I": 0.5}),
+        )),
+        OfflineQuestion("mbti-2", "面對一張殘缺的藏寶圖，你先？", (
+            ("對照地形逐一比對線索", {"S": 0.5}),
+            ("猜想繪圖者想隱藏的意圖", {"N": 0.5}),
+        )),
+        OfflineQuestion("mbti-3", "隊友犯錯害隊伍受傷，你會？", (
+            ("冷靜分析錯誤避免再犯", {"T": 0.5}),
+            ("先安撫他的自責", {"F": 0.5}),
+        )),
+        OfflineQuestion("mbti-4", "出發遠征前，你的行囊？", (
+            ("按清單一一備妥", {"J": 0.5}),
+            ("帶上必需品，其餘路上再說", {"P": 0.5}),
+        )),
+        OfflineQuestion("mbti-5", "漫長旅途後終於抵達城鎮，你想？", (
+            ("到酒館結識新朋友", {"E": 0.4}),
+            ("回房間獨自整理思緒", {"I": 0.4}),
+        )),
+        OfflineQuestion("mbti-6", "學習新的咒語時，你偏好？", (
+            ("照著步驟反覆練習", {"S": 0.4}),
+            ("先理解咒語背後的原理", {"N": 0.4}),
+        )),
+        OfflineQuestion("mbti-7", "村長請你裁決兩戶的爭執，你看重？", (
+            ("公平一致的規則", {"T": 0.4}),
+            ("雙方的感受與關係", {"F": 0.4}),
+        )),
+        OfflineQuestion("mbti-8", "旅程中出現意外的岔路，你？", (
+            ("回到原定路線", {"J": 0.4}),
+            ("興奮地探索新方向", {"P": 0.4}),
+        )),
+        OfflineQuestion("mbti-9", "公會要你向新人介紹冒險守則，你會？", _choices(
+            0.3, ("E", "召集大家當面講解"), ("I", "寫成一份詳細的手冊"),
+        )),
+        OfflineQuestion("mbti-10", "聽吟遊詩人講述遠古傳說時，你留意？", _choices(
+            0.3, ("S", "故事裡的地名與細節"), ("N", "傳說背後隱含的寓意"),
+        )),
+        OfflineQuestion("mbti-11", "夥伴向你抱怨任務太辛苦，你先？", _choices(
+            0.3, ("T", "幫他找出更省力的做法"), ("F", "體諒他的疲憊並陪他休息"),
+        )),
+        OfflineQuestion("mbti-12", "收到一份沒有期限的委託，你？", _choices(
+            0.3, ("J", "自己訂下完成日期"), ("P", "等靈感來了再動手"),
+        )),
+        OfflineQuestion("mbti-13", "連續幾天獨自探索地城後，你想？", _choices(
+            0.3, ("E", "趕快回城和大家分享見聞"), ("I", "再多享受幾天安靜"),
+        )),
+        OfflineQuestion("mbti-14", "打造新武器時，你偏好？", _choices(
+            0.3, ("S", "沿用經過驗證的鍛造法"), ("N", "嘗試從未有人用過的設計"),
+        )),
+        OfflineQuestion("mbti-15", "隊伍要決定是否救援陌生商隊，你看重？", _choices(
+            0.3, ("T", "風險與收益是否值得"), ("F", "他們此刻有多需要幫助"),
+        )),
+    ),
+    "bigfive": tuple(
+        OfflineQuestion(f"bigfive-{i + 1}", text, _likert(dimension))
+        for i, (dimension, text) in enumerate((
+            ("Openness", "我總想看看地圖邊界之外還有什麼"),
+            ("Conscientiousness", "接下委託後，我會準時且完整地完成"),
+            ("Extraversion", "在人聲鼎沸的公會大廳裡，我感到充滿活力"),
+            ("Agreeableness", "即使素不相識，我也願意分糧食給旅人"),
+            ("Neuroticism", "夜裡紮營時，我常擔心會有意外發生"),
+            ("Openness", "古老的傳說與奇特的藝術總令我著迷"),
+            ("Conscientiousness", "我會仔細保養裝備，而不是等它壞了再說"),
+            ("Extraversion", "我喜歡在隊伍中擔任發聲與帶動氣氛的人"),
+            ("Agreeableness", "與夥伴意見不同時，我傾向先退一步"),
+            ("Neuroticism", "一次失敗就會讓我好幾天心神不寧"),
+            ("Openness", "比起熟悉的路線，我更想走一條沒人走過的小徑"),
+            ("Conscientiousness", "出發前我一定會把路線與補給計畫寫清楚"),
+            ("Extraversion", "遇到陌生的冒險者，我會主動上前攀談"),
+            ("Agreeableness", "夥伴犯錯時，我願意相信他不是故意的"),
+            ("Neuroticism", "別人一句無心的話，常讓我在意很久"),
+        ))
+    ),
+    "disc": (
+        OfflineQuestion("disc-1", "隊伍陷入伏擊，你第一個反應是？", (
+            ("立刻下達指令反擊", {"D": 0.5}),
+            ("大聲鼓舞大家士氣", {"I": 0.5}),
+            ("守住身旁的夥伴", {"S": 0.5}),
+            ("觀察敵人的陣形弱點", {"C": 0.5}),
+        )),
+        OfflineQuestion("disc-2", "公會交付一項新任務，你最在意？", (
+            ("能否快速達成目標", {"D": 0.5}),
+            ("和誰一起出發", {"I": 0.5}),
+            ("隊伍是否安穩順利", {"S": 0.5}),
+            ("任務細節是否清楚", {"C": 0.5}),
+        )),
+        OfflineQuestion("disc-3", "有人質疑你的決定時，你會？", (
+            ("堅持立場直接回應", {"D": 0.4}),
+            ("用幽默化解氣氛", {"I": 0.4}),
+            ("聆聽後尋求共識", {"S": 0.4}),
+            ("拿出證據說明理由", {"C": 0.4}),
+        )),
+        OfflineQuestion("disc-4", "完成一場艱難的戰役後，你？", (
+            ("立刻規劃下一個挑戰", {"D": 0.4}),
+            ("召集大家慶功", {"I": 0.4}),
+            ("照顧受傷的隊友", {"S": 0.4}),
+            ("檢討戰術的得失", {"C": 0.4}),
+        )),
+        OfflineQuestion("disc-5", "商隊請你護送貨物穿越山谷，你先？", _choices(
+            0.4, ("D", "決定路線並要求大家跟上"), ("I", "和商人們打好關係"),
+            ("S", "確認每輛車都安全"), ("C", "研究山谷的地形與天候"),
+        )),
+        OfflineQuestion("disc-6", "新夥伴加入隊伍，你會？", _choices(
+            0.4, ("D", "直接交代他的任務"), ("I", "熱情地介紹每位成員"),
+            ("S", "耐心陪他熟悉環境"), ("C", "說明隊伍的規則與流程"),
+        )),
+        OfflineQuestion("disc-7", "任務期限突然提前，你的反應是？", _choices(
+            0.4, ("D", "加快腳步全力衝刺"), ("I", "鼓舞大家一起加油"),
+            ("S", "穩住隊伍避免慌亂"), ("C", "重新排定每一步的細節"),
+        )),
+        OfflineQuestion("disc-8", "你最希望夥伴怎麼評價你？", _choices(
+            0.4, ("D", "果斷可靠的領袖"), ("I", "帶來歡笑的開心果"),
+            ("S", "永遠守在身邊的支柱"), ("C", "思慮周全的智者"),
+        )),
+        OfflineQuestion("disc-9", "公會會議上意見僵持不下，你會？", _choices(
+            0.4, ("D", "拍板做出決定"), ("I", "提出有趣的新點子打破僵局"),
+            ("S", "請大家各退一步"), ("C", "整理各方案的優缺點"),
+        )),
+        OfflineQuestion("disc-10", "面對一座從未見過的魔物巢穴，你？", _choices(
+            0.3, ("D", "帶頭衝進去搶得先機"), ("I", "號召其他隊伍一起討伐"),
+            ("S", "先確保後援與退路"), ("C", "觀察魔物的習性再行動"),
+        )),
+        OfflineQuestion("disc-11", "獲得一筆豐厚的賞金，你會？", _choices(
+            0.3, ("D", "投資更強的裝備挑戰下一關"), ("I", "請大家大吃一頓"),
+            ("S", "平分給每位夥伴"), ("C", "記帳並存下一部分備用"),
+        )),
+        OfflineQuestion("disc-12", "被交付一項從沒做過的任務，你？", _choices(
+            0.3, ("D", "邊做邊學，先動手再說"), ("I", "找有經驗的朋友聊聊"),
+            ("S", "按部就班慢慢熟悉"), ("C", "先讀完所有相關紀錄"),
+        )),
+        OfflineQuestion("disc-13", "隊友的做法和你不同，你會？", _choices(
+            0.3, ("D", "直接指出應該怎麼做"), ("I", "笑著提議換個方式試試"),
+            ("S", "先配合他的做法"), ("C", "比較兩種做法的成效"),
+        )),
+        OfflineQuestion("disc-14", "旅途中最讓你不耐煩的是？", _choices(
+            0.3, ("D", "進度停滯不前"), ("I", "氣氛沉悶無聊"),
+            ("S", "計畫頻繁變動"), ("C", "資訊含糊不清"),
+        )),
+        OfflineQuestion("disc-15", "一天的冒險結束時，你最滿意的是？", _choices(
+            0.3, ("D", "完成了既定目標"), ("I", "認識了新朋友"),
+            ("S", "大家都平安歸來"), ("C", "每件事都做得正確"),
+        )),
+    ),
+    "enneagram": (
+        OfflineQuestion("enneagram-1", "在旅途中，最讓你感到滿足的是？", (
+            ("把事情做得正確無誤", {"Type1": 0.5}),
+            ("被夥伴需要與感謝", {"Type2": 0.5}),
+            ("完成讓人讚嘆的成就", {"Type3": 0.5}),
+            ("找到獨一無二的自我", {"Type4": 0.5}),
+            ("參透世界運作的知識", {"Type5": 0.5}),
+        )),
+        OfflineQuestion("enneagram-2", "深夜獨自守夜時，你心中常浮現？", (
+            ("對未知危險的警覺", {"Type6": 0.5}),
+            ("明天新冒險的期待", {"Type7": 0.5}),
+            ("保護隊伍的決心", {"Type8": 0.5}),
+            ("平靜地享受當下", {"Type9": 0.5}),
+        )),
+        OfflineQuestion("enneagram-3", "隊伍意見分歧時，你通常？", (
+            ("指出哪個做法才合乎原則", {"Type1": 0.4}),
+            ("照顧每個人的情緒", {"Type2": 0.4}),
+            ("提出最有效率的方案", {"Type3": 0.4}),
+            ("保持中立讓大家和好", {"Type9": 0.4}),
+            ("直接拍板做決定", {"Type8": 0.4}),
+        )),
+        OfflineQuestion("enneagram-4", "面對一座未知的遺跡，你會？", (
+            ("先研究文獻再進入", {"Type5": 0.4}),
+            ("確認退路與夥伴都在", {"Type6": 0.4}),
+            ("迫不及待衝進去探險", {"Type7": 0.4}),
+            ("感受遺跡訴說的故事", {"Type4": 0.4}),
+        )),
+        OfflineQuestion("enneagram-5", "被同伴誤解時，你最在意的是？", _choices(
+            0.4, ("Type1", "自己是否真的做錯"), ("Type2", "對方是否還在乎你"),
+            ("Type4", "沒有人真正懂你"), ("Type9", "別讓關係變得緊張"),
+        )),
+        OfflineQuestion("enneagram-6", "公會頒發榮譽勳章，你的感受是？", _choices(
+            0.4, ("Type3", "努力終於被看見"), ("Type2", "想把榮耀分給幫過你的人"),
+            ("Type8", "證明了自己的力量"), ("Type5", "比起勳章更想知道下一個謎題"),
+        )),
+        OfflineQuestion("enneagram-7", "旅程中遇到無法解決的困境，你傾向？", _choices(
+            0.4, ("Type6", "尋求可靠的長輩指引"), ("Type7", "轉換心情找別的樂子"),
+            ("Type5", "退到一旁獨自思考"), ("Type8", "硬闖過去"),
+        )),
+        OfflineQuestion("enneagram-8", "你心中理想的冒險隊伍是？", _choices(
+            0.4, ("Type1", "紀律嚴明、各司其職"), ("Type3", "戰績輝煌、聲名遠播"),
+            ("Type9", "彼此包容、氣氛和睦"), ("Type7", "天天都有新鮮事"),
+        )),
+        OfflineQuestion("enneagram-9", "夜深人靜時，你最常擔心？", _choices(
+            0.4, ("Type6", "未來會不會出差錯"), ("Type4", "自己是否平凡無奇"),
+            ("Type3", "是否落後於別人"), ("Type2", "是否有人需要你卻沒幫上"),
+        )),
+        OfflineQuestion("enneagram-10", "面對不公平的規則，你會？", _choices(
+            0.3, ("Type1", "據理力爭要求改正"), ("Type8", "直接挺身對抗"),
+            ("Type9", "能忍則忍避免衝突"), ("Type6", "先看看大家怎麼做"),
+        )),
+        OfflineQuestion("enneagram-11", "休息日你最想做的是？", _choices(
+            0.3, ("Type5", "埋首研究古老典籍"), ("Type7", "到處嘗鮮遊玩"),
+            ("Type4", "創作一首只屬於自己的歌"), ("Type2", "拜訪需要照顧的朋友"),
+        )),
+        OfflineQuestion("enneagram-12", "接下一項艱難的委託，你的動力來自？", _choices(
+            0.3, ("Type3", "完成後的成就與名聲"), ("Type8", "掌控局面的快感"),
+            ("Type1", "把事情做對的責任感"), ("Type6", "守護同伴的安全"),
+        )),
+        OfflineQuestion("enneagram-13", "同伴向你傾訴煩惱時，你會？", _choices(
+            0.3, ("Type2", "放下手邊的事全心陪伴"), ("Type9", "安靜地聽他說完"),
+            ("Type5", "幫他分析問題的根源"), ("Type7", "逗他開心轉移注意"),
+        )),
+        OfflineQuestion("enneagram-14", "旅途上看到一片壯麗的星空，你？", _choices(
+            0.3, ("Type4", "感受到難以言喻的觸動"), ("Type9", "靜靜地融入這片寧靜"),
+            ("Type5", "思索星辰運行的規律"), ("Type3", "想著要把這一刻告訴別人"),
+        )),
+        OfflineQuestion("enneagram-15", "如果只能帶一樣東西踏上旅程，你選？", _choices(
+            0.3, ("Type6", "萬無一失的護身符"), ("Type8", "最強的武器"),
+            ("Type7", "一張通往未知的地圖"), ("Type1", "記載正道的戒律之書"),
+        )),
+    ),
+    "gallup": (
+        OfflineQuestion("gallup-1", "接到一座城堡的重建委託，你最想負責？", (
+            ("訂下進度並逐步完成", {"ACH": 0.5, "DIS": 0.3}),
+            ("說服工匠加入團隊", {"WOO": 0.5, "COM": 0.3}),
+            ("讓每位工人各展所長", {"IND": 0.5, "DEV": 0.3}),
+            ("構想城堡未來的樣貌", {"FUT": 0.5, "STR": 0.3}),
+        )),
+        OfflineQuestion("gallup-2", "夥伴陷入低潮時，你會？", (
+            ("陪他一起找出解決辦法", {"RSV": 0.5, "RES": 0.3}),
+            ("分享振奮人心的故事", {"POS": 0.5, "CMU": 0.3}),
+            ("安靜地陪伴與傾聽", {"EMP": 0.5, "REL": 0.3}),
+            ("幫他分析問題的來龍去脈", {"ANA": 0.5, "CTX": 0.3}),
+        )),
+        OfflineQuestion("gallup-3", "在圖書館找到一本禁書，你？", (
+            ("蒐集更多相關資料", {"INP": 0.5, "LEA": 0.3}),
+            ("思考書中理念的意義", {"IDE": 0.5, "ITL": 0.3}),
+            ("確認閱讀它是否合乎規範", {"CON": 0.5, "DEL": 0.3}),
+            ("和大家分享裡面的發現", {"CMU": 0.5, "INC": 0.3}),
+        )),
+        OfflineQuestion("gallup-4", "公會舉辦競技大賽，你？", (
+            ("全力爭取冠軍", {"CPT": 0.5, "SIG": 0.3}),
+            ("第一個報名並帶頭衝", {"ACT": 0.5, "SAD": 0.3}),
+            ("把自己的招式練到完美", {"MAX": 0.5, "FOC": 0.3}),
+            ("協調賽程讓大家都能參加", {"ARR": 0.5, "HAR": 0.3}),
+        )),
+        OfflineQuestion("gallup-5", "踏上一段長途旅行前，你最重視？", (
+            ("備妥所有可能用到的物資", {"DEL": 0.5, "CON": 0.3}),
+            ("安排好每一天的行程", {"DIS": 0.5, "ARR": 0.3}),
+            ("確認旅程的目的與意義", {"BEL": 0.5, "FOC": 0.3}),
+            ("想像旅途中會遇見的人", {"WOO": 0.5, "FUT": 0.3}),
+        )),
+        OfflineQuestion("gallup-6", "新加入的學徒不太適應，你會？", (
+            ("發掘他的長處並給予舞台", {"DEV": 0.5, "IND": 0.3}),
+            ("讓他感覺自己是團隊的一分子", {"INC": 0.5, "REL": 0.3}),
+            ("體會他的不安並溫柔鼓勵", {"EMP": 0.5, "POS": 0.3}),
+            ("給他明確的目標與期限", {"ACH": 0.5, "CMU": 0.3}),
+        )),
+        OfflineQuestion("gallup-7", "一場戰役失利後，你會？", (
+            ("分析失敗的原因", {"ANA": 0.5, "ITL": 0.3}),
+            ("回顧過去類似的戰役找出規律", {"CTX": 0.5, "LEA": 0.3}),
+            ("立刻擬定新的作戰路線", {"STR": 0.5, "ADP": 0.3}),
+            ("負起責任向大家交代", {"RES": 0.5, "BEL": 0.3}),
+        )),
+        OfflineQuestion("gallup-8", "城鎮遭遇突發的災難，你第一時間？", (
+            ("立刻行動搶救", {"ACT": 0.5, "RSV": 0.3}),
+            ("接手指揮穩定秩序", {"CMU": 0.5, "SAD": 0.3}),
+            ("隨機應變處理眼前狀況", {"ADP": 0.5, "ARR": 0.3}),
+            ("讓每個人都知道自己能做什麼", {"INC": 0.5, "DEV": 0.3}),
+        )),
+        OfflineQuestion("gallup-9", "你最喜歡在酒館裡做的事是？", (
+            ("結識新的冒險者", {"WOO": 0.5, "CNR": 0.3}),
+            ("講述精彩的冒險故事", {"COM": 0.5, "POS": 0.3}),
+            ("和老朋友深談", {"REL": 0.5, "EMP": 0.3}),
+            ("打聽各地的傳聞與情報", {"INP": 0.5, "CTX": 0.3}),
+        )),
+        OfflineQuestion("gallup-10", "公會想改革委託制度，你會？", (
+            ("提出全新的制度構想", {"IDE": 0.5, "FUT": 0.3}),
+            ("確保新制度對每個人都公平", {"CON": 0.5, "HAR": 0.3}),
+            ("先研究舊制度的演變歷史", {"CTX": 0.5, "ANA": 0.3}),
+            ("推動大家盡快試行", {"ACT": 0.5, "CPT": 0.3}),
+        )),
+        OfflineQuestion("gallup-11", "你認為自己最珍貴的武器是？", (
+            ("永不停歇的努力", {"ACH": 0.5, "RES": 0.3}),
+            ("說服人心的口才", {"WOO": 0.5, "COM": 0.3}),
+            ("看穿局勢的眼光", {"STR": 0.5, "ANA": 0.3}),
+            ("讓團隊團結的力量", {"HAR": 0.5, "INC": 0.3}),
+        )),
+        OfflineQuestion("gallup-12", "學習一門新的魔法時，你享受的是？", (
+            ("從零到熟練的過程", {"LEA": 0.5, "ACH": 0.3}),
+            ("獨自沉思其中的奧秘", {"ITL": 0.5, "IDE": 0.3}),
+            ("把它練到登峰造極", {"MAX": 0.5, "FOC": 0.3}),
+            ("教會別人一起使用", {"DEV": 0.5, "CMU": 0.3}),
+        )),
+        OfflineQuestion("gallup-13", "看到夥伴陷入爭吵，你會？", (
+            ("找出雙方的共同點化解衝突", {"HAR": 0.5, "CNR": 0.3}),
+            ("冷靜地指出問題所在", {"ANA": 0.5, "RSV": 0.3}),
+            ("用笑聲緩和氣氛", {"POS": 0.5, "WOO": 0.3}),
+            ("提醒大家別忘了共同的目標", {"FOC": 0.5, "BEL": 0.3}),
+        )),
+        OfflineQuestion("gallup-14", "你最想在冒險史上留下的是？", (
+            ("無人能及的偉大功績", {"SIG": 0.5, "CPT": 0.3}),
+            ("一個更美好的未來藍圖", {"FUT": 0.5, "BEL": 0.3}),
+            ("一群彼此信任的夥伴", {"REL": 0.5, "CNR": 0.3}),
+            ("一套傳承後世的知識", {"INP": 0.5, "LEA": 0.3}),
+        )),
+        OfflineQuestion("gallup-15", "面對一次失敗的挑戰，你會告訴自己？", (
+            ("一切都有它的意義", {"CNR": 0.5, "BEL": 0.3}),
+            ("下次一定要贏回來", {"CPT": 0.5, "ACH": 0.3}),
+            ("相信自己能夠做到", {"SAD": 0.5, "POS": 0.3}),
+            ("問題總有辦法解決", {"RSV": 0.5, "ADP": 0.3}),
+        )),
+    ),
+}
+
+_BY_ID: Dict[str, OfflineQuestion] = {
+    question.id: question
+    for questions in OFFLINE_QUESTIONS.values()
+    for question in questions
+}
+
+
+def pick_offline_question(
+    quest_type: str, asked: Iterable[str]
+) -> Optional[OfflineQuestion]:
+    """依序取出本場測驗尚未出過的離線題目；題庫用完時返回 None"""
+    asked = set(asked)
+    for question in OFFLINE_QUESTIONS.get(quest_type, ()):
+        if question.id not in asked:
+            return question
+    return None
+
+
+def asked_offline_ids(interactions: List[Dict[str, Any]]) -> List[str]:
+    return [
+        interaction["question"]["offlineId"]
+        for interaction in interactions
+        if isinstance(interaction.get("question"), dict)
+        and interaction["question"].get("offlineId")
+    ]
+
+
+def score_offline_answer(offline_id: str, answer: str) -> Optional[Dict[str, Any]]:
+    """
+    以選項預設的維度增量計分（可接受選項 id 或選項文字）
+
+    Returns:
+        與 submit_analysis 相同格式的分析結果；題目或選項不存在時返回 None
+    """
+    question = _BY_ID.get(offline_id)
+    if question is None:
+        return None
+    for index, (text, deltas) in enumerate(question.options):
+        if answer in (str(index + 1), text):
+            return {
+                "quality_score": 1.0,
+                "trait_deltas": dict(deltas),
+                "analysis_reason": "離線題庫計分",
+            }
+    return None
@@ -0,0 +1,91 @@
+"""
+離線結算（降級模式）
+
+LLM 斷路器開啟時 Transformation Agent 無法執行，改以累加的維度總分在本地決定測驗結果：
+依 PsychologicalCalculator 的對照規則選出職業 / 種族 / 姿態 / 天賦或換算五大屬性，
+命運指引使用固定文字，命運羈絆省略（QuestReport 中為選填）。
+資產名稱與描述由 game_definitions 查得，查不到時以 ID 代替。
+"""
+
+from typing import Any, Dict, List
+
+from app.core.calculators import PsychologicalCalculator
+from app.core.trait_state import QUEST_DIMENSIONS
+
+OFFLINE_DESTINY_GUIDE = {
+    "daily": "星光暫時黯淡，今天適合放慢腳步，整理手邊的行囊。",
+    "main": "回顧這場試煉中的選擇，找出你最常依循的直覺。",
+    "side": "挑一件平常不會做的小事，觀察自己的反應。",
+    "oracle": "古書記下的答案，終將由你的行動補完。",
+}
+
+# 天賦數量與 Transformation Agent 的輸出一致
+GALLUP_TALENT_COUNT = 6
+
+_calculator = PsychologicalCalculator()
+
+
+def _ranked(quest_type: str, aggregated: Dict[str, float]) -> List[str]:
+    """依總分由高至低排列該測驗的維度（同分依維度清單順序）"""
+    dimensions = QUEST_DIMENSIONS.get(quest_type, ())
+    return sorted(
+        dimensions, key=lambda dim: (-aggregated.get(dim, 0.0), dimensions.index(dim))
+    )
+
+
+def offline_asset_ids(quest_type: str, aggregated: Dict[str, float]) -> List[str]:
+    """本地判定的資產 ID（bigfive 沒有資產，返回空列表）"""
+    if quest_type == "mbti":
+        return [_calculator.map_mbti_to_class(_calculator.get_mbti_type(aggregated))]
+    if quest_type == "enneagram":
+        return [_calculator.map_enneagram_to_race(_ranked(quest_type, aggregated)[0])]
+    if quest_type == "disc":
+        return [_calculator.map_disc_to_stance(_ranked(quest_type, aggregated)[0])]
+    if quest_type == "gallup":
+        return _calculator.map_gallup_to_talents(
+            _ranked(quest_type, aggregated)[:GALLUP_TALENT_COUNT]
+        )
+    return []
+
+
+def build_offline_report(
+    quest_type: str,
+    aggregated: Dict[str, float],
+    assets: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    組成與 submit_transformation 相同格式的轉生報告
+
+    Args:
+        quest_type: 測驗類型
+        aggregated: 依品質加權的維度總分（TraitAccumulator.aggregated）
+        assets: {資產 ID: AssetReference 格式的字典}，通常由 GameAssetsService.get_references 取得
+
+    Returns:
+        Dict[str, Any]: 轉生報告（offline 標記為 True）
+    """
+    report: Dict[str, Any] = {
+        "destiny_guide": dict(OFFLINE_DESTINY_GUIDE),
+        "offline": True,
+    }
+    if quest_type == "bigfive":
+        report["stats"] = _calculator.map_bigfive_to_stats(aggregated)
+        return report
+
+    ids = offline_asset_ids(quest_type, aggregated)
+    references = [
+        assets.get(asset_id) or {"id": asset_id, "name": asset_id, "description": ""}
+        for asset_id in ids
+    ]
+    if quest_type == "gallup":
+        report["talent_ids"] = ids
+        report["talents"] = references
+    elif ids:
+        id_field, object_field = {
+            "mbti": ("class_id", "class"),
+            "enneagram": ("race_id", "race"),
+            "disc": ("stance_id", "stance"),
+        }[quest_type]
+        report[id_field] = ids[0]
+        report[object_field] = references[0]
+    return report
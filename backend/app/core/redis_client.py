@@ -2,6 +2,23 @@ import redis.asyncio as redis
 from app.core.config import settings
 from typing import Optional
 
+# 比對後刪除需在 Redis 端原子執行
+_DELETE_IF_EQUALS = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# 將 Sorted Set 中到期（score <= ARGV[1]）的成員移入 List，多個 Worker 同時執行也不會重複移動
+_PROMOTE_DUE = """
+local due = redis.call('zrangebyscore', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    redis.call('zrem', KEYS[1], member)
+    redis.call('lpush', KEYS[2], member)
+end
+return #due
+"""
 
 class RedisClient:
     def __init__(self):
@@ -56,14 +73,19 @@ class RedisClient:
             await self.connect()
         return await self._redis.get(key)
 
-    async def set(self, key: str, value: str, ex: int = None):
-        """通用 set 方法"""
+    async def set(self, key: str, value: str, ex: int = None, nx: bool = False):
+        """通用 set 方法（nx=True 時僅在 key 不存在時寫入，返回是否寫入）"""
         if not self._redis:
             await self.connect()
         if ex is not None:
-            await self._redis.set(key, value, ex=ex)
-        else:
-            await self._redis.set(key, value)
+            return bool(await self._redis.set(key, value, ex=ex, nx=nx))
+        return bool(await self._redis.set(key, value, nx=nx))
+
+    async def getdel(self, key: str):
+        """取得並刪除 key（一次性的值只會被一個請求取走）"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.getdel(key)
 
     async def delete(self, key: str):
         """通用 delete 方法"""
@@ -71,5 +93,86 @@ class RedisClient:
             await self.connect()
         await self._redis.delete(key)
 
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        """僅在 key 的值仍等於 value 時刪除（避免刪掉其他節點重新寫入的值）"""
+        if not self._redis:
+            await self.connect()
+        return bool(await self._redis.eval(_DELETE_IF_EQUALS, 1, key, value))
+
+    async def hset(self, key: str, field: str, value: str, ex: int = None):
+        """寫入 Hash 欄位，可同時重設整個 key 的 TTL"""
+        if not self._redis:
+            await self.connect()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, value)
+            if ex is not None:
+                pipe.expire(key, ex)
+            await pipe.execute()
+
+    async def hgetall(self, key: str) -> dict:
+        """取得 Hash 全部欄位"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.hgetall(key)
+
+    async def lpush(self, key: str, value: str) -> int:
+        """推入 List 左端（佇列尾端）"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.lpush(key, value)
+
+    async def blmove(self, source: str, destination: str, timeout: float):
+        """
+        阻塞式取出 source 右端（佇列前端）並原子移至 destination 左端
+
+        Returns:
+            取出的值；逾時返回 None
+        """
+        if not self._redis:
+            await self.connect()
+        return await self._redis.blmove(source, destination, timeout, "RIGHT", "LEFT")
+
+    async def lmove(self, source: str, destination: str):
+        """非阻塞版 blmove；source 為空時返回 None"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.lmove(source, destination, "RIGHT", "LEFT")
+
+    async def lrem(self, key: str, value: str) -> int:
+        """自 List 移除所有等於 value 的元素"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.lrem(key, 0, value)
+
+    async def zadd(self, key: str, member: str, score: float) -> int:
+        """寫入 Sorted Set 成員"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.zadd(key, {member: score})
+
+    async def promote_due(
+        self, source: str, destination: str, max_score: float, limit: int = 100
+    ) -> int:
+        """將 source（Sorted Set）中 score 不超過 max_score 的成員原子移入 destination（List）"""
+        if not self._redis:
+            await self.connect()
+        return int(
+            await self._redis.eval(_PROMOTE_DUE, 2, source, destination, max_score, limit)
+        )
+
+    async def publish(self, channel: str, message: str) -> int:
+        """發佈訊息，返回收到訊息的訂閱者數量"""
+        if not self._redis:
+            await self.connect()
+        return await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str):
+        """訂閱頻道，返回 PubSub 物件（使用 listen() 取得訊息，結束時呼叫 aclose()）"""
+        if not self._redis:
+            await self.connect()
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        return pubsub
+
 
 redis_client = RedisClient()
@@ -1,7 +1,44 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.events import Event
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.adk.sessions.session import Session
 
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger("app")
+
+SessionKey = Tuple[str, str, str]
+
+
 class CustomInMemorySessionService(InMemorySessionService):
+    """
+    In-memory Session Service，附帶生命週期回收
+
+    每個 WebSocket session 在 questionnaire / analytics / transformation / summary
+    各有一個 ADK Session（含完整事件紀錄），不回收時常駐 Worker 會持續成長直到 OOM。
+    - 閒置超過 ttl_seconds 的 Session 由 sweep 移除（測驗進度另存於 Redis 存檔，可續玩）
+    - 總數超過 max_sessions 時依最後更新時間淘汰最舊的 Session（LRU）
+    - 結算完成後由 delete_quest_sessions 立即刪除該測驗的所有 Session
+
+    stats 的記憶體用量以每個 Session 的序列化大小快取計算：append_event 只累加新事件的大小，
+    update_session 後才於下次統計時重新序列化該 Session，抓取指標不必每次序列化全部 Session。
+    """
+
+    def __init__(
+        self, ttl_seconds: Optional[float] = None, max_sessions: Optional[int] = None
+    ):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sweeper: Optional[asyncio.Task] = None
+        self._sizes: Dict[SessionKey, int] = {}
+        self._stats_cache: Optional[Tuple[float, Dict[str, Dict[str, int]]]] = None
+
     async def update_session(self, session: Session):
         """
         Manually update session state in the in-memory store.
@@ -10,16 +47,209 @@ class CustomInMemorySessionService(InMemorySessionService):
         # Ensure the session has necessary keys
         if not session.app_name or not session.user_id or not session.id:
              return
-             
+
         # Initialize nested structure if missing
         if session.app_name not in self.sessions:
              self.sessions[session.app_name] = {}
         if session.user_id not in self.sessions[session.app_name]:
              self.sessions[session.app_name][session.user_id] = {}
-             
+
+        # 更新時間作為 TTL / LRU 依據
+        session.last_update_time = time.time()
         # Overwrite with the modified session object
         self.sessions[session.app_name][session.user_id][session.id] = session
+        # state 可能整批改寫，大小於下次統計時重新計算
+        self._sizes.pop((session.app_name, session.user_id, session.id), None)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        """寫入事件，並將事件大小累加到該 Session 的快取用量"""
+        event = await super().append_event(session, event)
+        key = (session.app_name, session.user_id, session.id)
+        if not event.partial and key in self._sizes:
+            self._sizes[key] += len(event.model_dump_json())
+        return event
+
+    def _iter_sessions(self) -> List[Tuple[SessionKey, Session]]:
+        return [
+            ((app_name, user_id, session_id), session)
+            for app_name, users in self.sessions.items()
+            for user_id, user_sessions in users.items()
+            for session_id, session in user_sessions.items()
+        ]
+
+    def _remove(self, app_name: str, user_id: str, session_id: str) -> bool:
+        users = self.sessions.get(app_name)
+        if not users or session_id not in users.get(user_id, {}):
+            return False
+        del users[user_id][session_id]
+        self._sizes.pop((app_name, user_id, session_id), None)
+        # 移除空的巢狀結構，避免大量玩家留下空字典
+        if not users[user_id]:
+            del users[user_id]
+            self.user_state.get(app_name, {}).pop(user_id, None)
+        if not users:
+            del self.sessions[app_name]
+        return True
+
+    async def delete_quest_sessions(self, user_id: str, session_id: str) -> int:
+        """
+        刪除某個測驗在所有 App 命名空間下的 Session（結算完成後呼叫）
+
+        Returns:
+            int: 刪除的 Session 數
+        """
+        removed = sum(
+            self._remove(app_name, user_id, session_id)
+            for app_name in list(self.sessions)
+        )
+        if removed:
+            logger.debug(f"🧹 [Session] 已刪除 {session_id} 的 {removed} 個 Session")
+        return removed
+
+    async def fork_session(
+        self, app_name: str, user_id: str, session_id: str, fork_id: str
+    ) -> Optional[Session]:
+        """
+        以 fork_id 複製一個 Session（含 state 與事件紀錄），供對沖請求各自執行
+
+        Returns:
+            複製出的 Session；來源不存在時返回 None
+        """
+        source = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if source is None:
+            return None
+        fork = source.model_copy(deep=True, update={"id": fork_id})
+        fork.last_update_time = time.time()
+        self.sessions[app_name][user_id][fork_id] = fork
+        return fork
+
+    async def merge_fork(
+        self, app_name: str, user_id: str, session_id: str, fork_id: str, since: int
+    ) -> int:
+        """
+        將複製 Session 第 since 則之後的事件接回原 Session 並刪除複製品
+
+        事件逐一透過 append_event 寫入，state_delta 會套用在原 Session 的最新 state 上，
+        不會覆蓋複製之後由其他任務寫入的欄位。
+
+        Returns:
+            int: 接回的事件數
+        """
+        fork = self.sessions.get(app_name, {}).get(user_id, {}).get(fork_id)
+        target = await self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        if fork is None or target is None:
+            return 0
+        events = fork.events[since:]
+        for event in events:
+            await self.append_event(target, event)
+        self._remove(app_name, user_id, fork_id)
+        return len(events)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        移除閒置超過 TTL 的 Session，並在超出上限時淘汰最久未更新者
+
+        Returns:
+            int: 移除的 Session 數
+        """
+        now = time.time() if now is None else now
+        entries = self._iter_sessions()
+        expired: List[SessionKey] = []
+        if self.ttl_seconds:
+            cutoff = now - self.ttl_seconds
+            expired = [key for key, session in entries if session.last_update_time < cutoff]
+
+        remaining = len(entries) - len(expired)
+        if self.max_sessions is not None and remaining > self.max_sessions:
+            expired_set = set(expired)
+            live = sorted(
+                (session.last_update_time, key)
+                for key, session in entries
+                if key not in expired_set
+            )
+            expired += [key for _, key in live[: remaining - self.max_sessions]]
+
+        removed = sum(self._remove(*key) for key in expired)
+        if removed:
+            logger.info(f"🧹 [Session] 回收 {removed} 個閒置 Session")
+        return removed
+
+    def stats(self, max_age: float = 0.0) -> Dict[str, Dict[str, int]]:
+        """
+        各 App 的 Session 數與約略記憶體用量（以 JSON 序列化大小估算，含事件紀錄）
+
+        只序列化尚未量測過（新建或 update_session 後）的 Session，其餘沿用快取大小。
+
+        Args:
+            max_age: 距上次統計未超過此秒數時直接返回上次結果（同一次抓取的多個指標共用）
+
+        Returns:
+            Dict[str, Dict[str, int]]: {app_name: {"sessions": 數量, "bytes": 位元組}}
+        """
+        now = time.monotonic()
+        if self._stats_cache is not None and now - self._stats_cache[0] < max_age:
+            return self._stats_cache[1]
+
+        report: Dict[str, Dict[str, int]] = {}
+        for key, session in self._iter_sessions():
+            size = self._sizes.get(key)
+            if size is None:
+                size = self._sizes[key] = len(session.model_dump_json())
+            entry = report.setdefault(key[0], {"sessions": 0, "bytes": 0})
+            entry["sessions"] += 1
+            entry["bytes"] += size
+        self._stats_cache = (now, report)
+        return report
+
+    async def start(self, interval: float):
+        """啟動定期回收（於 lifespan 啟動時呼叫）"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(
+                self._sweep_loop(interval), name="session-sweeper"
+            )
+
+    async def stop(self):
+        """停止定期回收（於 lifespan 關閉時呼叫）"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"❌ [Session] 回收失敗：{e}")
+
 
 # 單例模式：提供全域共享的 Session Service
 # 未來可替換為 Redis-backed Session Service
-session_service = CustomInMemorySessionService()
+session_service = CustomInMemorySessionService(
+    ttl_seconds=settings.SESSION_TTL_SECONDS,
+    max_sessions=settings.SESSION_MAX_COUNT,
+)
+
+# 兩個指標在同一次抓取中先後呼叫，共用同一份統計
+STATS_MAX_AGE = 1.0
+
+registry.register_callback(
+    "adk_sessions",
+    "In-memory ADK sessions held by this worker",
+    lambda: {
+        (app,): s["sessions"]
+        for app, s in session_service.stats(STATS_MAX_AGE).items()
+    },
+    labelnames=("app",),
+)
+registry.register_callback(
+    "adk_session_bytes",
+    "Approximate serialized size of in-memory ADK sessions (state + events)",
+    lambda: {
+        (app,): s["bytes"] for app, s in session_service.stats(STATS_MAX_AGE).items()
+    },
+    labelnames=("app",),
+)
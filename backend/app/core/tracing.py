@@ -0,0 +1,159 @@
+"""
+測驗流程的分段延遲追蹤（OpenTelemetry）
+
+以 OpenTelemetry span 包覆 WebSocket 事件、Agent 執行、CacheService 與 DB Session，
+讓單次測驗的延遲可拆解為 DB / Redis / LLM / 序列化等階段。
+
+- 未呼叫 `configure_tracing()` 時使用 OpenTelemetry 的 no-op tracer，幾乎沒有額外成本
+- `span_attributes()` 綁定的屬性（quest.type、ws.event 等）會自動帶入其下所有子 span，
+  包含以 `asyncio.create_task` 建立的背景分析任務
+- 測試可透過 `install_in_memory_exporter()` 取得 InMemorySpanExporter 檢查 span
+"""
+
+import functools
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger("app")
+
+tracer = trace.get_tracer("traitquest")
+
+# 目前請求範圍內、需要帶到每個 span 的共用屬性
+_bound_attributes: ContextVar[Dict[str, Any]] = ContextVar(
+    "trace_bound_attributes", default={}
+)
+
+_in_memory_exporter: Optional[InMemorySpanExporter] = None
+
+
+def _clean(attributes: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """OpenTelemetry 屬性不接受 None，略過缺值欄位"""
+    if not attributes:
+        return {}
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+@contextmanager
+def span_attributes(attributes: Mapping[str, Any]) -> Iterator[None]:
+    """在此範圍內建立的所有 span 都會帶上指定屬性"""
+    token = _bound_attributes.set({**_bound_attributes.get(), **_clean(attributes)})
+    try:
+        yield
+    finally:
+        _bound_attributes.reset(token)
+
+
+def start_span(name: str, attributes: Optional[Mapping[str, Any]] = None):
+    """
+    建立並啟用一個 span（同步 context manager，可跨 await 使用）
+
+    Args:
+        name: span 名稱，例如 "agent.run"、"cache.get"
+        attributes: 此 span 專屬的屬性，會與 `span_attributes()` 綁定的屬性合併
+    """
+    return tracer.start_as_current_span(
+        name, attributes={**_bound_attributes.get(), **_clean(attributes)}
+    )
+
+
+def traced(name: str, attributes: Optional[Mapping[str, Any]] = None):
+    """以 span 包覆 async 函式的裝飾器"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name, attributes):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _get_sdk_provider() -> TracerProvider:
+    """取得全域 SDK TracerProvider，尚未設定時建立一個"""
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME})
+        )
+        trace.set_tracer_provider(provider)
+    return provider
+
+
+def configure_tracing() -> bool:
+    """
+    依設定啟用追蹤（於 lifespan 啟動時呼叫）
+
+    - TRACING_ENABLED=false：維持 no-op，不建立 TracerProvider
+    - 設定 OTEL_EXPORTER_OTLP_ENDPOINT：以 OTLP/HTTP 批次匯出
+    - 未設定 endpoint：批次輸出至控制台（僅供本機觀察）
+
+    Returns:
+        bool: 是否已啟用追蹤
+    """
+    if not settings.TRACING_ENABLED:
+        return False
+
+    provider = _get_sdk_provider()
+
+    if settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            logger.warning(
+                "⚠️ [Tracing] 未安裝 opentelemetry-exporter-otlp-proto-http，改用控制台輸出"
+            )
+            exporter = ConsoleSpanExporter()
+        else:
+            exporter = OTLPSpanExporter(
+                endpoint=f"{settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip('/')}/v1/traces"
+            )
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    logger.info("🔭 [Tracing] 已啟用，匯出器：%s", type(exporter).__name__)
+    return True
+
+
+def shutdown_tracing() -> None:
+    """送出尚未匯出的 span（於 lifespan 關閉時呼叫）"""
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.force_flush()
+
+
+def install_in_memory_exporter() -> InMemorySpanExporter:
+    """
+    掛載同步的 InMemorySpanExporter（供測試使用，重複呼叫回傳同一個實例）
+
+    OpenTelemetry 的全域 TracerProvider 只能設定一次，因此整個測試程序共用同一個 exporter，
+    各測試應自行呼叫 `exporter.clear()`。
+    """
+    global _in_memory_exporter
+
+    if _in_memory_exporter is None:
+        _in_memory_exporter = InMemorySpanExporter()
+        _get_sdk_provider().add_span_processor(
+            SimpleSpanProcessor(_in_memory_exporter)
+        )
+    return _in_memory_exporter
@@ -0,0 +1,173 @@
+"""
+測驗進行中的特徵累加器
+
+每題分析結果送達時以固定時間更新（只觸及該題輸出的維度），不必在結算時重新彙整整份分析列表。
+各測驗類型的維度順序固定，總分與取樣次數以平行陣列保存，可直接放入 Session State 或 JSON；
+由 State 還原時沿用原本的陣列並就地更新，每題只觸及該題的維度而不複製整份狀態。
+
+累加方式與 PsychologicalCalculator.aggregate_traits 相同（增量 × 品質評分）；
+不在該測驗維度清單內的標籤不計入。
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.adaptive import MBTI_AXES
+
+GALLUP_TALENTS = (
+    # 執行力
+    "ACH", "ARR", "BEL", "CON", "DEL", "DIS", "FOC", "RES", "RSV",
+    # 影響力
+    "ACT", "COM", "CMU", "CPT", "MAX", "SAD", "SIG", "WOO",
+    # 關係建立
+    "ADP", "CNR", "DEV", "EMP", "HAR", "INC", "IND", "POS", "REL",
+    # 戰略思維
+    "ANA", "CTX", "FUT", "IDE", "INP", "ITL", "LEA", "STR",
+)
+
+QUEST_DIMENSIONS: Dict[str, Tuple[str, ...]] = {
+    "mbti": tuple(pole for axis in MBTI_AXES for pole in axis),
+    "bigfive": (
+        "Openness",
+        "Conscientiousness",
+        "Extraversion",
+        "Agreeableness",
+        "Neuroticism",
+    ),
+    "enneagram": tuple(f"Type{n}" for n in range(1, 10)),
+    "disc": ("D", "I", "S", "C"),
+    "gallup": GALLUP_TALENTS,
+}
+
+
+class TraitAccumulator:
+    """單場測驗的累加特徵總分、各維度取樣次數與品質評分總和"""
+
+    def __init__(
+        self,
+        quest_type: str,
+        totals: Optional[List[float]] = None,
+        counts: Optional[List[int]] = None,
+        quality_sum: float = 0.0,
+        indices: Optional[List[int]] = None,
+    ):
+        self.quest_type = quest_type
+        self.dimensions = QUEST_DIMENSIONS.get(quest_type, ())
+        self._positions = {dim: pos for pos, dim in enumerate(self.dimensions)}
+        size = len(self.dimensions)
+        # 傳入的列表不複製，add 直接更新（from_state 時即為 Session State 中的陣列）
+        self.totals = totals if totals is not None else [0.0] * size
+        self.counts = counts if counts is not None else [0] * size
+        self.quality_sum = quality_sum
+        # 已累加的題號（依序保存於 State），另以集合辨識重送答案
+        self.indices = indices if indices is not None else []
+        self._seen = set(self.indices)
+
+    @property
+    def answers(self) -> int:
+        return len(self.indices)
+
+    @property
+    def avg_quality(self) -> float:
+        return self.quality_sum / self.answers if self.answers else 1.0
+
+    def add(self, result: Dict[str, Any], question_index: int) -> bool:
+        """
+        累加一題的分析結果
+
+        Returns:
+            bool: 該題已累加過時返回 False（不重複累加，呼叫端需以逐題結果重建）
+        """
+        if question_index in self._seen:
+            return False
+        quality = result.get("quality_score", 1.0)
+        for trait, delta in (result.get("trait_deltas") or {}).items():
+            pos = self._positions.get(trait)
+            if pos is not None:
+                self.totals[pos] += delta * quality
+                self.counts[pos] += 1
+        self.quality_sum += quality
+        self.indices.append(question_index)
+        self._seen.add(question_index)
+        return True
+
+    def aggregated(self) -> Dict[str, float]:
+        """已取樣維度的總分（格式同 PsychologicalCalculator.aggregate_traits）"""
+        return {
+            dim: round(total, 4)
+            for dim, total, count in zip(self.dimensions, self.totals, self.counts)
+            if count
+        }
+
+    def under_sampled(self, limit: int = 2) -> List[str]:
+        """
+        取樣次數低於平均的維度（MBTI 以軸為單位，例如 "J/P"），依次數由少至多
+
+        Args:
+            limit: 最多回傳數量
+        """
+        if self.quest_type == "mbti":
+            groups = [
+                (f"{a}/{b}", self.counts[self._positions[a]] + self.counts[self._positions[b]])
+                for a, b in MBTI_AXES
+            ]
+        else:
+            groups = list(zip(self.dimensions, self.counts))
+        if not groups or not self.answers:
+            return []
+        mean = sum(count for _, count in groups) / len(groups)
+        lacking = sorted(
+            (group for group in groups if group[1] < mean), key=lambda group: group[1]
+        )
+        return [name for name, _ in lacking[:limit]]
+
+    def to_state(self) -> Dict[str, Any]:
+        """返回引用同一組陣列的 State（不複製；總分於 aggregated 輸出時才四捨五入）"""
+        return {
+            "quest_type": self.quest_type,
+            "totals": self.totals,
+            "counts": self.counts,
+            "quality_sum": self.quality_sum,
+            "indices": self.indices,
+        }
+
+    @classmethod
+    def from_state(cls, data: Dict[str, Any]) -> "TraitAccumulator":
+        return cls(
+            data["quest_type"],
+            totals=data["totals"],
+            counts=data["counts"],
+            quality_sum=data["quality_sum"],
+            indices=data["indices"],
+        )
+
+    @classmethod
+    def from_analytics(
+        cls, quest_type: str, analytics: Iterable[Tuple[int, Dict[str, Any]]]
+    ) -> "TraitAccumulator":
+        """由 (題號, 分析結果) 重建（續玩或重送答案時使用）"""
+        accumulator = cls(quest_type)
+        for question_index, result in analytics:
+            accumulator.add(result, question_index)
+        return accumulator
+
+
+def fold_trait_state(
+    state: Dict[str, Any], quest_type: str, question_index: int, result: Dict[str, Any]
+) -> bool:
+    """
+    將一題的分析結果累加進 Session State 的 `trait_state`
+
+    既有的 trait_state 就地更新陣列，不重建整份狀態。
+
+    Returns:
+        bool: 該題已累加過（重送答案）時返回 False，需以 from_analytics 重建
+    """
+    data = state.get("trait_state")
+    if data and data.get("quest_type") == quest_type:
+        accumulator = TraitAccumulator.from_state(data)
+    else:
+        accumulator = TraitAccumulator(quest_type)
+    if not accumulator.add(result, question_index):
+        return False
+    state["trait_state"] = accumulator.to_state()
+    return True
@@ -23,6 +23,7 @@ class UserQuest(Base):
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    session_id = Column(String, unique=True)  # WebSocket Session ID，確保每場測驗只結算一次
     quest_type = Column(String)  # mbti, big5, disc, enneagram, gallup
     interactions = Column(JSONB, default=list)  # List of dialogue objects
     quest_report = Column(JSONB, default=dict)  # 單次測驗報告
@@ -1,12 +1,50 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.metrics import registry
+from app.core.tracing import start_span
 
 engine = create_async_engine(settings.DATABASE_URL, echo=False)
 
+
+class TracedAsyncSession(AsyncSession):
+    """為 execute / commit 建立 db.* span 的 AsyncSession"""
+
+    async def execute(self, statement, *args, **kwargs):
+        operation = getattr(statement, "__visit_name__", "text").upper()
+        with start_span("db.execute", {"db.operation": operation}) as span:
+            # 編譯 SQL 字串有成本，僅在 span 實際被記錄時才做
+            if span.is_recording():
+                span.set_attribute("db.statement", str(statement)[:500])
+            return await super().execute(statement, *args, **kwargs)
+
+    async def commit(self):
+        with start_span("db.commit"):
+            return await super().commit()
+
+
+def db_pool_stats() -> dict:
+    """連線池狀態（非 QueuePool 時只回傳可取得的欄位）"""
+    pool = engine.pool
+    stats = {}
+    for field in ("size", "checkedin", "checkedout", "overflow"):
+        getter = getattr(pool, field, None)
+        if callable(getter):
+            stats[field] = getter()
+    return stats
+
+
+registry.register_callback(
+    "db_pool_connections",
+    "SQLAlchemy connection pool state (size, checkedin, checkedout, overflow)",
+    lambda: {(state,): value for state, value in db_pool_stats().items()},
+    labelnames=("state",),
+)
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
-    class_=AsyncSession,
+    class_=TracedAsyncSession,
     expire_on_commit=False,
 )
 
@@ -4,22 +4,42 @@ import traceback
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from pydantic import ValidationError
 from app.api import auth, quest, quest_ws, map
-from app.core.logging_config import configure_logging
+from app.core.logging_config import (
+    configure_logging,
+    get_dropped_log_count,
+    shutdown_logging,
+)
 from sqlalchemy import text
 from app.db.session import engine
 from app.core.redis_client import redis_client
+from app.core.llm import llm_transport
+from app.core.llm_tracing import configure_llm_tracing
+from app.core.tracing import configure_tracing, shutdown_tracing
+from app.core.metrics import HTTP_REQUEST_DURATION, registry
 from app.core.config import settings
+from app.core.background import background_tasks
+from app.core.session import session_service
+from app.api.quest_utils import manager
 from pathlib import Path
 
 # 定義靜態檔案目錄
 STATIC_DIR = Path("/app/static")
 
+
+def setup_logging() -> None:
+    configure_logging(
+        log_file=settings.LOG_FILE_PATH,
+        json_logs=settings.LOG_JSON,
+        queue_maxsize=settings.LOG_QUEUE_MAXSIZE,
+    )
+
+
 # Initialize logging
-configure_logging(log_file=settings.LOG_FILE_PATH)
+setup_logging()
 logger = logging.getLogger("app")
 
 
@@ -28,14 +48,20 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("--- 🌌 TraitQuest 啟動中：正在檢測連線 ---")
 
-    # Enable LiteLLM debug mode for troubleshooting
-    import litellm
+    # Configure logging
+    setup_logging()
 
-    litellm._turn_on_debug()
-    logger.info("🔧 [LiteLLM] Debug 模式已啟用")
+    # 取樣式 LLM 追蹤（取代常駐的 LiteLLM debug 模式）
+    configure_llm_tracing()
+    logger.info(
+        f"🔭 [LiteLLM] 取樣追蹤已啟用 (sample_rate={settings.LLM_TRACE_SAMPLE_RATE})"
+    )
 
-    # Configure logging
-    configure_logging(log_file=settings.LOG_FILE_PATH)
+    # 分段延遲追蹤（TRACING_ENABLED=false 時為 no-op）
+    configure_tracing()
+
+    # 掛載 LLM 共用連線池（每次啟動都需重新掛載，shutdown 時會關閉並清除）
+    llm_transport.install()
 
     # Test PostgreSQL
     try:
@@ -53,14 +79,40 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ [Redis] 連線失敗：{str(e)}")
 
+    # 訂閱本節點的 WebSocket 事件頻道（其他 Worker 產生的事件經 Redis 轉送）
+    await manager.start()
+
+    # 定期回收閒置的 in-memory ADK Session
+    await session_service.start(settings.SESSION_SWEEP_INTERVAL)
+
     yield
 
     # Shutdown
     logger.info("--- 🌑 TraitQuest 已關閉 ---")
 
+    # 等待背景分析任務完成（需要 Redis 與 LLM 連線池，須在兩者關閉前執行）
+    await background_tasks.drain(timeout=settings.BACKGROUND_DRAIN_TIMEOUT)
+
+    # 停止 WebSocket 事件頻道訂閱與 Session 回收
+    await manager.stop()
+    await session_service.stop()
+
     # Shutdown Redis
     await redis_client.disconnect()
 
+    # 關閉 LLM 共用連線池
+    logger.info(f"📊 [LLM] 連線統計：{llm_transport.snapshot()}")
+    await llm_transport.aclose()
+
+    # 送出尚未匯出的 span
+    shutdown_tracing()
+
+    # 寫出背景佇列中剩餘的日誌並停止 QueueListener
+    dropped = get_dropped_log_count()
+    if dropped:
+        logger.warning("⚠️ [Logging] 佇列滿載，共丟棄 %d 筆日誌", dropped)
+    shutdown_logging()
+
 
 app = FastAPI(title="TraitQuest API", version="1.0.0", lifespan=lifespan)
 
@@ -71,6 +123,25 @@ app.include_router(quest.router, prefix="/v1")
 app.include_router(map.router, prefix="/v1")
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """依路由樣板（而非實際路徑）記錄 HTTP 延遲，避免 label 數量爆增"""
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start_time,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     # Skip WebSocket requests - they use a different scope type
@@ -200,6 +271,23 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.METRICS_ENABLED:
+
+    registry.register_callback(
+        "logging_dropped_records_total",
+        "Log records dropped because the background log queue was full",
+        get_dropped_log_count,
+        kind="counter",
+    )
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus 指標（text exposition format 0.0.4）"""
+        return PlainTextResponse(
+            registry.render(), media_type="text/plain; version=0.0.4"
+        )
+
+
 @app.get("/api/health")
 async def api_health_check():
     """健康檢查端點（Docker 容器使用）"""
@@ -6,22 +6,53 @@ Redis 快取服務
 
 import json
 import logging
+import uuid
 from datetime import timedelta
-from typing import Optional
+from typing import Dict, Optional
 
+from opentelemetry import trace
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
 from app.core.redis_client import redis_client
+from app.core.tracing import traced
 
 logger = logging.getLogger("app")
 
 # TTL 設定
 USER_PROFILE_TTL = timedelta(hours=1)
 ANALYTICS_RESULT_TTL = timedelta(minutes=5)
+QUEST_CHECKPOINT_TTL = timedelta(hours=24)
+QUEST_RESULT_TTL = timedelta(hours=24)
+
+
+def _finalize_lock_ttl() -> timedelta:
+    """結算鎖 TTL：Transformation 與 Summary 兩個 Agent 的執行期限總和，再加上資料庫寫入的餘裕"""
+    deadlines = sum(
+        settings.AGENT_DEADLINES.get(name, settings.AGENT_DEADLINE_SECONDS)
+        for name in ("transformation_agent", "summary_agent")
+    )
+    return timedelta(seconds=deadlines + 60)
+
+
+# 結算鎖：涵蓋整個結算流程的最長時間，持有者當機時自動釋放
+QUEST_RESULT_LOCK_TTL = _finalize_lock_ttl()
+# 預先生成的開場題目：玩家通常在進入區域後數秒內開始測驗
+PREWARM_QUESTION_TTL = timedelta(minutes=10)
+# 開場題目生成標記：涵蓋一次出題的執行期限，生成中的 Worker 當機時自動釋放
+PREWARM_CLAIM_TTL = timedelta(
+    seconds=settings.AGENT_DEADLINES.get(
+        "questionnaire_agent", settings.AGENT_DEADLINE_SECONDS
+    )
+    + 30
+)
 
 
 class CacheService:
     """快取服務類"""
 
     @staticmethod
+    @traced("cache.get", {"cache.family": "user_profile"})
     async def get_user_profile(user_id: str) -> Optional[dict]:
         """
         獲取用戶快取資料
@@ -35,15 +66,19 @@ class CacheService:
         key = f"user_profile:{user_id}"
         try:
             data = await redis_client.get(key)
+            trace.get_current_span().set_attribute("cache.hit", bool(data))
+            record_cache_lookup("user_profile", bool(data))
             if data:
                 logger.info(f"💾 [Redis Cache Hit] user_profile for {user_id[:8]}...")
                 return json.loads(data)
             return None
         except Exception as e:
+            record_cache_lookup("user_profile", None)
             logger.warning(f"Redis get user_profile failed: {e}")
             return None
 
     @staticmethod
+    @traced("cache.set", {"cache.family": "user_profile"})
     async def set_user_profile(user_id: str, profile: dict):
         """
         快取用戶資料
@@ -64,6 +99,7 @@ class CacheService:
             logger.warning(f"Redis set user_profile failed: {e}")
 
     @staticmethod
+    @traced("cache.delete", {"cache.family": "user_profile"})
     async def invalidate_user_profile(user_id: str):
         """
         清除用戶快取
@@ -81,6 +117,7 @@ class CacheService:
             logger.warning(f"Redis delete user_profile failed: {e}")
 
     @staticmethod
+    @traced("cache.get", {"cache.family": "analytics_result"})
     async def get_analytics_result(session_id: str) -> Optional[dict]:
         """
         獲取分析結果快取
@@ -94,6 +131,8 @@ class CacheService:
         key = f"analytics_result:{session_id}"
         try:
             data = await redis_client.get(key)
+            trace.get_current_span().set_attribute("cache.hit", bool(data))
+            record_cache_lookup("analytics_result", bool(data))
             if data:
                 logger.debug(
                     f"💾 [Redis Cache Hit] analytics_result for {session_id[:8]}..."
@@ -101,10 +140,12 @@ class CacheService:
                 return json.loads(data)
             return None
         except Exception as e:
+            record_cache_lookup("analytics_result", None)
             logger.warning(f"Redis get analytics_result failed: {e}")
             return None
 
     @staticmethod
+    @traced("cache.set", {"cache.family": "analytics_result"})
     async def set_analytics_result(session_id: str, result: dict):
         """
         快取分析結果 (TTL 5 分鐘)
@@ -127,6 +168,7 @@ class CacheService:
             logger.warning(f"Redis set analytics_result failed: {e}")
 
     @staticmethod
+    @traced("cache.delete", {"cache.family": "analytics_result"})
     async def invalidate_analytics_result(session_id: str):
         """
         清除分析結果快取
@@ -142,3 +184,289 @@ class CacheService:
             )
         except Exception as e:
             logger.warning(f"Redis delete analytics_result failed: {e}")
+
+    @staticmethod
+    @traced("cache.get", {"cache.family": "quest_checkpoint"})
+    async def get_quest_checkpoint(session_id: str) -> Optional[dict]:
+        """
+        獲取測驗進度存檔
+
+        Args:
+            session_id: WebSocket Session ID
+
+        Returns:
+            測驗進度字典，若不存在則返回 None
+        """
+        key = f"quest_checkpoint:{session_id}"
+        try:
+            data = await redis_client.get(key)
+            trace.get_current_span().set_attribute("cache.hit", bool(data))
+            record_cache_lookup("quest_checkpoint", bool(data))
+            if data:
+                return json.loads(data)
+            return None
+        except Exception as e:
+            record_cache_lookup("quest_checkpoint", None)
+            logger.warning(f"Redis get quest_checkpoint failed: {e}")
+            return None
+
+    @staticmethod
+    @traced("cache.set", {"cache.family": "quest_checkpoint"})
+    async def set_quest_checkpoint(session_id: str, checkpoint: dict):
+        """
+        儲存測驗進度存檔 (TTL 24 小時)
+
+        Args:
+            session_id: WebSocket Session ID
+            checkpoint: 測驗進度字典
+        """
+        key = f"quest_checkpoint:{session_id}"
+        try:
+            await redis_client.set(
+                key,
+                json.dumps(checkpoint, default=str),
+                ex=int(QUEST_CHECKPOINT_TTL.total_seconds()),
+            )
+            logger.debug(
+                f"💾 [Redis Cache Set] quest_checkpoint for {session_id[:8]}..."
+            )
+        except Exception as e:
+            logger.warning(f"Redis set quest_checkpoint failed: {e}")
+
+    @staticmethod
+    @traced("cache.delete", {"cache.family": "quest_checkpoint"})
+    async def delete_quest_checkpoint(session_id: str):
+        """
+        清除測驗進度存檔
+
+        Args:
+            session_id: WebSocket Session ID
+        """
+        key = f"quest_checkpoint:{session_id}"
+        try:
+            await redis_client.delete(key)
+            logger.debug(
+                f"💾 [Redis Cache Invalidate] quest_checkpoint for {session_id[:8]}..."
+            )
+        except Exception as e:
+            logger.warning(f"Redis delete quest_checkpoint failed: {e}")
+
+    @staticmethod
+    @traced("cache.set", {"cache.family": "quest_analytics"})
+    async def add_quest_analytics(session_id: str, question_index: int, result: dict):
+        """
+        以題號保存單題分析結果（同一題重送只保留最新一筆，TTL 24 小時）
+
+        Args:
+            session_id: WebSocket Session ID
+            question_index: 題號（從 0 開始）
+            result: 分析結果字典
+        """
+        key = f"quest_analytics:{session_id}"
+        try:
+            await redis_client.hset(
+                key,
+                str(question_index),
+                json.dumps(result, default=str),
+                ex=int(QUEST_CHECKPOINT_TTL.total_seconds()),
+            )
+        except Exception as e:
+            logger.warning(f"Redis hset quest_analytics failed: {e}")
+
+    @staticmethod
+    @traced("cache.get", {"cache.family": "quest_analytics"})
+    async def get_quest_analytics_by_index(session_id: str) -> Optional[Dict[int, dict]]:
+        """
+        取得本次測驗已完成的分析結果（以題號為 key）
+
+        Returns:
+            {題號: 分析結果}；Redis 無法使用時返回 None
+        """
+        key = f"quest_analytics:{session_id}"
+        try:
+            data = await redis_client.hgetall(key)
+            record_cache_lookup("quest_analytics", bool(data))
+            return {int(index): json.loads(value) for index, value in data.items()}
+        except Exception as e:
+            record_cache_lookup("quest_analytics", None)
+            logger.warning(f"Redis hgetall quest_analytics failed: {e}")
+            return None
+
+    @staticmethod
+    async def get_quest_analytics(session_id: str) -> Optional[list]:
+        """
+        依題號順序取得本次測驗已完成的分析結果
+
+        Returns:
+            分析結果列表；Redis 無法使用時返回 None
+        """
+        by_index = await CacheService.get_quest_analytics_by_index(session_id)
+        if by_index is None:
+            return None
+        return [by_index[index] for index in sorted(by_index)]
+
+    @staticmethod
+    @traced("cache.delete", {"cache.family": "quest_analytics"})
+    async def delete_quest_analytics(session_id: str):
+        """清除本次測驗的分析結果"""
+        try:
+            await redis_client.delete(f"quest_analytics:{session_id}")
+        except Exception as e:
+            logger.warning(f"Redis delete quest_analytics failed: {e}")
+
+    @staticmethod
+    @traced("cache.get", {"cache.family": "quest_result"})
+    async def get_quest_result(user_id: str, session_id: str) -> Optional[dict]:
+        """
+        獲取已完成的結算結果
+
+        Args:
+            user_id: 玩家 ID（結果只對同一位玩家可見）
+            session_id: WebSocket Session ID
+
+        Returns:
+            final_result 內容，若不存在則返回 None
+        """
+        key = f"quest_result:{user_id}:{session_id}"
+        try:
+            data = await redis_client.get(key)
+            trace.get_current_span().set_attribute("cache.hit", bool(data))
+            record_cache_lookup("quest_result", bool(data))
+            if data:
+                return json.loads(data)
+            return None
+        except Exception as e:
+            record_cache_lookup("quest_result", None)
+            logger.warning(f"Redis get quest_result failed: {e}")
+            return None
+
+    @staticmethod
+    @traced("cache.set", {"cache.family": "quest_result"})
+    async def set_quest_result(user_id: str, session_id: str, result: dict):
+        """
+        保存結算結果 (TTL 24 小時)，重送 request_result 時直接返回
+
+        Args:
+            user_id: 玩家 ID
+            session_id: WebSocket Session ID
+            result: final_result 內容
+        """
+        key = f"quest_result:{user_id}:{session_id}"
+        try:
+            await redis_client.set(
+                key,
+                json.dumps(result, ensure_ascii=False, default=str),
+                ex=int(QUEST_RESULT_TTL.total_seconds()),
+            )
+        except Exception as e:
+            logger.warning(f"Redis set quest_result failed: {e}")
+
+    @staticmethod
+    async def acquire_quest_result_lock(user_id: str, session_id: str) -> Optional[str]:
+        """
+        取得結算鎖，避免同一場測驗同時結算兩次
+
+        Returns:
+            鎖的 token（釋放時需帶入）；已被其他請求持有時返回 None。
+            Redis 無法使用時仍返回 token（由資料庫唯一索引把關）
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_client.set(
+                f"quest_result_lock:{user_id}:{session_id}",
+                token,
+                ex=int(QUEST_RESULT_LOCK_TTL.total_seconds()),
+                nx=True,
+            )
+            return token if acquired else None
+        except Exception as e:
+            logger.warning(f"Redis set quest_result_lock failed: {e}")
+            return token
+
+    @staticmethod
+    async def release_quest_result_lock(user_id: str, session_id: str, token: str):
+        """釋放結算鎖（鎖已逾時並由其他請求取得時不刪除）"""
+        try:
+            await redis_client.delete_if_equals(
+                f"quest_result_lock:{user_id}:{session_id}", token
+            )
+        except Exception as e:
+            logger.warning(f"Redis delete quest_result_lock failed: {e}")
+
+    @staticmethod
+    @traced("cache.set", {"cache.family": "prewarm_question"})
+    async def set_prewarmed_question(user_id: str, quest_id: str, data: dict):
+        """
+        保存預先生成的開場題目 (TTL 10 分鐘)
+
+        Args:
+            user_id: 玩家 ID
+            quest_id: 測驗類型
+            data: 生成時的指令、結果與對話事件
+        """
+        key = f"prewarm_question:{user_id}:{quest_id}"
+        try:
+            await redis_client.set(
+                key,
+                json.dumps(data, ensure_ascii=False, default=str),
+                ex=int(PREWARM_QUESTION_TTL.total_seconds()),
+            )
+        except Exception as e:
+            logger.warning(f"Redis set prewarm_question failed: {e}")
+
+    @staticmethod
+    @traced("cache.get", {"cache.family": "prewarm_question"})
+    async def take_prewarmed_question(user_id: str, quest_id: str) -> Optional[dict]:
+        """
+        取走預先生成的開場題目（取出即刪除，每份題目只用於一場測驗）
+
+        Returns:
+            預先生成的資料，不存在或已過期時返回 None
+        """
+        key = f"prewarm_question:{user_id}:{quest_id}"
+        try:
+            data = await redis_client.getdel(key)
+            record_cache_lookup("prewarm_question", bool(data))
+            return json.loads(data) if data else None
+        except Exception as e:
+            record_cache_lookup("prewarm_question", None)
+            logger.warning(f"Redis getdel prewarm_question failed: {e}")
+            return None
+
+    @staticmethod
+    async def claim_prewarm(user_id: str, quest_id: str) -> bool:
+        """
+        取得開場題目的生成標記（SET NX），避免多個 Worker 同時為同一位玩家生成
+
+        Returns:
+            bool: 是否取得標記；Redis 無法使用時返回 True（改由本機去重）
+        """
+        try:
+            return bool(
+                await redis_client.set(
+                    f"prewarm_claim:{user_id}:{quest_id}",
+                    "1",
+                    ex=int(PREWARM_CLAIM_TTL.total_seconds()),
+                    nx=True,
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Redis set prewarm_claim failed: {e}")
+            return True
+
+    @staticmethod
+    async def release_prewarm(user_id: str, quest_id: str):
+        """生成結束後釋放生成標記"""
+        try:
+            await redis_client.delete(f"prewarm_claim:{user_id}:{quest_id}")
+        except Exception as e:
+            logger.warning(f"Redis delete prewarm_claim failed: {e}")
+
+    @staticmethod
+    async def has_prewarmed_question(user_id: str, quest_id: str) -> bool:
+        """是否已有尚未過期的預先生成題目"""
+        try:
+            return bool(await redis_client.get(f"prewarm_question:{user_id}:{quest_id}"))
+        except Exception as e:
+            logger.warning(f"Redis get prewarm_question failed: {e}")
+            return False
@@ -37,6 +37,45 @@ class GameAssetsService:
             
             return assets
 
+    @staticmethod
+    async def get_references(ids: list[str]) -> dict[str, dict]:
+        """
+        以 ID 查詢資產，組成 AssetReference 格式的字典（離線結算使用）
+
+        Returns:
+            {資產 ID: {"id", "name", "description"[, "origin"]}}；查詢失敗時返回空字典
+        """
+        if not ids:
+            return {}
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(
+                        GameDefinition.id,
+                        GameDefinition.category,
+                        GameDefinition.name,
+                        GameDefinition.metadata_info,
+                    ).where(GameDefinition.id.in_(ids))
+                )
+                rows = result.all()
+        except Exception as e:
+            logger.warning(f"⚠️ 查詢遊戲資產失敗：{e}")
+            return {}
+
+        references = {}
+        for asset_id, category, name, metadata in rows:
+            metadata = metadata or {}
+            reference = {
+                "id": asset_id,
+                "name": name or asset_id,
+                "description": metadata.get("traits") or metadata.get("description") or "",
+            }
+            if category == "talent":
+                reference["origin"] = metadata.get("original")
+                reference["description"] = reference["description"] or metadata.get("domain", "")
+            references[asset_id] = reference
+        return references
+
     @staticmethod
     async def get_truth_list_dump() -> str:
         """
@@ -0,0 +1,239 @@
+"""
+結算工作佇列（Redis List）
+
+WebSocket Worker 以 enqueue 送出結算工作，Job Worker（`python -m app.worker`）以 run 取出並執行。
+
+- 可靠佇列：工作以 BLMOVE 原子移入該 Worker 的處理中列表，完成後才移除；
+  Worker 當機重啟時（相同 JOB_WORKER_ID）會先將處理中列表放回佇列
+- 冪等：以 user_id + session_id 為 key 記錄工作狀態，同一場測驗重複請求不會重複排入；
+  已完成的結果保存 24 小時，重送 request_result 直接取回（只有同一位玩家取得到）
+- 並行：每個 Job Worker 最多同時執行 JOB_CONCURRENCY 個工作（LLM 呼叫以等待為主）
+- 重試：失敗時依指數退避寫入延遲佇列（Sorted Set，score 為到期時間），到期後才移回佇列，
+  等待期間不佔用執行名額；超過 JOB_MAX_ATTEMPTS 後標記失敗並通知玩家
+"""
+
+import asyncio
+import json
+import logging
+import socket
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger("app")
+
+FINALIZE_QUEUE = "jobs:finalize"
+DELAYED_QUEUE = f"{FINALIZE_QUEUE}:delayed"
+JOB_STATE_TTL = timedelta(hours=24)
+
+# 工作狀態
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JobHandler = Callable[..., Awaitable[Dict[str, Any]]]
+Notifier = Callable[[str, str, dict], Awaitable[None]]
+
+
+class FinalizeJobQueue:
+    """以 user_id + session_id 去重的結算工作佇列"""
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or settings.JOB_WORKER_ID or socket.gethostname()
+
+    @property
+    def processing_key(self) -> str:
+        return f"{FINALIZE_QUEUE}:processing:{self.worker_id}"
+
+    @staticmethod
+    def _state_key(user_id: str, session_id: str) -> str:
+        return f"job:finalize:{user_id}:{session_id}"
+
+    @staticmethod
+    def _result_key(user_id: str, session_id: str) -> str:
+        return f"job:finalize:{user_id}:{session_id}:result"
+
+    @staticmethod
+    def _owner(job: dict) -> str:
+        # 升級前排入的工作沒有 user_id 欄位，改取結算參數中的 user_id
+        return job.get("user_id") or job["payload"]["user_id"]
+
+    async def _set_state(self, user_id: str, session_id: str, state: str):
+        await redis_client.set(
+            self._state_key(user_id, session_id),
+            state,
+            ex=int(JOB_STATE_TTL.total_seconds()),
+        )
+
+    async def enqueue(
+        self, user_id: str, session_id: str, payload: Dict[str, Any]
+    ) -> str:
+        """
+        排入結算工作（同一 session 只會排入一次，失敗後可再次排入）
+
+        Returns:
+            str: 工作狀態；新排入為 queued，否則為既有工作的狀態
+        """
+        created = await redis_client.set(
+            self._state_key(user_id, session_id),
+            JOB_QUEUED,
+            ex=int(JOB_STATE_TTL.total_seconds()),
+            nx=True,
+        )
+        if not created:
+            state = await redis_client.get(self._state_key(user_id, session_id))
+            if state != JOB_FAILED:
+                return state or JOB_QUEUED
+            await self._set_state(user_id, session_id, JOB_QUEUED)
+
+        job = {
+            "user_id": user_id,
+            "session_id": session_id,
+            "attempts": 0,
+            "payload": payload,
+        }
+        await redis_client.lpush(FINALIZE_QUEUE, json.dumps(job, default=str))
+        logger.info(f"📮 [Jobs] Finalize job queued: {session_id}")
+        return JOB_QUEUED
+
+    async def get_result(
+        self, user_id: str, session_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """取得已完成工作的結果"""
+        data = await redis_client.get(self._result_key(user_id, session_id))
+        return json.loads(data) if data else None
+
+    async def recover(self) -> int:
+        """將本 Worker 上次未完成的工作放回佇列"""
+        recovered = 0
+        while await redis_client.lmove(self.processing_key, FINALIZE_QUEUE):
+            recovered += 1
+        if recovered:
+            logger.warning(f"♻️ [Jobs] 回收 {recovered} 個未完成的結算工作")
+        return recovered
+
+    async def promote_due(self, now: Optional[float] = None) -> int:
+        """將到期的重試工作自延遲佇列移回佇列"""
+        now = time.time() if now is None else now
+        return await redis_client.promote_due(DELAYED_QUEUE, FINALIZE_QUEUE, now)
+
+    async def run(
+        self,
+        handler: JobHandler,
+        notify: Notifier,
+        stop: Optional[asyncio.Event] = None,
+        poll_timeout: float = 1.0,
+        concurrency: Optional[int] = None,
+    ):
+        """
+        持續取出並執行工作，直到 stop 被設定（結束前等待執行中的工作完成）
+
+        Args:
+            handler: 以 payload 關鍵字參數呼叫，返回 final_result 內容
+            notify: 通知玩家的函式，簽章同 ConnectionManager.send_event
+            concurrency: 同時執行的工作上限（預設 JOB_CONCURRENCY）
+        """
+        stop = stop or asyncio.Event()
+        slots = asyncio.Semaphore(max(concurrency or settings.JOB_CONCURRENCY, 1))
+        running: Set[asyncio.Task] = set()
+
+        async def execute(raw: str):
+            try:
+                await self.process(raw, handler, notify)
+            except Exception as e:
+                logger.error(f"❌ [Jobs] 執行工作失敗：{e}")
+            finally:
+                slots.release()
+
+        await self.recover()
+        logger.info(f"🛠️ [Jobs] Worker {self.worker_id} 開始處理 {FINALIZE_QUEUE}")
+        try:
+            while not stop.is_set():
+                # 名額用完時等待任一工作完成，才從佇列取出下一個工作
+                await slots.acquire()
+                try:
+                    await self.promote_due()
+                    raw = await redis_client.blmove(
+                        FINALIZE_QUEUE, self.processing_key, poll_timeout
+                    )
+                except Exception as e:
+                    slots.release()
+                    logger.error(f"❌ [Jobs] 讀取佇列失敗：{e}")
+                    await asyncio.sleep(poll_timeout)
+                    continue
+                if raw is None:
+                    slots.release()
+                    continue
+                task = asyncio.create_task(execute(raw), name=f"job:{FINALIZE_QUEUE}")
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+    async def process(self, raw: str, handler: JobHandler, notify: Notifier):
+        """執行單一工作；無論成功與否都會自處理中列表移除"""
+        job = json.loads(raw)
+        user_id = self._owner(job)
+        session_id = job["session_id"]
+        try:
+            # 已完成（例如重試前其實已成功）的工作只重送結果
+            if await redis_client.get(self._state_key(user_id, session_id)) == JOB_DONE:
+                result = await self.get_result(user_id, session_id)
+                if result is not None:
+                    await notify(session_id, "final_result", result)
+                    return
+
+            await self._set_state(user_id, session_id, JOB_RUNNING)
+            try:
+                result = await handler(**job["payload"])
+            except Exception as e:
+                await self._retry(job, e, notify)
+                return
+
+            await redis_client.set(
+                self._result_key(user_id, session_id),
+                json.dumps(result, ensure_ascii=False, default=str),
+                ex=int(JOB_STATE_TTL.total_seconds()),
+            )
+            await self._set_state(user_id, session_id, JOB_DONE)
+            logger.info(f"✅ [Jobs] Finalize job done: {session_id}")
+            await notify(session_id, "final_result", result)
+        finally:
+            await redis_client.lrem(self.processing_key, raw)
+
+    async def _retry(self, job: dict, error: Exception, notify: Notifier):
+        user_id = self._owner(job)
+        session_id = job["session_id"]
+        attempts = job["attempts"] + 1
+        if attempts >= settings.JOB_MAX_ATTEMPTS:
+            logger.error(
+                f"❌ [Jobs] Finalize job failed after {attempts} attempts: {session_id}: {error}"
+            )
+            await self._set_state(user_id, session_id, JOB_FAILED)
+            await notify(
+                session_id,
+                "error",
+                {"message": "命運結算失敗，請稍後再試", "code": "RESULT_FAILED"},
+            )
+            return
+
+        delay = 2 ** (attempts - 1)
+        logger.warning(
+            f"⚠️ [Jobs] Finalize job attempt {attempts} failed for {session_id}, "
+            f"retrying in {delay}s: {error}"
+        )
+        # 寫入延遲佇列後即釋放執行名額，到期時由 run 移回佇列
+        await self._set_state(user_id, session_id, JOB_QUEUED)
+        await redis_client.zadd(
+            DELAYED_QUEUE,
+            json.dumps({**job, "attempts": attempts}, default=str),
+            time.time() + delay,
+        )
+
+
+finalize_queue = FinalizeJobQueue()
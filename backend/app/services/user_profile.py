@@ -0,0 +1,138 @@
+"""
+玩家檔案（/auth/me 回應）組裝與快取
+
+/auth/me 與測驗結算共用同一份組裝邏輯：結算完成後直接寫入新的快取（write-through），
+玩家回到主頁時的第一次 /auth/me 即可命中快取，不需重跑冷路徑查詢。
+"""
+
+import logging
+import uuid
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.models import GameDefinition, User, UserQuest
+from app.services.cache_service import CacheService
+from app.services.level_system import get_exp_for_level, level_service
+
+logger = logging.getLogger("app")
+
+
+async def build_user_profile(db: AsyncSession, user_id: uuid.UUID) -> Optional[dict]:
+    """
+    自資料庫組裝玩家檔案
+
+    Returns:
+        /auth/me 回應內容；玩家不存在時返回 None
+    """
+    # 獲取基礎用戶資料
+    user_result = await db.execute(select(User).where(User.id == user_id))
+    user = user_result.scalar_one_or_none()
+
+    if not user:
+        return None
+
+    # 從 User.hero_profile 讀取完整英雄檔案
+    hero_profile = user.hero_profile or {}
+
+    # 獲取已完成任務數量以計算同步率
+    completed_quests_result = await db.execute(
+        select(func.count(UserQuest.id)).where(
+            UserQuest.user_id == user_id, UserQuest.completed_at.isnot(None)
+        )
+    )
+    completed_count = completed_quests_result.scalar() or 0
+    sync_percent = min(int((completed_count / 5) * 100), 100)
+
+    # 獲取種族與職業詳細資訊
+    race_info = None
+    class_info = None
+
+    if hero_profile:
+        race_id = hero_profile.get("race_id")
+        class_id = hero_profile.get("class_id")
+
+        if race_id:
+            race_res = await db.execute(
+                select(GameDefinition).where(GameDefinition.id == race_id)
+            )
+            race_info = race_res.scalar_one_or_none()
+        if class_id:
+            class_res = await db.execute(
+                select(GameDefinition).where(GameDefinition.id == class_id)
+            )
+            class_info = class_res.scalar_one_or_none()
+
+    quest_result = await db.execute(
+        select(UserQuest)
+        .where(UserQuest.user_id == user_id, UserQuest.hero_chronicle.isnot(None))
+        .order_by(UserQuest.completed_at.desc())
+        .limit(1)
+    )
+    latest_quest = quest_result.scalar_one_or_none()
+
+    # 計算等級進度資訊（累積制）
+    current_level = user.level
+    current_exp = user.exp
+
+    # 計算下一級所需總經驗值
+    next_level_total_exp = get_exp_for_level(current_level + 1)
+
+    # 計算等級進度
+    exp_progress = max(0.0, min(1.0, current_exp / next_level_total_exp))
+
+    return {
+        "userId": str(user.id),
+        "displayName": user.display_name,
+        "avatarUrl": user.hero_avatar_url or "/assets/images/classes/civilian.webp",
+        "heroAvatarUrl": user.hero_avatar_url,
+        "heroClassId": user.hero_class_id,
+        "level": user.level,
+        "exp": user.exp,
+        "expToNextLevel": next_level_total_exp,
+        "expProgress": exp_progress,
+        "questMode": level_service.get_quest_mode(user.level),
+        "questionCount": level_service.get_question_count(user.level),
+        "syncPercent": sync_percent,
+        "heroIdentity": {
+            "race": {
+                "id": race_info.id if race_info else "",
+                "name": race_info.name if race_info else "尚未覺醒",
+                "description": (
+                    race_info.metadata_info.get("description") if race_info else ""
+                ),
+            },
+            "class": {
+                "id": class_info.id if class_info else "",
+                "name": class_info.name if class_info else "平民",
+                "description": (
+                    class_info.metadata_info.get("traits") if class_info else ""
+                ),
+            },
+        },
+        "heroProfile": hero_profile,
+        "latestChronicle": latest_quest.hero_chronicle if latest_quest else "",
+    }
+
+
+async def refresh_user_profile_cache(db: AsyncSession, user_id: str) -> Optional[dict]:
+    """
+    重新組裝玩家檔案並寫入快取（write-through）
+
+    組裝失敗時改為清除快取，避免留下過期的檔案。
+    """
+    try:
+        profile = await build_user_profile(db, uuid.UUID(user_id))
+    except Exception as e:
+        logger.warning(f"Refresh user_profile failed, invalidating cache: {e}")
+        await CacheService.invalidate_user_profile(user_id)
+        return None
+
+    if profile is None:
+        await CacheService.invalidate_user_profile(user_id)
+        return None
+
+    await CacheService.set_user_profile(user_id, profile)
+    return profile
@@ -0,0 +1,57 @@
+"""
+結算 Job Worker
+
+RESULT_JOB_QUEUE=true 時，WebSocket Worker 只負責送出結算工作；
+本程序自 Redis 佇列取出工作並執行 Transformation / Summary Agent、經驗值計算與資料庫寫入，
+完成後經 Redis Pub/Sub 將 final_result 送到持有玩家 socket 的節點。
+
+使用方式：
+    uv run python -m app.worker
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.api.quest_utils import manager
+from app.api.quest_ws_handlers import finalize_quest
+from app.core.config import settings
+from app.core.llm import llm_transport
+from app.core.llm_tracing import configure_llm_tracing
+from app.core.logging_config import configure_logging, shutdown_logging
+from app.core.redis_client import redis_client
+from app.core.tracing import configure_tracing, shutdown_tracing
+from app.services.job_queue import finalize_queue
+
+logger = logging.getLogger("app")
+
+
+async def run_worker():
+    configure_logging(
+        log_file=settings.LOG_FILE_PATH,
+        json_logs=settings.LOG_JSON,
+        queue_maxsize=settings.LOG_QUEUE_MAXSIZE,
+    )
+    configure_llm_tracing()
+    configure_tracing()
+    llm_transport.install()
+    await redis_client.connect()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("--- 🛠️ TraitQuest Job Worker 啟動 ---")
+    try:
+        await finalize_queue.run(finalize_quest, manager.send_event, stop)
+    finally:
+        logger.info("--- 🌑 TraitQuest Job Worker 已關閉 ---")
+        await redis_client.disconnect()
+        await llm_transport.aclose()
+        shutdown_tracing()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,4 @@
+-- 005: 結算冪等 - 以 WebSocket session_id 唯一識別每場測驗
+-- 重送 request_result 時不會重複寫入 user_quests 或重複發放經驗值
+ALTER TABLE user_quests ADD COLUMN IF NOT EXISTS session_id VARCHAR;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_user_quests_session_id ON user_quests(session_id);
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+熱路徑微基準：與已儲存基準比較
+
+執行 tests/benchmarks 並與 tests/benchmarks/baselines 中最新的基準比較，
+任何基準的中位數退化超過門檻（預設 25%）即以非零狀態結束，可直接用於部署前檢查。
+中位數比平均值不易受 GC 或排程造成的離群值影響；共用 / 超賣的 VM 上執行間差異可能遠大於門檻，
+請在固定規格的 CI runner 上建立與比較基準。
+
+基準依 `<OS>-<Python 實作>-<版本>-<位元>` 分目錄儲存，不同機器或 Python 版本需各自建立基準；
+目前環境沒有對應的基準時會提示以 --save 建立，並以狀態 2 結束。
+
+使用方式：
+    uv run python scripts/bench_hot_paths.py                 # 比較
+    uv run python scripts/bench_hot_paths.py --threshold 15  # 自訂退化門檻（%）
+    uv run python scripts/bench_hot_paths.py --save          # 建立 / 更新基準
+"""
+import argparse
+import glob
+import os
+import sys
+
+import pytest
+from pytest_benchmark.utils import get_machine_id
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+BENCH_DIR = os.path.join(BACKEND_DIR, "tests", "benchmarks")
+STORAGE = os.path.join(BENCH_DIR, "baselines")
+
+# 找不到可比較的基準（與 pytest 的錯誤狀態碼區分）
+EXIT_NO_BASELINE = 2
+
+
+def saved_machines() -> list:
+    """已有基準的環境（含至少一份結果的子目錄）"""
+    return sorted({
+        os.path.basename(os.path.dirname(path))
+        for path in glob.glob(os.path.join(STORAGE, "*", "*.json"))
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="熱路徑微基準")
+    parser.add_argument("--save", action="store_true", help="將本次結果存為新基準")
+    parser.add_argument(
+        "--threshold", type=float, default=25.0, help="中位數退化門檻（百分比）"
+    )
+    parser.add_argument("pytest_args", nargs="*", help="額外傳給 pytest 的參數")
+    args = parser.parse_args()
+
+    pytest_args = [
+        BENCH_DIR,
+        "-q",
+        "--benchmark-only",
+        "--benchmark-warmup=on",
+        f"--benchmark-storage=file://{os.path.abspath(STORAGE)}",
+        "--benchmark-columns=min,median,mean,stddev,rounds",
+        "--benchmark-sort=name",
+    ]
+    if args.save:
+        pytest_args.append("--benchmark-save=baseline")
+    else:
+        machine_id = get_machine_id()
+        available = saved_machines()
+        if machine_id not in available:
+            print(
+                f"找不到 {machine_id} 的基準（tests/benchmarks/baselines/{machine_id}）。\n"
+                f"現有基準：{', '.join(available) or '無'}\n"
+                "請在此環境先執行 `uv run python scripts/bench_hot_paths.py --save` 建立基準。",
+                file=sys.stderr,
+            )
+            sys.exit(EXIT_NO_BASELINE)
+        pytest_args += [
+            "--benchmark-compare",
+            f"--benchmark-compare-fail=median:{args.threshold:g}%",
+        ]
+
+    os.chdir(BACKEND_DIR)
+    sys.exit(pytest.main(pytest_args + args.pytest_args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+日誌管線事件迴圈延遲基準測試
+
+模擬高負載下大量日誌寫入緩慢的 stdout / 磁碟（每次 write 阻塞數毫秒），
+比較同步 handler 與 QueueHandler / QueueListener 管線下事件迴圈的延遲（stall）。
+
+量測方式：監控協程每 5ms 醒來一次，記錄實際醒來時間與預期的差距；
+同時有多個模擬請求的協程持續寫日誌。
+
+使用方式：
+    uv run python scripts/bench_logging.py
+    uv run python scripts/bench_logging.py --write-delay-ms 5 --workers 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+# 將 app 目錄加入 path 以便引入 logging_config
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.logging_config import configure_logging, shutdown_logging
+
+TICK_SECONDS = 0.005
+
+
+class SlowStream:
+    """模擬緩慢的輸出目的地（例如被塞滿的 pipe 或忙碌的磁碟）"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        self.writes += 1
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+async def monitor_lag(stop: asyncio.Event, samples: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        samples.append(max(0.0, loop.time() - expected) * 1000)
+
+
+async def worker(logger: logging.Logger, messages: int) -> None:
+    for i in range(messages):
+        logger.info("📥 [submit_answer]: step %d, payload=%s", i, {"answer": "A"})
+        await asyncio.sleep(0)
+
+
+async def run_scenario(workers: int, messages: int) -> tuple[list[float], float]:
+    logger = logging.getLogger("app")
+    samples: list[float] = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(stop, samples))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(logger, messages) for _ in range(workers)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await monitor
+    return samples, elapsed
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench(use_queue: bool, args) -> dict:
+    original_stdout = sys.stdout
+    stream = SlowStream(args.write_delay_ms / 1000)
+    sys.stdout = stream
+    try:
+        configure_logging(use_queue=use_queue, queue_maxsize=args.queue_maxsize)
+        samples, elapsed = asyncio.run(run_scenario(args.workers, args.messages))
+    finally:
+        shutdown_logging()
+        sys.stdout = original_stdout
+
+    return {
+        "mode": "queue" if use_queue else "sync",
+        "elapsed_s": elapsed,
+        "lag_p50": statistics.median(samples) if samples else 0.0,
+        "lag_p99": percentile(samples, 99),
+        "lag_max": max(samples) if samples else 0.0,
+        "writes": stream.writes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=25)
+    parser.add_argument("--write-delay-ms", type=float, default=2.0)
+    parser.add_argument("--queue-maxsize", type=int, default=10000)
+    args = parser.parse_args()
+
+    total = args.workers * args.messages
+    print("=" * 72)
+    print(
+        f"日誌事件迴圈延遲基準：{args.workers} 協程 × {args.messages} 筆 = {total} 筆，"
+        f"每次寫入阻塞 {args.write_delay_ms}ms"
+    )
+    print("=" * 72)
+
+    for use_queue in (False, True):
+        result = bench(use_queue, args)
+        print(
+            f"{result['mode']:<6} 請求完成 {result['elapsed_s'] * 1000:>8.1f}ms  "
+            f"迴圈延遲 p50 {result['lag_p50']:>7.2f}ms  "
+            f"p99 {result['lag_p99']:>8.2f}ms  max {result['lag_max']:>8.2f}ms  "
+            f"(寫出 {result['writes']} 筆)"
+        )
+
+
+if __name__ == "__main__":
+    main()
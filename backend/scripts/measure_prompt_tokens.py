@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+System Prompt Token 量測腳本
+
+比較拆分前（原始 *_INSTRUCTION，每次送出完整對照表）與拆分後（靜態前綴 + 當前測驗片段）
+的 Prompt Token 數。靜態前綴在每次呼叫時完全相同，可被供應商的 Prompt Cache 命中。
+
+拆分前的原始 Prompt 保存在 scripts/fixtures/baseline_prompts/，取自拆分前的
+app/agents/*.py，作為固定的比較基準。
+
+使用方式：
+    uv run python scripts/measure_prompt_tokens.py
+"""
+import logging
+import os
+import sys
+from pathlib import Path
+
+# 將 app 目錄加入 path 以便引入 Agent 模組
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import litellm
+
+from app.core.agent import build_quest_slice
+from app.agents.questionnaire import (
+    QUESTIONNAIRE_STATIC_INSTRUCTION,
+    QUESTIONNAIRE_QUEST_SLICES,
+)
+from app.agents.analytics import ANALYTICS_STATIC_INSTRUCTION, ANALYTICS_QUEST_SLICES
+from app.agents.transformation import (
+    TRANSFORMATION_STATIC_INSTRUCTION,
+    TRANSFORMATION_QUEST_SLICES,
+)
+
+BASELINE_DIR = Path(__file__).parent / "fixtures" / "baseline_prompts"
+
+QUEST_TYPES = ["mbti", "bigfive", "enneagram", "disc", "gallup"]
+
+AGENTS = {
+    "questionnaire": (QUESTIONNAIRE_STATIC_INSTRUCTION, QUESTIONNAIRE_QUEST_SLICES),
+    "analytics": (ANALYTICS_STATIC_INSTRUCTION, ANALYTICS_QUEST_SLICES),
+    "transformation": (TRANSFORMATION_STATIC_INSTRUCTION, TRANSFORMATION_QUEST_SLICES),
+}
+
+
+def count_tokens(text: str, model: str) -> int:
+    return litellm.token_counter(model=model, text=text)
+
+
+def load_baseline(name: str) -> str:
+    return (BASELINE_DIR / f"{name}.txt").read_text(encoding="utf-8")
+
+
+def main():
+    # 量測時不需要 LiteLLM 的逐次 debug 輸出
+    logging.getLogger("LiteLLM").setLevel(logging.WARNING)
+    model = os.getenv("LLM_MODEL", "openai/gpt-4o")
+
+    print("=" * 72)
+    print(f"Prompt Token 量測 (tokenizer: {model})")
+    print("=" * 72)
+
+    for name, (static, slices) in AGENTS.items():
+        before = count_tokens(load_baseline(name), model)
+        fallback = count_tokens(static + build_quest_slice(slices, None), model)
+        static_tokens = count_tokens(static, model)
+
+        print(f"\n[{name}] 拆分前（原始 Prompt）：{before} tokens / 呼叫")
+        print(f"  未知測驗類型（靜態前綴 + 全部片段）：{fallback} tokens")
+        print(f"  靜態可快取前綴：{static_tokens} tokens")
+        for quest_type in QUEST_TYPES:
+            slice_tokens = count_tokens(build_quest_slice(slices, quest_type), model)
+            after = static_tokens + slice_tokens
+            saved = (1 - after / before) * 100 if before else 0
+            print(
+                f"  {quest_type:<10} 拆分後：{after:>5} tokens "
+                f"(片段 {slice_tokens:>4}，較拆分前 -{saved:.0f}%)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+適性測驗離線模擬
+
+以合成玩家模擬測驗作答：每位玩家有固定的潛在傾向，每題的 trait_deltas 為傾向加上雜訊，
+格式與 Analytics Agent 的輸出相同。同一組作答分別以「固定題數」與「適性提前結束」
+（app.core.adaptive.should_stop_early）計算結果，比較省下的題數與結果一致率。
+
+作答時當題的分析仍在背景執行，判斷是否提前結束時只看得到前幾題的分析結果，
+以 --lag 模擬（預設 1 題）。
+
+使用方式：
+    uv run python scripts/simulate_adaptive_quests.py
+    uv run python scripts/simulate_adaptive_quests.py --threshold 1.5 --min-questions 5
+    uv run python scripts/simulate_adaptive_quests.py --max-questions 15 --players 5000
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.core.adaptive import ADAPTIVE_QUEST_TYPES, MBTI_AXES, TOP_K, should_stop_early
+from app.core.calculators import PsychologicalCalculator
+from app.core.config import settings
+
+calculator = PsychologicalCalculator()
+
+TRAITS = {
+    "disc": ["D", "I", "S", "C"],
+    "enneagram": [f"Type{n}" for n in range(1, 10)],
+    "gallup": [f"T{n:02d}" for n in range(34)],
+}
+# 每題觸及的維度數
+PROBES = {"mbti": 2, "disc": 2, "enneagram": 3, "gallup": 5}
+
+
+def make_player(quest_type: str, rng: random.Random) -> Dict[str, float]:
+    """潛在傾向：MBTI 為各軸 -1~1 的偏好，其他為各維度的權重（最大值 0.6）"""
+    if quest_type == "mbti":
+        return {pole_a: rng.uniform(-1, 1) for pole_a, _ in MBTI_AXES}
+    weights = {trait: rng.random() ** 2 for trait in TRAITS[quest_type]}
+    top = max(weights.values())
+    return {trait: 0.6 * w / top for trait, w in weights.items()}
+
+
+def answer(
+    quest_type: str, player: Dict[str, float], noise: float, rng: random.Random
+) -> dict:
+    """一題的分析結果（quality_score + trait_deltas）"""
+    deltas: Dict[str, float] = {}
+    if quest_type == "mbti":
+        for pole_a, pole_b in rng.sample(MBTI_AXES, PROBES["mbti"]):
+            value = 0.5 * player[pole_a] + rng.gauss(0, noise)
+            deltas[pole_a if value >= 0 else pole_b] = round(abs(value), 2)
+    else:
+        for trait in rng.sample(TRAITS[quest_type], PROBES[quest_type]):
+            deltas[trait] = round(player[trait] + rng.gauss(0, noise), 2)
+    return {"quality_score": rng.uniform(1.0, 2.0), "trait_deltas": deltas}
+
+
+def outcome(quest_type: str, analytics: List[dict]):
+    aggregated = calculator.aggregate_traits(analytics, quest_type)
+    if quest_type == "mbti":
+        return calculator.get_mbti_type(aggregated)
+    ranked = sorted(aggregated, key=lambda trait: (-aggregated[trait], trait))
+    return frozenset(ranked[: TOP_K[quest_type]])
+
+
+def simulate(
+    quest_type: str,
+    players: int,
+    max_questions: int,
+    min_questions: int,
+    threshold: float,
+    lag: int,
+    noise: float,
+    seed: int,
+) -> Dict[str, float]:
+    rng = random.Random(seed)
+    asked = 0
+    agreed = 0
+    for _ in range(players):
+        player = make_player(quest_type, rng)
+        stream = [answer(quest_type, player, noise, rng) for _ in range(max_questions)]
+
+        length = max_questions
+        for answered in range(1, max_questions):
+            if should_stop_early(
+                stream[: max(answered - lag, 0)],
+                quest_type,
+                answered=answered,
+                min_questions=min_questions,
+                max_questions=max_questions,
+                threshold=threshold,
+            ):
+                length = answered
+                break
+
+        asked += length
+        agreed += outcome(quest_type, stream[:length]) == outcome(quest_type, stream)
+
+    avg = asked / players
+    return {
+        "avg_questions": avg,
+        "saved": 1 - avg / max_questions,
+        "agreement": agreed / players,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="適性測驗離線模擬")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--max-questions", type=int, default=10)
+    parser.add_argument(
+        "--min-questions", type=int, default=settings.ADAPTIVE_MIN_QUESTIONS
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=settings.ADAPTIVE_CONFIDENCE_Z
+    )
+    parser.add_argument("--lag", type=int, default=1, help="尚未完成分析的題數")
+    parser.add_argument("--noise", type=float, default=0.3, help="每題增量的雜訊標準差")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(
+        f"玩家 {args.players} 位，題數 {args.min_questions}~{args.max_questions}，"
+        f"z 門檻 {args.threshold:g}，分析延遲 {args.lag} 題"
+    )
+    print(f"{'測驗':<10}{'平均題數':>10}{'省下題數':>10}{'結果一致率':>12}")
+    for quest_type in sorted(ADAPTIVE_QUEST_TYPES):
+        report = simulate(
+            quest_type,
+            players=args.players,
+            max_questions=args.max_questions,
+            min_questions=args.min_questions,
+            threshold=args.threshold,
+            lag=args.lag,
+            noise=args.noise,
+            seed=args.seed,
+        )
+        print(
+            f"{quest_type:<10}{report['avg_questions']:>10.2f}"
+            f"{report['saved']:>10.1%}{report['agreement']:>12.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+單次執行模式測試：Analytics 每題以全新 Session 執行，prompt 大小不隨題數成長
+"""
+
+from unittest.mock import patch
+
+import litellm
+import pytest
+
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.fake_llm_server import fake_model
+from tests.mocks.redis_mock import InMemoryRedis
+
+
+@pytest.mark.asyncio
+async def test_analytics_prompt_size_is_constant_per_answer(fake_llm):
+    from app.agents.analytics import create_analytics_agent
+    from app.api.quest_utils import run_analytics_task
+
+    agent = fake_model(create_analytics_agent())
+    sessions = CustomInMemorySessionService()
+    redis = InMemoryRedis()
+
+    with patch("app.api.quest_utils.analytics_agent", agent), patch(
+        "app.api.quest_utils.session_service", sessions
+    ), patch("app.services.cache_service.redis_client", redis):
+        for index in range(5):
+            await run_analytics_task(
+                "u1",
+                "s1",
+                "面對未知的石門，你會怎麼做？",
+                "推開石門",
+                "bigfive",
+                question_index=index,
+            )
+        await litellm.aclient_session.aclose()
+
+    first_calls = [
+        r for r in fake_llm.state.requests if r["agent"] == "analytics" and not r["followup"]
+    ]
+    assert len(first_calls) == 5
+    assert len({r["messages"] for r in first_calls}) == 1
+    assert len({r["prompt_tokens"] for r in first_calls}) == 1
+    # 一次性 Session 執行後即刪除
+    assert not sessions.sessions.get("analytics", {}).get("u1")
+    assert len(redis.data["quest_analytics:s1"]) == 5
@@ -0,0 +1,146 @@
+"""
+Agent Prompt 拆分測試：靜態前綴 + 依測驗類型附加的片段
+"""
+
+import litellm
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from google.adk.models.lite_llm import LiteLLMClient
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from app.core.agent import (
+    PROMPT_CACHE_INJECTION_POINTS,
+    build_quest_slice,
+    quest_instruction_provider,
+)
+from app.agents.analytics import (
+    analytics_agent,
+    ANALYTICS_STATIC_INSTRUCTION,
+    ANALYTICS_QUEST_SLICES,
+)
+from app.agents.questionnaire import (
+    questionnaire_agent,
+    QUESTIONNAIRE_STATIC_INSTRUCTION,
+    QUESTIONNAIRE_QUEST_SLICES,
+)
+from app.agents.transformation import (
+    transformation_agent,
+    TRANSFORMATION_STATIC_INSTRUCTION,
+    TRANSFORMATION_QUEST_SLICES,
+)
+
+QUEST_TYPES = ["mbti", "bigfive", "enneagram", "disc", "gallup"]
+
+
+def test_build_quest_slice_selects_only_current_quest():
+    """MBTI 測驗只附加 MBTI 片段，不包含其他對照表"""
+    mbti = build_quest_slice(TRANSFORMATION_QUEST_SLICES, "mbti")
+    assert "RACE_1" not in mbti
+    assert "TAL_ACH" not in mbti
+
+    gallup = build_quest_slice(TRANSFORMATION_QUEST_SLICES, "gallup")
+    assert "TAL_ACH" in gallup
+    assert "RACE_1" not in gallup
+
+
+def test_build_quest_slice_unknown_quest_falls_back_to_all():
+    """未知測驗類型時回傳所有片段，避免缺少合法 ID"""
+    full = build_quest_slice(TRANSFORMATION_QUEST_SLICES, None)
+    for quest_type in QUEST_TYPES:
+        assert TRANSFORMATION_QUEST_SLICES[quest_type] in full
+
+
+def test_static_prefix_keeps_shared_class_table():
+    """destiny_bonds 需要職業對照表，因此必須留在所有測驗共用的靜態前綴"""
+    assert "CLS_INTJ" in TRANSFORMATION_STATIC_INSTRUCTION
+    assert "RACE_1" not in TRANSFORMATION_STATIC_INSTRUCTION
+
+
+@pytest.mark.parametrize("quest_type", QUEST_TYPES)
+def test_every_quest_type_has_slices(quest_type):
+    assert quest_type in TRANSFORMATION_QUEST_SLICES
+    assert quest_type in ANALYTICS_QUEST_SLICES
+    assert quest_type in QUESTIONNAIRE_QUEST_SLICES
+
+
+def test_instruction_provider_prefixes_static_instruction():
+    """System prompt 以靜態前綴開頭，只接上當前測驗片段"""
+    provider = quest_instruction_provider(
+        ANALYTICS_STATIC_INSTRUCTION, ANALYTICS_QUEST_SLICES, "quest_type"
+    )
+    ctx = MagicMock()
+    ctx.state = {"quest_type": "disc"}
+    instruction = provider(ctx)
+
+    assert instruction.startswith(ANALYTICS_STATIC_INSTRUCTION)
+    assert instruction.endswith(ANALYTICS_QUEST_SLICES["disc"])
+    assert ANALYTICS_QUEST_SLICES["gallup"] not in instruction
+
+
+def _ctx(state: dict) -> MagicMock:
+    ctx = MagicMock()
+    ctx.state = state
+    return ctx
+
+
+@pytest.mark.parametrize(
+    "agent, static, slices, state_key",
+    [
+        (
+            questionnaire_agent,
+            QUESTIONNAIRE_STATIC_INSTRUCTION,
+            QUESTIONNAIRE_QUEST_SLICES,
+            "current_quest_id",
+        ),
+        (analytics_agent, ANALYTICS_STATIC_INSTRUCTION, ANALYTICS_QUEST_SLICES, "quest_type"),
+        (
+            transformation_agent,
+            TRANSFORMATION_STATIC_INSTRUCTION,
+            TRANSFORMATION_QUEST_SLICES,
+            "quest_type",
+        ),
+    ],
+)
+def test_agent_provider_reads_its_state_key(agent, static, slices, state_key):
+    """各 Agent 的 provider 依自己的 state key 選取片段"""
+    instruction = agent.instruction(_ctx({state_key: "enneagram"}))
+
+    assert instruction == f"{static}\n\n{slices['enneagram']}"
+    assert slices["mbti"] not in instruction
+
+
+def test_questionnaire_provider_ignores_other_state_keys():
+    """Questionnaire 依 current_quest_id 選片段，quest_type 不影響結果"""
+    instruction = questionnaire_agent.instruction(
+        _ctx({"current_quest_id": "disc", "quest_type": "gallup"})
+    )
+
+    assert instruction.endswith(QUESTIONNAIRE_QUEST_SLICES["disc"])
+    assert QUESTIONNAIRE_QUEST_SLICES["gallup"] not in instruction
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "agent", [questionnaire_agent, analytics_agent, transformation_agent]
+)
+async def test_agents_send_cache_control_hint(agent):
+    """實際送往 LiteLLM 的參數帶有 cache_control 注入點，且 system 位於 index 0"""
+    response = litellm.ModelResponse(
+        choices=[{"message": {"role": "assistant", "content": "ok"}}]
+    )
+    request = LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text="hi")])],
+        config=types.GenerateContentConfig(system_instruction="SYSTEM"),
+    )
+
+    with patch.object(
+        LiteLLMClient, "acompletion", new=AsyncMock(return_value=response)
+    ) as acompletion:
+        async for _ in agent.model.generate_content_async(request, stream=False):
+            pass
+
+    kwargs = acompletion.call_args.kwargs
+    assert kwargs["cache_control_injection_points"] == PROMPT_CACHE_INJECTION_POINTS
+    assert kwargs["messages"][0]["content"] == "SYSTEM"
@@ -0,0 +1,245 @@
+"""
+結算冪等測試：每個 session 只結算一次，重送 request_result 直接返回已保存的結果
+"""
+
+import asyncio
+import json
+import math
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.services.cache_service import CacheService
+from tests.mocks.redis_mock import InMemoryRedis
+
+SESSION_ID = "finalize-session-1"
+USER_ID = "11111111-1111-1111-1111-111111111111"
+REPORT = {"class_id": "CLS_INTJ", "levelInfo": {"level": 2, "earnedExp": 300}}
+FINALIZE_KWARGS = dict(
+    session_id=SESSION_ID,
+    quest_id="mbti",
+    user_id=USER_ID,
+    player_level=1,
+    player_exp=0,
+    display_name="測試玩家",
+    interactions=[{"question": {"text": "第一題"}, "answer": "A"}],
+    analytics_list=[{"quality_score": 1.2, "trait_deltas": {"I": 0.4}}],
+)
+
+
+@pytest.fixture
+def redis():
+    fake = InMemoryRedis()
+    with patch("app.services.cache_service.redis_client", fake):
+        yield fake
+
+
+def _db_session(quest_report=None, commit_error=None):
+    """模擬 AsyncSessionLocal()：查詢返回 quest_report，commit 可拋出例外"""
+    db = MagicMock()
+    query_result = MagicMock()
+    query_result.scalar_one_or_none.return_value = quest_report
+    db.execute = AsyncMock(return_value=query_result)
+    db.commit = AsyncMock(side_effect=commit_error)
+    db.rollback = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=db)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, db
+
+
+@pytest.mark.asyncio
+async def test_repeated_finalize_skips_agents(redis):
+    from app.api.quest_ws_handlers import finalize_quest
+
+    await CacheService.set_quest_result(USER_ID, SESSION_ID, REPORT)
+    agent = AsyncMock()
+    with patch("app.api.quest_ws_handlers.run_agent_async", agent):
+        result = await finalize_quest(**FINALIZE_KWARGS)
+
+    assert result == REPORT
+    agent.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_repeated_request_result_skips_analytics_wait(redis):
+    from app.api.quest_ws_handlers import handle_request_result
+
+    await CacheService.set_quest_result(USER_ID, SESSION_ID, REPORT)
+    with patch("app.api.quest_ws_handlers.background_tasks") as tasks:
+        result = await handle_request_result(
+            session_id=SESSION_ID,
+            quest_id="mbti",
+            user_id=USER_ID,
+            player_level=1,
+            player_exp=0,
+            display_name="測試玩家",
+            questionnaire_session=MagicMock(),
+        )
+
+    assert result == {"event": "final_result", "data": REPORT}
+    tasks.wait.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_finalized_result_is_rebuilt_from_database(redis):
+    from app.api.quest_utils import load_finalized_result
+
+    db_report = {"class_id": "CLS_INTJ", "level_info": {"level": 2}}
+    factory, _ = _db_session(quest_report=db_report)
+    with patch("app.api.quest_utils.AsyncSessionLocal", factory):
+        result = await load_finalized_result(USER_ID, SESSION_ID)
+
+    assert result["levelInfo"] == {"level": 2}
+    assert await CacheService.get_quest_result(USER_ID, SESSION_ID) == result
+
+
+@pytest.mark.asyncio
+async def test_finalized_result_is_scoped_to_its_player(redis):
+    from app.api.quest_utils import load_finalized_result
+
+    other_user = "22222222-2222-2222-2222-222222222222"
+    await CacheService.set_quest_result(USER_ID, SESSION_ID, REPORT)
+    factory, db = _db_session()
+    with patch("app.api.quest_utils.AsyncSessionLocal", factory):
+        # 他人的 sessionId 不會取得此玩家的結果
+        assert await load_finalized_result(other_user, SESSION_ID) is None
+
+    where = str(db.execute.await_args.args[0].compile())
+    assert "user_quests.session_id" in where and "user_quests.user_id" in where
+    assert await CacheService.acquire_quest_result_lock(other_user, SESSION_ID)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_finalize_waits_for_lock_holder(redis):
+    from app.api.quest_ws_handlers import finalize_quest
+
+    assert await CacheService.acquire_quest_result_lock(USER_ID, SESSION_ID)
+    agent = AsyncMock()
+    factory, _ = _db_session()
+
+    async def holder_finishes():
+        await asyncio.sleep(0.1)
+        await CacheService.set_quest_result(USER_ID, SESSION_ID, REPORT)
+
+    with patch("app.api.quest_ws_handlers.run_agent_async", agent), patch(
+        "app.api.quest_utils.AsyncSessionLocal", factory
+    ):
+        holder = asyncio.create_task(holder_finishes())
+        result = await finalize_quest(**FINALIZE_KWARGS)
+        await holder
+
+    assert result == REPORT
+    agent.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_holder_does_not_release_new_holder(redis):
+    from app.services.cache_service import QUEST_RESULT_LOCK_TTL
+    from app.core.config import settings
+
+    first = await CacheService.acquire_quest_result_lock(USER_ID, SESSION_ID)
+    assert await CacheService.acquire_quest_result_lock(USER_ID, SESSION_ID) is None
+
+    # 第一個持有者的鎖逾時後由第二個請求取得；第一個持有者結束時不可刪除新鎖
+    del redis.data[f"quest_result_lock:{USER_ID}:{SESSION_ID}"]
+    second = await CacheService.acquire_quest_result_lock(USER_ID, SESSION_ID)
+    await CacheService.release_quest_result_lock(USER_ID, SESSION_ID, first)
+    assert await CacheService.acquire_quest_result_lock(USER_ID, SESSION_ID) is None
+
+    await CacheService.release_quest_result_lock(USER_ID, SESSION_ID, second)
+    assert await CacheService.acquire_quest_result_lock(USER_ID, SESSION_ID)
+
+    # 鎖的 TTL 涵蓋 Transformation + Summary 的執行期限
+    deadlines = sum(
+        settings.AGENT_DEADLINES.get(name, settings.AGENT_DEADLINE_SECONDS)
+        for name in ("transformation_agent", "summary_agent")
+    )
+    assert QUEST_RESULT_LOCK_TTL.total_seconds() > deadlines
+
+
+@pytest.mark.asyncio
+async def test_duplicate_insert_rolls_back_exp(redis):
+    from app.api.quest_ws_handlers import _run_finalization
+
+    factory, db = _db_session(
+        commit_error=IntegrityError("INSERT", {}, Exception("duplicate"))
+    )
+    agent = AsyncMock(return_value={"class_id": "CLS_INTJ"})
+    with patch("app.api.quest_ws_handlers.run_agent_async", agent), patch(
+        "app.api.quest_ws_handlers.AsyncSessionLocal", factory
+    ), patch(
+        "app.api.quest_ws_handlers.load_finalized_result",
+        AsyncMock(return_value=REPORT),
+    ), patch(
+        "app.api.quest_ws_handlers.refresh_user_profile_cache", AsyncMock()
+    ) as refresh:
+        result = await _run_finalization(**FINALIZE_KWARGS)
+
+    assert result == REPORT
+    db.rollback.assert_awaited_once()
+    refresh.assert_not_called()
+    assert db.execute.await_args.args[1]["session_id"] == SESSION_ID
+
+
+@pytest.mark.asyncio
+async def test_persist_is_single_round_trip():
+    """經驗值、等級、英雄檔案與測驗紀錄以單一敘述寫入"""
+    from app.api.quest_utils import persist_quest_result
+
+    level_info = {"level": 3, "exp": 650, "isLeveledUp": True, "earnedExp": 350}
+    _, db = _db_session(quest_report=level_info)
+    quest_report = {"class_id": "CLS_INTJ", "race_id": None}
+
+    result = await persist_quest_result(
+        db,
+        session_id=SESSION_ID,
+        user_id=USER_ID,
+        quest_id="mbti",
+        player_level=2,
+        earned_exp=350,
+        quest_report=quest_report,
+        interactions=FINALIZE_KWARGS["interactions"],
+        hero_chronicle="史詩",
+    )
+
+    assert result == level_info
+    db.execute.assert_awaited_once()
+    statement, params = db.execute.await_args.args
+    assert "hero_profile, '{}'::jsonb) ||" in str(statement)
+    assert "INSERT INTO user_quests" in str(statement)
+    # 與 merge_hero_profile 相同，None 欄位不覆蓋既有檔案
+    assert json.loads(params["profile_patch"]) == {"class_id": "CLS_INTJ"}
+    assert json.loads(params["quest_report"])["quest_type"] == "mbti"
+    assert params["hero_avatar_url"] == "/assets/images/classes/cls_intj.webp"
+
+
+def test_sql_level_formula_matches_level_service():
+    """資料庫端的等級求根公式與 LevelSystemService.get_level_from_exp 一致"""
+    from app.services.level_system import level_service
+
+    for exp in list(range(0, 20_000, 7)) + [
+        level_service.get_exp_threshold(n) + d for n in range(1, 60) for d in (-1, 0, 1)
+    ]:
+        sql_level = max(1, math.floor((math.sqrt(1 + 8 * exp / 100.0) - 1) / 2) + 1)
+        assert sql_level == level_service.get_level_from_exp(exp), exp
+
+
+@pytest.mark.asyncio
+async def test_finalization_writes_profile_cache(redis):
+    """結算後直接寫入新的玩家檔案快取（而非清除）"""
+    from app.api.quest_ws_handlers import _run_finalization
+
+    level_info = {"level": 2, "exp": 400, "isLeveledUp": True, "earnedExp": 400}
+    factory, db = _db_session(quest_report=level_info)
+    agent = AsyncMock(return_value={"class_id": "CLS_INTJ"})
+    with patch("app.api.quest_ws_handlers.run_agent_async", agent), patch(
+        "app.api.quest_ws_handlers.AsyncSessionLocal", factory
+    ), patch(
+        "app.api.quest_ws_handlers.refresh_user_profile_cache", AsyncMock()
+    ) as refresh:
+        result = await _run_finalization(**FINALIZE_KWARGS)
+
+    assert result["levelInfo"]["level"] == 2
+    refresh.assert_awaited_once_with(db, USER_ID)
@@ -0,0 +1,168 @@
+"""
+開場題目預先生成測試：check-access 後背景生成、跨 Worker 去重、start_quest 直接取用並接上對話歷史、指令不同時改為即時生成
+"""
+
+from contextlib import ExitStack
+from unittest.mock import AsyncMock, patch
+
+import litellm
+import pytest
+
+from app.core.background import background_tasks
+from app.core.metrics import PREWARM_QUESTIONS
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.fake_llm_server import fake_model
+from tests.mocks.redis_mock import InMemoryRedis
+
+USER_ID = "u1"
+
+
+@pytest.fixture
+def env(fake_llm):
+    from app.agents.questionnaire import create_questionnaire_agent
+
+    agent = fake_model(create_questionnaire_agent())
+    sessions = CustomInMemorySessionService()
+    redis = InMemoryRedis()
+
+    with ExitStack() as stack:
+        for target in (
+            "app.api.quest_utils.session_service",
+            "app.api.quest_prewarm.session_service",
+            "app.api.quest_ws_handlers.session_service",
+        ):
+            stack.enter_context(patch(target, sessions))
+        for target in (
+            "app.api.quest_utils.questionnaire_agent",
+            "app.api.quest_prewarm.questionnaire_agent",
+        ):
+            stack.enter_context(patch(target, agent))
+        stack.enter_context(patch("app.services.cache_service.redis_client", redis))
+        stack.enter_context(
+            patch("app.api.quest_prewarm.get_hero_chronicle", AsyncMock(return_value=""))
+        )
+        stack.enter_context(
+            patch(
+                "app.api.quest_prewarm.get_user_display_name",
+                AsyncMock(return_value="冒險者"),
+            )
+        )
+        yield fake_llm, sessions, redis, agent
+
+
+async def _start(sessions, display_name="冒險者"):
+    from app.api.quest_ws_handlers import handle_start_quest
+
+    session = await sessions.create_session(
+        app_name="questionnaire", user_id=USER_ID, session_id="s1"
+    )
+    return await handle_start_quest(
+        session_id="s1",
+        quest_id="mbti",
+        user_id=USER_ID,
+        player_level=1,
+        display_name=display_name,
+        questionnaire_session=session,
+    )
+
+
+@pytest.mark.asyncio
+async def test_start_quest_uses_prewarmed_question(env):
+    from app.api.quest_prewarm import schedule_prewarm
+    from app.api.quest_utils import run_agent_async
+
+    app, sessions, redis, agent = env
+    used = PREWARM_QUESTIONS.get(result="used")
+
+    assert schedule_prewarm(USER_ID, "mbti", 1)
+    # 生成中重複進入區域不會再送出任務
+    assert not schedule_prewarm(USER_ID, "mbti", 1)
+    await background_tasks.wait(f"prewarm:{USER_ID}:mbti")
+    assert f"prewarm_question:{USER_ID}:mbti" in redis.data
+    # 生成結束後釋放生成標記
+    assert f"prewarm_claim:{USER_ID}:mbti" not in redis.data
+    # 暫用的生成 Session 已刪除
+    assert not sessions.sessions["questionnaire"].get(USER_ID)
+
+    result = await _start(sessions)
+
+    assert result["question"]["text"]
+    assert result["questionIndex"] == 0
+    assert len(app.state.requests) == 1
+    assert PREWARM_QUESTIONS.get(result="used") == used + 1
+    assert f"prewarm_question:{USER_ID}:mbti" not in redis.data
+
+    session = await sessions.get_session(
+        app_name="questionnaire", user_id=USER_ID, session_id="s1"
+    )
+    assert session.state["questionnaire_output"]["question"]["text"] == result["question"]["text"]
+
+    # 下一題的請求帶有預先生成的開場對話（system + 開場 3 則 + 本輪指令）
+    await run_agent_async(
+        agent=agent,
+        app_name="questionnaire",
+        user_id=USER_ID,
+        session_id="s1",
+        instruction="玩家對於第 1 題的回答是：A",
+        output_key="questionnaire_output",
+    )
+    await litellm.aclient_session.aclose()
+    assert app.state.requests[-1]["messages"] == 5
+
+
+@pytest.mark.asyncio
+async def test_stale_prewarm_falls_back_to_live_generation(env):
+    from app.api.quest_prewarm import schedule_prewarm
+
+    app, sessions, _, _ = env
+    stale = PREWARM_QUESTIONS.get(result="stale")
+
+    schedule_prewarm(USER_ID, "mbti", 1)
+    await background_tasks.wait(f"prewarm:{USER_ID}:mbti")
+
+    # 玩家名稱已變更，預先生成的開場白不再適用
+    result = await _start(sessions, display_name="新名字")
+    await litellm.aclient_session.aclose()
+
+    assert result["question"]["text"]
+    assert len(app.state.requests) == 2
+    assert PREWARM_QUESTIONS.get(result="stale") == stale + 1
+
+
+@pytest.mark.asyncio
+async def test_prewarm_disabled(env):
+    from app.api.quest_prewarm import schedule_prewarm
+
+    with patch("app.api.quest_prewarm.settings.PREWARM_FIRST_QUESTION", False):
+        assert not schedule_prewarm(USER_ID, "mbti", 1)
+    assert background_tasks.pending(f"prewarm:{USER_ID}:mbti") == 0
+
+
+@pytest.mark.asyncio
+async def test_prewarm_is_deduplicated_across_workers(env):
+    from app.api.quest_prewarm import schedule_prewarm
+
+    app, _, redis, _ = env
+    skipped = PREWARM_QUESTIONS.get(result="skipped")
+    # 另一個 Worker 已取得生成標記
+    redis.data[f"prewarm_claim:{USER_ID}:mbti"] = "1"
+
+    with patch(
+        "app.api.quest_prewarm.get_player_level", AsyncMock(return_value=1)
+    ) as get_level:
+        assert schedule_prewarm(USER_ID, "mbti")
+        await background_tasks.wait(f"prewarm:{USER_ID}:mbti")
+
+        assert app.state.requests == []
+        assert PREWARM_QUESTIONS.get(result="skipped") == skipped + 1
+        get_level.assert_not_awaited()
+
+        # 標記釋放後改由本 Worker 生成，等級在背景查詢
+        del redis.data[f"prewarm_claim:{USER_ID}:mbti"]
+        assert schedule_prewarm(USER_ID, "mbti")
+        await background_tasks.wait(f"prewarm:{USER_ID}:mbti")
+    await litellm.aclient_session.aclose()
+
+    get_level.assert_awaited_once_with(USER_ID)
+    assert len(app.state.requests) == 1
+    assert f"prewarm_question:{USER_ID}:mbti" in redis.data
@@ -0,0 +1,186 @@
+"""
+斷線續玩測試：Redis 測驗存檔、resume_quest 還原、重送答案的冪等處理與結算工作排入
+"""
+
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.background import background_tasks
+from app.core.session import CustomInMemorySessionService
+from app.services.cache_service import CacheService
+from tests.mocks.redis_mock import InMemoryRedis
+
+USER_ID = "11111111-1111-1111-1111-111111111111"
+SESSION_ID = "resume-session-1"
+QUESTION_EVENT = {
+    "event": "next_question",
+    "data": {"question": {"id": "q_1", "text": "第二題"}, "questionIndex": 1},
+}
+
+
+@pytest.fixture
+def redis():
+    fake = InMemoryRedis()
+    with patch("app.services.cache_service.redis_client", fake):
+        yield fake
+
+
+def _use_worker(service):
+    """將 handler 與工具函式指向指定的 Session Service（模擬不同 Worker）"""
+    return (
+        patch("app.api.quest_utils.session_service", service),
+        patch("app.api.quest_ws_handlers.session_service", service),
+    )
+
+
+async def _seed_worker_a():
+    service = CustomInMemorySessionService()
+    session = await service.create_session(
+        app_name="questionnaire", user_id=USER_ID, session_id=SESSION_ID
+    )
+    session.state.update(
+        {
+            "current_quest_id": "disc",
+            "total_steps": 10,
+            "interactions": [{"question": {"text": "第一題"}, "answer": "A"}],
+            "accumulated_analytics": [{"quality_score": 1.2, "trait_deltas": {"D": 0.4}}],
+        }
+    )
+    await service.update_session(session)
+    # 單題分析由背景任務依題號寫入 Redis，不隨存檔覆寫
+    await CacheService.add_quest_analytics(
+        SESSION_ID, 0, {"quality_score": 1.2, "trait_deltas": {"D": 0.4}}
+    )
+    return service
+
+
+@pytest.mark.asyncio
+async def test_resume_on_another_worker_replays_last_event(redis):
+    from app.api.quest_utils import save_quest_checkpoint
+    from app.api.quest_ws_handlers import handle_resume_quest
+
+    worker_a = await _seed_worker_a()
+    with _use_worker(worker_a)[0]:
+        await save_quest_checkpoint(USER_ID, SESSION_ID, QUESTION_EVENT)
+
+    stored = json.loads(redis.data[f"quest_checkpoint:{SESSION_ID}"])
+    assert stored["user_id"] == USER_ID
+    assert stored["last_event"] == QUESTION_EVENT
+
+    worker_b = CustomInMemorySessionService()
+    session_b = await worker_b.create_session(
+        app_name="questionnaire", user_id=USER_ID, session_id=SESSION_ID
+    )
+    agent = AsyncMock()
+    patches = _use_worker(worker_b)
+    with patches[0], patches[1], patch(
+        "app.api.quest_ws_handlers.run_questionnaire_agent", agent
+    ):
+        result = await handle_resume_quest(
+            session_id=SESSION_ID, user_id=USER_ID, questionnaire_session=session_b
+        )
+
+    agent.assert_not_called()
+    assert result["event"] == "next_question"
+    assert result["data"]["resumed"] is True
+    assert result["data"]["questionIndex"] == 1
+
+    restored = await worker_b.get_session(
+        app_name="questionnaire", user_id=USER_ID, session_id=SESSION_ID
+    )
+    assert restored.state["current_quest_id"] == "disc"
+    assert len(restored.state["interactions"]) == 1
+    assert restored.state["accumulated_analytics"][0]["trait_deltas"] == {"D": 0.4}
+    assert restored.state["resumed"] is True
+
+
+@pytest.mark.asyncio
+async def test_resume_rejects_other_players_checkpoint(redis):
+    from app.api.quest_utils import save_quest_checkpoint
+    from app.api.quest_ws_handlers import handle_resume_quest
+
+    worker = await _seed_worker_a()
+    with _use_worker(worker)[0]:
+        await save_quest_checkpoint(USER_ID, SESSION_ID, QUESTION_EVENT)
+
+    other = CustomInMemorySessionService()
+    session = await other.create_session(
+        app_name="questionnaire", user_id="intruder", session_id=SESSION_ID
+    )
+    with _use_worker(other)[0]:
+        result = await handle_resume_quest(
+            session_id=SESSION_ID, user_id="intruder", questionnaire_session=session
+        )
+
+    assert result["event"] == "error"
+    assert result["data"]["code"] == "CHECKPOINT_NOT_FOUND"
+    assert "current_quest_id" not in session.state
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_answer_overwrites_interaction(redis):
+    from app.api.quest_ws_handlers import handle_submit_answer
+
+    service = await _seed_worker_a()
+    session = await service.get_session(
+        app_name="questionnaire", user_id=USER_ID, session_id=SESSION_ID
+    )
+    session.state["questionnaire_output"] = {"question": {"text": "第一題"}}
+    patches = _use_worker(service)
+    with patches[0], patches[1], patch(
+        "app.api.quest_ws_handlers.run_questionnaire_agent",
+        AsyncMock(return_value={"question": {"text": "第二題"}}),
+    ), patch("app.api.quest_ws_handlers.run_analytics_task", AsyncMock()):
+        result = await handle_submit_answer(
+            session_id=SESSION_ID,
+            answer="B",
+            question_index=0,
+            user_id=USER_ID,
+            quest_id="disc",
+            player_level=1,
+            display_name="測試玩家",
+            questionnaire_session=session,
+        )
+        await background_tasks.wait(SESSION_ID)
+
+    assert result["event"] == "next_question"
+    updated = await service.get_session(
+        app_name="questionnaire", user_id=USER_ID, session_id=SESSION_ID
+    )
+    assert [item["answer"] for item in updated.state["interactions"]] == ["B"]
+    checkpoint = json.loads(redis.data[f"quest_checkpoint:{SESSION_ID}"])
+    assert checkpoint["last_event"]["data"]["questionIndex"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_result_enqueues_job_in_queue_mode(redis):
+    from app.api.quest_ws_handlers import handle_request_result
+
+    service = await _seed_worker_a()
+    session = await service.get_session(
+        app_name="questionnaire", user_id=USER_ID, session_id=SESSION_ID
+    )
+    finalize = AsyncMock()
+    patches = _use_worker(service)
+    with patches[0], patches[1], patch(
+        "app.api.quest_ws_handlers.settings.RESULT_JOB_QUEUE", True
+    ), patch("app.services.job_queue.redis_client", redis), patch(
+        "app.api.quest_ws_handlers.finalize_quest", finalize
+    ):
+        result = await handle_request_result(
+            session_id=SESSION_ID,
+            quest_id="disc",
+            user_id=USER_ID,
+            player_level=1,
+            player_exp=0,
+            display_name="測試玩家",
+            questionnaire_session=session,
+        )
+
+    finalize.assert_not_called()
+    assert result["event"] == "result_queued"
+    job = json.loads(redis.data["jobs:finalize"][0])
+    assert job["payload"]["interactions"][0]["answer"] == "A"
+    assert job["payload"]["analytics_list"][0]["trait_deltas"] == {"D": 0.4}
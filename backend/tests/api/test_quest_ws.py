@@ -47,7 +47,8 @@ def mock_websocket_deps():
             mock_manager.active_connections[sid] = ws
 
         mock_manager.connect = AsyncMock(side_effect=mock_connect)
-        mock_manager.disconnect = MagicMock()
+        mock_manager.disconnect = AsyncMock()
+        mock_manager.touch = AsyncMock()
         mock_manager.send_event = AsyncMock()
         mock_manager.active_connections = {}
 
@@ -0,0 +1,108 @@
+"""
+叢集 WebSocket 測試：事件經 Redis Pub/Sub 轉送到持有 socket 的節點
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from starlette.websockets import WebSocketState
+
+from app.api.quest_utils import ConnectionManager
+from tests.mocks.redis_mock import InMemoryRedis
+
+
+@pytest.fixture
+def redis():
+    fake = InMemoryRedis()
+    with patch("app.api.quest_utils.redis_client", fake):
+        yield fake
+
+
+def _websocket():
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_json = AsyncMock()
+    websocket.client_state = WebSocketState.CONNECTED
+    return websocket
+
+
+async def _until(condition, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_event_from_other_node_reaches_socket(redis):
+    node_a, node_b = ConnectionManager("node-a"), ConnectionManager("node-b")
+    await node_a.start()
+    await node_b.start()
+    await _until(lambda: redis.subscribers.get(node_a.channel))
+    try:
+        websocket = _websocket()
+        await node_a.connect("s1", websocket)
+        assert redis.data["ws_owner:s1"] == "node-a"
+
+        await node_b.send_event("s1", "final_result", {"class_id": "CLS_INTJ"})
+
+        await _until(lambda: websocket.send_json.await_count == 1)
+        websocket.send_json.assert_awaited_with(
+            {"event": "final_result", "data": {"class_id": "CLS_INTJ"}}
+        )
+    finally:
+        await node_a.stop()
+        await node_b.stop()
+    assert not redis.subscribers[node_a.channel]
+
+
+@pytest.mark.asyncio
+async def test_local_socket_skips_redis(redis):
+    node = ConnectionManager("node-a")
+    websocket = _websocket()
+    await node.connect("s1", websocket)
+    redis.publish = AsyncMock()
+
+    await node.send_event("s1", "next_question", {"questionIndex": 1})
+
+    redis.publish.assert_not_called()
+    websocket.send_json.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_event_without_owner_is_dropped(redis):
+    redis.publish = AsyncMock()
+
+    await ConnectionManager("node-b").send_event("gone", "error", {})
+
+    redis.publish.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_keeps_ownership_taken_by_other_node(redis):
+    node_a, node_b = ConnectionManager("node-a"), ConnectionManager("node-b")
+    await node_a.connect("s1", _websocket())
+    # 玩家重新連線到 node-b 後，node-a 才偵測到舊連線中斷
+    await node_b.connect("s1", _websocket())
+    await node_a.disconnect("s1")
+
+    assert redis.data["ws_owner:s1"] == "node-b"
+    await node_b.disconnect("s1")
+    assert "ws_owner:s1" not in redis.data
+
+
+@pytest.mark.asyncio
+async def test_routed_payload_is_json(redis):
+    received = await redis.subscribe("ws:node:node-a")
+    redis.data["ws_owner:s1"] = "node-a"
+
+    await ConnectionManager("node-b").send_event("s1", "quest_complete", {"n": 1})
+
+    message = received.queue.get_nowait()
+    assert json.loads(message["data"]) == {
+        "session_id": "s1",
+        "event": "quest_complete",
+        "data": {"n": 1},
+    }
@@ -0,0 +1,87 @@
+"""
+熱路徑微基準測試（pytest-benchmark）
+
+一般執行 `pytest tests` 時這些基準只跑少量回合並檢查絕對預算（見 BUDGETS_US），
+用於攔截數量級的退化。與已儲存基準比較請使用 scripts/bench_hot_paths.py：
+
+    # 比較目前程式碼與 tests/benchmarks/baselines 中最新的基準（中位數退化超過 25% 即失敗）
+    uv run python scripts/bench_hot_paths.py
+
+    # 效能改善或換機器後更新基準
+    uv run python scripts/bench_hot_paths.py --save
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# 每次呼叫的中位數上限（微秒）：約為基準值的 10 倍，只攔截明顯退化，避免不同機器誤報
+BUDGETS_US = {
+    "aggregate_traits": 200,
+    "get_mbti_type": 20,
+    "map_bigfive_to_stats": 60,
+    "level_progress": 50,
+    "check_level_up": 30,
+    "quest_exp": 15,
+    "merge_hero_profile": 20,
+    "validate_hero_profile": 400,
+    "validate_quest_report": 200,
+    "validate_interactions": 800,
+    "cache_user_profile_roundtrip": 1200,
+    "cache_analytics_roundtrip": 500,
+    "build_start_instruction": 10,
+    "build_answer_instruction": 30,
+    "build_analytics_instruction": 70,
+    "build_transformation_instruction": 500,
+    "build_summary_instruction": 400,
+}
+
+
+@pytest.fixture
+def within_budget(benchmark):
+    """執行基準並確認中位數未超出 BUDGETS_US 中的預算"""
+
+    def run(name: str, func, *args, **kwargs):
+        result = benchmark(func, *args, **kwargs)
+        if not benchmark.disabled and benchmark.stats is not None:
+            median_us = benchmark.stats.stats.median * 1_000_000
+            assert median_us < BUDGETS_US[name], (
+                f"{name}: median {median_us:.1f}µs exceeds budget {BUDGETS_US[name]}µs"
+            )
+        return result
+
+    return run
+
+
+@pytest.fixture
+def event_loop_runner():
+    """在同一個事件迴圈中重複執行 coroutine（benchmark 需同步呼叫）"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def analytics_list() -> list:
+    """一場 15 題測驗累積的分析結果"""
+    return [
+        {
+            "quality_score": 1.2 + (i % 5) * 0.1,
+            "trait_deltas": {"E": 0.2, "I": 0.1 * (i % 3), "N": 0.3, "T": 0.15, "J": 0.05},
+            "analysis_reason": f"第 {i + 1} 題的回答顯示出穩定的內省傾向與邏輯推理偏好。",
+        }
+        for i in range(15)
+    ]
+
+
+@pytest.fixture
+def hero_profile() -> dict:
+    """完成五大測驗的完整英雄檔案（取自 HeroProfile 範例）"""
+    from app.models.schemas import HeroProfile
+
+    return json.loads(
+        json.dumps(HeroProfile.model_config["json_schema_extra"]["example"])
+    )
@@ -0,0 +1,207 @@
+"""
+後端熱路徑微基準：心理計算、等級系統、英雄檔案合併、Schema 驗證、快取序列化與指令組裝
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.api.quest_prompts import (
+    build_analytics_instruction,
+    build_answer_instruction,
+    build_start_instruction,
+    build_summary_instruction,
+    build_transformation_instruction,
+)
+from app.core.calculators import PsychologicalCalculator
+from app.models.schemas import (
+    merge_hero_profile,
+    validate_hero_profile,
+    validate_interactions,
+    validate_quest_report,
+)
+from app.services.cache_service import CacheService
+from app.services.level_system import level_service
+from tests.mocks.redis_mock import InMemoryRedis
+
+pytestmark = pytest.mark.benchmark(max_time=0.5, min_rounds=20)
+
+calculator = PsychologicalCalculator()
+
+INTERACTIONS = [
+    {
+        "question": {
+            "id": f"q_{i}",
+            "type": "QUANTITATIVE",
+            "text": "面對未知的石門，你會怎麼做？",
+            "options": [{"id": f"opt_{n}", "text": f"選項 {n}"} for n in range(5)],
+        },
+        "answer": "選項 2",
+    }
+    for i in range(15)
+]
+
+
+# --- PsychologicalCalculator ---
+
+
+def test_aggregate_traits(within_budget, analytics_list):
+    result = within_budget("aggregate_traits", calculator.aggregate_traits, analytics_list, "mbti")
+    assert result["N"] > 0
+
+
+def test_get_mbti_type(within_budget):
+    aggregated = {"E": 1.0, "I": 2.0, "S": 0.5, "N": 1.5, "T": 2.0, "F": 0.2, "J": 1.0}
+    assert within_budget("get_mbti_type", calculator.get_mbti_type, aggregated) == "INTJ"
+
+
+def test_map_bigfive_to_stats(within_budget):
+    aggregated = {"Openness": 3.0, "Conscientiousness": -1.0, "Neuroticism": 9.0}
+    stats = within_budget("map_bigfive_to_stats", calculator.map_bigfive_to_stats, aggregated)
+    assert stats["STA_N"] == 100
+
+
+# --- LevelSystemService ---
+
+
+def test_level_progress(within_budget):
+    progress = within_budget("level_progress", level_service.get_level_progress, 123_456)
+    assert 0 <= progress["progress"] <= 1
+
+
+def test_check_level_up(within_budget):
+    assert within_budget("check_level_up", level_service.check_level_up, 10, 6600)[2]
+
+
+def test_quest_exp(within_budget):
+    assert within_budget("quest_exp", level_service.calculate_quest_exp, 15, 1.4) == 1950
+
+
+# --- Schemas ---
+
+
+def test_merge_hero_profile(within_budget, hero_profile):
+    new_data = {"class_id": "CLS_ENFP", "stats": None, "talent_ids": ["TAL_ACH"]}
+    merged = within_budget("merge_hero_profile", merge_hero_profile, hero_profile, new_data)
+    assert merged["class_id"] == "CLS_ENFP"
+
+
+def test_validate_hero_profile(within_budget, hero_profile):
+    profile = within_budget("validate_hero_profile", validate_hero_profile, hero_profile)
+    assert profile.class_id == "CLS_INTJ"
+
+
+def test_validate_quest_report(within_budget, hero_profile):
+    report = {
+        "quest_type": "mbti",
+        "class_id": hero_profile["class_id"],
+        "class": hero_profile["class"],
+        "destiny_guide": hero_profile["destiny_guide"],
+        "destiny_bonds": hero_profile["destiny_bonds"],
+        "level_info": {
+            "level": 3,
+            "exp": 650,
+            "expToNextLevel": 1000,
+            "expProgress": 0.1,
+            "isLeveledUp": True,
+            "earnedExp": 350,
+        },
+    }
+    assert within_budget("validate_quest_report", validate_quest_report, report).class_id
+
+
+def test_validate_interactions(within_budget):
+    assert len(within_budget("validate_interactions", validate_interactions, INTERACTIONS)) == 15
+
+
+# --- CacheService 序列化 ---
+
+
+def test_cache_user_profile_roundtrip(within_budget, event_loop_runner, hero_profile):
+    async def roundtrip():
+        await CacheService.set_user_profile("bench-user", hero_profile)
+        return await CacheService.get_user_profile("bench-user")
+
+    with patch("app.services.cache_service.redis_client", InMemoryRedis()):
+        result = within_budget(
+            "cache_user_profile_roundtrip", lambda: event_loop_runner(roundtrip())
+        )
+    assert result["class_id"] == hero_profile["class_id"]
+
+
+def test_cache_analytics_roundtrip(within_budget, event_loop_runner, analytics_list):
+    async def roundtrip():
+        await CacheService.set_analytics_result("bench-session", analytics_list[0])
+        return await CacheService.get_analytics_result("bench-session")
+
+    with patch("app.services.cache_service.redis_client", InMemoryRedis()):
+        result = within_budget(
+            "cache_analytics_roundtrip", lambda: event_loop_runner(roundtrip())
+        )
+    assert result["trait_deltas"]
+
+
+# --- 指令組裝 ---
+
+
+def test_build_start_instruction(within_budget):
+    mode = level_service.get_quest_mode(12)
+    instruction = within_budget(
+        "build_start_instruction",
+        build_start_instruction,
+        "冒險者",
+        12,
+        "mbti",
+        10,
+        mode,
+        "曾在迷霧森林中做出勇敢的選擇。",
+    )
+    assert "[玩家歷史摘要]" in instruction
+
+
+def test_build_answer_instruction(within_budget):
+    interactions = [
+        {"question": {"text": q["question"]["text"]}, "answer": q["answer"]}
+        for q in INTERACTIONS[:5]
+    ]
+    instruction = within_budget(
+        "build_answer_instruction",
+        build_answer_instruction,
+        "冒險者",
+        12,
+        "選項 2",
+        5,
+        10,
+        interactions,
+    )
+    assert "[近期對話上下文]" in instruction
+
+
+def test_build_analytics_instruction(within_budget):
+    options = INTERACTIONS[0]["question"]["options"]
+    instruction = within_budget(
+        "build_analytics_instruction",
+        build_analytics_instruction,
+        "面對未知的石門，你會怎麼做？",
+        "選項 2",
+        "mbti",
+        options,
+    )
+    assert "測驗範疇：mbti" in instruction
+
+
+def test_build_transformation_instruction(within_budget, analytics_list):
+    instruction = within_budget(
+        "build_transformation_instruction",
+        build_transformation_instruction,
+        "mbti",
+        analytics_list,
+    )
+    assert instruction.startswith("當前測驗類型：mbti")
+
+
+def test_build_summary_instruction(within_budget, analytics_list):
+    instruction = within_budget(
+        "build_summary_instruction", build_summary_instruction, analytics_list
+    )
+    assert "第 15 題" in instruction
@@ -4,6 +4,7 @@ Pytest 配置檔案
 處理所有測試所需的通用 mock 設置。
 """
 
+import importlib.util
 import sys
 import os
 from unittest.mock import MagicMock
@@ -14,10 +15,16 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 # Removed Copilot Mock setup
 
-# Mock google.genai
-mock_genai = MagicMock()
-sys.modules["google.genai"] = mock_genai
-sys.modules["google.genai.types"] = mock_genai.types
+# Mock google.genai（僅在未安裝時替代，已安裝時 ADK 需要真實的 types 才能匯入）
+# find_spec 只查找不執行匯入；未安裝 google 命名空間套件時查找子模組會拋出 ModuleNotFoundError
+try:
+    genai_installed = importlib.util.find_spec("google.genai") is not None
+except ModuleNotFoundError:
+    genai_installed = False
+if not genai_installed:
+    mock_genai = MagicMock()
+    sys.modules["google.genai"] = mock_genai
+    sys.modules["google.genai.types"] = mock_genai.types
 
 
 @pytest.fixture
@@ -28,3 +35,45 @@ def mock_session_service():
     service = MockInMemorySessionService()
     yield service
     service.clear_sessions()
+
+
+@pytest.fixture
+def fake_llm(request):
+    """
+    讓 LiteLLM 的 HTTP 請求改送到假 LLM 伺服器，返回伺服器 app（app.state.requests 記錄每次請求）
+
+    延遲模型以 indirect 參數指定：
+        @pytest.mark.parametrize("fake_llm", [LatencyModel(...)], indirect=True)
+    搭配 tests.mocks.fake_llm_server.fake_model 將 Agent 的模型指向此伺服器。
+    """
+    import httpx
+    import litellm
+
+    from tests.mocks.fake_llm_server import create_app
+
+    app = create_app(getattr(request, "param", None))
+    previous = litellm.aclient_session
+    litellm.aclient_session = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    yield app
+    litellm.aclient_session = previous
+
+
+@pytest.fixture
+def span_exporter():
+    """提供 InMemorySpanExporter，檢查追蹤 span（整個測試程序共用，每次測試前清空）"""
+    from app.core.tracing import install_in_memory_exporter
+
+    exporter = install_in_memory_exporter()
+    exporter.clear()
+    yield exporter
+    exporter.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_breaker():
+    """LLM 斷路器為整個程序共用，避免前一個測試的失敗呼叫使後續測試被拒絕"""
+    from app.core.circuit_breaker import llm_breaker
+
+    llm_breaker.reset()
+    yield
+    llm_breaker.reset()
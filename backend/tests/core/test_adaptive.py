@@ -0,0 +1,148 @@
+"""
+適性測驗測試：判定信心估計、最少 / 最多題數限制，以及結果穩定時要求 complete_trial
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.adaptive import estimate_confidence, should_stop_early
+from app.core.config import settings
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.redis_mock import InMemoryRedis
+
+
+def _mbti(n, deltas=None):
+    deltas = deltas or {"I": 0.5, "N": 0.4, "T": 0.5, "J": 0.4}
+    return [{"quality_score": 1.5, "trait_deltas": dict(deltas)} for _ in range(n)]
+
+
+def test_consistent_answers_are_stable():
+    confidence = estimate_confidence(_mbti(6), "mbti", answered=6, max_questions=10)
+
+    assert set(confidence.margins) == {"E/I", "S/N", "T/F", "J/P"}
+    assert confidence.remaining == 4
+    assert confidence.is_stable(1.5)
+
+
+def test_unprobed_axis_blocks_early_stop():
+    # J/P 軸從未被觸及，結果尚未決定
+    analytics = _mbti(6, {"I": 0.5, "N": 0.4, "T": 0.5})
+    confidence = estimate_confidence(analytics, "mbti", answered=6, max_questions=10)
+
+    assert confidence.margins["J/P"] == 0.0
+    assert not confidence.is_stable(1.5)
+
+
+def test_split_answers_are_not_stable():
+    analytics = _mbti(3, {"E": 0.5, "N": 0.4, "T": 0.5, "J": 0.4}) + _mbti(3)
+    confidence = estimate_confidence(analytics, "mbti", answered=6, max_questions=10)
+
+    assert confidence.margins["E/I"] < 1.5
+
+
+def test_top_k_decision_for_categorical_quests():
+    analytics = [
+        {"quality_score": 1.2, "trait_deltas": {"D": 0.6, "S": 0.1}} for _ in range(7)
+    ]
+    confidence = estimate_confidence(analytics, "disc", answered=7, max_questions=10)
+    assert list(confidence.margins) == ["D>S"]
+    assert confidence.is_stable(1.5)
+
+    # Gallup 需排出前 6 名，只觀察到 2 個天賦時無法判定
+    gallup = [{"quality_score": 1.0, "trait_deltas": {"ACH": 0.5, "STR": 0.3}}] * 7
+    assert not estimate_confidence(gallup, "gallup", 7, 10).is_stable(1.5)
+
+
+def test_bigfive_and_empty_analytics_are_not_adaptive():
+    analytics = [{"quality_score": 1.0, "trait_deltas": {"Openness": 0.5}}] * 8
+    assert estimate_confidence(analytics, "bigfive", 8, 10) is None
+    assert estimate_confidence([], "mbti", 3, 10) is None
+
+
+def test_pending_analyses_count_as_remaining():
+    analytics = [
+        {"quality_score": 1.0, "trait_deltas": {"I": 0.3, "N": 0.3, "T": 0.3, "J": 0.3}}
+    ] * 3
+
+    # 已回答 9 題但只有 3 題完成分析：其餘 6 題與最後 1 題都可能翻轉判定
+    confidence = estimate_confidence(analytics, "mbti", answered=9, max_questions=10)
+    assert confidence.remaining == 7
+    assert not confidence.is_stable(1.5)
+    assert not should_stop_early(
+        analytics, "mbti", answered=9, min_questions=6, max_questions=10, threshold=1.5
+    )
+    # 分析全部完成時同樣的差距已足夠穩定
+    assert estimate_confidence(analytics * 3, "mbti", answered=9, max_questions=10).is_stable(1.5)
+
+
+def test_resubmitted_answer_replaces_its_analysis():
+    from app.api.quest_utils import record_quest_analytics
+
+    state = {}
+    record_quest_analytics(state, 0, {"trait_deltas": {"I": 0.5}})
+    record_quest_analytics(state, 1, {"trait_deltas": {"N": 0.4}})
+    # 斷線重送第 1 題
+    record_quest_analytics(state, 0, {"trait_deltas": {"E": 0.5}})
+
+    assert state["accumulated_analytics"] == [
+        {"trait_deltas": {"E": 0.5}},
+        {"trait_deltas": {"N": 0.4}},
+    ]
+
+
+def test_min_and_max_questions_are_respected():
+    analytics = _mbti(9)
+    kwargs = dict(max_questions=10, threshold=1.5)
+
+    assert not should_stop_early(analytics[:4], "mbti", answered=5, min_questions=6, **kwargs)
+    assert should_stop_early(analytics[:5], "mbti", answered=6, min_questions=6, **kwargs)
+    # 達到上限由一般流程結束
+    assert not should_stop_early(analytics, "mbti", answered=10, min_questions=6, **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("adaptive, expect_early", [(True, True), (False, False)])
+async def test_submit_answer_requests_complete_trial_when_stable(adaptive, expect_early):
+    from app.api.quest_ws_handlers import handle_submit_answer
+    from app.core.background import background_tasks
+
+    service = CustomInMemorySessionService()
+    session = await service.create_session(
+        app_name="questionnaire", user_id="u1", session_id="adaptive-s1"
+    )
+    session.state.update(
+        {
+            "total_steps": 10,
+            "interactions": [{"question": {"text": f"第{n}題"}, "answer": "A"} for n in range(5)],
+            "accumulated_analytics": _mbti(5),
+            "questionnaire_output": {"question": {"text": "第六題"}},
+        }
+    )
+    agent = AsyncMock(return_value={"question": {"text": "第七題"}})
+
+    with patch("app.api.quest_utils.session_service", service), patch(
+        "app.api.quest_ws_handlers.session_service", service
+    ), patch("app.services.cache_service.redis_client", InMemoryRedis()), patch(
+        "app.api.quest_ws_handlers.run_questionnaire_agent", agent
+    ), patch(
+        "app.api.quest_ws_handlers.run_analytics_task", AsyncMock()
+    ), patch.object(
+        settings, "ADAPTIVE_QUESTS", adaptive
+    ), patch.object(
+        settings, "ADAPTIVE_MIN_QUESTIONS", 6
+    ):
+        await handle_submit_answer(
+            session_id="adaptive-s1",
+            answer="B",
+            question_index=5,
+            user_id="u1",
+            quest_id="mbti",
+            player_level=1,
+            display_name="冒險者",
+            questionnaire_session=session,
+        )
+        await background_tasks.wait("adaptive-s1")
+
+    instruction = agent.await_args.args[2]
+    assert ("complete_trial" in instruction) is expect_early
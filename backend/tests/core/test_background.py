@@ -0,0 +1,105 @@
+"""
+背景任務登錄表測試：斷線後分析任務仍完成並寫入 Redis、等待逾時與關閉時 drain
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.background import BackgroundTaskRegistry
+from app.services.cache_service import CacheService
+from tests.mocks.redis_mock import InMemoryRedis
+
+
+@pytest.fixture
+def redis():
+    fake = InMemoryRedis()
+    with patch("app.services.cache_service.redis_client", fake), patch(
+        "app.api.quest_utils.redis_client", fake
+    ):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_analytics_task_survives_disconnect(redis):
+    """WebSocket 斷線後，已送出的分析任務仍會完成並依題號寫入 Redis"""
+    from app.api.quest_utils import ConnectionManager, run_analytics_task
+
+    registry = BackgroundTaskRegistry()
+    manager = ConnectionManager()
+    await manager.connect("s1", AsyncMock())
+
+    started = asyncio.Event()
+    result = {"quality_score": 1.1, "trait_deltas": {"E": 0.3}}
+
+    async def slow_agent(**_):
+        started.set()
+        await asyncio.sleep(0.05)
+        return result
+
+    with patch("app.api.quest_utils.run_agent_async", slow_agent), patch(
+        "app.api.quest_utils.session_service"
+    ) as service:
+        service.get_session = AsyncMock(return_value=None)
+        registry.spawn(
+            "s1",
+            run_analytics_task("u1", "s1", "題目", "A", "mbti", question_index=0),
+        )
+        await started.wait()
+        await manager.disconnect("s1")
+
+        assert registry.pending("s1") == 1
+        assert await registry.wait("s1", timeout=1)
+
+    assert registry.pending() == 0
+    assert await CacheService.get_quest_analytics("s1") == [result]
+
+
+@pytest.mark.asyncio
+async def test_wait_reports_timeout():
+    registry = BackgroundTaskRegistry()
+    registry.spawn("s1", asyncio.sleep(1))
+
+    assert await registry.wait("s1", timeout=0.01) is False
+    assert registry.pending("s1") == 1
+    assert await registry.wait("other") is True
+    await registry.drain(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_removed():
+    registry = BackgroundTaskRegistry()
+
+    async def boom():
+        raise RuntimeError("LLM down")
+
+    task = registry.spawn("s1", boom())
+    assert await registry.wait("s1") is True
+    assert task.exception() is not None
+    assert registry.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_tasks_after_timeout():
+    registry = BackgroundTaskRegistry()
+    fast = registry.spawn("s1", asyncio.sleep(0))
+    slow = registry.spawn("s2", asyncio.sleep(10))
+
+    cancelled = await registry.drain(timeout=0.05)
+
+    assert cancelled == 1
+    assert fast.done() and not fast.cancelled()
+    assert slow.cancelled()
+    assert registry.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_answer_keeps_latest_analytics(redis):
+    await CacheService.add_quest_analytics("s1", 1, {"quality_score": 1.0})
+    await CacheService.add_quest_analytics("s1", 0, {"quality_score": 0.8})
+    await CacheService.add_quest_analytics("s1", 1, {"quality_score": 1.4})
+
+    analytics = await CacheService.get_quest_analytics("s1")
+
+    assert [item["quality_score"] for item in analytics] == [0.8, 1.4]
@@ -0,0 +1,309 @@
+"""
+LLM 斷路器測試：依失敗率開啟、half-open 試探恢復，開啟時改以離線題庫出題並在本地計分
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    llm_breaker,
+)
+from app.core.metrics import OFFLINE_FALLBACKS
+from app.core.offline_questions import (
+    MAX_OFFLINE_STEPS,
+    OFFLINE_QUESTIONS,
+    score_offline_answer,
+)
+from app.services.level_system import level_service
+from app.core.session import CustomInMemorySessionService
+from app.core.trait_state import QUEST_DIMENSIONS
+from tests.mocks.redis_mock import InMemoryRedis
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock):
+    return CircuitBreaker(
+        "test", window=10, min_calls=4, failure_rate=0.5, slow_seconds=5, open_seconds=30,
+        clock=clock,
+    )
+
+
+def test_breaker_trips_on_failure_rate_and_recovers():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+
+    breaker.record_success(1.0)
+    breaker.record_failure()
+    # 過慢的成功呼叫視同失敗
+    breaker.record_success(6.0)
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    # 只放行一個試探呼叫
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success(1.0)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    # 被取消的試探呼叫釋放名額，下一次仍可試探
+    clock.now = 60
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_recovery_wakes_when_breaker_closes():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.retry_after() == 30
+
+    started = time.perf_counter()
+    waiter = asyncio.create_task(breaker.wait_for_recovery(10))
+    await asyncio.sleep(0.05)
+    breaker.reset()
+    await waiter
+    assert time.perf_counter() - started < 1
+
+    # 已到試探時間時不等待
+    breaker._open()
+    clock.now = 30
+    assert breaker.retry_after() == 0
+    await asyncio.wait_for(breaker.wait_for_recovery(10), 0.1)
+
+
+def test_offline_bank_scores_known_dimensions():
+    # 題庫涵蓋最高等級的題數
+    assert MAX_OFFLINE_STEPS >= level_service.get_question_count(99)
+    for quest_type, questions in OFFLINE_QUESTIONS.items():
+        assert len(questions) >= MAX_OFFLINE_STEPS
+        assert len({q.id for q in questions}) == len(questions)
+        for question in questions:
+            for _, deltas in question.options:
+                assert set(deltas) <= set(QUEST_DIMENSIONS[quest_type])
+
+    assert score_offline_answer("mbti-1", "2")["trait_deltas"] == {"I": 0.5}
+    assert score_offline_answer("mbti-1", "加入人群一起歡唱")["trait_deltas"] == {"E": 0.5}
+    assert score_offline_answer("mbti-1", "9") is None
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_rejects_agent_runs_immediately():
+    from app.agents.analytics import analytics_agent
+    from app.api.quest_utils import run_agent_async
+
+    for _ in range(llm_breaker.min_calls):
+        llm_breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        await run_agent_async(
+            agent=analytics_agent,
+            app_name="analytics",
+            user_id="u1",
+            session_id="s1",
+            instruction="題目",
+            output_key="analytics_output",
+            ephemeral=True,
+        )
+
+
+@pytest.mark.asyncio
+async def test_quest_continues_offline_while_breaker_is_open():
+    from app.api.quest_utils import run_agent_async
+    from app.api.quest_ws_handlers import handle_submit_answer
+    from app.core.background import background_tasks
+
+    service = CustomInMemorySessionService()
+    session = await service.create_session(
+        app_name="questionnaire", user_id="u1", session_id="offline-s1"
+    )
+    session.state.update(
+        {
+            "total_steps": 10,
+            "interactions": [],
+            "accumulated_analytics": [],
+            "questionnaire_output": {"question": {"text": "第一題", "options": []}},
+        }
+    )
+    await service.update_session(session)
+    for _ in range(llm_breaker.min_calls):
+        llm_breaker.record_failure()
+    served = OFFLINE_FALLBACKS.get(quest_type="mbti", kind="question")
+
+    deferred = OFFLINE_FALLBACKS.get(quest_type="mbti", kind="analysis_deferred")
+    llm_analysis = {"quality_score": 1.2, "trait_deltas": {"N": 0.4}}
+    real_run_agent = run_agent_async
+
+    async def analytics_run(**kwargs):
+        # 出題仍走真正的執行器（斷路器開啟時立即拒絕）；分析在斷路器恢復後返回固定結果
+        if kwargs["app_name"] != "analytics" or not llm_breaker.allow():
+            return await real_run_agent(**kwargs)
+        return llm_analysis
+
+    async def submit(answer, index):
+        session = await service.get_session(
+            app_name="questionnaire", user_id="u1", session_id="offline-s1"
+        )
+        return await handle_submit_answer(
+            session_id="offline-s1",
+            answer=answer,
+            question_index=index,
+            user_id="u1",
+            quest_id="mbti",
+            player_level=1,
+            display_name="冒險者",
+            questionnaire_session=session,
+        )
+
+    with patch("app.api.quest_utils.session_service", service), patch(
+        "app.api.quest_ws_handlers.session_service", service
+    ), patch("app.services.cache_service.redis_client", InMemoryRedis()), patch(
+        "app.api.quest_utils.run_agent_async", analytics_run
+    ):
+        started = time.perf_counter()
+        first = await submit("A", 0)
+        second = await submit("2", 1)
+        assert time.perf_counter() - started < 1
+
+        # 第 1 題（LLM 題目）的分析延後等待；斷路器恢復後才執行
+        await asyncio.sleep(0.05)
+        assert background_tasks.pending("offline-s1") == 1
+        llm_breaker.reset()
+        await background_tasks.wait("offline-s1", timeout=5)
+
+    assert first["event"] == "next_question"
+    assert first["data"]["question"]["offlineId"] == "mbti-1"
+    assert second["data"]["question"]["offlineId"] == "mbti-2"
+    assert OFFLINE_FALLBACKS.get(quest_type="mbti", kind="question") == served + 2
+    assert OFFLINE_FALLBACKS.get(quest_type="mbti", kind="analysis_deferred") == deferred + 1
+
+    session = await service.get_session(
+        app_name="questionnaire", user_id="u1", session_id="offline-s1"
+    )
+    # 離線題目在本地計分；LLM 題目的分析在恢復後補上，不遺失作答資料
+    assert session.state["accumulated_analytics"] == [
+        {"quality_score": 1.0, "trait_deltas": {"I": 0.5}, "analysis_reason": "離線題庫計分"},
+        llm_analysis,
+    ]
+    assert sorted(session.state["trait_state"]["indices"]) == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_exhausted_offline_bank_completes_quest():
+    from app.api.quest_utils import serve_offline_question
+
+    service = CustomInMemorySessionService()
+    await service.create_session(
+        app_name="questionnaire",
+        user_id="u1",
+        session_id="s1",
+        state={
+            "interactions": [
+                {"question": {"offlineId": q.id}, "answer": "1"}
+                for q in OFFLINE_QUESTIONS["disc"]
+            ]
+        },
+    )
+
+    with patch("app.api.quest_utils.session_service", service):
+        assert await serve_offline_question("u1", "s1", "disc") == {}
+
+    session = await service.get_session(
+        app_name="questionnaire", user_id="u1", session_id="s1"
+    )
+    assert session.state["quest_completed"] is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "quest_type,analytics,expected",
+    [
+        ("mbti", [{"quality_score": 1.0, "trait_deltas": {"I": 0.5, "N": 0.4, "T": 0.5, "J": 0.4}}],
+         {"class_id": "CLS_INTJ"}),
+        ("disc", [{"quality_score": 1.0, "trait_deltas": {"S": 0.5, "C": 0.2}}], {"stance_id": "STN_S"}),
+        ("enneagram", [{"quality_score": 1.0, "trait_deltas": {"Type5": 0.5}}], {"race_id": "RACE_5"}),
+        ("gallup", [{"quality_score": 1.0, "trait_deltas": {"STR": 0.3, "ACH": 0.5}}],
+         {"talent_ids": ["TAL_ACH", "TAL_STR", "TAL_ARR", "TAL_BEL", "TAL_CON", "TAL_DEL"]}),
+        ("bigfive", [{"quality_score": 1.0, "trait_deltas": {"Openness": 2.0}}],
+         {"stats": {"STA_O": 70, "STA_C": 50, "STA_E": 50, "STA_A": 50, "STA_N": 50}}),
+    ],
+)
+async def test_finalization_falls_back_to_local_report_while_breaker_is_open(
+    quest_type, analytics, expected
+):
+    from app.api.quest_ws_handlers import _run_finalization
+
+    for _ in range(llm_breaker.min_calls):
+        llm_breaker.record_failure()
+    level_info = {"level": 2, "exp": 120, "isLeveledUp": False}
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=MagicMock(commit=AsyncMock()))
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    references = {"CLS_INTJ": {"id": "CLS_INTJ", "name": "戰略法師", "description": "獨立、戰略"}}
+    before = OFFLINE_FALLBACKS.get(quest_type=quest_type, kind="transformation")
+
+    with patch("app.api.quest_ws_handlers.AsyncSessionLocal", factory), patch(
+        "app.api.quest_ws_handlers.persist_quest_result", AsyncMock(return_value=level_info)
+    ) as persist, patch(
+        "app.api.quest_ws_handlers.refresh_user_profile_cache", AsyncMock()
+    ), patch(
+        "app.api.quest_ws_handlers.game_assets_service.get_references",
+        AsyncMock(return_value=references),
+    ), patch("app.services.cache_service.redis_client", InMemoryRedis()):
+        report = await asyncio.wait_for(
+            _run_finalization(
+                session_id="s1",
+                quest_id=quest_type,
+                user_id="u1",
+                player_level=1,
+                player_exp=0,
+                display_name="冒險者",
+                interactions=[{"question": {"text": "第一題"}, "answer": "A"}],
+                analytics_list=analytics,
+            ),
+            timeout=1,
+        )
+
+    assert report.items() >= expected.items()
+    assert report["offline"] is True
+    assert set(report["destiny_guide"]) == {"daily", "main", "side", "oracle"}
+    assert report["levelInfo"] == level_info
+    assert "冒險者" in persist.await_args.kwargs["hero_chronicle"]
+    assert OFFLINE_FALLBACKS.get(quest_type=quest_type, kind="transformation") == before + 1
+    if quest_type == "mbti":
+        assert report["class"]["name"] == "戰略法師"
@@ -0,0 +1,245 @@
+"""
+執行期限與對沖請求測試：逾時取消、慢請求由對沖請求接手、對話型 Agent 只接回採用者的事件，
+並以注入延遲的假 LLM 伺服器驗證尾端延遲下降
+"""
+
+import asyncio
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import litellm
+import pytest
+
+from app.core.hedging import LatencyTracker, hedged, latency_tracker
+from app.core.metrics import AGENT_DEADLINE_EXCEEDED, AGENT_HEDGES
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.fake_llm_server import LatencyModel, fake_model
+
+FAST = 0.02
+SLOW = 0.8
+
+
+class ScriptedLatency(LatencyModel):
+    """依請求序號決定延遲：序號在 slow 內者為慢請求"""
+
+    def __init__(self, slow):
+        super().__init__()
+        self.slow = set(slow)
+        self.calls = 0
+
+    def delay_for(self, agent: str, followup: bool) -> float:
+        index = self.calls
+        self.calls += 1
+        return SLOW if index in self.slow else FAST
+
+
+def test_latency_tracker_quantile():
+    tracker = LatencyTracker(window=20)
+    assert tracker.quantile("a", 0.95) is None
+
+    for value in [0.1] * 19 + [5.0]:
+        tracker.observe("a", value)
+    # 20 筆中 1 筆慢請求：p95 仍為一般延遲
+    assert tracker.quantile("a", 0.95) == 0.1
+    assert tracker.quantile("a", 1.0) == 5.0
+    assert tracker.quantile("a", 0.95, min_samples=21) is None
+
+
+@pytest.mark.asyncio
+async def test_hedged_skips_hedge_when_primary_is_fast():
+    calls = []
+
+    async def attempt(n):
+        calls.append(n)
+        await asyncio.sleep(0.01)
+        return n
+
+    assert await hedged(attempt, hedge_after=0.5) == (0, 0)
+    assert calls == [0]
+
+
+@pytest.mark.asyncio
+async def test_hedged_takes_first_and_cancels_slow_attempt():
+    cancelled = []
+
+    async def attempt(n):
+        try:
+            await asyncio.sleep(5 if n == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return f"attempt-{n}"
+
+    started = time.perf_counter()
+    assert await hedged(attempt, hedge_after=0.05) == ("attempt-1", 1)
+    assert time.perf_counter() - started < 1
+    assert cancelled == [0]
+
+
+@pytest.mark.asyncio
+async def test_hedged_falls_back_when_one_attempt_fails():
+    async def attempt(n):
+        await asyncio.sleep(0.1 if n == 0 else 0.2)
+        if n == 0:
+            raise RuntimeError("proxy 502")
+        return "ok"
+
+    assert await hedged(attempt, hedge_after=0.05) == ("ok", 1)
+
+    async def failing(n):
+        await asyncio.sleep(0.01)
+        raise RuntimeError(f"fail-{n}")
+
+    with pytest.raises(RuntimeError):
+        await hedged(failing, hedge_after=None)
+
+
+@pytest.mark.asyncio
+async def test_outer_timeout_cancels_all_attempts():
+    cancelled = []
+
+    async def attempt(n):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.2):
+            await hedged(attempt, hedge_after=0.05)
+    assert sorted(cancelled) == [0, 1]
+
+
+@pytest.fixture
+def sessions():
+    sessions = CustomInMemorySessionService()
+    latency_tracker.clear()
+    with patch("app.api.quest_utils.session_service", sessions):
+        yield sessions
+    latency_tracker.clear()
+
+
+def _hedging(agent_name, **overrides):
+    values = {
+        "AGENT_HEDGE_AGENTS": [agent_name],
+        "AGENT_HEDGE_MIN_SAMPLES": 10,
+        "AGENT_HEDGE_MIN_DELAY": 0.1,
+        **overrides,
+    }
+    stack = ExitStack()
+    for name, value in values.items():
+        stack.enter_context(patch(f"app.api.quest_utils.settings.{name}", value))
+    return stack
+
+
+async def _run_analytics(agent):
+    from app.api.quest_utils import run_agent_async
+
+    started = time.perf_counter()
+    result = await run_agent_async(
+        agent=agent,
+        app_name="analytics",
+        user_id="u1",
+        session_id="s1",
+        instruction="題目：面對未知的石門，你會怎麼做？\n回答：推開石門\n測驗範疇：mbti",
+        output_key="analytics_output",
+        ephemeral=True,
+    )
+    assert result["trait_deltas"]
+    return time.perf_counter() - started
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "fake_llm", [ScriptedLatency(slow={8, 28, 48, 68})], indirect=True
+)
+async def test_hedging_cuts_analytics_tail_latency(fake_llm, sessions):
+    """每 20 次呼叫有 1 次卡住：對沖後最慢的一次接近 p95 而非卡住的時間"""
+    from app.agents.analytics import create_analytics_agent
+
+    agent = fake_model(create_analytics_agent())
+    fired = AGENT_HEDGES.get(agent=agent.name, result="fired")
+    won = AGENT_HEDGES.get(agent=agent.name, result="won")
+
+    # 第一次呼叫含初始化成本，不列入延遲樣本
+    await _run_analytics(agent)
+    latency_tracker.clear()
+    baseline = [await _run_analytics(agent) for _ in range(40)]
+    with _hedging(agent.name):
+        hedged_runs = [await _run_analytics(agent) for _ in range(40)]
+    await litellm.aclient_session.aclose()
+
+    assert max(baseline) >= SLOW
+    assert max(hedged_runs) < SLOW / 2
+    # 只有卡住的兩次送出對沖請求，且都由對沖請求勝出
+    assert AGENT_HEDGES.get(agent=agent.name, result="fired") == fired + 2
+    assert AGENT_HEDGES.get(agent=agent.name, result="won") == won + 2
+    assert len(fake_llm.state.requests) == 83
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [ScriptedLatency(slow={0})], indirect=True)
+async def test_hedged_questionnaire_keeps_single_turn_in_session(fake_llm, sessions):
+    from app.agents.questionnaire import create_questionnaire_agent
+    from app.api.quest_utils import run_agent_async
+
+    agent = fake_model(create_questionnaire_agent())
+    for _ in range(10):
+        latency_tracker.observe(agent.name, FAST)
+    await sessions.create_session(
+        app_name="questionnaire",
+        user_id="u1",
+        session_id="s1",
+        state={"current_quest_id": "mbti", "total_steps": 10, "interactions": []},
+    )
+
+    with _hedging(agent.name):
+        result = await run_agent_async(
+            agent=agent,
+            app_name="questionnaire",
+            user_id="u1",
+            session_id="s1",
+            instruction="開始 MBTI 試煉",
+            output_key="questionnaire_output",
+        )
+    await litellm.aclient_session.aclose()
+
+    assert result["question"]["text"]
+    assert len(fake_llm.state.requests) == 2
+    # 只接回勝出嘗試的一輪對話，複製出的 Session 已刪除
+    assert list(sessions.sessions["questionnaire"]["u1"]) == ["s1"]
+    session = await sessions.get_session(
+        app_name="questionnaire", user_id="u1", session_id="s1"
+    )
+    assert len(session.events) == 3
+    assert session.state["questionnaire_output"] == result
+    assert session.state["total_steps"] == 10
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_llm", [ScriptedLatency(slow={0})], indirect=True)
+async def test_deadline_cancels_stalled_run(fake_llm, sessions):
+    from app.agents.questionnaire import create_questionnaire_agent
+    from app.api.quest_utils import run_agent_async
+
+    agent = fake_model(create_questionnaire_agent())
+    exceeded = AGENT_DEADLINE_EXCEEDED.get(agent=agent.name)
+
+    started = time.perf_counter()
+    with patch(
+        "app.api.quest_utils.settings.AGENT_DEADLINES", {agent.name: 0.2}
+    ), pytest.raises(TimeoutError, match="逾時"):
+        await run_agent_async(
+            agent=agent,
+            app_name="questionnaire",
+            user_id="u1",
+            session_id="s1",
+            instruction="開始 MBTI 試煉",
+            output_key="questionnaire_output",
+        )
+    await litellm.aclient_session.aclose()
+
+    assert time.perf_counter() - started < SLOW
+    assert AGENT_DEADLINE_EXCEEDED.get(agent=agent.name) == exceeded + 1
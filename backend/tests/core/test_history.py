@@ -0,0 +1,102 @@
+"""
+對話歷史壓縮測試：保留開場與最近 K 輪、中間問答折疊為摘要，Questionnaire 的 prompt 大小不隨題數成長
+"""
+
+from unittest.mock import patch
+
+import litellm
+import pytest
+from google.genai import types
+
+from app.core.history import build_interaction_digest, compact_contents
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.fake_llm_server import fake_model
+
+
+def _user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def _turn(n):
+    """一輪：玩家指令 → 模型工具呼叫 → 工具回應 → 模型收尾"""
+    call = types.FunctionCall(name="submit_question", args={"n": n})
+    response = types.FunctionResponse(name="submit_question", response={"n": n})
+    return [
+        _user(f"回答 {n}"),
+        types.Content(role="model", parts=[types.Part(function_call=call)]),
+        types.Content(role="user", parts=[types.Part(function_response=response)]),
+        types.Content(role="model", parts=[types.Part(text="已完成。")]),
+    ]
+
+
+def test_compact_keeps_opening_and_last_turns_intact():
+    contents = [c for n in range(6) for c in _turn(n)]
+
+    compacted = compact_contents(contents, keep_turns=2, digest="[摘要]")
+
+    assert len(compacted) == 12
+    # 開場指令（英雄史詩與試煉設定）原樣保留
+    assert compacted[:4] == contents[:4]
+    assert compacted[4].parts[0].text == "[摘要]"
+    assert compacted[4].parts[1].text == "回答 4"
+    # 工具回應不視為新的一輪，同一輪的呼叫與回應不會被拆開
+    assert compacted[6].parts[0].function_response is not None
+
+
+def test_compact_is_noop_for_short_history():
+    contents = [c for n in range(3) for c in _turn(n)]
+    # 開場加上最近 2 輪已涵蓋全部內容
+    assert compact_contents(contents, keep_turns=2, digest="[摘要]") is contents
+    assert compact_contents(contents, keep_turns=3, digest="[摘要]") is contents
+    assert compact_contents(contents, keep_turns=0, digest="[摘要]") is contents
+
+
+def test_digest_folds_only_older_interactions():
+    interactions = [
+        {"question": {"text": f"第 {n} 道試煉" + "很長" * 40}, "answer": f"選項 {n}"}
+        for n in range(5)
+    ]
+
+    digest = build_interaction_digest(interactions, keep_turns=3)
+
+    assert digest.count("\n第") == 2
+    assert "選項 1" in digest and "選項 2" not in digest
+    assert "…" in digest
+    assert build_interaction_digest(interactions[:3], keep_turns=3) is None
+
+
+@pytest.mark.asyncio
+async def test_questionnaire_prompt_stops_growing(fake_llm):
+    """真實 ADK Questionnaire Agent：超過保留輪數後每題送出的訊息數固定"""
+    from app.agents.questionnaire import create_questionnaire_agent
+    from app.api.quest_utils import run_agent_async
+
+    agent = fake_model(create_questionnaire_agent())
+    sessions = CustomInMemorySessionService()
+    with patch("app.api.quest_utils.session_service", sessions), patch(
+        "app.agents.questionnaire.settings.QUESTIONNAIRE_HISTORY_TURNS", 2
+    ):
+        for n in range(8):
+            session = await sessions.get_session(
+                app_name="questionnaire", user_id="u1", session_id="s1"
+            )
+            if session is not None:
+                session.state["interactions"] = [
+                    {"question": {"text": f"題目 {i}"}, "answer": f"回答 {i}"}
+                    for i in range(n)
+                ]
+                await sessions.update_session(session)
+            await run_agent_async(
+                agent=agent,
+                app_name="questionnaire",
+                user_id="u1",
+                session_id="s1",
+                instruction=f"玩家對於第 {n} 題的回答是：A",
+                output_key="questionnaire_output",
+            )
+    await litellm.aclient_session.aclose()
+
+    sizes = [r["messages"] for r in fake_llm.state.requests if not r["followup"]]
+    # system + 開場 3 則 + 保留的 2 輪（前一輪 3 則 + 本輪指令）；未壓縮時為 2, 5, 8, 11, ...
+    # 輸出工具呼叫後即結束該輪，不再有模型收尾文字
+    assert sizes == [2, 5] + [8] * 6
@@ -0,0 +1,112 @@
+"""
+模型分層與備援測試：各 Agent 依層級取得模型、主要模型出錯或逾時改用備援模型
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+import litellm
+import pytest
+
+from app.core import llm
+from app.core.llm import FallbackLiteLlm, get_llm_model, resolve_agent_model
+from app.core.metrics import LLM_FALLBACKS
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.fake_llm_server import create_app
+
+
+def test_agents_resolve_to_their_tier():
+    with patch.object(llm.settings, "LLM_MODEL", "big"), patch.object(
+        llm.settings, "LLM_FAST_MODEL", "small"
+    ), patch.object(llm.settings, "AGENT_MODELS", {"summary_agent": "tiny"}):
+        assert resolve_agent_model("questionnaire_agent") == "big"
+        assert resolve_agent_model("transformation_agent") == "big"
+        assert resolve_agent_model("analytics_agent") == "small"
+        # 個別指定優先於層級
+        assert resolve_agent_model("summary_agent") == "tiny"
+
+    # 未設定輕量模型時全部使用 LLM_MODEL
+    with patch.object(llm.settings, "LLM_MODEL", "big"):
+        assert resolve_agent_model("analytics_agent") == "big"
+
+
+def test_shared_models_carry_fallback():
+    with patch.object(llm, "_models", {}), patch.object(
+        llm.settings, "LLM_FALLBACK_MODEL", "backup"
+    ):
+        primary = get_llm_model("big")
+        assert get_llm_model("big") is primary
+        assert primary.fallback.model == "backup"
+        # 備援模型本身不再套一層備援
+        assert get_llm_model("backup").fallback is None
+
+
+class RoutingTransport(httpx.AsyncBaseTransport):
+    """依請求的模型名稱模擬故障：broken 回傳 500、stalled 不回應，其餘轉給假 LLM 伺服器"""
+
+    def __init__(self, app):
+        self.inner = httpx.ASGITransport(app=app)
+        self.models = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model = json.loads(await request.aread())["model"]
+        self.models.append(model)
+        if model == "broken":
+            return httpx.Response(500, json={"error": {"message": "upstream down"}})
+        if model == "stalled":
+            await asyncio.sleep(30)
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture
+def transport():
+    routing = RoutingTransport(create_app())
+    previous = litellm.aclient_session
+    litellm.aclient_session = httpx.AsyncClient(transport=routing)
+    yield routing
+    litellm.aclient_session = previous
+
+
+def _model(name):
+    return FallbackLiteLlm(
+        model=f"openai/{name}",
+        api_base="http://fake-llm",
+        api_key="sk-fake",
+        primary_timeout=2.0,
+        fallback=FallbackLiteLlm(
+            model="openai/fake-model", api_base="http://fake-llm", api_key="sk-fake"
+        ),
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("primary,reason", [("broken", "error"), ("stalled", "timeout")])
+async def test_analytics_falls_back_to_secondary_model(transport, primary, reason):
+    from app.agents.analytics import create_analytics_agent
+    from app.api.quest_utils import run_agent_async
+
+    agent = create_analytics_agent()
+    agent.model = _model(primary)
+    before = LLM_FALLBACKS.get(agent=agent.name, model=f"openai/{primary}", reason=reason)
+
+    with patch("app.api.quest_utils.session_service", CustomInMemorySessionService()):
+        result = await run_agent_async(
+            agent=agent,
+            app_name="analytics",
+            user_id="u1",
+            session_id="s1",
+            instruction="題目：面對未知的石門，你會怎麼做？\n回答：推開石門\n測驗範疇：mbti",
+            output_key="analytics_output",
+            ephemeral=True,
+        )
+    await litellm.aclient_session.aclose()
+
+    assert result["trait_deltas"]
+    assert transport.models[0] == primary
+    assert transport.models[-1] == "fake-model"
+    assert (
+        LLM_FALLBACKS.get(agent=agent.name, model=f"openai/{primary}", reason=reason)
+        == before + 1
+    )
@@ -0,0 +1,129 @@
+"""
+取樣式 LLM 追蹤測試
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.llm_tracing import REDACTED, SampledLLMTracer, redact, truncate
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+END = START + timedelta(milliseconds=850)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def trace_records():
+    """
+    直接在 app.llm 掛載收集用 handler
+
+    不依賴 caplog：app logger 在 configure_logging 後 propagate=False，
+    而未設定時 caplog 又會經由 root 重複擷取，兩種情況結果不一致。
+    """
+    trace_logger = logging.getLogger("app.llm")
+    handler = _ListHandler()
+    previous_level = trace_logger.level
+    trace_logger.addHandler(handler)
+    trace_logger.setLevel(logging.INFO)
+    yield lambda: [r for r in handler.records if hasattr(r, "llm_trace")]
+    trace_logger.removeHandler(handler)
+    trace_logger.setLevel(previous_level)
+
+
+def _kwargs(content: str = "你好") -> dict:
+    return {
+        "model": "openai/gpt-4o",
+        "api_key": "sk-secret-value-123456",
+        "standard_logging_object": {
+            "model": "gpt-4o",
+            "prompt_tokens": 120,
+            "completion_tokens": 30,
+            "messages": [{"role": "user", "content": content}],
+            "response": {"choices": [{"message": {"content": "ok"}}]},
+        },
+    }
+
+
+def test_redact_masks_sensitive_keys_and_patterns():
+    data = {
+        "api_key": "sk-abcdefghijkl",
+        "headers": {"Authorization": "Bearer abc.def"},
+        "content": "寄信到 hero@example.com，金鑰 sk-abcdefghijkl",
+    }
+    result = redact(data)
+
+    assert result["api_key"] == REDACTED
+    assert result["headers"]["Authorization"] == REDACTED
+    assert "hero@example.com" not in result["content"]
+    assert "sk-abcdefghijkl" not in result["content"]
+
+
+def test_redact_keeps_token_usage_counts():
+    data = {
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        "max_tokens": 512,
+        "access_token": "abc",
+        "X-API-Key": "xyz",
+    }
+    result = redact(data)
+
+    assert result["usage"] == {
+        "prompt_tokens": 10,
+        "completion_tokens": 5,
+        "total_tokens": 15,
+    }
+    assert result["max_tokens"] == 512
+    assert result["access_token"] == REDACTED
+    assert result["X-API-Key"] == REDACTED
+
+
+def test_truncate_keeps_length_hint():
+    assert truncate("abc", 10) == "abc"
+    assert truncate("a" * 20, 5) == "aaaaa...(+15 chars)"
+
+
+def test_build_record_is_truncated_and_redacted():
+    tracer = SampledLLMTracer(sample_rate=1.0, max_chars=40)
+    record = tracer.build_record(
+        _kwargs("長" * 200 + " user@example.com"), None, START, END, "success"
+    )
+
+    assert record["latency_ms"] == 850.0
+    assert record["prompt_tokens"] == 120
+    assert "(+" in record["messages"]
+    assert "sk-secret" not in str(record)
+
+
+@pytest.mark.asyncio
+async def test_success_events_respect_sample_rate(trace_records):
+    await SampledLLMTracer(sample_rate=0.0, max_chars=100).async_log_success_event(
+        _kwargs(), None, START, END
+    )
+    assert not trace_records()
+
+    await SampledLLMTracer(sample_rate=1.0, max_chars=100).async_log_success_event(
+        _kwargs(), None, START, END
+    )
+    traces = trace_records()
+    assert len(traces) == 1
+    assert traces[0].llm_trace["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_failures_are_always_logged(trace_records):
+    await SampledLLMTracer(sample_rate=0.0, max_chars=100).async_log_failure_event(
+        _kwargs(), None, START, END
+    )
+    traces = trace_records()
+    assert len(traces) == 1
+    assert traces[0].levelno == logging.WARNING
@@ -0,0 +1,125 @@
+"""
+共用 LLM 模型與連線池測試
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import litellm
+import pytest
+
+from app.core.llm import LLMTransport, get_llm_model
+
+
+def test_agents_share_single_model_instance():
+    """所有 Agent 共用同一個 LiteLlm 實例"""
+    from app.agents.analytics import analytics_agent
+    from app.agents.questionnaire import questionnaire_agent
+    from app.agents.summary import summary_agent
+    from app.agents.transformation import transformation_agent
+
+    model = get_llm_model()
+    for agent in (
+        analytics_agent,
+        questionnaire_agent,
+        summary_agent,
+        transformation_agent,
+    ):
+        assert agent.model is model
+
+
+def test_install_sets_litellm_client_session():
+    transport = LLMTransport()
+    previous = litellm.aclient_session
+    try:
+        transport.install()
+        assert litellm.aclient_session is transport.client
+    finally:
+        litellm.aclient_session = previous
+
+
+async def _start_keepalive_server():
+    """本機最小 HTTP/1.1 keep-alive 伺服器（/fail 回傳 500）"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode().split("\r\n")
+                path = lines[0].split(" ")[1]
+                length = 0
+                for line in lines[1:]:
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                status = "500 Internal Server Error" if path == "/fail" else "200 OK"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: 2\r\n\r\n{{}}".encode()
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.asyncio
+async def test_transport_reuses_connections():
+    """透過真實 httpcore 連線池：3 次請求只建立 1 條 TCP 連線"""
+    server, base_url = await _start_keepalive_server()
+    transport = LLMTransport()
+    try:
+        await transport.client.post(f"{base_url}/chat/completions", json={})
+        await transport.client.post(f"{base_url}/chat/completions", json={})
+        await transport.client.post(f"{base_url}/fail", json={})
+
+        snapshot = transport.snapshot()
+        assert snapshot["requests"] == 3
+        assert snapshot["responses"] == 3
+        assert snapshot["errors"] == 1
+        assert snapshot["connections_opened"] == 1
+        assert snapshot["connections_opened"] < snapshot["requests"]
+        assert snapshot["open_connections"] == 1
+        assert snapshot["idle_connections"] == 1
+    finally:
+        await transport.aclose()
+        server.close()
+        await server.wait_closed()
+
+    assert transport.pool_status() == {"open_connections": 0, "idle_connections": 0}
+
+
+@pytest.mark.asyncio
+async def test_lifespan_reinstalls_pool_on_every_start():
+    """shutdown 會清除 aclient_session，下一次 startup 必須重新掛載"""
+    from app.core.llm import llm_transport
+    from app.main import app, lifespan
+
+    engine = MagicMock()
+    engine.connect.side_effect = RuntimeError("no database in tests")
+    redis = MagicMock()
+    redis.connect = AsyncMock(side_effect=RuntimeError("no redis in tests"))
+    redis.disconnect = AsyncMock()
+
+    with patch("app.main.engine", engine), patch("app.main.redis_client", redis):
+        for _ in range(2):
+            async with lifespan(app):
+                assert litellm.aclient_session is llm_transport.client
+            assert litellm.aclient_session is None
+
+
+@pytest.mark.asyncio
+async def test_trace_counts_new_connections():
+    transport = LLMTransport()
+    await transport._trace("connection.connect_tcp.complete", {})
+    await transport._trace("connection.start_tls.complete", {})
+    await transport._trace("http11.send_request_headers.complete", {})
+
+    assert transport.stats.connections_opened == 1
+    assert transport.stats.tls_handshakes == 1
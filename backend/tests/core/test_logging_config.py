@@ -0,0 +1,113 @@
+"""
+非阻塞日誌管線測試：QueueHandler / QueueListener、JSON 格式化與佇列滿載處理
+"""
+
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from app.core.logging_config import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    configure_logging,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "app.log"
+    yield path
+    shutdown_logging()
+
+
+def test_loggers_only_hold_queue_handlers(log_file):
+    configure_logging(log_file=str(log_file))
+
+    for name in ("app", "uvicorn.access", "litellm"):
+        handlers = logging.getLogger(name).handlers
+        assert handlers
+        assert all(isinstance(h, NonBlockingQueueHandler) for h in handlers)
+
+
+def test_records_are_written_by_listener_and_flushed_on_shutdown(log_file):
+    configure_logging(log_file=str(log_file))
+    logging.getLogger("app").warning("寫入 %s", "背景執行緒")
+
+    shutdown_logging()
+
+    assert "寫入 背景執行緒" in log_file.read_text(encoding="utf-8")
+    # 停止後 logger 改回直接掛載實際 handler，不會遺失關閉過程中的日誌
+    assert not any(
+        isinstance(h, NonBlockingQueueHandler)
+        for h in logging.getLogger("app").handlers
+    )
+
+
+def test_reconfigure_is_idempotent(log_file):
+    configure_logging(log_file=str(log_file))
+    configure_logging(log_file=str(log_file))
+    logging.getLogger("app").warning("只寫一次")
+    shutdown_logging()
+
+    assert log_file.read_text(encoding="utf-8").count("只寫一次") == 1
+
+
+def test_json_logs_include_extra_fields(log_file):
+    configure_logging(log_file=str(log_file), json_logs=True)
+    logging.getLogger("app").warning(
+        "quest %s done", "mbti", extra={"session_id": "s-1"}
+    )
+    shutdown_logging()
+
+    line = log_file.read_text(encoding="utf-8").strip().splitlines()[-1]
+    payload = json.loads(line)
+    assert payload["message"] == "quest mbti done"
+    assert payload["level"] == "WARNING"
+    assert payload["session_id"] == "s-1"
+
+
+def test_json_formatter_keeps_traceback():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("app").makeRecord(
+            "app", logging.ERROR, "x.py", 1, "failed", None, sys.exc_info()
+        )
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert "ValueError: boom" in payload["exc_info"]
+
+
+def test_prepare_freezes_mutable_args():
+    """訊息在呼叫端定格，之後修改參數物件不影響已排入佇列的日誌"""
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    state = {"step": 1}
+
+    logger = logging.getLogger("tests.logging.freeze")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    try:
+        logger.info("state=%s", state)
+        state["step"] = 2
+    finally:
+        logger.removeHandler(handler)
+
+    assert log_queue.get_nowait().getMessage() == "state={'step': 1}"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.makeLogRecord({"msg": "x"})
+
+    handler.handle(record)
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
@@ -0,0 +1,114 @@
+"""
+Prometheus 指標測試：text exposition 格式、HTTP / Cache / LLM 指標與 /metrics 端點
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.llm_tracing import LLMMetricsLogger
+from app.core.metrics import CACHE_REQUESTS, LLM_TOKENS, MetricsRegistry, current_agent
+from app.services.cache_service import CacheService
+
+
+def test_render_counter_and_callback():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs", ("kind",))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    registry.register_callback("queue_depth", "Depth", lambda: 7)
+
+    text = registry.render()
+    assert "# TYPE traitquest_jobs_total counter" in text
+    assert 'traitquest_jobs_total{kind="a"} 3' in text
+    assert "# TYPE traitquest_queue_depth gauge" in text
+    assert "traitquest_queue_depth 7" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert 'traitquest_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'traitquest_latency_seconds_bucket{le="1"} 2' in text
+    assert 'traitquest_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "traitquest_latency_seconds_count 3" in text
+    assert "traitquest_latency_seconds_sum 5.55" in text
+
+
+def test_labels_must_match_declaration():
+    counter = MetricsRegistry().counter("x_total", "X", ("agent",))
+    with pytest.raises(ValueError):
+        counter.inc(model="gpt")
+
+
+def test_failing_callback_does_not_break_scrape():
+    registry = MetricsRegistry()
+    registry.register_callback("broken", "Broken", lambda: 1 / 0)
+    registry.counter("ok_total", "Ok").inc()
+
+    text = registry.render()
+    assert "traitquest_broken" not in text
+    assert "traitquest_ok_total 1" in text
+
+
+@pytest.mark.asyncio
+async def test_cache_lookups_are_counted_per_family():
+    before_hit = CACHE_REQUESTS.get(family="user_profile", result="hit")
+    before_miss = CACHE_REQUESTS.get(family="user_profile", result="miss")
+
+    with patch("app.services.cache_service.redis_client") as redis:
+        redis.get = AsyncMock(side_effect=[json.dumps({"level": 1}), None])
+        await CacheService.get_user_profile("user-1")
+        await CacheService.get_user_profile("user-2")
+
+    assert CACHE_REQUESTS.get(family="user_profile", result="hit") == before_hit + 1
+    assert CACHE_REQUESTS.get(family="user_profile", result="miss") == before_miss + 1
+
+
+@pytest.mark.asyncio
+async def test_llm_metrics_are_attributed_to_current_agent():
+    labels = {"agent": "metrics_test_agent", "model": "gpt-4o", "type": "prompt"}
+    start = datetime(2026, 1, 1)
+    kwargs = {
+        "standard_logging_object": {
+            "model": "gpt-4o",
+            "prompt_tokens": 120,
+            "completion_tokens": 30,
+        }
+    }
+
+    token = current_agent.set("metrics_test_agent")
+    try:
+        await LLMMetricsLogger().async_log_success_event(
+            kwargs, None, start, start + timedelta(seconds=1.5)
+        )
+    finally:
+        current_agent.reset(token)
+
+    assert LLM_TOKENS.get(**labels) == 120
+
+
+def test_metrics_endpoint_reports_route_templates():
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert (
+        'traitquest_http_request_duration_seconds_count{method="GET",route="/health",status="200"}'
+        in body
+    )
+    assert "traitquest_ws_connections_active 0" in body
+    assert 'traitquest_db_pool_connections{state="checkedout"}' in body
+    assert 'traitquest_llm_http_events_total{event="requests"}' in body
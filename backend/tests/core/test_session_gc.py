@@ -0,0 +1,169 @@
+"""
+In-memory Session 回收測試：TTL 與 LRU 淘汰、結算後刪除各 App 的 Session、記憶體用量統計
+"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from google.adk.events import Event
+from google.genai import types
+
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.redis_mock import InMemoryRedis
+
+APPS = ("questionnaire", "analytics", "transformation", "summary")
+
+
+async def _create(service, app_name, session_id, user_id="u1", updated=None):
+    session = await service.create_session(
+        app_name=app_name, user_id=user_id, session_id=session_id
+    )
+    if updated is not None:
+        service.sessions[app_name][user_id][session_id].last_update_time = updated
+    return session
+
+
+def _count(service):
+    return sum(s["sessions"] for s in service.stats().values())
+
+
+@pytest.mark.asyncio
+async def test_sweep_removes_idle_sessions():
+    service = CustomInMemorySessionService(ttl_seconds=60)
+    now = time.time()
+    await _create(service, "questionnaire", "old", updated=now - 120)
+    await _create(service, "questionnaire", "fresh", updated=now - 10)
+    await _create(service, "analytics", "old", user_id="u2", updated=now - 61)
+
+    assert service.sweep(now=now) == 2
+
+    assert list(service.sessions) == ["questionnaire"]
+    assert list(service.sessions["questionnaire"]["u1"]) == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_sweep_evicts_least_recently_updated_over_limit():
+    service = CustomInMemorySessionService(max_sessions=2)
+    now = time.time()
+    for index in range(4):
+        await _create(service, "questionnaire", f"s{index}", updated=now - 100 + index)
+
+    assert service.sweep(now=now) == 2
+    assert sorted(service.sessions["questionnaire"]["u1"]) == ["s2", "s3"]
+
+
+@pytest.mark.asyncio
+async def test_update_session_refreshes_lru_position():
+    service = CustomInMemorySessionService(max_sessions=1)
+    await _create(service, "questionnaire", "a", updated=1.0)
+    await _create(service, "questionnaire", "b", updated=2.0)
+
+    session = await service.get_session(
+        app_name="questionnaire", user_id="u1", session_id="a"
+    )
+    await service.update_session(session)
+    service.sweep()
+
+    assert list(service.sessions["questionnaire"]["u1"]) == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_delete_quest_sessions_covers_all_apps():
+    service = CustomInMemorySessionService()
+    for app_name in APPS:
+        await _create(service, app_name, "s1")
+    await _create(service, "questionnaire", "s2")
+
+    assert await service.delete_quest_sessions("u1", "s1") == 4
+    assert await service.delete_quest_sessions("u1", "s1") == 0
+    assert list(service.sessions) == ["questionnaire"]
+    assert list(service.sessions["questionnaire"]["u1"]) == ["s2"]
+
+
+@pytest.mark.asyncio
+async def test_stats_account_for_event_history():
+    service = CustomInMemorySessionService()
+    session = await _create(service, "questionnaire", "s1")
+    before = service.stats()["questionnaire"]["bytes"]
+
+    for n in range(5):
+        await service.append_event(
+            session,
+            Event(
+                author="user",
+                content=types.Content(role="user", parts=[types.Part(text=f"回答 {n}" * 50)]),
+            ),
+        )
+
+    after = service.stats()["questionnaire"]
+    assert after["sessions"] == 1
+    assert after["bytes"] > before + 5 * 50
+
+
+@pytest.mark.asyncio
+async def test_stats_serialize_each_session_once():
+    from google.adk.sessions.session import Session
+
+    from app.core.metrics import registry
+
+    service = CustomInMemorySessionService()
+    session = await _create(service, "questionnaire", "s1")
+    await _create(service, "analytics", "s1")
+    first = service.stats()
+
+    # 已量測的 Session 不再整份序列化；新事件只累加事件本身的大小
+    with patch.object(Session, "model_dump_json", side_effect=AssertionError):
+        await service.append_event(
+            session,
+            Event(author="user", content=types.Content(role="user", parts=[types.Part(text="回答")])),
+        )
+        assert service.stats()["questionnaire"]["bytes"] > first["questionnaire"]["bytes"]
+
+    # update_session 後重新量測該 Session
+    session = await service.get_session(
+        app_name="questionnaire", user_id="u1", session_id="s1"
+    )
+    session.state["interactions"] = ["回答" * 100]
+    await service.update_session(session)
+    assert service.stats()["questionnaire"]["bytes"] > first["questionnaire"]["bytes"] + 200
+
+    # 同一次抓取中 adk_sessions / adk_session_bytes 共用一次統計
+    service._stats_cache = None
+    with patch("app.core.session.session_service", service), patch.object(
+        service, "_iter_sessions", wraps=service._iter_sessions
+    ) as scan:
+        output = registry.render()
+    assert 'traitquest_adk_sessions{app="analytics"} 1' in output
+    assert 'traitquest_adk_session_bytes{app="analytics"}' in output
+    assert scan.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_request_result_releases_quest_sessions():
+    from app.api.quest_ws_handlers import handle_request_result
+
+    service = CustomInMemorySessionService()
+    questionnaire = await _create(service, "questionnaire", "s1")
+    questionnaire.state["interactions"] = [{"question": {"text": "題目"}, "answer": "A"}]
+    await service.update_session(questionnaire)
+    await _create(service, "transformation", "s1")
+    report = {"quest_type": "mbti"}
+
+    with patch("app.api.quest_utils.session_service", service), patch(
+        "app.api.quest_ws_handlers.session_service", service
+    ), patch("app.services.cache_service.redis_client", InMemoryRedis()), patch(
+        "app.api.quest_ws_handlers.finalize_quest", AsyncMock(return_value=report)
+    ):
+        result = await handle_request_result(
+            session_id="s1",
+            quest_id="mbti",
+            user_id="u1",
+            player_level=1,
+            player_exp=0,
+            display_name="冒險者",
+            questionnaire_session=questionnaire,
+        )
+
+    assert result == {"event": "final_result", "data": report}
+    assert _count(service) == 0
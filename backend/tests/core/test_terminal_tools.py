@@ -0,0 +1,67 @@
+"""
+終止工具測試：輸出工具成功後立即結束 Agent 執行，不再請求模型產生收尾文字
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import litellm
+import pytest
+
+from app.core.agent import end_after_tools
+from app.core.metrics import AGENT_MODEL_TURNS
+from app.core.session import CustomInMemorySessionService
+from tests.mocks.fake_llm_server import fake_model
+
+
+def _context():
+    return SimpleNamespace(actions=SimpleNamespace(skip_summarization=False))
+
+
+def test_terminal_tool_skips_summarization():
+    callback = end_after_tools("submit_question", "complete_trial")
+
+    context = _context()
+    assert callback(SimpleNamespace(name="complete_trial"), context, {"ok": True}) is None
+    assert context.actions.skip_summarization is True
+
+
+def test_other_tools_and_errors_return_to_model():
+    callback = end_after_tools("submit_question")
+
+    other = _context()
+    callback(SimpleNamespace(name="lookup"), other, {"ok": True})
+    assert other.actions.skip_summarization is False
+
+    # 工具回報錯誤時交回模型修正
+    failed = _context()
+    callback(SimpleNamespace(name="submit_question"), failed, {"error": "缺少 options"})
+    assert failed.actions.skip_summarization is False
+
+
+@pytest.mark.asyncio
+async def test_analytics_run_makes_single_llm_call(fake_llm):
+    """真實 ADK Analytics Agent：submit_analysis 後不再送出 follow-up 請求"""
+    from app.agents.analytics import create_analytics_agent
+    from app.api.quest_utils import run_agent_async
+
+    agent = fake_model(create_analytics_agent())
+    sessions = CustomInMemorySessionService()
+    before = AGENT_MODEL_TURNS.count(agent=agent.name)
+
+    with patch("app.api.quest_utils.session_service", sessions):
+        result = await run_agent_async(
+            agent=agent,
+            app_name="analytics",
+            user_id="u1",
+            session_id="s1",
+            instruction="題目：面對未知的石門，你會怎麼做？\n回答：推開石門\n測驗範疇：mbti",
+            output_key="analytics_output",
+            ephemeral=True,
+        )
+        await litellm.aclient_session.aclose()
+
+    assert result["trait_deltas"]
+    assert [r["followup"] for r in fake_llm.state.requests] == [False]
+    assert AGENT_MODEL_TURNS.count(agent=agent.name) == before + 1
+    assert AGENT_MODEL_TURNS._sums[(agent.name,)] >= 1
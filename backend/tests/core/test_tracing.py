@@ -0,0 +1,105 @@
+"""
+分段延遲追蹤測試：span 屬性傳遞、Agent / Cache / DB span
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.quest_ws_handlers import instrumented_event
+from app.core.tracing import span_attributes, start_span
+from app.db.session import TracedAsyncSession
+from app.services.cache_service import CacheService
+
+
+def _spans(exporter, name):
+    return [span for span in exporter.get_finished_spans() if span.name == name]
+
+
+@pytest.mark.asyncio
+async def test_bound_attributes_reach_child_spans_and_tasks(span_exporter):
+    async def background():
+        with start_span("analytics.child"):
+            pass
+
+    with span_attributes({"quest.type": "disc", "ws.event": "submit_answer"}):
+        with start_span("ws.parent"):
+            await asyncio.create_task(background())
+
+    child = _spans(span_exporter, "analytics.child")[0]
+    parent = _spans(span_exporter, "ws.parent")[0]
+    assert child.attributes["quest.type"] == "disc"
+    assert child.attributes["ws.event"] == "submit_answer"
+    assert child.parent.span_id == parent.context.span_id
+
+
+@pytest.mark.asyncio
+async def test_run_agent_async_span_is_tagged(span_exporter):
+    from app.api import quest_utils
+
+    class FakeRunner:
+        async def run_async(self, **kwargs):
+            yield SimpleNamespace(
+                author="fake_agent",
+                get_function_responses=lambda: [],
+                actions=SimpleNamespace(end_of_agent=True),
+            )
+
+    agent = SimpleNamespace(name="fake_agent")
+
+    @instrumented_event("start_quest")
+    async def handler(session_id: str, quest_id: str):
+        return await quest_utils.run_agent_async(
+            agent=agent,
+            app_name="tracing_test",
+            user_id="u1",
+            session_id=session_id,
+            instruction="hi",
+            output_key="out",
+        )
+
+    with patch.object(quest_utils, "get_runner", return_value=FakeRunner()):
+        await handler(session_id="trace-s1", quest_id="mbti")
+
+    agent_span = _spans(span_exporter, "agent.run")[0]
+    event_span = _spans(span_exporter, "ws.start_quest")[0]
+    assert agent_span.attributes["agent.name"] == "fake_agent"
+    assert agent_span.attributes["quest.type"] == "mbti"
+    assert agent_span.attributes["ws.event"] == "start_quest"
+    assert agent_span.attributes["agent.events"] == 1
+    assert agent_span.parent.span_id == event_span.context.span_id
+
+
+@pytest.mark.asyncio
+async def test_cache_service_spans_record_family_and_hit(span_exporter):
+    with patch("app.services.cache_service.redis_client") as redis:
+        redis.get = AsyncMock(side_effect=[json.dumps({"level": 3}), None])
+        assert await CacheService.get_user_profile("user-1") == {"level": 3}
+        assert await CacheService.get_analytics_result("session-1") is None
+
+    hit, miss = _spans(span_exporter, "cache.get")
+    assert hit.attributes["cache.family"] == "user_profile"
+    assert hit.attributes["cache.hit"] is True
+    assert miss.attributes["cache.family"] == "analytics_result"
+    assert miss.attributes["cache.hit"] is False
+
+
+@pytest.mark.asyncio
+async def test_traced_db_session_spans(span_exporter):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    session_factory = async_sessionmaker(bind=engine, class_=TracedAsyncSession)
+    try:
+        async with session_factory() as session:
+            await session.execute(text("SELECT 1"))
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+    execute = _spans(span_exporter, "db.execute")[0]
+    assert execute.attributes["db.statement"] == "SELECT 1"
+    assert _spans(span_exporter, "db.commit")
@@ -0,0 +1,134 @@
+"""
+累加特徵測試：逐題累加與整批彙整一致、重送答案重建、取樣不足維度與結算沿用累加結果
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.calculators import PsychologicalCalculator
+from app.core.session import CustomInMemorySessionService
+from app.core.trait_state import TraitAccumulator, fold_trait_state
+from tests.mocks.redis_mock import InMemoryRedis
+
+ANALYTICS = [
+    {"quality_score": 1.2, "trait_deltas": {"I": 0.4, "N": 0.3}},
+    {"quality_score": 1.5, "trait_deltas": {"E": 0.2, "T": 0.5}},
+    {"quality_score": 1.0, "trait_deltas": {"I": 0.3, "F": -0.1}},
+]
+
+
+def test_running_totals_match_batch_aggregation():
+    accumulator = TraitAccumulator("mbti")
+    for index, result in enumerate(ANALYTICS):
+        assert accumulator.add(result, index)
+
+    expected = PsychologicalCalculator().aggregate_traits(ANALYTICS, "mbti")
+    assert accumulator.aggregated() == pytest.approx(expected)
+    assert accumulator.avg_quality == pytest.approx(3.7 / 3)
+
+
+def test_state_roundtrip_is_compact():
+    state = {}
+    for index, result in enumerate(ANALYTICS):
+        assert fold_trait_state(state, "mbti", index, result)
+
+    data = state["trait_state"]
+    assert len(data["totals"]) == len(data["counts"]) == 8
+    assert data["counts"] == [1, 2, 0, 1, 1, 1, 0, 0]
+    assert TraitAccumulator.from_state(data).aggregated() == TraitAccumulator.from_analytics(
+        "mbti", enumerate(ANALYTICS)
+    ).aggregated()
+
+    # 同一題再次送達時不重複累加
+    assert not fold_trait_state(state, "mbti", 1, ANALYTICS[1])
+    assert state["trait_state"] == data
+
+    # 後續題目就地更新原本的陣列，不複製
+    totals, indices = data["totals"], data["indices"]
+    assert fold_trait_state(state, "mbti", 3, {"trait_deltas": {"J": 0.5}})
+    assert state["trait_state"]["totals"] is totals
+    assert state["trait_state"]["indices"] is indices
+    assert indices == [0, 1, 2, 3]
+
+
+def test_under_sampled_dimensions():
+    accumulator = TraitAccumulator.from_analytics("mbti", enumerate(ANALYTICS))
+    # E/I 取樣 3 次、S/N 與 T/F 各 1 次、J/P 從未觸及
+    assert accumulator.under_sampled() == ["J/P", "S/N"]
+    assert TraitAccumulator("disc").under_sampled() == []
+
+    disc = TraitAccumulator.from_analytics(
+        "disc", enumerate([{"trait_deltas": {"D": 0.5, "I": 0.1}}] * 2)
+    )
+    assert disc.under_sampled(limit=3) == ["S", "C"]
+
+
+@pytest.mark.asyncio
+async def test_analytics_task_folds_and_rebuilds_on_resubmit():
+    from app.api.quest_utils import run_analytics_task
+
+    service = CustomInMemorySessionService()
+    await service.create_session(
+        app_name="questionnaire", user_id="u1", session_id="s1"
+    )
+    results = iter(ANALYTICS + [{"quality_score": 2.0, "trait_deltas": {"S": 0.5}}])
+
+    async def agent(**_):
+        return next(results)
+
+    with patch("app.api.quest_utils.session_service", service), patch(
+        "app.api.quest_utils.run_agent_async", agent
+    ), patch("app.services.cache_service.redis_client", InMemoryRedis()):
+        for index in (0, 1, 2, 1):
+            await run_analytics_task("u1", "s1", "題目", "A", "mbti", question_index=index)
+
+    session = await service.get_session(
+        app_name="questionnaire", user_id="u1", session_id="s1"
+    )
+    # 第 2 題重送後以 Redis 中的逐題結果重建（取代原本的 E/T 分數）
+    aggregated = TraitAccumulator.from_state(session.state["trait_state"]).aggregated()
+    assert aggregated == pytest.approx({"I": 0.78, "N": 0.36, "S": 1.0, "F": -0.1})
+
+
+@pytest.mark.asyncio
+async def test_request_result_hands_running_state_to_finalization():
+    from app.api.quest_ws_handlers import handle_request_result
+
+    service = CustomInMemorySessionService()
+    session = await service.create_session(
+        app_name="questionnaire", user_id="u1", session_id="s1"
+    )
+    for index, result in enumerate(ANALYTICS):
+        fold_trait_state(session.state, "mbti", index, result)
+    session.state["accumulated_analytics"] = ANALYTICS
+    session.state["interactions"] = [{"answer": "A"}] * 3
+    await service.update_session(session)
+    finalize = AsyncMock(return_value={"quest_type": "mbti"})
+
+    with patch("app.api.quest_utils.session_service", service), patch(
+        "app.api.quest_ws_handlers.session_service", service
+    ), patch("app.services.cache_service.redis_client", InMemoryRedis()), patch(
+        "app.api.quest_ws_handlers.finalize_quest", finalize
+    ):
+        await handle_request_result(
+            session_id="s1",
+            quest_id="mbti",
+            user_id="u1",
+            player_level=1,
+            player_exp=0,
+            display_name="冒險者",
+            questionnaire_session=session,
+        )
+
+    assert finalize.await_args.kwargs["trait_state"] == session.state["trait_state"]
+
+
+def test_transformation_instruction_includes_weighted_totals():
+    from app.api.quest_prompts import build_transformation_instruction
+
+    totals = TraitAccumulator.from_analytics("mbti", enumerate(ANALYTICS)).aggregated()
+    instruction = build_transformation_instruction("mbti", ANALYTICS, totals)
+
+    assert '維度加權總分：{"E": 0.3, "I": 0.78' in instruction
+    assert "維度加權總分" not in build_transformation_instruction("mbti", ANALYTICS)
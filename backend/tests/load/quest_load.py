@@ -0,0 +1,289 @@
+"""
+Quest WebSocket 負載測試
+
+模擬多位玩家同時透過 `/v1/quests/ws` 完成整個測驗流程：
+start_quest → N 次 submit_answer → request_result，
+統計各事件類型的 p50 / p95 / p99 延遲、錯誤數與吞吐量。
+
+建議搭配 Fake LLM Server，排除真實模型的成本與不穩定性：
+    # 1. 啟動 Fake LLM（可調整各 Agent 的延遲分佈）
+    uv run python -m tests.mocks.fake_llm_server --port 9100
+
+    # 2. 後端指向 Fake LLM
+    LITELLM_PROXY_URL=http://127.0.0.1:9100 LLM_MODEL=openai/fake-model \\
+        uv run uvicorn app.main:app --port 8000
+
+    # 3. 建立測試玩家並執行負載
+    uv run python -m tests.load.quest_load --players 50 --ramp 10 --seed-users
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import websockets
+
+from app.core.security import create_access_token
+
+LOADTEST_EMAIL_DOMAIN = "loadtest.traitquest.local"
+RESPONSE_EVENTS = {"next_question", "quest_complete", "final_result", "error"}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近排名法百分位數"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+@dataclass
+class LoadStats:
+    """負載測試統計結果"""
+
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    completed_quests: int = 0
+    failed_quests: int = 0
+    elapsed: float = 0.0
+
+    def record(self, event: str, seconds: float) -> None:
+        self.latencies[event].append(seconds)
+
+    def record_error(self, event: str) -> None:
+        self.errors[event] += 1
+
+    def summary(self) -> dict:
+        events = {}
+        for event, values in self.latencies.items():
+            events[event] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": max(values) * 1000,
+                "mean_ms": statistics.fmean(values) * 1000,
+            }
+        total_events = sum(len(v) for v in self.latencies.values())
+        return {
+            "elapsed_s": self.elapsed,
+            "completed_quests": self.completed_quests,
+            "failed_quests": self.failed_quests,
+            "quests_per_min": (
+                self.completed_quests / self.elapsed * 60 if self.elapsed else 0.0
+            ),
+            "events_per_s": total_events / self.elapsed if self.elapsed else 0.0,
+            "events": events,
+            "errors": dict(self.errors),
+        }
+
+
+class QuestPlayer:
+    """單一模擬玩家：以一條 WebSocket 連線完成一次完整測驗"""
+
+    def __init__(
+        self,
+        base_url: str,
+        user_id: str,
+        quest_id: str,
+        stats: LoadStats,
+        think_time: float = 0.0,
+        timeout: float = 120.0,
+        rng: Optional[random.Random] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.user_id = user_id
+        self.quest_id = quest_id
+        self.stats = stats
+        self.think_time = think_time
+        self.timeout = timeout
+        self.rng = rng or random.Random()
+        self.session_id = str(uuid.uuid4())
+
+    async def _request(self, ws, event: str, data: dict) -> dict:
+        """送出事件並等待對應的回應事件，記錄往返延遲"""
+        started = time.perf_counter()
+        await ws.send(json.dumps({"event": event, "data": data}))
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), timeout=self.timeout)
+            message = json.loads(raw)
+            if message.get("event") in RESPONSE_EVENTS:
+                break
+        if message["event"] == "error":
+            self.stats.record_error(event)
+            raise RuntimeError(message.get("data", {}).get("message", "error"))
+        self.stats.record(event, time.perf_counter() - started)
+        return message
+
+    async def _think(self) -> None:
+        if self.think_time > 0:
+            await asyncio.sleep(self.rng.uniform(0, self.think_time * 2))
+
+    async def run(self) -> None:
+        token = create_access_token({"sub": self.user_id})
+        url = f"{self.base_url}/v1/quests/ws?sessionId={self.session_id}"
+        try:
+            async with websockets.connect(
+                url, subprotocols=["Bearer", token], open_timeout=self.timeout
+            ) as ws:
+                message = await self._request(
+                    ws, "start_quest", {"questId": self.quest_id}
+                )
+                question_index = 0
+                while message["event"] == "next_question":
+                    await self._think()
+                    options = (
+                        message.get("data", {}).get("question", {}).get("options")
+                        or ["A"]
+                    )
+                    option = self.rng.choice(options)
+                    answer = option.get("text") if isinstance(option, dict) else option
+                    message = await self._request(
+                        ws,
+                        "submit_answer",
+                        {"answer": answer, "questionIndex": question_index},
+                    )
+                    question_index += 1
+
+                await self._request(ws, "request_result", {})
+            self.stats.completed_quests += 1
+        except Exception as e:
+            self.stats.failed_quests += 1
+            self.stats.record_error(type(e).__name__)
+
+
+async def seed_load_users(count: int) -> List[str]:
+    """建立（或沿用）負載測試專用玩家，回傳 user id 清單"""
+    from sqlalchemy import select
+
+    from app.db.models import User
+    from app.db.session import AsyncSessionLocal
+
+    user_ids = []
+    async with AsyncSessionLocal() as db:
+        for i in range(count):
+            email = f"player{i:04d}@{LOADTEST_EMAIL_DOMAIN}"
+            user = (
+                await db.execute(select(User).where(User.email == email))
+            ).scalar_one_or_none()
+            if user is None:
+                user = User(
+                    google_id=f"loadtest-{i:04d}",
+                    email=email,
+                    display_name=f"LoadTester{i:04d}",
+                    level=1,
+                    exp=0,
+                )
+                db.add(user)
+                await db.flush()
+            user_ids.append(str(user.id))
+        await db.commit()
+    return user_ids
+
+
+async def run_load(
+    base_url: str,
+    user_ids: List[str],
+    quest_id: str,
+    ramp: float = 0.0,
+    think_time: float = 0.0,
+    timeout: float = 120.0,
+    seed: Optional[int] = None,
+) -> LoadStats:
+    """
+    執行負載測試
+
+    Args:
+        base_url: 後端 WebSocket 位址，例如 ws://127.0.0.1:8000
+        user_ids: 每位模擬玩家使用的 user id
+        quest_id: 測驗類型
+        ramp: 在幾秒內逐步啟動所有玩家
+        think_time: 每題平均思考時間（秒）
+    """
+    stats = LoadStats()
+    rng = random.Random(seed)
+    interval = ramp / len(user_ids) if user_ids else 0.0
+
+    async def start_player(index: int, user_id: str):
+        await asyncio.sleep(index * interval)
+        player = QuestPlayer(
+            base_url,
+            user_id,
+            quest_id,
+            stats,
+            think_time=think_time,
+            timeout=timeout,
+            rng=random.Random(rng.random()),
+        )
+        await player.run()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(start_player(i, uid) for i, uid in enumerate(user_ids)))
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def format_report(summary: dict) -> str:
+    lines = [
+        "=" * 78,
+        f"完成 {summary['completed_quests']} 場測驗，失敗 {summary['failed_quests']} 場，"
+        f"耗時 {summary['elapsed_s']:.1f}s",
+        f"吞吐量：{summary['quests_per_min']:.1f} 場/分鐘，{summary['events_per_s']:.2f} 事件/秒",
+        "=" * 78,
+        f"{'事件':<16}{'次數':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)",
+    ]
+    for event, row in summary["events"].items():
+        lines.append(
+            f"{event:<16}{row['count']:>8}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}"
+            f"{row['p99_ms']:>10.0f}{row['max_ms']:>10.0f}"
+        )
+    if summary["errors"]:
+        lines.append(f"錯誤：{summary['errors']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quest WebSocket 負載測試")
+    parser.add_argument("--base-url", default="ws://127.0.0.1:8000")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--ramp", type=float, default=0.0, help="啟動所有玩家的秒數")
+    parser.add_argument("--quest", default="mbti")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--seed-users", action="store_true", help="於資料庫建立負載測試玩家"
+    )
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args()
+
+    async def _run():
+        if args.seed_users:
+            user_ids = await seed_load_users(args.players)
+        else:
+            user_ids = [str(uuid.uuid4()) for _ in range(args.players)]
+        stats = await run_load(
+            args.base_url,
+            user_ids,
+            args.quest,
+            ramp=args.ramp,
+            think_time=args.think_time,
+            timeout=args.timeout,
+            seed=args.seed,
+        )
+        return stats.summary()
+
+    summary = asyncio.run(_run())
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+負載測試工具本身的測試：Fake LLM Server 回應、延遲分佈、百分位統計與模擬玩家流程
+"""
+
+import json
+import random
+
+import litellm
+import pytest
+import websockets
+from fastapi.testclient import TestClient
+
+from tests.load.quest_load import LoadStats, percentile, run_load
+from tests.mocks.fake_llm_server import (
+    LatencyDistribution,
+    LatencyModel,
+    build_completion,
+    create_app,
+    fake_model,
+)
+
+
+def _tool(name: str) -> dict:
+    return {"type": "function", "function": {"name": name, "parameters": {}}}
+
+
+def _tool_call(response: dict) -> dict:
+    return response["choices"][0]["message"]["tool_calls"][0]["function"]
+
+
+def test_fake_llm_picks_tool_by_agent():
+    client = TestClient(create_app())
+    body = {
+        "model": "fake-model",
+        "messages": [{"role": "user", "content": "請生成下一題"}],
+        "tools": [_tool("submit_question"), _tool("complete_trial")],
+    }
+
+    response = client.post("/v1/chat/completions", json=body).json()
+    call = _tool_call(response)
+    assert call["name"] == "submit_question"
+    assert len(json.loads(call["arguments"])["options"]) == 5
+    assert response["usage"]["total_tokens"] > 0
+
+    body["messages"][0]["content"] = "試煉已達上限，請務必使用 complete_trial 工具結束測驗"
+    response = client.post("/chat/completions", json=body).json()
+    assert _tool_call(response)["name"] == "complete_trial"
+    assert client.get("/stats").json() == {"questionnaire:tool_call": 2}
+
+
+def test_fake_llm_transformation_matches_quest_type():
+    response, agent, _ = build_completion(
+        {
+            "messages": [{"role": "user", "content": "當前測驗類型：disc\n累積心理數據：[]"}],
+            "tools": [_tool("submit_transformation")],
+        }
+    )
+    arguments = json.loads(_tool_call(response)["arguments"])
+    assert agent == "transformation"
+    assert arguments["stance_id"] == "STN_D"
+    assert "class_id" not in arguments
+
+
+def test_fake_llm_ends_turn_after_tool_response():
+    response, agent, followup = build_completion(
+        {
+            "messages": [
+                {"role": "user", "content": "分析"},
+                {"role": "tool", "tool_call_id": "call_1", "content": "{}"},
+            ],
+            "tools": [_tool("submit_analysis")],
+        }
+    )
+    assert (agent, followup) == ("analytics", True)
+    assert response["choices"][0]["finish_reason"] == "stop"
+
+
+def test_latency_distributions():
+    rng = random.Random(0)
+    assert LatencyDistribution.parse("fixed:0.2").sample(rng) == 0.2
+    assert 1.0 <= LatencyDistribution.parse("uniform:1:2").sample(rng) <= 2.0
+    assert LatencyDistribution.parse("lognormal:1.5:0.4").sample(rng) > 0
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("gamma:1")
+
+    model = LatencyModel(
+        per_agent={"analytics": LatencyDistribution.parse("fixed:2")},
+        followup_factor=0.25,
+    )
+    assert model.delay_for("analytics", followup=False) == 2
+    assert model.delay_for("analytics", followup=True) == 0.5
+    assert model.delay_for("summary", followup=False) == 0
+
+
+def test_percentile_and_summary():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+    stats = LoadStats(elapsed=2.0, completed_quests=4)
+    for value in values:
+        stats.record("submit_answer", value)
+    summary = stats.summary()
+    assert summary["events"]["submit_answer"]["p95_ms"] == pytest.approx(95)
+    assert summary["quests_per_min"] == 120
+    assert summary["events_per_s"] == 50
+
+
+@pytest.mark.asyncio
+async def test_adk_agent_runs_against_fake_llm(fake_llm):
+    """真實 ADK Agent 經由 LiteLLM 呼叫 Fake LLM，工具輸出寫入 Session state"""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    from app.agents.analytics import create_analytics_agent
+
+    try:
+        agent = fake_model(create_analytics_agent())
+        sessions = InMemorySessionService()
+        await sessions.create_session(app_name="load", user_id="u1", session_id="s1")
+        runner = Runner(agent=agent, app_name="load", session_service=sessions)
+        message = types.Content(
+            role="user", parts=[types.Part(text="測驗範疇：bigfive\n玩家回答：A")]
+        )
+        async for _ in runner.run_async(
+            user_id="u1", session_id="s1", new_message=message
+        ):
+            pass
+
+        session = await sessions.get_session(
+            app_name="load", user_id="u1", session_id="s1"
+        )
+        output = session.state["analytics_output"]
+        assert "Openness" in output["trait_deltas"]
+    finally:
+        await litellm.aclient_session.aclose()
+
+
+async def _fake_quest_ws(connection):
+    """以最小協定模擬 /v1/quests/ws：兩題後結束"""
+    async for raw in connection:
+        message = json.loads(raw)
+        event = message["event"]
+        if event == "start_quest":
+            reply = {"event": "next_question", "data": {"question": {"options": ["A"]}}}
+        elif event == "submit_answer":
+            done = message["data"]["questionIndex"] >= 1
+            reply = (
+                {"event": "quest_complete", "data": {}}
+                if done
+                else {"event": "next_question", "data": {"question": {"options": ["B"]}}}
+            )
+        else:
+            reply = {"event": "final_result", "data": {}}
+        await connection.send(json.dumps(reply))
+
+
+@pytest.mark.asyncio
+async def test_players_complete_full_flow():
+    async with websockets.serve(
+        _fake_quest_ws, "127.0.0.1", 0, subprotocols=["Bearer"]
+    ) as server:
+        port = server.sockets[0].getsockname()[1]
+        stats = await run_load(
+            f"ws://127.0.0.1:{port}",
+            ["00000000-0000-0000-0000-000000000001"] * 3,
+            "mbti",
+            seed=1,
+        )
+
+    summary = stats.summary()
+    assert summary["completed_quests"] == 3
+    assert summary["failed_quests"] == 0
+    assert summary["events"]["start_quest"]["count"] == 3
+    assert summary["events"]["submit_answer"]["count"] == 6
+    assert summary["events"]["request_result"]["count"] == 3
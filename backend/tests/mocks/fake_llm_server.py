@@ -0,0 +1,347 @@
+"""
+Fake LLM Server（OpenAI 相容，用於負載測試）
+
+模擬 LiteLLM Proxy 的 `/chat/completions`，依請求中的 tools 判斷是哪個 Agent，
+回傳該 Agent 預期的工具呼叫（submit_question / complete_trial / submit_analysis /
+submit_transformation / submit_summary）；收到工具回應後回傳簡短文字結束該輪。
+每次回應前依 Agent 的延遲分佈 sleep，模擬真實 LLM 的耗時。
+
+使用方式（後端以環境變數指向此伺服器）：
+    uv run python -m tests.mocks.fake_llm_server --port 9100 \\
+        --latency questionnaire=lognormal:1.5:0.4 --latency analytics=uniform:0.5:1.5
+
+    LITELLM_PROXY_URL=http://127.0.0.1:9100 LLM_MODEL=openai/fake-model \\
+        uv run uvicorn app.main:app --port 8000
+
+延遲分佈格式：
+    fixed:<秒>                 固定延遲
+    uniform:<最小>:<最大>       均勻分佈
+    lognormal:<中位數>:<sigma>  對數常態（長尾，較接近真實 LLM）
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+
+# 依工具名稱判斷 Agent
+TOOL_AGENTS = {
+    "submit_question": "questionnaire",
+    "complete_trial": "questionnaire",
+    "submit_analysis": "analytics",
+    "submit_transformation": "transformation",
+    "submit_summary": "summary",
+}
+
+DESTINY_GUIDE = {
+    "daily": "今日宜靜心觀察。",
+    "main": "完成一件拖延已久的任務。",
+    "side": "與一位老朋友聯繫。",
+    "oracle": "星辰指引你前行。",
+}
+DESTINY_BONDS = {
+    "compatible": [
+        {
+            "class_id": "CLS_ENFP",
+            "class_name": "元素召喚師",
+            "sync_rate": 85,
+            "advantage": "互補",
+        }
+    ],
+    "conflicting": [
+        {
+            "class_id": "CLS_ESTJ",
+            "class_name": "秩序騎士",
+            "risk_level": "中",
+            "friction_reason": "步調不同",
+        }
+    ],
+}
+
+TRAIT_DELTAS = {
+    "mbti": {"I": 0.4, "N": 0.3, "T": 0.2, "J": 0.1},
+    "bigfive": {"Openness": 0.4, "Conscientiousness": 0.2},
+    "enneagram": {"Type5": 0.4, "Type1": 0.1},
+    "disc": {"D": 0.3, "C": 0.2},
+    "gallup": {"ACH": 0.4, "STR": 0.3, "LEA": 0.2},
+}
+
+
+@dataclass
+class LatencyDistribution:
+    """單一延遲分佈（秒）"""
+
+    kind: str = "fixed"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, *raw = spec.split(":")
+        params = [float(p) for p in raw]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        return cls(kind=kind, params=params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        median, sigma = self.params
+        if median <= 0:
+            return 0.0
+        return rng.lognormvariate(0.0, sigma) * median
+
+
+@dataclass
+class LatencyModel:
+    """
+    各 Agent 的延遲設定
+
+    Attributes:
+        per_agent: Agent 名稱 -> 延遲分佈，未設定者使用 default
+        followup_factor: 工具回應後「收尾」那一輪的延遲倍率（通常遠短於產生工具呼叫）
+    """
+
+    default: LatencyDistribution = field(default_factory=LatencyDistribution)
+    per_agent: Dict[str, LatencyDistribution] = field(default_factory=dict)
+    followup_factor: float = 0.3
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def delay_for(self, agent: str, followup: bool) -> float:
+        delay = self.per_agent.get(agent, self.default).sample(self._rng)
+        return delay * self.followup_factor if followup else delay
+
+
+def _last_text(messages: List[dict], role: str) -> str:
+    for message in reversed(messages):
+        if message.get("role") == role:
+            content = message.get("content")
+            if isinstance(content, list):
+                return " ".join(
+                    part.get("text", "") for part in content if isinstance(part, dict)
+                )
+            return content or ""
+    return ""
+
+
+def _quest_type(messages: List[dict]) -> str:
+    match = re.search(r"當前測驗類型：(\w+)", _last_text(messages, "user"))
+    return match.group(1) if match else "mbti"
+
+
+def build_tool_arguments(tool_name: str, messages: List[dict]) -> Dict[str, Any]:
+    """依工具名稱產生合法參數"""
+    if tool_name == "submit_question":
+        return {
+            "narrative": "迷霧中浮現一座古老的石門。",
+            "question_text": "面對未知的石門，你會怎麼做？",
+            "options": ["立刻推開", "先觀察四周", "詢問同伴", "記錄線索", "轉身離開"],
+            "type": "QUANTITATIVE",
+            "guide_message": "相信直覺",
+        }
+    if tool_name == "complete_trial":
+        return {"final_message": "你已通過所有試煉，靈魂即將覺醒。"}
+    if tool_name == "submit_analysis":
+        quest_type = _quest_type(messages)
+        match = re.search(r"測驗範疇：(\w+)", _last_text(messages, "user"))
+        if match:
+            quest_type = match.group(1)
+        return {
+            "quality_score": 1.4,
+            "trait_deltas": TRAIT_DELTAS.get(quest_type, TRAIT_DELTAS["mbti"]),
+            "analysis_reason": "回答呈現穩定的性格傾向。",
+        }
+    if tool_name == "submit_summary":
+        return {"hero_chronicle": "這位冒險者在試煉中展現了沉著與好奇。"}
+    if tool_name == "submit_transformation":
+        quest_type = _quest_type(messages)
+        common = {"destiny_guide": DESTINY_GUIDE, "destiny_bonds": DESTINY_BONDS}
+        per_quest = {
+            "mbti": {
+                "class_id": "CLS_INTJ",
+                "hero_class": {"id": "CLS_INTJ", "name": "戰略法師", "description": "獨立"},
+            },
+            "enneagram": {
+                "race_id": "RACE_5",
+                "race": {"id": "RACE_5", "name": "智者族", "description": "渴求知識"},
+            },
+            "bigfive": {
+                "stats": {"STA_O": 80, "STA_C": 60, "STA_E": 40, "STA_A": 55, "STA_N": 30}
+            },
+            "disc": {
+                "stance_id": "STN_D",
+                "stance": {"id": "STN_D", "origin": "D", "name": "烈焰", "description": "果斷"},
+            },
+            "gallup": {
+                "talent_ids": ["TAL_ACH", "TAL_STR", "TAL_LEA", "TAL_FUT", "TAL_EMP", "TAL_ANA"],
+                "talents": [{"id": "TAL_ACH", "name": "成就", "description": "勤奮"}],
+            },
+        }
+        return {**per_quest.get(quest_type, per_quest["mbti"]), **common}
+    return {}
+
+
+def choose_tool(tool_names: List[str], messages: List[dict]) -> Optional[str]:
+    """選出本輪要呼叫的工具（Questionnaire 在指令要求時結束試煉）"""
+    if "submit_question" in tool_names:
+        if "complete_trial" in tool_names and "complete_trial" in _last_text(
+            messages, "user"
+        ):
+            return "complete_trial"
+        return "submit_question"
+    for name in tool_names:
+        if name in TOOL_AGENTS:
+            return name
+    return tool_names[0] if tool_names else None
+
+
+def _estimate_tokens(messages: List[dict]) -> int:
+    return max(1, len(json.dumps(messages, ensure_ascii=False)) // 2)
+
+
+def build_completion(body: dict) -> tuple[dict, str, bool]:
+    """
+    依 OpenAI chat completion 請求產生回應
+
+    Returns:
+        (response, agent, followup)：回應內容、判定的 Agent、是否為工具回應後的收尾輪
+    """
+    messages = body.get("messages", [])
+    tool_names = [
+        tool.get("function", {}).get("name") for tool in body.get("tools") or []
+    ]
+    tool_name = choose_tool(tool_names, messages)
+    agent = TOOL_AGENTS.get(tool_name, "default")
+    followup = bool(messages) and messages[-1].get("role") == "tool"
+
+    if followup or tool_name is None:
+        message = {"role": "assistant", "content": "已完成。"}
+        finish_reason = "stop"
+    else:
+        arguments = build_tool_arguments(tool_name, messages)
+        message = {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {
+                        "name": tool_name,
+                        "arguments": json.dumps(arguments, ensure_ascii=False),
+                    },
+                }
+            ],
+        }
+        finish_reason = "tool_calls"
+
+    prompt_tokens = _estimate_tokens(messages)
+    completion_tokens = _estimate_tokens([message])
+    response = {
+        "id": f"chatcmpl-fake-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake-model"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+    return response, agent, followup
+
+
+def create_app(latency: Optional[LatencyModel] = None) -> FastAPI:
+    latency = latency or LatencyModel()
+    app = FastAPI(title="Fake LLM Server")
+    app.state.calls = {}
+    # 每次請求的 prompt 大小（供測試檢查 prompt 是否隨題數成長）
+    app.state.requests = []
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        response, agent, followup = build_completion(body)
+        key = f"{agent}:{'followup' if followup else 'tool_call'}"
+        app.state.calls[key] = app.state.calls.get(key, 0) + 1
+        app.state.requests.append(
+            {
+                "agent": agent,
+                "followup": followup,
+                "messages": len(body.get("messages", [])),
+                "prompt_tokens": response["usage"]["prompt_tokens"],
+            }
+        )
+        await asyncio.sleep(latency.delay_for(agent, followup))
+        return response
+
+    app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.calls
+
+    return app
+
+
+def fake_model(agent):
+    """將 Agent 的模型換成送往本伺服器的 LiteLlm（測試搭配 conftest 的 fake_llm fixture）"""
+    from google.adk.models.lite_llm import LiteLlm
+
+    agent.model = LiteLlm(
+        model="openai/fake-model", api_base="http://fake-llm", api_key="sk-fake"
+    )
+    return agent
+
+
+def parse_latency_args(specs: List[str], default: str, followup: float, seed=None):
+    per_agent = {}
+    for spec in specs:
+        agent, _, dist = spec.partition("=")
+        per_agent[agent] = LatencyDistribution.parse(dist)
+    return LatencyModel(
+        default=LatencyDistribution.parse(default),
+        per_agent=per_agent,
+        followup_factor=followup,
+        seed=seed,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI 相容的 Fake LLM Server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--default-latency", default="lognormal:1.0:0.5")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        help="<agent>=<spec>，agent 為 questionnaire / analytics / transformation / summary",
+    )
+    parser.add_argument("--followup-factor", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    latency = parse_latency_args(
+        args.latency, args.default_latency, args.followup_factor, args.seed
+    )
+    uvicorn.run(create_app(latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Redis Mock（用於測試環境）
+
+以 dict 模擬 `app.core.redis_client.RedisClient` 的通用 get / set / delete、Hash、List、Sorted Set 與 Pub/Sub 操作，
+可取代 CacheService 等模組中的 redis_client，測試不需真的 Redis。
+多個元件共用同一個 InMemoryRedis 即可模擬多個 Worker 透過 Redis 溝通。
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Union
+
+
+class InMemoryPubSub:
+    """單一頻道訂閱；listen() 只產生 message 類型的訊息"""
+
+    def __init__(self, broker: "InMemoryRedis", channel: str):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self) -> None:
+        subscribers = self.broker.subscribers.get(self.channel, [])
+        if self in subscribers:
+            subscribers.remove(self)
+
+
+class InMemoryRedis:
+    """以 dict 保存字串、Hash、List 與 Sorted Set 的 Redis 替身（忽略 TTL）"""
+
+    def __init__(self):
+        self.data: Dict[
+            str, Union[str, Dict[str, str], List[str], Dict[str, float]]
+        ] = {}
+        self.subscribers: Dict[str, List[InMemoryPubSub]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.data.get(key)
+
+    async def set(
+        self, key: str, value: str, ex: Optional[int] = None, nx: bool = False
+    ) -> bool:
+        if nx and key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    async def getdel(self, key: str) -> Optional[str]:
+        return self.data.pop(key, None)
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        if self.data.get(key) != value:
+            return False
+        del self.data[key]
+        return True
+
+    async def hset(self, key: str, field: str, value: str, ex: Optional[int] = None):
+        self.data.setdefault(key, {})[field] = value
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self.data.get(key, {}))
+
+    async def lpush(self, key: str, value: str) -> int:
+        items = self.data.setdefault(key, [])
+        items.insert(0, value)
+        return len(items)
+
+    async def lmove(self, source: str, destination: str) -> Optional[str]:
+        items = self.data.get(source)
+        if not items:
+            return None
+        value = items.pop()
+        self.data.setdefault(destination, []).insert(0, value)
+        return value
+
+    async def blmove(
+        self, source: str, destination: str, timeout: float
+    ) -> Optional[str]:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            value = await self.lmove(source, destination)
+            if value is not None or asyncio.get_running_loop().time() >= deadline:
+                return value
+            await asyncio.sleep(0.01)
+
+    async def lrem(self, key: str, value: str) -> int:
+        items = self.data.get(key, [])
+        removed = items.count(value)
+        self.data[key] = [item for item in items if item != value]
+        return removed
+
+    async def zadd(self, key: str, member: str, score: float) -> int:
+        members = self.data.setdefault(key, {})
+        added = member not in members
+        members[member] = score
+        return int(added)
+
+    async def promote_due(
+        self, source: str, destination: str, max_score: float, limit: int = 100
+    ) -> int:
+        members = self.data.get(source, {})
+        due = sorted(
+            (score, member) for member, score in members.items() if score <= max_score
+        )[:limit]
+        for _, member in due:
+            del members[member]
+            await self.lpush(destination, member)
+        return len(due)
+
+    async def publish(self, channel: str, message: str) -> int:
+        subscribers = self.subscribers.get(channel, [])
+        for pubsub in subscribers:
+            pubsub.queue.put_nowait(
+                {"type": "message", "channel": channel, "data": message}
+            )
+        return len(subscribers)
+
+    async def subscribe(self, channel: str) -> InMemoryPubSub:
+        pubsub = InMemoryPubSub(self, channel)
+        self.subscribers.setdefault(channel, []).append(pubsub)
+        return pubsub
@@ -0,0 +1,162 @@
+"""
+結算工作佇列測試：冪等排入、並行執行、延遲重試、失敗通知與重啟回收
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.job_queue import (
+    DELAYED_QUEUE,
+    FINALIZE_QUEUE,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_QUEUED,
+    FinalizeJobQueue,
+)
+from tests.mocks.redis_mock import InMemoryRedis
+
+PAYLOAD = {"session_id": "s1", "quest_id": "mbti", "user_id": "u1"}
+REPORT = {"class_id": "CLS_INTJ"}
+
+
+@pytest.fixture
+def redis():
+    fake = InMemoryRedis()
+    with patch("app.services.job_queue.redis_client", fake):
+        yield fake
+
+
+@pytest.fixture
+def queue():
+    return FinalizeJobQueue(worker_id="w1")
+
+
+async def _run_once(redis, queue, handler, notify):
+    """模擬 Worker 取出一個工作並執行"""
+    raw = await redis.lmove(FINALIZE_QUEUE, queue.processing_key)
+    await queue.process(raw, handler, notify)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_per_session(redis, queue):
+    assert await queue.enqueue("u1", "s1", PAYLOAD) == JOB_QUEUED
+    assert await queue.enqueue("u1", "s1", PAYLOAD) == JOB_QUEUED
+    assert len(redis.data[FINALIZE_QUEUE]) == 1
+
+
+@pytest.mark.asyncio
+async def test_process_stores_result_and_notifies(redis, queue):
+    handler = AsyncMock(return_value=REPORT)
+    notify = AsyncMock()
+    await queue.enqueue("u1", "s1", PAYLOAD)
+
+    await _run_once(redis, queue, handler, notify)
+
+    handler.assert_awaited_once_with(**PAYLOAD)
+    notify.assert_awaited_once_with("s1", "final_result", REPORT)
+    assert await queue.get_result("u1", "s1") == REPORT
+    assert redis.data["job:finalize:u1:s1"] == JOB_DONE
+    assert redis.data[queue.processing_key] == []
+    # 完成後重送 request_result 不會再排入
+    assert await queue.enqueue("u1", "s1", PAYLOAD) == JOB_DONE
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_reported(redis, queue):
+    handler = AsyncMock(side_effect=RuntimeError("LLM down"))
+    notify = AsyncMock()
+    await queue.enqueue("u1", "s1", PAYLOAD)
+
+    with patch("app.services.job_queue.settings.JOB_MAX_ATTEMPTS", 2):
+        await _run_once(redis, queue, handler, notify)
+        # 重試寫入延遲佇列，未到期前不會移回佇列
+        assert redis.data[FINALIZE_QUEUE] == []
+        (raw, due), = redis.data[DELAYED_QUEUE].items()
+        assert json.loads(raw)["attempts"] == 1
+        assert await queue.promote_due(now=due - 0.1) == 0
+        assert await queue.promote_due(now=due) == 1
+        assert redis.data[DELAYED_QUEUE] == {}
+        notify.assert_not_called()
+
+        await _run_once(redis, queue, handler, notify)
+
+    assert handler.await_count == 2
+    assert redis.data["job:finalize:u1:s1"] == JOB_FAILED
+    assert redis.data[FINALIZE_QUEUE] == []
+    assert redis.data[DELAYED_QUEUE] == {}
+    notify.assert_awaited_once()
+    assert notify.await_args.args[1] == "error"
+    # 失敗後可再次排入
+    assert await queue.enqueue("u1", "s1", PAYLOAD) == JOB_QUEUED
+
+
+@pytest.mark.asyncio
+async def test_job_result_is_scoped_to_its_player(redis, queue):
+    await queue.enqueue("u1", "s1", PAYLOAD)
+    await _run_once(redis, queue, AsyncMock(return_value=REPORT), AsyncMock())
+
+    # 他人以同一個 sessionId 請求時不會取得結果，也不會被視為已完成
+    assert await queue.get_result("u2", "s1") is None
+    assert await queue.enqueue("u2", "s1", {**PAYLOAD, "user_id": "u2"}) == JOB_QUEUED
+
+
+@pytest.mark.asyncio
+async def test_recover_requeues_unfinished_jobs(redis, queue):
+    await queue.enqueue("u1", "s1", PAYLOAD)
+    await redis.lmove(FINALIZE_QUEUE, queue.processing_key)
+    assert redis.data[FINALIZE_QUEUE] == []
+
+    assert await queue.recover() == 1
+    assert len(redis.data[FINALIZE_QUEUE]) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_stops_on_event(redis, queue):
+    handler = AsyncMock(return_value=REPORT)
+    notify = AsyncMock()
+    stop = asyncio.Event()
+    await queue.enqueue("u1", "s1", PAYLOAD)
+
+    worker = asyncio.create_task(queue.run(handler, notify, stop, poll_timeout=0.01))
+    while not notify.await_count:
+        await asyncio.sleep(0.01)
+    stop.set()
+    await asyncio.wait_for(worker, timeout=1)
+
+    notify.assert_awaited_once_with("s1", "final_result", REPORT)
+
+
+@pytest.mark.asyncio
+async def test_run_executes_jobs_concurrently(redis, queue):
+    started = []
+    release = asyncio.Event()
+
+    async def handler(session_id, **_):
+        started.append(session_id)
+        await release.wait()
+        return REPORT
+
+    notify = AsyncMock()
+    stop = asyncio.Event()
+    for session_id in ("s1", "s2", "s3"):
+        await queue.enqueue("u1", session_id, {**PAYLOAD, "session_id": session_id})
+
+    worker = asyncio.create_task(
+        queue.run(handler, notify, stop, poll_timeout=0.01, concurrency=2)
+    )
+    while len(started) < 2:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    # 名額用完時第三個工作留在佇列
+    assert len(started) == 2
+    assert len(redis.data[FINALIZE_QUEUE]) == 1
+
+    release.set()
+    while notify.await_count < 3:
+        await asyncio.sleep(0.01)
+    stop.set()
+    await asyncio.wait_for(worker, timeout=1)
+    assert sorted(started) == ["s1", "s2", "s3"]
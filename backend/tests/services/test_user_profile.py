@@ -0,0 +1,47 @@
+"""
+玩家檔案 write-through 快取測試
+"""
+
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.cache_service import CacheService
+from tests.mocks.redis_mock import InMemoryRedis
+
+USER_ID = "11111111-1111-1111-1111-111111111111"
+PROFILE = {"userId": USER_ID, "level": 3, "exp": 650, "syncPercent": 20}
+
+
+@pytest.fixture
+def redis():
+    fake = InMemoryRedis()
+    with patch("app.services.cache_service.redis_client", fake):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_refresh_writes_new_profile(redis):
+    from app.services.user_profile import refresh_user_profile_cache
+
+    await CacheService.set_user_profile(USER_ID, {"userId": USER_ID, "level": 1})
+    build = AsyncMock(return_value=PROFILE)
+    db = object()
+    with patch("app.services.user_profile.build_user_profile", build):
+        assert await refresh_user_profile_cache(db, USER_ID) == PROFILE
+
+    build.assert_awaited_once_with(db, uuid.UUID(USER_ID))
+    assert await CacheService.get_user_profile(USER_ID) == PROFILE
+
+
+@pytest.mark.asyncio
+async def test_refresh_failure_invalidates_stale_profile(redis):
+    from app.services.user_profile import refresh_user_profile_cache
+
+    await CacheService.set_user_profile(USER_ID, {"userId": USER_ID, "level": 1})
+    build = AsyncMock(side_effect=RuntimeError("db down"))
+    with patch("app.services.user_profile.build_user_profile", build):
+        assert await refresh_user_profile_cache(object(), USER_ID) is None
+
+    assert await CacheService.get_user_profile(USER_ID) is None
@@ -21,6 +21,7 @@ interface QuestEvents {
   next_question: QuestUpdateData;
   quest_complete: { message: string };
   final_result: FinalResult;
+  result_queued: { sessionId: string; status: string };
   error: QuestError;
   guide_message: { message: string };
 }
@@ -30,11 +31,17 @@ interface QuestWebSocketMessage {
   data: QuestEvents[keyof QuestEvents];
 }
 
+const MAX_RECONNECT_ATTEMPTS = 3;
+const RECONNECT_BASE_DELAY_MS = 1000;
+
 class QuestWebSocketClient {
   private socket: WebSocket | null = null;
   private callbacks: Map<keyof QuestEvents, EventCallback[]> = new Map();
 
   private baseUrl: string;
+  private sessionId: string | null = null;
+  private token: string | null = null;
+  private reconnectAttempts = 0;
 
   constructor() {
     this.baseUrl =
@@ -42,15 +49,19 @@ class QuestWebSocketClient {
   }
 
   connect(sessionId: string, token: string): Promise<void> {
+    this.sessionId = sessionId;
+    this.token = token;
     return new Promise((resolve, reject) => {
       const url = `${this.baseUrl}?sessionId=${sessionId}`;
-      this.socket = new WebSocket(url, ["Bearer", token]);
+      const socket = new WebSocket(url, ["Bearer", token]);
+      this.socket = socket;
 
-      this.socket.onopen = () => {
+      socket.onopen = () => {
+        this.reconnectAttempts = 0;
         resolve();
       };
 
-      this.socket.onmessage = (event: MessageEvent) => {
+      socket.onmessage = (event: MessageEvent) => {
         try {
           const message = JSON.parse(event.data) as QuestWebSocketMessage;
           const { event: eventName, data } = message;
@@ -60,15 +71,40 @@ class QuestWebSocketClient {
         }
       };
 
-      this.socket.onerror = (error) => {
+      socket.onerror = (error) => {
         console.error("WebSocket Error:", error);
         reject(error);
       };
 
-      this.socket.onclose = () => {};
+      socket.onclose = () => {
+        // 非主動斷線：以同一個 sessionId 重連並要求伺服器從存檔續玩
+        if (this.socket === socket) {
+          this.scheduleReconnect();
+        }
+      };
     });
   }
 
+  private scheduleReconnect() {
+    if (!this.sessionId || !this.token) return;
+    if (this.reconnectAttempts >= MAX_RECONNECT_ATTEMPTS) {
+      this.trigger("error", {
+        message: "與心靈伺服器的連線中斷",
+        code: "CONNECTION_LOST",
+      });
+      return;
+    }
+
+    const delay = RECONNECT_BASE_DELAY_MS * 2 ** this.reconnectAttempts;
+    this.reconnectAttempts += 1;
+    setTimeout(() => {
+      if (!this.sessionId || !this.token) return;
+      this.connect(this.sessionId, this.token)
+        .then(() => this.send("resume_quest", {}))
+        .catch(() => {});
+    }, delay);
+  }
+
   on<K extends keyof QuestEvents>(
     event: K,
     callback: EventCallback<QuestEvents[K]>,
@@ -94,9 +130,12 @@ class QuestWebSocketClient {
   }
 
   disconnect() {
+    this.sessionId = null;
+    this.token = null;
     if (this.socket) {
-      this.socket.close();
+      const socket = this.socket;
       this.socket = null;
+      socket.close();
     }
   }
 }